@@ -1,4 +1,3 @@
-import pickle
 import sys
 import os
 import duckdb
@@ -17,6 +16,8 @@ from models.semantic_model import SemanticModel
 from models.report import clsReport
 from models.workspace import Workspace
 from models.dax_tokenizer import DaxTokenizer
+from models.query_cost import QueryCostScorer
+from models.snapshot import SnapshotWriter
 from FabricItemDownloader import FabricItemDownloader
 
 logger = logging.getLogger(__name__)
@@ -240,7 +241,7 @@ class PowerBIImporter:
     
             
 
-    def import_from_powerbi(self, item_id: str = None, destination_path: str = "data", WorkspaceName: str = None, db_name: str = "powerbi", ConnectAndDownload: bool = True):
+    def import_from_powerbi(self, item_id: str = None, destination_path: str = "data", WorkspaceName: str = None, db_name: str = "powerbi", ConnectAndDownload: bool = True, write_snapshots: bool = False):
         """
         Importa todos los modelos semánticos y reports de un workspace de Power BI, identificado por nombre.
         Si WorkspaceName es None, se usará el primer workspace disponible.
@@ -252,6 +253,9 @@ class PowerBIImporter:
             db_name: Nombre de la base de datos DuckDB en carpeta data (default: "powerbi")
             ConnectAndDownload: Si True (default), se conecta a Power BI y descarga.
                                 Si False, solo parsea y persiste archivos ya descargados localmente.
+            write_snapshots: Si True, guarda además un snapshot Parquet por modelo y report
+                             en output/ (en segundo plano). Por defecto se omite: el
+                             catálogo DuckDB ya contiene lo importado.
         """
         ws_name = WorkspaceName or self.workspace_name
         workspace_id = "local"
@@ -323,7 +327,9 @@ class PowerBIImporter:
             logger.info(f"✅ Workspaces guardados en BD")
         
         output_dir = os.path.join("output")
-        os.makedirs(output_dir, exist_ok=True)
+        snapshot_writer = SnapshotWriter(output_dir) if write_snapshots else None
+        if not snapshot_writer:
+            logger.info("⏭️ Snapshots omitidos: el catálogo DuckDB contiene modelos y reportes")
         ws_entry["semantic_models"] = []
         ws_entry["reports"] = []
         
@@ -350,8 +356,8 @@ class PowerBIImporter:
                         semantic_model_obj.load_from_directory(Path(model_base_path))
                         semantic_model_obj.save_to_database(conn)
                         #get_calc_dependencies_paginated(self.fabric_item_downloader, model_id, model_name)
-                        with open(os.path.join(output_dir, f"{workspace_name}__{model_name}__semantic_model.pkl"), "wb") as pf:
-                            pickle.dump(semantic_model_obj, pf)
+                        if snapshot_writer:
+                            snapshot_writer.submit_model(semantic_model_obj, f"{workspace_name}__{model_name}__semantic_model")
                         logger.info(f"✅ Modelo {model_name} procesado correctamente")
                     except Exception as e:
                         logger.error(f"❌ Error parseando/serializando modelo {model_name}: {e}")
@@ -386,8 +392,8 @@ class PowerBIImporter:
                         logger.info(f"✅ Parseando reporte {report_name}...")
                         report_obj = clsReport(report_folder, report_id=report_id, workspace_id=workspace_id, report_name=report_name)
                         report_obj.save_to_database(conn)
-                        with open(os.path.join(output_dir, f"{workspace_name}__{report_name}__report.pkl"), "wb") as pf:
-                            pickle.dump(report_obj, pf)
+                        if snapshot_writer:
+                            snapshot_writer.submit_report(report_obj, f"{workspace_name}__{report_name}__report")
                         logger.info(f"✅ Reporte {report_name} procesado correctamente")
                     except Exception as e:
                         logger.error(f"❌ Error parseando/serializando report {report_name}: {e}")
@@ -444,8 +450,8 @@ class PowerBIImporter:
                         semantic_model_obj = SemanticModel(item_path, semantic_model_id=model_id, workspace_id=workspace_id)
                         semantic_model_obj.load_from_directory(Path(item_path))
                         semantic_model_obj.save_to_database(conn)
-                        with open(os.path.join(output_dir, f"{workspace_name}__{model_name}__semantic_model.pkl"), "wb") as pf:
-                            pickle.dump(semantic_model_obj, pf)
+                        if snapshot_writer:
+                            snapshot_writer.submit_model(semantic_model_obj, f"{workspace_name}__{model_name}__semantic_model")
                         logger.info(f"✅ Modelo {model_name} procesado correctamente")
                     except Exception as e:
                         logger.error(f"❌ Error parseando modelo local {model_name}: {e}")
@@ -459,8 +465,8 @@ class PowerBIImporter:
                     try:
                         report_obj = clsReport(item_path, report_id=report_id, workspace_id=workspace_id, report_name=report_name)
                         report_obj.save_to_database(conn)
-                        with open(os.path.join(output_dir, f"{workspace_name}__{report_name}__report.pkl"), "wb") as pf:
-                            pickle.dump(report_obj, pf)
+                        if snapshot_writer:
+                            snapshot_writer.submit_report(report_obj, f"{workspace_name}__{report_name}__report")
                         logger.info(f"✅ Reporte {report_name} procesado correctamente")
                     except Exception as e:
                         logger.error(f"❌ Error parseando reporte local {report_name}: {e}")
@@ -485,10 +491,12 @@ class PowerBIImporter:
                     tk, measure_table_map = DaxTokenizer.from_duckdb(
                         db_path, semantic_model_id=model_id, conn=conn
                     )
-                    inserted = tk.save_dependencies_to_db(
+                    # Incremental: solo se recalculan las medidas cambiadas y sus ancestros
+                    stats = tk.update_dependencies_incremental(
                         db_path, semantic_model_id=model_id, 
                         measure_table_map=measure_table_map, conn=conn
                     )
+                    inserted = stats["inserted"]
                     total_inserted += inserted
                     
                     # Dependencias de tablas calculadas
@@ -496,8 +504,32 @@ class PowerBIImporter:
                         db_path, semantic_model_id=model_id, conn=conn
                     )
                     total_table_deps += table_deps
+
+                    # Columnas calculadas, items de grupos de cálculo y filtros RLS
+                    tk.save_expression_dependencies_to_db(
+                        db_path, semantic_model_id=model_id, conn=conn
+                    )
+
+                    # Índice de linaje inverso (impacto objeto → medidas/visuales)
+                    DaxTokenizer.build_lineage_index(
+                        db_path, semantic_model_id=model_id, conn=conn
+                    )
+
+                    # Bitsets de uso por report (submodelos por selección de reports)
+                    DaxTokenizer.save_report_usage_to_db(
+                        db_path, semantic_model_id=model_id, conn=conn
+                    )
+
+                    # Coste de consulta por visual y página (necesita modelo y reports ya guardados)
+                    QueryCostScorer.from_db(
+                        semantic_model_id=model_id, conn=conn
+                    ).save_to_database(conn)
                     
-                    logger.info(f"  ✅ {model_name}: {inserted} medidas + {table_deps} tablas calculadas")
+                    logger.info(
+                        f"  ✅ {model_name}: {inserted} medidas "
+                        f"({stats['changed']} cambiadas, {stats['affected']} recalculadas) "
+                        f"+ {table_deps} tablas calculadas"
+                    )
                 except Exception as model_err:
                     logger.warning(f"  ⚠️ {model_name}: {model_err}")
                     
@@ -514,6 +546,11 @@ class PowerBIImporter:
 
         # Cerrar conexión DuckDB
         conn.close()
+
+        # Esperar a los snapshots escritos en segundo plano
+        if snapshot_writer:
+            snapshots = snapshot_writer.wait()
+            logger.info(f"✅ {len(snapshots)} snapshots guardados en: {output_dir}")
         logger.info(f"✅ Base de datos DuckDB guardada en: {db_path}")
         logger.info(f"✅ Información del workspace guardada en: {info_path}")
         logger.info(f"✅ Importación del workspace '{workspace_name}' completada exitosamente")
@@ -535,9 +572,10 @@ if __name__ == "__main__":
     parser.add_argument("--workspace", type=str, help="Nombre del workspace a importar", required=False)
     parser.add_argument("--dest", type=str, help="Directorio destino para la descarga", default="data")
     parser.add_argument("--db", type=str, help="Nombre de la base de datos DuckDB (sin extensión)", default="powerbi")
+    parser.add_argument("--snapshots", action="store_true", help="Guardar snapshots Parquet de modelos y reports en output/")
     args = parser.parse_args()
 
     downloader = FabricItemDownloader()
     importer = PowerBIImporter(downloader, workspace_name=args.workspace)
-    importer.import_from_powerbi(destination_path=args.dest, db_name=args.db)
+    importer.import_from_powerbi(destination_path=args.dest, db_name=args.db, write_snapshots=args.snapshots)
 
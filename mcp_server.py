@@ -5,7 +5,6 @@ Expone herramientas para crear, analizar y optimizar modelos mediante lenguaje n
 """
 
 import asyncio
-import json
 from pathlib import Path
 from typing import Any, List, Optional
 from collections import defaultdict
@@ -14,8 +13,9 @@ from mcp.server import Server
 from mcp.types import Tool, TextContent
 import mcp.server.stdio
 
-from models import SemanticModel, clsReport
+from models import SemanticModel, MemoryEstimator, QueryCostScorer, ReportCache
 from models.report import Page
+from models.report_merge import merge_report_pages
 
 
 # Configuración
@@ -308,6 +308,8 @@ class PowerBIModelServer:
         self.server = Server("powerbi-semantic-model")
         self.default_db_name = "demostracion"
         self.default_db_path = self.data_path / "demostracion.duckdb"
+        # Reports parseados entre llamadas (se invalidan al cambiar sus ficheros de definición)
+        self.report_cache = ReportCache(max_entries=64, cache_dir=str(self.data_path / "report_cache"))
         self._register_handlers()
     
     def _register_handlers(self):
@@ -617,6 +619,84 @@ class PowerBIModelServer:
                         "required": ["model_name"]
                     }
                 ),
+                Tool(
+                    name="analyze_impact",
+                    description="Análisis de impacto (linaje inverso): qué medidas, tablas calculadas, "
+                                "visuales e informes dependen, directa o transitivamente, de una columna, "
+                                "medida o tabla del modelo. Usa el índice semantic_model_lineage de la BD DuckDB "
+                                "por defecto (se construye si no existe).",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "model_name": {
+                                "type": "string",
+                                "description": "Nombre del modelo semántico (ej: 'Ventas.SemanticModel')"
+                            },
+                            "table_name": {
+                                "type": "string",
+                                "description": "Tabla del objeto a analizar"
+                            },
+                            "object_name": {
+                                "type": "string",
+                                "description": "Columna o medida. Si se omite, se analiza la tabla completa"
+                            },
+                            "rebuild_index": {
+                                "type": "boolean",
+                                "description": "Reconstruir el índice de linaje antes de consultar (default: false)",
+                                "default": False
+                            }
+                        },
+                        "required": ["model_name", "table_name"]
+                    }
+                ),
+                Tool(
+                    name="estimate_memory",
+                    description="Estima la memoria VertiPaq de un modelo (heurística por tipo de dato, "
+                                "summarizeBy, columnas calculadas, claves de texto y pistas de filas/cardinalidad) "
+                                "y lista las tablas y columnas más costosas.",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "model_name": {
+                                "type": "string",
+                                "description": "Nombre del modelo semántico (ej: 'Ventas.SemanticModel')"
+                            },
+                            "stats_file": {
+                                "type": "string",
+                                "description": "Fichero JSON opcional con filas y cardinalidades: "
+                                               "{\"tables\": {\"T\": {\"rows\": N, \"columns\": {\"C\": n}}}}"
+                            },
+                            "top": {
+                                "type": "integer",
+                                "description": "Número de columnas a listar (default: 20)",
+                                "default": 20
+                            }
+                        },
+                        "required": ["model_name"]
+                    }
+                ),
+                Tool(
+                    name="score_report_queries",
+                    description="Puntúa la carga de consultas de cada visual y página de un reporte desde DuckDB "
+                                "(tipo de visual, campos, medidas, filtros y listas In, tablas/matrices sin filtrar, "
+                                "particiones DirectQuery y relaciones bidireccionales del modelo) y lista las "
+                                "páginas y visuales más costosos.",
+                    inputSchema={
+                        "type": "object",
+                        "properties": {
+                            "report_name": {
+                                "type": "string",
+                                "description": "Nombre del reporte (tal como aparece en la BD)"
+                            },
+                            "top": {
+                                "type": "integer",
+                                "description": "Número de visuales a listar (default: 10)",
+                                "default": 10
+                            }
+                        },
+                        "required": ["report_name"]
+                    }
+                ),
                 Tool(
                     name="default_db",
                     description="Establece la base de datos DuckDB por defecto (ruta y nombre)",
@@ -758,6 +838,27 @@ class PowerBIModelServer:
                     arguments.get("semantic_model_id")
                 )
 
+            elif name == "analyze_impact":
+                return await self._analyze_impact(
+                    arguments["model_name"],
+                    arguments["table_name"],
+                    arguments.get("object_name"),
+                    arguments.get("rebuild_index", False)
+                )
+
+            elif name == "estimate_memory":
+                return await self._estimate_memory(
+                    arguments["model_name"],
+                    arguments.get("stats_file"),
+                    arguments.get("top", 20)
+                )
+
+            elif name == "score_report_queries":
+                return await self._score_report_queries(
+                    arguments["report_name"],
+                    arguments.get("top", 10)
+                )
+
             elif name == "default_db":
                 return await self._default_db(
                     arguments["db_path"],
@@ -978,7 +1079,7 @@ class PowerBIModelServer:
             return [TextContent(type="text", text=f"Error: Reporte '{report_name}' no encontrado en {workspace_path}")]
         
         # Parsear reporte
-        report = clsReport(str(report_path))
+        report = self.report_cache.get(str(report_path))
         
         # Obtener referencias
         columns_refs = report.get_all_columns_used()
@@ -1020,7 +1121,7 @@ class PowerBIModelServer:
             return [TextContent(type="text", text=f"Error: Reporte '{report_name}' no encontrado")]
         
         # Parsear reporte
-        report = clsReport(str(report_path))
+        report = self.report_cache.get(str(report_path))
         
         # Generar listado de páginas
         result = f"=== Páginas del Reporte: {report_name} ===\n\n"
@@ -1043,7 +1144,7 @@ class PowerBIModelServer:
             return [TextContent(type="text", text=f"Error: Reporte '{report_name}' no encontrado")]
         
         # Parsear reporte
-        report = clsReport(str(report_path))
+        report = self.report_cache.get(str(report_path))
         
         # Buscar página por nombre o displayName
         target_page = None
@@ -1191,7 +1292,7 @@ class PowerBIModelServer:
             if not report_path.exists():
                 return [TextContent(type="text", text=f"Error: Reporte '{report_name}' no encontrado ni en DuckDB ni en el filesystem.\nDuckDB: {db_msg}")]
             
-            report = clsReport(str(report_path))
+            report = self.report_cache.get(str(report_path))
             
             if not report.pages:
                 return [TextContent(type="text", text=f"Error: El reporte no tiene páginas")]
@@ -1293,7 +1394,8 @@ class PowerBIModelServer:
         Utiliza ``create_subset_model_from_db`` que consulta las tablas
         ``report_column_used``, ``report_measure_used`` y
         ``semantic_model_measure_dependencies`` para determinar qué tablas,
-        columnas, medidas y relaciones necesita el submodelo.
+        columnas, medidas y relaciones necesita el submodelo. Si se indican
+        ``reports``, solo cuenta el uso de esos reports.
         """
         
         source_path = self.models_path / source_model
@@ -1310,11 +1412,12 @@ class PowerBIModelServer:
         subset = model.create_subset_model_from_db(
             db_path=db_path,
             subset_name=target_model,
+            reports=reports or None,
         )
         
-        # Guardar
+        # Guardar (solo los ficheros cuyo contenido cambia)
         target_path = self.models_path / target_model
-        subset.save_to_directory(target_path)
+        changes = subset.save_to_directory_incremental(target_path)
 
         # Si se solicita, copiar páginas de los reportes origen, acumulando
         if copy_reports:
@@ -1329,7 +1432,12 @@ class PowerBIModelServer:
         result = f"✅ Modelo optimizado creado: {target_model}\n\n"
         result += f"Basado en datos de DuckDB ({db_path})\n"
         result += f"Tablas: {len(subset.tables)}\n"
-        result += f"Relaciones: {len(subset.relationships)}\n\n"
+        result += f"Relaciones: {len(subset.relationships)}\n"
+        memory = MemoryEstimator().compare(model, subset)
+        result += (f"Memoria estimada: {memory['subset_mb']:,.1f} MB de {memory['source_mb']:,.1f} MB "
+                   f"(ahorro {memory['saved_mb']:,.1f} MB, {memory['saved_pct']:.0f}%)\n")
+        result += (f"Ficheros reescritos: {len(changes['written'])} "
+                   f"(sin cambios: {len(changes['unchanged'])}, eliminados: {len(changes['removed'])})\n\n")
         
         for table in sorted(subset.tables, key=lambda t: t.name):
             result += f"**{table.name}**\n"
@@ -1350,57 +1458,19 @@ class PowerBIModelServer:
     async def _copy_and_merge_report_pages(self, source_reports: List[str], target_report_name: str) -> None:
         """Copia páginas de uno o varios reports origen y las acumula en el report destino.
 
-        - Lee `definition/report.json` de cada report origen.
-        - Concadena las entradas de `pages` en el `report.json` destino.
+        - PBIR: copia en paralelo ``definition/pages/<id>`` (page.json y visuales)
+          y añade los ids a ``pages.json``; los ids repetidos se renombran
+          de forma determinista (``<id>_2``...).
+        - Legacy: concatena las entradas de `pages` del `report.json` origen.
+        - Idempotente: las páginas ya fusionadas (ver ``MERGE_MANIFEST``) se
+          omiten si no han cambiado o se reemplazan en su sitio.
         - No copia StaticResources; solo estructura de páginas.
         - NO incluye la clave 'pages' en report.json si está vacía (Power BI Desktop requiere esto)
         """
-        target_dir = self.models_path / target_report_name / "definition"
-        target_report_json_path = target_dir / "report.json"
-        if not target_report_json_path.exists():
-            return
-
-        # Cargar destino
-        target_data = json.loads(target_report_json_path.read_text(encoding="utf-8"))
-
-        # Acumular páginas
-        for src in source_reports:
-            src_dir = self.models_path / src / "definition"
-            src_report_json_path = src_dir / "report.json"
-            if not src_report_json_path.exists():
-                # Si el report de origen no tiene report.json, simplemente ignorar
-                continue
-            try:
-                src_data = json.loads(src_report_json_path.read_text(encoding="utf-8"))
-                src_pages = src_data.get("pages", [])
-                # Evitar duplicados simples por nombre
-                existing_names = {p.get("name") for p in target_data.get("pages", [])}
-                for p in src_pages:
-                    name = p.get("name")
-                    if name and name in existing_names:
-                        # si existe, crear nombre único
-                        suffix = 2
-                        new_name = f"{name} ({suffix})"
-                        while new_name in existing_names:
-                            suffix += 1
-                            new_name = f"{name} ({suffix})"
-                        p = {**p, "name": new_name}
-                        existing_names.add(new_name)
-                        target_data["pages"].append(p)
-                    else:
-                        if name:
-                            existing_names.add(name)
-                        target_data["pages"].append(p)
-            except Exception:
-                # continuar si hay errores de formato
-                continue
-
-        # Guardar destino
-        # IMPORTANTE: NO incluir 'pages' si está vacía (Power BI Desktop no abre archivos con pages: [])
-        if "pages" in target_data and not target_data["pages"]:
-            del target_data["pages"]
-        
-        target_report_json_path.write_text(json.dumps(target_data, indent=2), encoding="utf-8")
+        merge_report_pages(
+            [self.models_path / src for src in source_reports],
+            self.models_path / target_report_name,
+        )
     
     async def _get_table_details(self, model_name: str, table_name: str) -> list[TextContent]:
         """Obtiene detalles de una tabla"""
@@ -1471,7 +1541,7 @@ class PowerBIModelServer:
         usage = defaultdict(lambda: defaultdict(set))
         
         for report_dir in reports:
-            report_obj = clsReport(str(report_dir))
+            report_obj = self.report_cache.get(str(report_dir))
             columns_refs = report_obj.get_all_columns_used()
             measures_refs = report_obj.get_all_measures_used()
             
@@ -1510,6 +1580,43 @@ class PowerBIModelServer:
         
         return [TextContent(type="text", text=result)]
 
+    async def _score_report_queries(self, report_name: str, top: int = 10) -> list[TextContent]:
+        """Puntuación de carga de consultas por página y visual de un reporte (DuckDB)."""
+        if not self.default_db_path.exists():
+            return [TextContent(type="text", text=f"❌ No se encontró la base de datos: {self.default_db_path}")]
+
+        try:
+            import duckdb
+            connection = duckdb.connect(str(self.default_db_path), read_only=True)
+        except Exception as e:
+            return [TextContent(type="text", text=f"Error abriendo DuckDB: {e}")]
+
+        try:
+            visual_scores, page_scores = QueryCostScorer.from_db(
+                report_name=report_name, conn=connection
+            ).score()
+        except Exception as e:
+            return [TextContent(type="text", text=f"❌ Error puntuando el reporte: {e}")]
+        finally:
+            connection.close()
+
+        if not page_scores:
+            return [TextContent(type="text", text=f"No hay visuales del reporte '{report_name}' en la BD")]
+
+        result = f"=== Carga de consultas: {report_name} ===\n\n"
+        result += "### Páginas\n"
+        for page in page_scores:
+            result += (f"- {page['page_name']}: {page['score']:g} puntos ({page['level']}), "
+                       f"{page['query_visuals']}/{page['visuals']} visuales con consulta, "
+                       f"máx. visual {page['max_visual_score']:g}\n")
+        result += f"\n### Visuales más costosos (top {top})\n"
+        for row in [v for v in visual_scores if v['score']][:top]:
+            result += (f"- {row['page_name']} / {row['visual_name']} ({row['visual_type']}): "
+                       f"{row['score']:g} ({row['level']})\n")
+            for reason in row['reasons']:
+                result += f"    · {reason}\n"
+        return [TextContent(type="text", text=result)]
+
     async def _analyze_model_usage_bd(
         self,
         model_name: str,
@@ -1591,6 +1698,115 @@ class PowerBIModelServer:
 
         return [TextContent(type="text", text=result)]
 
+    async def _estimate_memory(
+        self,
+        model_name: str,
+        stats_file: Optional[str] = None,
+        top: int = 20
+    ) -> list[TextContent]:
+        """Estimación de memoria del modelo y ranking de columnas por coste."""
+        model_path = self.models_path / model_name
+        if not model_path.exists():
+            return [TextContent(type="text", text=f"Error: Modelo '{model_name}' no encontrado")]
+
+        model = SemanticModel(str(model_path))
+        model.load_from_directory(model_path)
+        try:
+            estimator = MemoryEstimator.from_stats_file(Path(stats_file) if stats_file else None)
+        except (OSError, ValueError) as e:
+            return [TextContent(type="text", text=f"❌ Error leyendo estadísticas: {e}")]
+
+        estimate = estimator.estimate_model(model)
+        result = f"=== Memoria estimada: {model_name} ===\n\n"
+        result += f"Total estimado: {estimate['mb']:,.1f} MB (heurística, no medida real)\n\n"
+
+        result += "### Tablas\n"
+        for t in sorted(estimate["tables"], key=lambda t: t["bytes"], reverse=True):
+            result += f"- {t['table']}: {t['bytes'] / 1024 / 1024:,.1f} MB ({t['rows']:,} filas)\n"
+
+        result += f"\n### Top {top} columnas\n"
+        for c in estimator.rank_columns(model, top=top):
+            flags = []
+            if c["is_key_like"] and c["data_type"] == "string":
+                flags.append("clave de texto")
+            if c["is_calculated"]:
+                flags.append("calculada")
+            extra = f" [{', '.join(flags)}]" if flags else ""
+            result += (f"- {c['table']}[{c['column']}] ({c['data_type']}): "
+                       f"{c['bytes'] / 1024 / 1024:,.2f} MB, cardinalidad ~{c['cardinality']:,}{extra}\n")
+
+        return [TextContent(type="text", text=result)]
+
+    async def _analyze_impact(
+        self,
+        model_name: str,
+        table_name: str,
+        object_name: Optional[str] = None,
+        rebuild_index: bool = False
+    ) -> list[TextContent]:
+        """Lista los dependientes (medidas, tablas calculadas, visuales, informes) de un objeto."""
+        if not self.default_db_path.exists():
+            return [TextContent(
+                type="text",
+                text=f"❌ Base de datos no encontrada: {self.default_db_path}\n\n"
+                     f"Usa 'default_db' para configurar una base de datos válida."
+            )]
+
+        model = SemanticModel(str(self.models_path / model_name))
+        try:
+            impact = model.get_impact_analysis(
+                str(self.default_db_path),
+                table_name,
+                object_name,
+                rebuild_index=rebuild_index
+            )
+        except Exception as e:
+            return [TextContent(type="text", text=f"❌ Error en análisis de impacto: {e}")]
+
+        target = f"{table_name}[{object_name}]" if object_name else table_name
+        result = f"=== Análisis de Impacto: {target} ===\n\n"
+        result += f"Modelo: {model_name}\n"
+        result += f"Medidas afectadas: {len(impact['measures'])}\n"
+        result += f"Tablas calculadas afectadas: {len(impact['calculated_tables'])}\n"
+        result += f"Visuales afectados: {len(impact['visuals'])}\n"
+        result += f"Informes afectados: {len(impact['reports'])}\n"
+
+        if impact["measures"]:
+            result += "\n### Medidas:\n"
+            for m in impact["measures"]:
+                kind = "directa" if m["depth"] == 1 else f"transitiva (nivel {m['depth']})"
+                result += f"- [{m['table']}] {m['name']} — {kind}\n"
+
+        if impact["calculated_tables"]:
+            result += "\n### Tablas calculadas:\n"
+            for t in impact["calculated_tables"]:
+                result += f"- {t['name']}\n"
+
+        for key, title in (
+            ("calculated_columns", "Columnas calculadas"),
+            ("calculation_items", "Items de grupos de cálculo"),
+            ("roles", "Roles RLS"),
+        ):
+            if impact.get(key):
+                result += f"\n### {title}:\n"
+                for item in impact[key]:
+                    result += f"- [{item['table']}] {item['name']}\n"
+
+        if impact["reports"]:
+            result += "\n### Informes y visuales:\n"
+            visuals_by_report = defaultdict(list)
+            for v in impact["visuals"]:
+                visuals_by_report[v["report"]].append(v)
+            for r in impact["reports"]:
+                result += f"- {r['name']} ({len(visuals_by_report[r['name']])} visuales)\n"
+                for v in visuals_by_report[r["name"]]:
+                    result += f"  - {v['page']} / {v['name']}\n"
+
+        if not any(v for k, v in impact.items() if k != "reports"):
+            result += "\n✅ Ningún objeto depende de este elemento: se puede eliminar sin impacto.\n"
+
+        return [TextContent(type="text", text=result)]
+
     async def _default_db(self, db_path: str, db_name: str) -> list[TextContent]:
         """Actualiza la base DuckDB por defecto usada por el servidor."""
         new_path = Path(db_path)
@@ -1,10 +1,19 @@
 from .semantic_model import SemanticModel, TableElementSpec
+from .subset_plan import SubsetIndex, SubsetPlan
+from .memory_estimator import MemoryEstimator
+from .storage_mode_advisor import StorageModeAdvisor
+from .aggregation_generator import AggregationGenerator
+from .refresh_policy import RefreshPolicyGenerator
 from .report import Visual, Page, clsReport
+from .report_cache import ReportCache
+from .query_cost import QueryCostScorer
 from .model import Model
 from .relationship import Relationship
 from .table import Table, Column, Measure, Partition
+from .m_expression import MExpression
 from .dax_tokenizer import DaxTokenizer, DaxDependencies
 from .culture import Culture
+from .role import Role
 from .platform import Platform
 from .definition import Definition
 from .workspace import Workspace
@@ -12,19 +21,29 @@ from .workspace import Workspace
 __all__ = [
     'SemanticModel',
     'TableElementSpec',
+    'SubsetIndex',
+    'SubsetPlan',
+    'MemoryEstimator',
+    'StorageModeAdvisor',
+    'AggregationGenerator',
+    'RefreshPolicyGenerator',
     'Model',
     'Relationship',
     'Table',
     'Column',
     'Measure',
     'Partition',
+    'MExpression',
     'DaxTokenizer',
     'DaxDependencies',
     'Culture',
+    'Role',
     'Platform',
     'Definition',
     'clsReport',
     'Visual',
     'Page',
+    'ReportCache',
+    'QueryCostScorer',
     'Workspace',
 ]
@@ -0,0 +1,541 @@
+"""
+Generador de tablas de agregación (``alternateOf``) a partir del grano de
+las consultas de los reports.
+
+Para cada visual se toma su grano (columnas usadas como agrupación) y las
+agregaciones simples de hechos que hay detrás de sus medidas (SUM, MIN, MAX,
+COUNT, COUNTROWS y AVERAGE como SUM + COUNT de la columna), siguiendo las dependencias
+entre medidas. Los granos que se repiten se agrupan de forma voraz: cada
+agregación cubre también los visuales de grano más grueso.
+
+La tabla generada lleva una columna ``groupBy`` por columna de agrupación y
+una columna ``sum``/``min``/``max``/``count`` por agregación, con partición
+SQL nativa (``Sql.Database``) cuando las tablas implicadas vienen de la misma
+base de datos, o DAX (``SUMMARIZECOLUMNS``) en otro caso.
+
+Power BI solo usa agregaciones si la tabla de detalle es DirectQuery (ver
+``StorageModeAdvisor``); las dimensiones de agrupación conviene tenerlas en
+Dual.
+"""
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, List, Optional, Set, Tuple
+import copy
+import re
+import uuid
+
+from .m_expression import MExpression
+from .memory_estimator import MemoryEstimator
+from .catalog_sql import REPORT_MODEL_JOIN
+from .table import Table
+
+if TYPE_CHECKING:
+    from .semantic_model import SemanticModel
+
+ColumnRef = Tuple[str, str]          # (tabla, columna)
+Aggregation = Tuple[str, str]        # (función, columna del hecho) — columna '' = filas
+
+_TABLE_REF = r"('(?:[^']|'')+'|[A-Za-z_][\w]*)"
+_SIMPLE_AGG = re.compile(
+    r"\b(SUM|MIN|MAX|COUNT|COUNTA|AVERAGE)\s*\(\s*" + _TABLE_REF + r"\s*\[([^\]]+)\]\s*\)",
+    re.IGNORECASE,
+)
+_COUNTROWS = re.compile(r"\bCOUNTROWS\s*\(\s*" + _TABLE_REF + r"\s*\)", re.IGNORECASE)
+_MEASURE_REF = re.compile(r"(?<![\w'\]])\[([^\]]+)\]")
+_SQL_SOURCE = re.compile(r'Sql\.Database\s*\(\s*"([^"]*)"\s*,\s*"([^"]*)"')
+_SQL_SERVER = re.compile(r'Sql\.Databases\s*\(\s*"([^"]*)"')
+_SQL_DATABASE = re.compile(r'\{\[\s*Name\s*=\s*"([^"]*)"\s*\]\}\s*\[Data\]')
+_SQL_OBJECT = re.compile(r'\{\[\s*Schema\s*=\s*"([^"]*)"\s*,\s*Item\s*=\s*"([^"]*)"\s*\]\}\s*\[Data\]')
+
+
+def _unquote(name: str) -> str:
+    return name[1:-1].replace("''", "'") if name.startswith("'") else name
+
+
+def _tmdl_name(name: str) -> str:
+    """Nombre TMDL/DAX, entre comillas simples si hace falta."""
+    if re.fullmatch(r'[A-Za-z_][\w]*', name):
+        return name
+    return "'" + name.replace("'", "''") + "'"
+
+
+def _dax_column(table: str, column: str) -> str:
+    """Referencia DAX ``'Tabla'[Columna]``: también es el nombre que le da SUMMARIZECOLUMNS."""
+    return f"{_tmdl_name(table)}[{column.replace(']', ']]')}]"
+
+
+class AggregationGenerator:
+    """
+    Busca granos recurrentes en los visuales y genera tablas de agregación.
+
+    ``visual_usage`` es ``{(report, página, visual): (columnas, medidas)}``
+    con columnas ``{(tabla, columna)}`` y medidas ``{nombre}`` (ver
+    ``from_db``).
+    """
+
+    def __init__(
+        self,
+        model: 'SemanticModel',
+        visual_usage: Dict[Tuple[str, str, str], Tuple[Set[ColumnRef], Set[str]]],
+        measure_deps: Optional[Dict[str, Set[str]]] = None,
+        estimator: Optional[MemoryEstimator] = None,
+        max_group_by: int = 6,
+    ):
+        self.model = model
+        self.visual_usage = visual_usage
+        self.measure_deps = measure_deps or {}
+        self.estimator = estimator or MemoryEstimator()
+        self.max_group_by = max_group_by
+        self.tables = {t.name: t for t in model.tables}
+        self.measures = {m.name: (t.name, m.expression) for t in model.tables for m in t.measures}
+        # Relaciones activas muchos → uno
+        self.outgoing: Dict[str, List[Any]] = {}
+        for rel in model.relationships:
+            if rel.is_active and rel.from_table in self.tables and rel.to_table in self.tables:
+                self.outgoing.setdefault(rel.from_table, []).append(rel)
+
+    @classmethod
+    def from_db(
+        cls,
+        model: 'SemanticModel',
+        db_path: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+        **kwargs,
+    ) -> 'AggregationGenerator':
+        """Carga el uso por visual y el cierre de dependencias entre medidas."""
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path, read_only=True)
+        try:
+            sm_id = model._resolve_db_model_id(conn, semantic_model_id)
+            rows = conn.execute(f"""
+                WITH model_reports AS (
+                    SELECT report_id AS id, report_name AS name
+                    FROM ({REPORT_MODEL_JOIN}) WHERE semantic_model_id = ?
+                )
+                SELECT mr.name, c.page_name, c.visual_name, 'column', c.table_name, c.column_name
+                FROM report_column_used c JOIN model_reports mr ON mr.id = c.report_id
+                UNION ALL
+                SELECT mr.name, m.page_name, m.visual_name, 'measure', m.table_name, m.measure_name
+                FROM report_measure_used m JOIN model_reports mr ON mr.id = m.report_id
+            """, [sm_id]).fetchall()
+            measure_deps: Dict[str, Set[str]] = {}
+            try:
+                for name, ref in conn.execute("""
+                    SELECT measure_name, referenced_name
+                    FROM semantic_model_measure_dependencies
+                    WHERE semantic_model_id = ? AND dependency_type = 'measure'
+                """, [sm_id]).fetchall():
+                    measure_deps.setdefault(name, set()).add(ref)
+            except Exception:
+                pass  # Sin dependencias guardadas: se resuelven desde las expresiones
+        finally:
+            if _own_conn:
+                conn.close()
+
+        visual_usage: Dict[Tuple[str, str, str], Tuple[Set[ColumnRef], Set[str]]] = {}
+        for report, page, visual, kind, tbl, name in rows:
+            columns, measures = visual_usage.setdefault((report, page, visual), (set(), set()))
+            if kind == 'column':
+                columns.add((tbl, name))
+            else:
+                measures.add(name)
+        return cls(model, visual_usage, measure_deps=measure_deps, **kwargs)
+
+    # ── Análisis de medidas ───────────────────────────────────────
+
+    def measure_closure(self, name: str) -> Set[str]:
+        """La medida y todas las que usa (transitivamente)."""
+        if name in self.measure_deps:
+            return {name} | self.measure_deps[name]
+        seen = set()
+        stack = [name]
+        while stack:
+            current = stack.pop()
+            if current in seen or current not in self.measures:
+                continue
+            seen.add(current)
+            stack.extend(ref for ref in _MEASURE_REF.findall(self.measures[current][1])
+                         if ref in self.measures)
+        return seen
+
+    def measure_aggregations(self, name: str) -> Dict[str, Optional[Set[Aggregation]]]:
+        """
+        Agregaciones simples por tabla de hechos de la medida (incluidas las
+        medidas de las que depende). None para un hecho si alguna expresión
+        lo usa de otra forma (iteradores, DISTINCTCOUNT...): esa medida no
+        podría resolverse con una agregación.
+        """
+        result: Dict[str, Optional[Set[Aggregation]]] = {}
+        for measure in self.measure_closure(name):
+            if measure not in self.measures:
+                continue
+            expression = self.measures[measure][1]
+            for match in _SIMPLE_AGG.finditer(expression):
+                func, table, column = match.group(1).upper(), _unquote(match.group(2)), match.group(3)
+                if table not in self.tables:
+                    continue
+                aggs = result.setdefault(table, set())
+                if aggs is None:
+                    continue
+                if func == 'AVERAGE':
+                    # AVERAGE ignora los blancos: su divisor es COUNT(columna), no COUNTROWS
+                    aggs.update({('sum', column), ('count', column)})
+                else:
+                    aggs.add(({'COUNTA': 'count'}.get(func, func.lower()), column))
+            for match in _COUNTROWS.finditer(expression):
+                table = _unquote(match.group(1))
+                if table in self.tables and result.get(table, set()) is not None:
+                    result.setdefault(table, set()).add(('count', ''))
+            # Otros usos del hecho fuera de las agregaciones simples
+            rest = _COUNTROWS.sub('', _SIMPLE_AGG.sub('', expression))
+            for table in self.tables:
+                quoted = "'" + table.replace("'", "''") + "'"
+                pattern = r"(?<![\w'])(" + re.escape(table) + "|" + re.escape(quoted) + r")(?![\w'])"
+                if re.search(pattern, rest):
+                    result[table] = None
+        return result
+
+    def reachable_tables(self, fact: str) -> Dict[str, List[Any]]:
+        """Tablas alcanzables desde ``fact`` por relaciones muchos → uno, con el camino."""
+        paths: Dict[str, List[Any]] = {fact: []}
+        queue = [fact]
+        while queue:
+            current = queue.pop(0)
+            for rel in self.outgoing.get(current, []):
+                if rel.to_table not in paths:
+                    paths[rel.to_table] = paths[current] + [rel]
+                    queue.append(rel.to_table)
+        return paths
+
+    # ── Granos ────────────────────────────────────────────────────
+
+    def visual_grains(self) -> List[Dict[str, Any]]:
+        """
+        Grano de cada visual por tabla de hechos:
+        ``{visual, fact, group_by: frozenset, aggregations: set}``.
+        """
+        grains = []
+        reachable_cache: Dict[str, Set[str]] = {}
+        for visual, (columns, measures) in sorted(self.visual_usage.items()):
+            per_fact: Dict[str, Set[Aggregation]] = {}
+            for measure in measures:
+                for fact, aggs in self.measure_aggregations(measure).items():
+                    if aggs:
+                        per_fact.setdefault(fact, set()).update(aggs)
+            for fact, aggs in per_fact.items():
+                if fact not in reachable_cache:
+                    reachable_cache[fact] = set(self.reachable_tables(fact))
+                group_by = frozenset(columns)
+                if not group_by or len(group_by) > self.max_group_by:
+                    continue
+                if any(tbl not in reachable_cache[fact] for tbl, _ in group_by):
+                    continue
+                grains.append({'visual': visual, 'fact': fact, 'group_by': group_by, 'aggregations': aggs})
+        return grains
+
+    def find_aggregations(
+        self,
+        facts: Optional[Set[str]] = None,
+        min_visuals: int = 2,
+        max_per_fact: int = 3,
+    ) -> List[Dict[str, Any]]:
+        """
+        Elige, por hecho, los granos que cubren más visuales (un grano cubre
+        a los visuales cuyas columnas son un subconjunto de las suyas).
+
+        Returns:
+            ``[{fact, group_by, aggregations, visuals, fact_rows, estimated_rows}]``
+        """
+        by_fact: Dict[str, List[Dict[str, Any]]] = {}
+        for grain in self.visual_grains():
+            if facts is None or grain['fact'] in facts:
+                by_fact.setdefault(grain['fact'], []).append(grain)
+
+        candidates = []
+        for fact, grains in sorted(by_fact.items()):
+            uncovered = list(grains)
+            options: Set[FrozenSet[ColumnRef]] = {g['group_by'] for g in grains}
+            for _ in range(max_per_fact):
+                best = None
+                for option in options:
+                    covered = [g for g in uncovered if g['group_by'] <= option]
+                    key = (len(covered), -len(option))
+                    if best is None or key > best[0]:
+                        best = (key, option, covered)
+                if best is None or len(best[2]) < min_visuals:
+                    break
+                _, group_by, covered = best
+                aggregations: Set[Aggregation] = set()
+                for grain in covered:
+                    aggregations |= grain['aggregations']
+                candidates.append({
+                    'fact': fact,
+                    'group_by': sorted(group_by),
+                    'aggregations': sorted(aggregations),
+                    'visuals': [g['visual'] for g in covered],
+                    'fact_rows': self.estimator.table_rows(self.tables[fact]),
+                    'estimated_rows': self.estimate_rows(fact, group_by),
+                })
+                uncovered = [g for g in uncovered if g not in covered]
+                options.discard(group_by)
+        return candidates
+
+    def estimate_rows(self, fact: str, group_by) -> int:
+        """Filas estimadas de la agregación: producto de cardinalidades, acotado por el hecho."""
+        fact_rows = self.estimator.table_rows(self.tables[fact])
+        dimensions = {r.to_table for r in self.model.relationships}
+        rows = 1
+        for tbl, col in group_by:
+            table = self.tables[tbl]
+            column = next((c for c in table.columns if c.name == col), None)
+            if column is None:
+                continue
+            table_rows = self.estimator.table_rows(table, tbl in dimensions)
+            rows *= self.estimator.column_cardinality(table, column, table_rows)
+            if rows >= fact_rows:
+                return fact_rows
+        return rows
+
+    # ── Generación TMDL ───────────────────────────────────────────
+
+    def _agg_column_names(self, candidate: Dict[str, Any]) -> Tuple[Dict[ColumnRef, str], Dict[Aggregation, str]]:
+        names = [col for _, col in candidate['group_by']]
+        group_names = {
+            (tbl, col): (col if names.count(col) == 1 else f"{tbl} {col}")
+            for tbl, col in candidate['group_by']
+        }
+        agg_names = {
+            (func, col): (f"{func.capitalize()} {col}" if col else "Count Rows")
+            for func, col in candidate['aggregations']
+        }
+        return group_names, agg_names
+
+    def _sql_source(self, table_name: str) -> Optional[Tuple[str, str, str]]:
+        """``(servidor, base de datos, objeto SQL)`` de una tabla con origen SQL Server."""
+        table = self.tables[table_name]
+        for partition in table.partitions:
+            if partition.source_type != 'm':
+                continue
+            expr = partition.source_expression
+            source = _SQL_SOURCE.search(expr)
+            if source:
+                server, database = source.groups()
+            else:
+                server_match, db_match = _SQL_SERVER.search(expr), _SQL_DATABASE.search(expr)
+                if not (server_match and db_match):
+                    continue
+                server, database = server_match.group(1), db_match.group(1)
+            m_expression = MExpression.parse(expr)
+            if m_expression and m_expression.native_query_step() >= 0:
+                return None  # Consulta nativa: no se combina
+            obj = _SQL_OBJECT.search(expr)
+            if obj:
+                return server, database, f"[{obj.group(1)}].[{obj.group(2)}]"
+        return None
+
+    def _build_sql(self, candidate: Dict[str, Any], group_names, agg_names) -> Optional[Tuple[str, str, str]]:
+        """Consulta SQL de la agregación si todas las tablas están en la misma BD."""
+        fact = candidate['fact']
+        paths = self.reachable_tables(fact)
+        needed = [fact] + sorted({tbl for tbl, _ in candidate['group_by']} - {fact})
+        joins: List[Any] = []
+        for tbl in needed:
+            for rel in paths[tbl]:
+                if rel not in joins:
+                    joins.append(rel)
+        involved = [fact] + [rel.to_table for rel in joins]
+        sources = {tbl: self._sql_source(tbl) for tbl in involved}
+        if any(src is None for src in sources.values()):
+            return None
+        if len({src[:2] for src in sources.values()}) != 1:
+            return None
+
+        def source_column(tbl: str, col: str) -> Optional[str]:
+            column = next((c for c in self.tables[tbl].columns if c.name == col), None)
+            if column is None or column.is_calculated:
+                return None
+            return column.source_column or column.name
+
+        alias = {fact: 't0'}
+        lines_from = [f"FROM {sources[fact][2]} AS t0"]
+        for rel in joins:
+            if rel.to_table in alias:
+                continue
+            alias[rel.to_table] = f"t{len(alias)}"
+            from_col = source_column(rel.from_table, rel.from_column)
+            to_col = source_column(rel.to_table, rel.to_column)
+            if not from_col or not to_col:
+                return None
+            lines_from.append(
+                f"LEFT JOIN {sources[rel.to_table][2]} AS {alias[rel.to_table]} "
+                f"ON {alias[rel.from_table]}.[{from_col}] = {alias[rel.to_table]}.[{to_col}]"
+            )
+
+        select, group = [], []
+        for tbl, col in candidate['group_by']:
+            src = source_column(tbl, col)
+            if not src:
+                return None
+            select.append(f"{alias[tbl]}.[{src}] AS [{group_names[(tbl, col)]}]")
+            group.append(f"{alias[tbl]}.[{src}]")
+        for func, col in candidate['aggregations']:
+            if not col:
+                select.append(f"COUNT_BIG(*) AS [{agg_names[(func, col)]}]")
+                continue
+            src = source_column(fact, col)
+            if not src:
+                return None
+            sql_func = 'COUNT' if func == 'count' else func.upper()
+            select.append(f"{sql_func}(t0.[{src}]) AS [{agg_names[(func, col)]}]")
+
+        sql = "SELECT " + ", ".join(select) + "\n" + "\n".join(lines_from) + "\nGROUP BY " + ", ".join(group)
+        server, database = next(iter(sources.values()))[:2]
+        return server, database, sql
+
+    def _build_dax(self, candidate: Dict[str, Any], group_names, agg_names) -> str:
+        fact_ref = _tmdl_name(candidate['fact'])
+        args = [_dax_column(tbl, col) for tbl, col in candidate['group_by']]
+        for func, col in candidate['aggregations']:
+            if not col:
+                args.append(f'"{agg_names[(func, col)]}", COUNTROWS({fact_ref})')
+            else:
+                dax_func = 'COUNT' if func == 'count' else func.upper()
+                args.append(f'"{agg_names[(func, col)]}", {dax_func}({_dax_column(candidate["fact"], col)})')
+        return "SUMMARIZECOLUMNS(" + ", ".join(args) + ")"
+
+    def to_table(self, candidate: Dict[str, Any], name: str) -> Table:
+        """Tabla TMDL de la agregación, oculta, con ``alternateOf`` en cada columna."""
+        fact = candidate['fact']
+        group_names, agg_names = self._agg_column_names(candidate)
+        sql = self._build_sql(candidate, group_names, agg_names)
+
+        lines = [f"table {_tmdl_name(name)}", "\tisHidden", f"\tlineageTag: {uuid.uuid4()}", ""]
+        for (tbl, col), agg_col in group_names.items():
+            base = next((c for c in self.tables[tbl].columns if c.name == col), None)
+            lines += [
+                f"\tcolumn {_tmdl_name(agg_col)}",
+                f"\t\tdataType: {(base.data_type if base else None) or 'string'}",
+                "\t\tisHidden",
+                f"\t\tlineageTag: {uuid.uuid4()}",
+                "\t\tsummarizeBy: none",
+            ]
+            # En la tabla calculada la columna conserva el nombre cualificado
+            # que le da SUMMARIZECOLUMNS, aunque aquí se renombre
+            lines.append(f"\t\tsourceColumn: {agg_col if sql else _dax_column(tbl, col)}")
+            lines += [
+                "",
+                "\t\talternateOf",
+                f"\t\t\tbaseColumn: {_tmdl_name(tbl)}.{_tmdl_name(col)}",
+                "\t\t\tsummarization: groupBy",
+                "",
+            ]
+        for (func, col), agg_col in agg_names.items():
+            base = next((c for c in self.tables[fact].columns if c.name == col), None) if col else None
+            data_type = 'int64' if func == 'count' else ((base.data_type if base else None) or 'double')
+            lines += [
+                f"\tcolumn {_tmdl_name(agg_col)}",
+                f"\t\tdataType: {data_type}",
+                "\t\tisHidden",
+                f"\t\tlineageTag: {uuid.uuid4()}",
+                "\t\tsummarizeBy: sum",
+                f"\t\tsourceColumn: {agg_col}" if sql else f"\t\tsourceColumn: [{agg_col}]",
+                "",
+                "\t\talternateOf",
+            ]
+            if col:
+                lines.append(f"\t\t\tbaseColumn: {_tmdl_name(fact)}.{_tmdl_name(col)}")
+            else:
+                lines.append(f"\t\t\tbaseTable: {_tmdl_name(fact)}")
+            lines += [f"\t\t\tsummarization: {func}", ""]
+
+        if sql:
+            server, database, query = sql
+            m_query = query.replace('"', '""').replace('\n', '#(lf)')
+            lines += [
+                f"\tpartition {_tmdl_name(name)} = m",
+                "\t\tmode: import",
+                "\t\tsource =",
+                "\t\t\t\tlet",
+                f'\t\t\t\t    Origen = Sql.Database("{server}", "{database}", [Query="{m_query}"])',
+                "\t\t\t\tin",
+                "\t\t\t\t    Origen",
+                "",
+            ]
+        else:
+            lines += [
+                f"\tpartition {_tmdl_name(name)} = calculated",
+                "\t\tmode: import",
+                f"\t\tsource = {self._build_dax(candidate, group_names, agg_names)}",
+                "",
+            ]
+        lines += ["\tannotation PBI_ResultType = Table", ""]
+        return Table.from_content(name, "\n".join(lines))
+
+    def add_to_model(self, model: 'SemanticModel', candidates: List[Dict[str, Any]]) -> List[str]:
+        """
+        Añade las agregaciones a ``model`` (el propio modelo o un submodelo)
+        como tablas nuevas. Devuelve los nombres de las tablas creadas.
+        """
+        existing = {t.name for t in model.tables}
+        # Agregaciones ya presentes (p.ej. de una ejecución anterior)
+        existing_mappings = {_alternate_of(t.raw_content) for t in model.tables} - {frozenset()}
+        created = []
+        counters: Dict[str, int] = {}
+        for candidate in candidates:
+            fact = candidate['fact']
+            if fact not in existing:
+                continue
+            counters[fact] = counters.get(fact, 0) + 1
+            name = f"Agg {fact} {counters[fact]}"
+            while name in existing:
+                counters[fact] += 1
+                name = f"Agg {fact} {counters[fact]}"
+            table = self.to_table(candidate, name)
+            if _alternate_of(table.raw_content) in existing_mappings:
+                print(f"  [Agg] Ya existe una agregación de {fact} con el mismo grano")
+                continue
+            model.tables.append(table)
+            model._file_metadata['tables'][name] = {'original_path': None, 'modified': True}
+            existing.add(name)
+            created.append(name)
+            mode = next((p.mode for p in self.tables[fact].partitions if p.mode), 'import')
+            if mode == 'import':
+                print(f"  ⚠️ [Agg] {fact} está en Import: Power BI solo usa '{name}' "
+                      f"si el hecho es DirectQuery")
+
+        # model.tmdl: ref table de las tablas nuevas (si el modelo las usa)
+        if created and model.model and 'ref table ' in model.model.raw_content:
+            lines = model.model.raw_content.split('\n')
+            last_ref = max(i for i, line in enumerate(lines) if line.startswith('ref table '))
+            lines[last_ref + 1:last_ref + 1] = [f"ref table {_tmdl_name(name)}" for name in created]
+            model.model = copy.copy(model.model)
+            model.model.raw_content = '\n'.join(lines)
+            model._file_metadata['model']['modified'] = True
+        return created
+
+
+def _alternate_of(raw_content: str) -> FrozenSet[str]:
+    """Mapeos ``alternateOf`` (baseColumn/baseTable + summarization) de una tabla."""
+    mappings = set()
+    base = None
+    for line in raw_content.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith(('baseColumn:', 'baseTable:')):
+            base = stripped
+        elif stripped.startswith('summarization:') and base:
+            mappings.add(f"{base} {stripped}")
+            base = None
+    return frozenset(mappings)
+
+
+def print_aggregation_candidates(candidates: List[Dict[str, Any]]) -> None:
+    """Resumen de las agregaciones propuestas."""
+    for candidate in candidates:
+        group_by = ', '.join(f"{t}[{c}]" for t, c in candidate['group_by'])
+        aggs = ', '.join(f"{f}({c or '*'})" for f, c in candidate['aggregations'])
+        print(f"  📦 {candidate['fact']}: {len(candidate['visuals'])} visuales | "
+              f"~{candidate['estimated_rows']:,} filas de {candidate['fact_rows']:,}")
+        print(f"     agrupa: {group_by}")
+        print(f"     agrega: {aggs}")
@@ -0,0 +1,35 @@
+"""
+SQL compartido sobre el catálogo DuckDB (tablas ``report*`` y
+``semantic_model*``) que usan varios módulos de análisis.
+"""
+
+# Enlace report → modelo semántico, común a todo lo que lee el uso de reports de un
+# modelo: por nombre ("<report>.SemanticModel") o por semantic_model_reference.
+# Columnas: report_id, report_name, semantic_model_id (semantic_model.id).
+REPORT_MODEL_JOIN = """
+    SELECT r.id AS report_id, r.name AS report_name, sm.id AS semantic_model_id
+    FROM report r
+    JOIN semantic_model sm
+      ON sm.name = r.name || '.SemanticModel'
+      OR (r.semantic_model_reference IS NOT NULL
+          AND r.semantic_model_reference = sm.semantic_model_id)
+"""
+
+# Tablas que lee cada medida, transitivamente: las accedidas (dependencias
+# 'table') y las de sus columnas ('column'), según
+# semantic_model_measure_dependencies (que ya incluye las de las medidas que usa).
+# Columnas: semantic_model_id, measure_name, table_name.
+MEASURE_TABLES = """
+    SELECT DISTINCT semantic_model_id, measure_name,
+           COALESCE(referenced_table, referenced_name) AS table_name
+    FROM semantic_model_measure_dependencies
+    WHERE dependency_type IN ('table', 'column')
+"""
+
+
+def has_measure_tables(conn) -> bool:
+    """True si la BD tiene ``semantic_model_measure_dependencies`` (para ``MEASURE_TABLES``)."""
+    return conn.execute(
+        "SELECT 1 FROM information_schema.tables "
+        "WHERE table_name = 'semantic_model_measure_dependencies'"
+    ).fetchone() is not None
@@ -14,10 +14,13 @@ de ciclos para evitar recursión infinita.
 
 from __future__ import annotations
 
+import hashlib
 import re
 from dataclasses import dataclass, field
 from enum import Enum, auto
-from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from .catalog_sql import REPORT_MODEL_JOIN
 
 
 # ──────────────────────────────────────────────
@@ -280,6 +283,29 @@ _RE_WORD = re.compile(r'\b[A-Za-z_][\w.]*\b')
 # Operators
 _RE_OPERATOR = re.compile(r'<>|>=|<=|&&|\|\||[+\-*/=<>&|^]')
 
+# Iteradores (contexto de fila) cuyo primer argumento es una tabla:
+# SUMX(Sales, [Amount]) → [Amount] es columna de Sales
+_RE_ITERATOR_TABLE = re.compile(
+    r"\b(?:SUMX|AVERAGEX|MINX|MAXX|COUNTX|COUNTAX|PRODUCTX|MEDIANX|GEOMEANX|"
+    r"CONCATENATEX|RANKX|FILTER|ADDCOLUMNS|SELECTCOLUMNS|GENERATE|GENERATEALL|"
+    r"STDEVX\.[PS]|VARX\.[PS]|PERCENTILEX\.(?:INC|EXC))\s*\(\s*(?:'([^']+)'|([A-Za-z_][\w ]*?))\s*,",
+    re.IGNORECASE,
+)
+
+# Versión del algoritmo de análisis: forma parte del hash de expresión para
+# que el modo incremental re-analice todo cuando cambian las reglas.
+_ANALYZER_VERSION = 3
+
+# Tipos de dependiente persistidos en semantic_model_lineage → clave en get_impact
+_LINEAGE_DEPENDENT_KEYS: Dict[str, str] = {
+    "measure": "measures",
+    "calculated_table": "calculated_tables",
+    "calculated_column": "calculated_columns",
+    "calculation_item": "calculation_items",
+    "rls": "roles",
+    "visual": "visuals",
+}
+
 
 # ──────────────────────────────────────────────
 # DaxTokenizer class
@@ -294,6 +320,12 @@ class DaxTokenizer:
         tk = DaxTokenizer(known_tables, known_measures)
         deps = tk.analyze(expression)
 
+    Con ``known_columns`` y ``measure_table_map`` las referencias ``[X]`` sin
+    tabla se resuelven contra la tabla de la medida (columna de la tabla
+    "home"), la tabla del iterador que las rodea (``SUMX(Sales, [Amount])``)
+    o la única columna del modelo con ese nombre, en lugar de tratarse
+    siempre como medidas.
+
     Carga desde DuckDB::
 
         tk = DaxTokenizer.from_duckdb(path, model_id)
@@ -306,6 +338,7 @@ class DaxTokenizer:
         known_tables: Optional[Set[str]] = None,
         known_measures: Optional[Dict[str, str]] = None,
         known_columns: Optional[Dict[str, Set[str]]] = None,
+        measure_table_map: Optional[Dict[str, str]] = None,
     ):
         """
         Args:
@@ -313,10 +346,13 @@ class DaxTokenizer:
             known_measures: Diccionario {nombre_medida: expression} de todas
                             las medidas del modelo.
             known_columns:  Diccionario {tabla: {col1, col2, ...}}.
+            measure_table_map: Diccionario {nombre_medida: tabla} con la tabla
+                            "home" de cada medida.
         """
         self.known_tables: Set[str] = known_tables or set()
         self.known_measures: Dict[str, str] = known_measures or {}
         self.known_columns: Dict[str, Set[str]] = known_columns or {}
+        self.measure_table_map: Dict[str, str] = measure_table_map or {}
         # Mapa lower → original para lookup insensible a mayúsculas
         self._measures_lower: Dict[str, str] = {
             k.lower(): k for k in self.known_measures
@@ -324,6 +360,16 @@ class DaxTokenizer:
         self._tables_lower: Dict[str, str] = {
             t.lower(): t for t in self.known_tables
         }
+        # {tabla: {col_lower: col}} para resolver [X] contra la tabla home
+        self._columns_lower: Dict[str, Dict[str, str]] = {
+            t: {c.lower(): c for c in cols}
+            for t, cols in self.known_columns.items()
+        }
+        # {col_lower: [(tabla, col)]} para [X] cuyo nombre es único en el modelo
+        self._column_owners: Dict[str, List[Tuple[str, str]]] = {}
+        for t, cols in sorted(self._columns_lower.items()):
+            for low, col in cols.items():
+                self._column_owners.setdefault(low, []).append((t, col))
         # Regex compilado una vez para detectar nombres de tabla desnudos
         # (sin [Columna] a continuación), e.g. COUNTROWS(Table), VALUES(Table)
         # Se ordena de mayor a menor longitud para evitar matches parciales.
@@ -340,8 +386,16 @@ class DaxTokenizer:
     # Public: analyze single expression
     # ──────────────────────────────────────────
 
-    def analyze(self, expression: str) -> DaxDependencies:
-        """Analiza una expresión DAX y devuelve sus dependencias."""
+    def analyze(self, expression: str, home_table: Optional[str] = None) -> DaxDependencies:
+        """
+        Analiza una expresión DAX y devuelve sus dependencias.
+
+        Args:
+            expression: Código DAX.
+            home_table: Tabla donde vive el objeto analizado.  Las referencias
+                ``[X]`` sin tabla que no son medidas conocidas pero sí columnas
+                de esta tabla se registran como columnas.
+        """
         deps = DaxDependencies()
         if not expression:
             return deps
@@ -373,14 +427,27 @@ class DaxTokenizer:
         text_no_refs = re.sub(r"'[^']+'\s*\[[^\]]+\]", ' ', text_no_refs)
 
         # 4) Standalone [Measure] references
+        home_columns = self._columns_lower.get(self._resolve_table(home_table)) if home_table else None
+        iterator_tables = [
+            self._resolve_table((m.group(1) or m.group(2)).strip())
+            for m in _RE_ITERATOR_TABLE.finditer(text)
+        ]
         for m in re.finditer(r'\[([^\]]+)\]', text_no_refs):
             ref = m.group(1).strip()
+            low = ref.lower()
             # Check if it's a known measure
-            if ref.lower() in self._measures_lower:
-                deps.measures.add(self._measures_lower[ref.lower()])
-            else:
-                # Could be a column of the current table or an unknown measure
+            if low in self._measures_lower:
+                deps.measures.add(self._measures_lower[low])
+            elif home_columns and low in home_columns:
+                # Columna de la tabla home (contexto de fila implícito)
+                deps.add_column(self._resolve_table(home_table), home_columns[low])
+            elif self._resolve_unqualified_column(low, iterator_tables, deps):
+                pass
+            elif not self.known_measures:
+                # Sin contexto del modelo: puede ser una medida desconocida
                 deps.measures.add(ref)
+            # Con contexto completo, [X] desconocido es una columna virtual
+            # (ADDCOLUMNS, SUMMARIZE, SELECTCOLUMNS...) y no una dependencia
 
         # 5) Functions – words followed by (
         for m in re.finditer(r'\b([A-Za-z_][\w.]*)\s*\(', text):
@@ -424,7 +491,7 @@ class DaxTokenizer:
         measures = measures or self.known_measures
         results: Dict[str, DaxDependencies] = {}
         for name, expr in measures.items():
-            results[name] = self.analyze(expr)
+            results[name] = self.analyze(expr, self.measure_table_map.get(name))
         return results
 
     # ──────────────────────────────────────────
@@ -434,6 +501,7 @@ class DaxTokenizer:
     def resolve_transitive_measures(
         self,
         all_deps: Dict[str, DaxDependencies],
+        names: Optional[Iterable[str]] = None,
     ) -> Dict[str, DaxDependencies]:
         """
         Resuelve dependencias transitivas de medidas.
@@ -443,8 +511,13 @@ class DaxTokenizer:
 
         Detecta ciclos para evitar recursión infinita.
 
+        Args:
+            all_deps: Dependencias directas {medida: deps}.
+            names: Medidas a resolver. Si None, se resuelven todas. Útil en
+                   modo incremental para recalcular solo las afectadas.
+
         Returns:
-            Diccionario con las mismas claves pero deps expandidas.
+            Diccionario con las deps expandidas de las medidas pedidas.
         """
         resolved: Dict[str, DaxDependencies] = {}
         resolving: Set[str] = set()  # cycle detection
@@ -481,10 +554,12 @@ class DaxTokenizer:
             resolved[name] = merged
             return merged
 
-        for name in all_deps:
-            _resolve(name)
+        if names is None:
+            for name in all_deps:
+                _resolve(name)
+            return resolved
 
-        return resolved
+        return {name: _resolve(name) for name in names if name in all_deps}
 
     # ──────────────────────────────────────────
     # Public: table dependency graph
@@ -528,21 +603,107 @@ class DaxTokenizer:
     def ensure_dependencies_table(conn) -> None:
         """
         Crea las tablas de dependencias si no existen:
-        - semantic_model_measure_dependencies (dependencias de medidas)
+        - semantic_model_measure_dependencies (dependencias de medidas); es
+          una vista sobre el almacenamiento compacto
+          ``semantic_model_measure_dependency_ids`` (IDs enteros + ENUM) y el
+          diccionario de objetos ``semantic_model_object``.  Las BDs antiguas
+          con la tabla de strings se migran automáticamente.
         - semantic_model_calculatedTable_dependencies (dependencias de tablas calculadas)
+        - semantic_model_expression_dependencies (columnas calculadas, items
+          de grupos de cálculo y filtros RLS, distinguidos por ``source_kind``)
 
         Args:
             conn: Conexión DuckDB abierta (read-write).
         """
+        try:
+            conn.execute(
+                "CREATE TYPE sm_dependency_type AS ENUM ('table', 'column', 'measure')"
+            )
+        except Exception:
+            pass  # tipo ya existe
+
+        # Diccionario de objetos por modelo: (tipo, tabla, nombre) → object_id.
+        # La unicidad de la clave la garantiza _encode_objects.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_object (
+                semantic_model_id INTEGER NOT NULL,
+                object_id INTEGER NOT NULL,
+                object_kind sm_dependency_type NOT NULL,
+                table_name VARCHAR NOT NULL,
+                object_name VARCHAR NOT NULL,
+                PRIMARY KEY (semantic_model_id, object_id)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_measure_dependency_ids (
+                semantic_model_id INTEGER NOT NULL,
+                measure_id INTEGER NOT NULL,
+                dependency_type sm_dependency_type NOT NULL,
+                referenced_id INTEGER NOT NULL,
+                is_direct BOOLEAN DEFAULT false,
+                FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
+            )
+        """)
+
+        # Migración: tabla antigua de strings → almacenamiento compacto
+        legacy = conn.execute(
+            "SELECT table_type FROM information_schema.tables "
+            "WHERE table_name = 'semantic_model_measure_dependencies'"
+        ).fetchone()
+        if legacy and legacy[0] == 'BASE TABLE':
+            try:
+                conn.execute(
+                    "ALTER TABLE semantic_model_measure_dependencies "
+                    "ADD COLUMN is_direct BOOLEAN DEFAULT false"
+                )
+            except Exception:
+                pass  # columna ya existe
+            legacy_rows = conn.execute(
+                "SELECT semantic_model_id, measure_name, measure_table, dependency_type, "
+                "       referenced_name, referenced_table, COALESCE(is_direct, false) "
+                "FROM semantic_model_measure_dependencies"
+            ).fetchall()
+            conn.execute("DROP TABLE semantic_model_measure_dependencies")
+            DaxTokenizer._insert_dependency_rows(conn, legacy_rows)
+
+        # Vista de compatibilidad con las columnas de texto de siempre
+        conn.execute("""
+            CREATE VIEW IF NOT EXISTS semantic_model_measure_dependencies AS
+            SELECT d.semantic_model_id,
+                   m.object_name AS measure_name,
+                   m.table_name AS measure_table,
+                   CAST(d.dependency_type AS VARCHAR) AS dependency_type,
+                   r.object_name AS referenced_name,
+                   CASE WHEN d.dependency_type = 'table' THEN NULL
+                        ELSE r.table_name END AS referenced_table,
+                   d.is_direct
+            FROM semantic_model_measure_dependency_ids d
+            JOIN semantic_model_object m
+              ON m.semantic_model_id = d.semantic_model_id AND m.object_id = d.measure_id
+            JOIN semantic_model_object r
+              ON r.semantic_model_id = d.semantic_model_id AND r.object_id = d.referenced_id
+        """)
+
+        # Hash de la expresión de cada medida tal y como se analizó por última vez
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_measure_expression_hash (
+                semantic_model_id INTEGER NOT NULL,
+                measure_name VARCHAR NOT NULL,
+                measure_table VARCHAR,
+                expression_hash VARCHAR NOT NULL,
+                updated_at TIMESTAMP DEFAULT now(),
+                PRIMARY KEY (semantic_model_id, measure_name)
+            )
+        """)
+        
         conn.execute(
-            "CREATE SEQUENCE IF NOT EXISTS seq_sm_measure_dep_id START 1"
+            "CREATE SEQUENCE IF NOT EXISTS seq_sm_calc_table_dep_id START 1"
         )
         conn.execute("""
-            CREATE TABLE IF NOT EXISTS semantic_model_measure_dependencies (
-                id INTEGER PRIMARY KEY DEFAULT nextval('seq_sm_measure_dep_id'),
+            CREATE TABLE IF NOT EXISTS semantic_model_calculatedTable_dependencies (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_sm_calc_table_dep_id'),
                 semantic_model_id INTEGER NOT NULL,
-                measure_name VARCHAR NOT NULL,
-                measure_table VARCHAR NOT NULL,
+                calculated_table_name VARCHAR NOT NULL,
                 dependency_type VARCHAR NOT NULL,
                 referenced_name VARCHAR NOT NULL,
                 referenced_table VARCHAR,
@@ -550,15 +711,17 @@ class DaxTokenizer:
                 FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
             )
         """)
-        
+
         conn.execute(
-            "CREATE SEQUENCE IF NOT EXISTS seq_sm_calc_table_dep_id START 1"
+            "CREATE SEQUENCE IF NOT EXISTS seq_sm_expr_dep_id START 1"
         )
         conn.execute("""
-            CREATE TABLE IF NOT EXISTS semantic_model_calculatedTable_dependencies (
-                id INTEGER PRIMARY KEY DEFAULT nextval('seq_sm_calc_table_dep_id'),
+            CREATE TABLE IF NOT EXISTS semantic_model_expression_dependencies (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_sm_expr_dep_id'),
                 semantic_model_id INTEGER NOT NULL,
-                calculated_table_name VARCHAR NOT NULL,
+                source_kind VARCHAR NOT NULL,
+                source_table VARCHAR NOT NULL,
+                source_name VARCHAR NOT NULL,
                 dependency_type VARCHAR NOT NULL,
                 referenced_name VARCHAR NOT NULL,
                 referenced_table VARCHAR,
@@ -620,6 +783,8 @@ class DaxTokenizer:
                     [semantic_model_id],
                 ).fetchall()
                 measure_table_map = {r[0]: r[1] for r in rows}
+            if not self.measure_table_map:
+                self.measure_table_map = measure_table_map
 
             # Calcular dependencias transitivas
             all_deps = self.analyze_all_measures()
@@ -628,65 +793,238 @@ class DaxTokenizer:
             # Crear tabla + secuencia (reutiliza ensure_dependencies_table)
             DaxTokenizer.ensure_dependencies_table(conn)
 
-            # Limpiar datos anteriores de este modelo
+            # Limpiar datos anteriores de este modelo (el diccionario de
+            # objetos se regenera para no acumular IDs huérfanos)
+            conn.execute(
+                "DELETE FROM semantic_model_measure_dependency_ids "
+                "WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            )
+            conn.execute(
+                "DELETE FROM semantic_model_object WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            )
+            # Los bitsets de uso por report de este modelo usan los IDs del
+            # diccionario (se regeneran tras insertar las dependencias)
+            DaxTokenizer.ensure_report_usage_table(conn)
+            conn.execute(
+                "DELETE FROM semantic_model_report_usage WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            )
             conn.execute(
-                "DELETE FROM semantic_model_measure_dependencies "
+                "DELETE FROM semantic_model_measure_expression_hash "
                 "WHERE semantic_model_id = ?",
                 [semantic_model_id],
             )
 
             # Construir filas a insertar
             rows_to_insert: List[Tuple] = []
-
             for measure_name, deps in resolved.items():
-                owner_table = measure_table_map.get(measure_name, "")
+                rows_to_insert.extend(self._build_dependency_rows(
+                    semantic_model_id, measure_name, deps,
+                    all_deps[measure_name], measure_table_map,
+                ))
 
-                # Dependencias tipo "table"
-                for tbl in sorted(deps.tables):
-                    rows_to_insert.append((
-                        semantic_model_id,
-                        measure_name,
-                        owner_table,
-                        "table",
-                        tbl,
-                        None,
-                    ))
+            # Insertar en batch
+            self._insert_dependency_rows(conn, rows_to_insert)
+            self._upsert_expression_hashes(
+                conn, semantic_model_id, list(self.known_measures),
+                measure_table_map,
+            )
+            # Los bitsets borrados arriba apuntaban a los IDs antiguos:
+            # se regeneran para este modelo con el diccionario nuevo
+            DaxTokenizer._refresh_report_usage(conn, semantic_model_id)
 
-                # Dependencias tipo "column"
-                for tbl, cols in sorted(deps.columns.items()):
-                    for col in sorted(cols):
-                        rows_to_insert.append((
-                            semantic_model_id,
-                            measure_name,
-                            owner_table,
-                            "column",
-                            col,
-                            tbl,
-                        ))
+            return len(rows_to_insert)
 
-                # Dependencias tipo "measure"
-                for mref in sorted(deps.measures):
-                    ref_table = measure_table_map.get(mref, "")
-                    rows_to_insert.append((
-                        semantic_model_id,
-                        measure_name,
-                        owner_table,
-                        "measure",
-                        mref,
-                        ref_table,
-                    ))
+        finally:
+            if _own_conn:
+                conn.close()
 
-            # Insertar en batch
-            if rows_to_insert:
-                conn.executemany(
-                    "INSERT INTO semantic_model_measure_dependencies "
-                    "(semantic_model_id, measure_name, measure_table, "
-                    " dependency_type, referenced_name, referenced_table) "
-                    "VALUES (?, ?, ?, ?, ?, ?)",
-                    rows_to_insert,
+    # ──────────────────────────────────────────
+    # Public: incremental dependency update
+    # ──────────────────────────────────────────
+
+    def update_dependencies_incremental(
+        self,
+        db_path: str,
+        semantic_model_id: Optional[int] = None,
+        measure_table_map: Optional[Dict[str, str]] = None,
+        conn=None,
+    ) -> Dict[str, int]:
+        """
+        Actualiza ``semantic_model_measure_dependencies`` solo para las medidas
+        afectadas por cambios desde el último análisis.
+
+        1. Compara el hash de cada expresión con el guardado en
+           ``semantic_model_measure_expression_hash``. El hash incluye los
+           candidatos actuales de sus ``[X]`` sin tabla, de modo que añadir
+           o renombrar una medida o columna solo invalida las medidas que
+           usan ese nombre.
+        2. Re-analiza únicamente las medidas nuevas o modificadas; las
+           dependencias directas del resto se leen de la BD (``is_direct``).
+        3. Con el grafo inverso (medida → medidas que la usan) obtiene los
+           ancestros afectados y recalcula solo sus cierres transitivos.
+        4. Reemplaza las filas de las medidas afectadas y elimina las de
+           medidas borradas.
+        5. Elimina del diccionario ``semantic_model_object`` los objetos que
+           ya no existen en el modelo.
+
+        Si el modelo no tiene hashes guardados (BD antigua o primera
+        ejecución) se hace un cálculo completo con ``save_dependencies_to_db``.
+
+        Args:
+            db_path: Ruta al fichero .duckdb.
+            semantic_model_id: ID numérico del modelo. Si None, usa el primero.
+            measure_table_map: {measure_name: table_name}. Si None se infiere
+                desde la DB.
+            conn: Conexión DuckDB (opcional).
+
+        Returns:
+            Dict con ``changed``, ``removed``, ``affected`` (medidas cuyo
+            cierre se recalculó) e ``inserted`` (filas insertadas).
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path)
+        try:
+            if semantic_model_id is None:
+                row = conn.execute(
+                    "SELECT id FROM semantic_model LIMIT 1"
+                ).fetchone()
+                if not row:
+                    raise ValueError("No semantic models found in database")
+                semantic_model_id = row[0]
+
+            if measure_table_map is None:
+                rows = conn.execute(
+                    "SELECT measure_name, table_name FROM semantic_model_measure "
+                    "WHERE semantic_model_id = ?",
+                    [semantic_model_id],
+                ).fetchall()
+                measure_table_map = {r[0]: r[1] for r in rows}
+            if not self.measure_table_map:
+                self.measure_table_map = measure_table_map
+
+            DaxTokenizer.ensure_dependencies_table(conn)
+
+            stored_hashes: Dict[str, str] = {
+                r[0]: r[1] for r in conn.execute(
+                    "SELECT measure_name, expression_hash "
+                    "FROM semantic_model_measure_expression_hash "
+                    "WHERE semantic_model_id = ?",
+                    [semantic_model_id],
+                ).fetchall()
+            }
+
+            if not stored_hashes:
+                inserted = self.save_dependencies_to_db(
+                    db_path, semantic_model_id=semantic_model_id,
+                    measure_table_map=measure_table_map, conn=conn,
+                )
+                n = len(self.known_measures)
+                return {"changed": n, "removed": 0, "affected": n, "inserted": inserted}
+
+            # 1) Diff de expresiones: el hash incluye a qué resuelven hoy sus
+            #    [X] sin tabla, así que solo se invalidan las medidas cuya
+            #    resolución cambia al añadir o renombrar medidas y columnas
+            changed: Set[str] = {
+                name for name in self.known_measures
+                if stored_hashes.get(name) != self._measure_hash(
+                    name, measure_table_map.get(name, "")
+                )
+            }
+            removed: Set[str] = set(stored_hashes) - set(self.known_measures)
+
+            if not changed and not removed:
+                return {"changed": 0, "removed": 0, "affected": 0, "inserted": 0}
+
+            # 2) Dependencias directas: BD para las intactas, análisis para el resto
+            direct: Dict[str, DaxDependencies] = {
+                name: DaxDependencies()
+                for name in self.known_measures if name not in changed
+            }
+            for mname, dep_type, ref_name, ref_table in conn.execute(
+                "SELECT measure_name, dependency_type, referenced_name, referenced_table "
+                "FROM semantic_model_measure_dependencies "
+                "WHERE semantic_model_id = ? AND is_direct",
+                [semantic_model_id],
+            ).fetchall():
+                deps = direct.get(mname)
+                if deps is None:
+                    continue
+                if dep_type == "table":
+                    deps.tables.add(ref_name)
+                elif dep_type == "column":
+                    deps.add_column(ref_table, ref_name)
+                elif dep_type == "measure":
+                    deps.measures.add(ref_name)
+            for name in changed:
+                direct[name] = self.analyze(
+                    self.known_measures[name], measure_table_map.get(name)
                 )
 
-            return len(rows_to_insert)
+            # 3) Ancestros afectados vía grafo inverso
+            reverse: Dict[str, Set[str]] = {}
+            for name, deps in direct.items():
+                for ref in deps.measures:
+                    reverse.setdefault(ref, set()).add(name)
+
+            affected: Set[str] = set()
+            pending = list(changed | removed)
+            while pending:
+                current = pending.pop()
+                for parent in reverse.get(current, ()):
+                    if parent not in affected:
+                        affected.add(parent)
+                        pending.append(parent)
+            affected |= changed
+
+            resolved = self.resolve_transitive_measures(direct, names=affected)
+
+            # 4) Reemplazo de filas solo para las medidas afectadas/borradas
+            stale = sorted(affected | removed)
+            conn.execute(
+                "DELETE FROM semantic_model_measure_dependency_ids "
+                "WHERE semantic_model_id = ? AND measure_id IN ("
+                "    SELECT object_id FROM semantic_model_object "
+                "    WHERE semantic_model_id = ? AND object_kind = 'measure' "
+                "      AND list_contains(?, object_name))",
+                [semantic_model_id, semantic_model_id, stale],
+            )
+
+            rows_to_insert: List[Tuple] = []
+            for measure_name, deps in resolved.items():
+                rows_to_insert.extend(self._build_dependency_rows(
+                    semantic_model_id, measure_name, deps,
+                    direct[measure_name], measure_table_map,
+                ))
+            self._insert_dependency_rows(conn, rows_to_insert)
+
+            # 5) Objetos del diccionario que ya no están en el modelo ni los
+            #    usa ninguna dependencia; los bitsets de uso por report
+            #    apuntan a sus IDs, así que se recalculan
+            if self._delete_removed_objects(conn, semantic_model_id):
+                DaxTokenizer._refresh_report_usage(conn, semantic_model_id)
+
+            if removed:
+                conn.execute(
+                    "DELETE FROM semantic_model_measure_expression_hash "
+                    "WHERE semantic_model_id = ? AND list_contains(?, measure_name)",
+                    [semantic_model_id, sorted(removed)],
+                )
+            self._upsert_expression_hashes(
+                conn, semantic_model_id, sorted(changed), measure_table_map,
+            )
+
+            return {
+                "changed": len(changed),
+                "removed": len(removed),
+                "affected": len(affected),
+                "inserted": len(rows_to_insert),
+            }
 
         finally:
             if _own_conn:
@@ -799,6 +1137,536 @@ class DaxTokenizer:
             if _own_conn:
                 conn.close()
 
+    def save_expression_dependencies_to_db(
+        self,
+        db_path: str,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+    ) -> int:
+        """
+        Analiza el resto de expresiones DAX del modelo y guarda sus
+        dependencias en ``semantic_model_expression_dependencies``:
+
+        * **calculated_column** – ``semantic_model_column`` con ``is_calculated``.
+        * **calculation_item** – ``semantic_model_calculation_item``.
+        * **rls** – filtros de ``semantic_model_role_permission``
+          (``source_name`` es el rol, ``source_table`` la tabla filtrada).
+
+        Las referencias ``[X]`` se resuelven contra la tabla de origen y las
+        medidas referenciadas se expanden con su cierre transitivo.
+
+        Returns:
+            Número de filas insertadas.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path)
+        try:
+            if semantic_model_id is None:
+                row = conn.execute(
+                    "SELECT id FROM semantic_model LIMIT 1"
+                ).fetchone()
+                if not row:
+                    raise ValueError("No semantic models found in database")
+                semantic_model_id = row[0]
+
+            sources: List[Tuple[str, str, str, str]] = []
+            queries = [
+                ("calculated_column",
+                 "SELECT table_name, column_name, expression FROM semantic_model_column "
+                 "WHERE semantic_model_id = ? AND is_calculated"),
+                ("calculation_item",
+                 "SELECT table_name, item_name, expression FROM semantic_model_calculation_item "
+                 "WHERE semantic_model_id = ?"),
+                ("rls",
+                 "SELECT table_name, role_name, filter_expression FROM semantic_model_role_permission "
+                 "WHERE semantic_model_id = ?"),
+            ]
+            for kind, sql in queries:
+                try:
+                    rows = conn.execute(sql, [semantic_model_id]).fetchall()
+                except Exception:
+                    rows = []  # La tabla/columna puede no existir en DBs antiguas
+                sources.extend((kind, tbl, name, expr) for tbl, name, expr in rows if expr)
+
+            DaxTokenizer.ensure_dependencies_table(conn)
+            conn.execute(
+                "DELETE FROM semantic_model_expression_dependencies "
+                "WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            )
+
+            resolved_measures: Optional[Dict[str, DaxDependencies]] = None
+            rows_to_insert: List[Tuple] = []
+
+            for kind, source_table, source_name, expression in sources:
+                deps = self.analyze(expression, source_table)
+
+                # Expandir medidas referenciadas con su cierre transitivo
+                if deps.measures:
+                    if resolved_measures is None:
+                        resolved_measures = self.resolve_transitive_measures(
+                            self.analyze_all_measures()
+                        )
+                    for mref in list(deps.measures):
+                        child = resolved_measures.get(mref)
+                        if child is None:
+                            continue
+                        deps.tables |= child.tables
+                        for t, cols in child.columns.items():
+                            deps.columns.setdefault(t, set()).update(cols)
+                        deps.measures |= child.measures
+
+                for tbl in sorted(deps.tables):
+                    rows_to_insert.append((
+                        semantic_model_id, kind, source_table, source_name,
+                        "table", tbl, None,
+                    ))
+                for tbl, cols in sorted(deps.columns.items()):
+                    for col in sorted(cols):
+                        rows_to_insert.append((
+                            semantic_model_id, kind, source_table, source_name,
+                            "column", col, tbl,
+                        ))
+                for mref in sorted(deps.measures):
+                    rows_to_insert.append((
+                        semantic_model_id, kind, source_table, source_name,
+                        "measure", mref, self.measure_table_map.get(mref),
+                    ))
+
+            if rows_to_insert:
+                conn.executemany(
+                    "INSERT INTO semantic_model_expression_dependencies "
+                    "(semantic_model_id, source_kind, source_table, source_name, "
+                    " dependency_type, referenced_name, referenced_table) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows_to_insert,
+                )
+
+            return len(rows_to_insert)
+
+        finally:
+            if _own_conn:
+                conn.close()
+
+    # ──────────────────────────────────────────
+    # Public: reverse lineage (impact analysis)
+    # ──────────────────────────────────────────
+
+    @staticmethod
+    def ensure_report_usage_table(conn) -> None:
+        """
+        Crea ``semantic_model_report_usage``: columnas y medidas que usa cada
+        report como bitset sobre ``semantic_model_object`` (bit i = object_id i,
+        BLOB little-endian), de modo que el uso de varios reports se une con
+        un OR.
+        """
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_report_usage (
+                semantic_model_id INTEGER NOT NULL,
+                report_id INTEGER NOT NULL,
+                report_name VARCHAR NOT NULL,
+                usage_bits BLOB NOT NULL,
+                object_count INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT now(),
+                PRIMARY KEY (semantic_model_id, report_id),
+                FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
+            )
+        """)
+
+    @staticmethod
+    def save_report_usage_to_db(
+        db_path: str,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+    ) -> int:
+        """
+        Calcula el bitset de uso de cada report asociado al modelo (por nombre
+        o por ``semantic_model_reference``) y lo guarda en
+        ``semantic_model_report_usage``. Las columnas y medidas usadas se dan
+        de alta en el diccionario ``semantic_model_object`` si no existen.
+
+        Returns:
+            Número de reports guardados.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path)
+        try:
+            if semantic_model_id is None:
+                row = conn.execute(
+                    "SELECT id FROM semantic_model LIMIT 1"
+                ).fetchone()
+                if not row:
+                    raise ValueError("No semantic models found in database")
+                semantic_model_id = row[0]
+
+            DaxTokenizer.ensure_dependencies_table(conn)
+            DaxTokenizer.ensure_report_usage_table(conn)
+
+            rows = conn.execute(f"""
+                WITH model_reports AS (
+                    SELECT report_id AS id, report_name AS name
+                    FROM ({REPORT_MODEL_JOIN}) WHERE semantic_model_id = ?
+                )
+                SELECT mr.id, mr.name, 'column' AS kind, c.table_name, c.column_name
+                FROM report_column_used c JOIN model_reports mr ON mr.id = c.report_id
+                UNION
+                SELECT mr.id, mr.name, 'measure' AS kind, m.table_name, m.measure_name
+                FROM report_measure_used m JOIN model_reports mr ON mr.id = m.report_id
+            """, [semantic_model_id]).fetchall()
+
+            ids = DaxTokenizer._encode_objects(
+                conn, semantic_model_id, {(kind, tbl, name) for _, _, kind, tbl, name in rows}
+            )
+            usage: Dict[int, List] = {}
+            for report_id, report_name, kind, tbl, name in rows:
+                entry = usage.setdefault(report_id, [report_name, 0, 0])
+                entry[1] |= 1 << ids[(kind, tbl, name)]
+                entry[2] += 1
+
+            conn.execute(
+                "DELETE FROM semantic_model_report_usage WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            )
+            if usage:
+                conn.executemany(
+                    "INSERT INTO semantic_model_report_usage "
+                    "(semantic_model_id, report_id, report_name, usage_bits, object_count) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (semantic_model_id, report_id, name,
+                         bits.to_bytes((bits.bit_length() + 7) // 8, "little"), count)
+                        for report_id, (name, bits, count) in usage.items()
+                    ],
+                )
+            return len(usage)
+        finally:
+            if _own_conn:
+                conn.close()
+
+    @staticmethod
+    def ensure_lineage_table(conn) -> None:
+        """
+        Crea ``semantic_model_lineage``: índice inverso objeto → dependientes.
+
+        Cada fila indica que ``dependent_*`` (medida, tabla calculada o visual)
+        depende, directa o transitivamente (``depth`` > 1), del objeto
+        ``object_*`` (columna, medida o tabla).  Para visuales,
+        ``dependent_table`` es el nombre del report y ``page_name`` la página.
+        """
+        conn.execute(
+            "CREATE SEQUENCE IF NOT EXISTS seq_sm_lineage_id START 1"
+        )
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_lineage (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_sm_lineage_id'),
+                semantic_model_id INTEGER NOT NULL,
+                object_type VARCHAR NOT NULL,
+                object_table VARCHAR NOT NULL,
+                object_name VARCHAR NOT NULL,
+                dependent_type VARCHAR NOT NULL,
+                dependent_table VARCHAR,
+                dependent_name VARCHAR NOT NULL,
+                page_name VARCHAR,
+                depth INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT now(),
+                FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
+            )
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sm_lineage_object "
+            "ON semantic_model_lineage (semantic_model_id, object_table, object_name)"
+        )
+
+    @staticmethod
+    def build_lineage_index(
+        db_path: str,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+    ) -> int:
+        """
+        Construye el índice de linaje inverso de un modelo y lo guarda en
+        ``semantic_model_lineage``.
+
+        Aristas (objeto → dependiente) consideradas:
+
+        * columnas / tablas / medidas → medidas
+          (``semantic_model_measure_dependencies``)
+        * columnas / tablas / medidas → tablas calculadas
+          (``semantic_model_calculatedTable_dependencies``); a su vez, una
+          tabla calculada propaga el impacto a todas sus columnas.
+        * columnas / tablas / medidas → columnas calculadas, items de cálculo
+          y filtros RLS (``semantic_model_expression_dependencies``); una
+          columna calculada propaga el impacto a sus propios dependientes.
+        * columnas / medidas → visuales
+          (``report_column_used`` / ``report_measure_used`` de los reports
+          asociados al modelo).
+
+        Para cada columna, medida y tabla se recorre el grafo en anchura y se
+        persisten todos los dependientes alcanzables con su profundidad.
+
+        Returns:
+            Número de filas insertadas.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path)
+        try:
+            if semantic_model_id is None:
+                row = conn.execute(
+                    "SELECT id FROM semantic_model LIMIT 1"
+                ).fetchone()
+                if not row:
+                    raise ValueError("No semantic models found in database")
+                semantic_model_id = row[0]
+
+            DaxTokenizer.ensure_dependencies_table(conn)
+            DaxTokenizer.ensure_lineage_table(conn)
+
+            # Nodo = (tipo, tabla, nombre).  Tablas y tablas calculadas: nombre "".
+            measure_table_map: Dict[str, str] = {
+                r[0]: r[1] for r in conn.execute(
+                    "SELECT measure_name, table_name FROM semantic_model_measure "
+                    "WHERE semantic_model_id = ?",
+                    [semantic_model_id],
+                ).fetchall()
+            }
+
+            def _object_node(dep_type: str, ref_name: str, ref_table: Optional[str]) -> Tuple[str, str, str]:
+                if dep_type == "table":
+                    return ("table", ref_name, "")
+                if dep_type == "measure":
+                    return ("measure", measure_table_map.get(ref_name, ref_table or ""), ref_name)
+                return ("column", ref_table or "", ref_name)
+
+            edges: Dict[Tuple[str, str, str], Set[Tuple[str, str, str]]] = {}
+
+            def _add_edge(src: Tuple[str, str, str], dst: Tuple[str, str, str]) -> None:
+                if src != dst:
+                    edges.setdefault(src, set()).add(dst)
+
+            # Medidas: si hay marcas is_direct se usan solo las directas,
+            # si no (BD antigua) el cierre transitivo guardado también sirve.
+            measure_rows = conn.execute(
+                "SELECT measure_name, dependency_type, referenced_name, "
+                "       referenced_table, is_direct "
+                "FROM semantic_model_measure_dependencies "
+                "WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            ).fetchall()
+            has_direct = any(r[4] for r in measure_rows)
+            for mname, dep_type, ref_name, ref_table, is_direct in measure_rows:
+                if has_direct and not is_direct:
+                    continue
+                _add_edge(
+                    _object_node(dep_type, ref_name, ref_table),
+                    ("measure", measure_table_map.get(mname, ""), mname),
+                )
+
+            # Tablas calculadas
+            calc_rows = conn.execute(
+                "SELECT calculated_table_name, dependency_type, referenced_name, referenced_table "
+                "FROM semantic_model_calculatedTable_dependencies "
+                "WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            ).fetchall()
+            calc_tables: Set[str] = set()
+            for ct_name, dep_type, ref_name, ref_table in calc_rows:
+                calc_tables.add(ct_name)
+                _add_edge(
+                    _object_node(dep_type, ref_name, ref_table),
+                    ("calculated_table", ct_name, ""),
+                )
+
+            # Columnas calculadas, items de cálculo y filtros RLS.  Una columna
+            # calculada propaga a su vez el impacto a sus propios dependientes.
+            try:
+                expr_rows = conn.execute(
+                    "SELECT source_kind, source_table, source_name, dependency_type, "
+                    "       referenced_name, referenced_table "
+                    "FROM semantic_model_expression_dependencies "
+                    "WHERE semantic_model_id = ?",
+                    [semantic_model_id],
+                ).fetchall()
+            except Exception:
+                expr_rows = []
+            for kind, src_table, src_name, dep_type, ref_name, ref_table in expr_rows:
+                dependent = (kind, src_table, src_name)
+                _add_edge(_object_node(dep_type, ref_name, ref_table), dependent)
+                if kind == "calculated_column":
+                    _add_edge(dependent, ("column", src_table, src_name))
+
+            # Visuales de los reports asociados al modelo
+            visual_rows = conn.execute(f"""
+                SELECT 'column', c.table_name, c.column_name, mr.report_name, c.page_name, c.visual_name
+                FROM report_column_used c
+                JOIN ({REPORT_MODEL_JOIN}) mr ON mr.report_id = c.report_id
+                WHERE mr.semantic_model_id = ?
+                UNION
+                SELECT 'measure', m.table_name, m.measure_name, mr.report_name, m.page_name, m.visual_name
+                FROM report_measure_used m
+                JOIN ({REPORT_MODEL_JOIN}) mr ON mr.report_id = m.report_id
+                WHERE mr.semantic_model_id = ?
+            """, [semantic_model_id, semantic_model_id]).fetchall()
+            for obj_type, tbl, name, report_name, page_name, visual_name in visual_rows:
+                src = _object_node(obj_type, name, tbl)
+                _add_edge(src, ("visual", report_name, f"{page_name}\x1f{visual_name}"))
+
+            # Una tabla calculada "alimenta" la tabla y cada una de sus columnas
+            nodes_by_table: Dict[str, Set[Tuple[str, str, str]]] = {}
+            for src in list(edges):
+                if src[0] in ("column", "table"):
+                    nodes_by_table.setdefault(src[1], set()).add(src)
+            for ct_name in calc_tables:
+                ct_node = ("calculated_table", ct_name, "")
+                _add_edge(ct_node, ("table", ct_name, ""))
+                for node in nodes_by_table.get(ct_name, ()):
+                    _add_edge(ct_node, node)
+
+            # BFS desde cada objeto consultable
+            rows_to_insert: List[Tuple] = []
+            for src in edges:
+                if src[0] not in ("column", "measure", "table"):
+                    continue
+                seen: Dict[Tuple[str, str, str], int] = {}
+                frontier = [src]
+                depth = 0
+                while frontier:
+                    depth += 1
+                    next_frontier = []
+                    for node in frontier:
+                        for dst in edges.get(node, ()):
+                            if dst in seen or dst == src:
+                                continue
+                            seen[dst] = depth
+                            next_frontier.append(dst)
+                    frontier = next_frontier
+
+                for (dst_type, dst_table, dst_name), d in seen.items():
+                    if dst_type not in _LINEAGE_DEPENDENT_KEYS:
+                        continue
+                    page_name = None
+                    if dst_type == "visual":
+                        page_name, dst_name = dst_name.split("\x1f", 1)
+                    elif dst_type == "calculated_table":
+                        dst_name = dst_table
+                    rows_to_insert.append((
+                        semantic_model_id, src[0], src[1], src[2],
+                        dst_type, dst_table, dst_name, page_name, d,
+                    ))
+
+            conn.execute(
+                "DELETE FROM semantic_model_lineage WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            )
+            if rows_to_insert:
+                conn.executemany(
+                    "INSERT INTO semantic_model_lineage "
+                    "(semantic_model_id, object_type, object_table, object_name, "
+                    " dependent_type, dependent_table, dependent_name, page_name, depth) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows_to_insert,
+                )
+
+            return len(rows_to_insert)
+
+        finally:
+            if _own_conn:
+                conn.close()
+
+    @staticmethod
+    def get_impact(
+        db_path: str,
+        table_name: str,
+        object_name: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+    ) -> Dict[str, List[Dict]]:
+        """
+        ¿Qué se rompe si elimino este objeto?  Consulta ``semantic_model_lineage``.
+
+        Args:
+            db_path: Ruta al fichero .duckdb.
+            table_name: Tabla del objeto (o de la medida).
+            object_name: Columna o medida.  Si None, se analiza la tabla entera
+                (todas sus columnas, medidas y referencias directas a la tabla).
+            semantic_model_id: ID numérico del modelo. Si None, usa el primero.
+            conn: Conexión DuckDB (opcional).
+
+        Returns:
+            ``{"measures": [...], "calculated_tables": [...],
+            "calculated_columns": [...], "calculation_items": [...],
+            "roles": [...], "visuals": [...], "reports": [...]}``; cada
+            elemento es un dict con los campos de la fila y ``depth`` mínimo.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path, read_only=True)
+        try:
+            if semantic_model_id is None:
+                row = conn.execute(
+                    "SELECT id FROM semantic_model LIMIT 1"
+                ).fetchone()
+                if not row:
+                    raise ValueError("No semantic models found in database")
+                semantic_model_id = row[0]
+
+            sql = (
+                "SELECT dependent_type, dependent_table, dependent_name, page_name, "
+                "       MIN(depth) AS depth "
+                "FROM semantic_model_lineage "
+                "WHERE semantic_model_id = ? AND object_table = ? "
+            )
+            params: List = [semantic_model_id, table_name]
+            if object_name is not None:
+                sql += "AND object_name = ? "
+                params.append(object_name)
+            sql += (
+                "GROUP BY dependent_type, dependent_table, dependent_name, page_name "
+                "ORDER BY depth, dependent_type, dependent_table, dependent_name"
+            )
+
+            result: Dict[str, List[Dict]] = {
+                key: [] for key in _LINEAGE_DEPENDENT_KEYS.values()
+            }
+            result["reports"] = []
+            reports: Dict[str, int] = {}
+            for dep_type, dep_table, dep_name, page_name, depth in conn.execute(sql, params).fetchall():
+                if dep_type == "measure":
+                    result["measures"].append(
+                        {"table": dep_table, "name": dep_name, "depth": depth}
+                    )
+                elif dep_type == "calculated_table":
+                    result["calculated_tables"].append(
+                        {"name": dep_name, "depth": depth}
+                    )
+                elif dep_type == "visual":
+                    result["visuals"].append(
+                        {"report": dep_table, "page": page_name, "name": dep_name, "depth": depth}
+                    )
+                    reports[dep_table] = min(depth, reports.get(dep_table, depth))
+                elif dep_type in _LINEAGE_DEPENDENT_KEYS:
+                    result[_LINEAGE_DEPENDENT_KEYS[dep_type]].append(
+                        {"table": dep_table, "name": dep_name, "depth": depth}
+                    )
+            result["reports"] = [
+                {"name": name, "depth": d} for name, d in sorted(reports.items())
+            ]
+            return result
+
+        finally:
+            if _own_conn:
+                conn.close()
+
     # ──────────────────────────────────────────
     # Classmethod: from DuckDB
     # ──────────────────────────────────────────
@@ -863,7 +1731,10 @@ class DaxTokenizer:
                 known_measures[mname] = expr or ""
                 measure_table_map[mname] = tbl
 
-            return cls(known_tables, known_measures, known_columns), measure_table_map
+            return (
+                cls(known_tables, known_measures, known_columns, measure_table_map),
+                measure_table_map,
+            )
 
         finally:
             if _own_conn:
@@ -873,6 +1744,240 @@ class DaxTokenizer:
     # Internal helpers
     # ──────────────────────────────────────────
 
+    @staticmethod
+    def _build_dependency_rows(
+        semantic_model_id: int,
+        measure_name: str,
+        deps: DaxDependencies,
+        direct: DaxDependencies,
+        measure_table_map: Dict[str, str],
+    ) -> List[Tuple]:
+        """Filas de ``semantic_model_measure_dependencies`` para una medida."""
+        owner_table = measure_table_map.get(measure_name, "")
+        rows: List[Tuple] = []
+
+        # Dependencias tipo "table"
+        for tbl in sorted(deps.tables):
+            rows.append((
+                semantic_model_id, measure_name, owner_table,
+                "table", tbl, None, tbl in direct.tables,
+            ))
+
+        # Dependencias tipo "column"
+        for tbl, cols in sorted(deps.columns.items()):
+            direct_cols = direct.columns.get(tbl, set())
+            for col in sorted(cols):
+                rows.append((
+                    semantic_model_id, measure_name, owner_table,
+                    "column", col, tbl, col in direct_cols,
+                ))
+
+        # Dependencias tipo "measure"
+        for mref in sorted(deps.measures):
+            rows.append((
+                semantic_model_id, measure_name, owner_table,
+                "measure", mref, measure_table_map.get(mref, ""),
+                mref in direct.measures,
+            ))
+
+        return rows
+
+    @staticmethod
+    def _reference_key(dependency_type: str, referenced_name: str,
+                       referenced_table: Optional[str]) -> Tuple[str, str, str]:
+        """Clave del diccionario de objetos para el objeto referenciado."""
+        if dependency_type == "table":
+            return ("table", "", referenced_name)
+        return (dependency_type, referenced_table or "", referenced_name)
+
+    @staticmethod
+    def _encode_objects(
+        conn,
+        semantic_model_id: int,
+        keys: Set[Tuple[str, str, str]],
+    ) -> Dict[Tuple[str, str, str], int]:
+        """
+        Devuelve {(tipo, tabla, nombre): object_id} para ``keys``, dando de
+        alta en ``semantic_model_object`` los objetos que aún no existen.
+        """
+        ids: Dict[Tuple[str, str, str], int] = {
+            (kind, tbl, name): oid
+            for oid, kind, tbl, name in conn.execute(
+                "SELECT object_id, CAST(object_kind AS VARCHAR), table_name, object_name "
+                "FROM semantic_model_object WHERE semantic_model_id = ?",
+                [semantic_model_id],
+            ).fetchall()
+        }
+        next_id = max(ids.values(), default=0) + 1
+        new_rows: List[Tuple] = []
+        for key in sorted(keys - ids.keys()):
+            ids[key] = next_id
+            new_rows.append((semantic_model_id, next_id) + key)
+            next_id += 1
+        if new_rows:
+            conn.executemany(
+                "INSERT INTO semantic_model_object "
+                "(semantic_model_id, object_id, object_kind, table_name, object_name) "
+                "VALUES (?, ?, ?, ?, ?)",
+                new_rows,
+            )
+        return ids
+
+    @staticmethod
+    def _insert_dependency_rows(conn, rows: List[Tuple]) -> None:
+        """
+        Inserta filas con la forma de ``semantic_model_measure_dependencies``
+        (semantic_model_id, measure_name, measure_table, dependency_type,
+        referenced_name, referenced_table, is_direct) codificándolas con IDs.
+        """
+        by_model: Dict[int, List[Tuple]] = {}
+        for row in rows:
+            by_model.setdefault(row[0], []).append(row)
+
+        for semantic_model_id, model_rows in by_model.items():
+            keys: Set[Tuple[str, str, str]] = set()
+            for _, mname, mtable, dep_type, ref_name, ref_table, _ in model_rows:
+                keys.add(("measure", mtable or "", mname))
+                keys.add(DaxTokenizer._reference_key(dep_type, ref_name, ref_table))
+            ids = DaxTokenizer._encode_objects(conn, semantic_model_id, keys)
+
+            # Inserción columnar (listas + unnest): mucho más rápida que
+            # executemany fila a fila para cierres transitivos grandes
+            conn.execute(
+                "INSERT INTO semantic_model_measure_dependency_ids "
+                "(semantic_model_id, measure_id, dependency_type, referenced_id, is_direct) "
+                "SELECT ?, unnest(?::INTEGER[]), unnest(?::VARCHAR[])::sm_dependency_type, "
+                "       unnest(?::INTEGER[]), unnest(?::BOOLEAN[])",
+                [
+                    semantic_model_id,
+                    [ids[("measure", mtable or "", mname)] for _, mname, mtable, *_ in model_rows],
+                    [row[3] for row in model_rows],
+                    [
+                        ids[DaxTokenizer._reference_key(row[3], row[4], row[5])]
+                        for row in model_rows
+                    ],
+                    [bool(row[6]) for row in model_rows],
+                ],
+            )
+
+    def _upsert_expression_hashes(
+        self,
+        conn,
+        semantic_model_id: int,
+        names: List[str],
+        measure_table_map: Dict[str, str],
+    ) -> None:
+        rows = [
+            (
+                semantic_model_id, name, measure_table_map.get(name, ""),
+                self._measure_hash(name, measure_table_map.get(name, "")),
+            )
+            for name in names
+        ]
+        if rows:
+            conn.executemany(
+                "INSERT OR REPLACE INTO semantic_model_measure_expression_hash "
+                "(semantic_model_id, measure_name, measure_table, expression_hash) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    @classmethod
+    def _expression_hash(cls, expression: str, table_name: str = "", resolution: str = "") -> str:
+        """Hash estable de la expresión limpia de una medida, su tabla y la resolución de sus [X]."""
+        text = (f"{_ANALYZER_VERSION}\n{resolution}\n{table_name}\n"
+                f"{cls._clean_expression(expression or '')}")
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def _measure_hash(self, name: str, table_name: str) -> str:
+        """``_expression_hash`` de la medida ``name`` con el modelo actual."""
+        expression = self.known_measures.get(name, "")
+        return self._expression_hash(expression, table_name, self._resolution_signature(expression))
+
+    def _resolve_unqualified_column(
+        self, ref_lower: str, iterator_tables: List[str], deps: DaxDependencies
+    ) -> bool:
+        """
+        Resuelve ``[X]`` sin tabla contra la tabla de un iterador de la
+        expresión (``SUMX(Sales, [Amount])``) o, si no, contra la única
+        columna del modelo con ese nombre. Devuelve True si la registra.
+        """
+        for table in iterator_tables:
+            columns = self._columns_lower.get(table)
+            if columns and ref_lower in columns:
+                deps.add_column(table, columns[ref_lower])
+                return True
+        owners = self._column_owners.get(ref_lower, ())
+        if len(owners) == 1:
+            deps.add_column(*owners[0])
+            return True
+        return False
+
+    @classmethod
+    def _unqualified_refs(cls, expression: str) -> Set[str]:
+        """Nombres en minúsculas de las referencias ``[X]`` sin tabla de la expresión."""
+        text = cls._clean_expression(expression or "")
+        text = _RE_BLOCK_COMMENT.sub(' ', text)
+        text = _RE_LINE_COMMENT.sub(' ', text)
+        text = _RE_QUOTED_TABLE_COL.sub(' ', text)
+        text = _RE_UNQUOTED_TABLE_COL.sub(' ', text)
+        return {m.group(1).strip().lower() for m in re.finditer(r'\[([^\]]+)\]', text)}
+
+    def _resolution_signature(self, expression: str) -> str:
+        """
+        Candidatos actuales de cada ``[X]`` sin tabla de la expresión: la
+        medida con ese nombre y las columnas ``tabla.X`` del modelo. Solo
+        cambia si se añade, borra o renombra un objeto con ese nombre.
+        """
+        parts = []
+        for low in sorted(self._unqualified_refs(expression)):
+            owners = ",".join(f"{t}.{c}" for t, c in self._column_owners.get(low, ()))
+            parts.append(f"{low}={self._measures_lower.get(low, '')}:{owners}")
+        return "\x1f".join(parts)
+
+    def _delete_removed_objects(self, conn, semantic_model_id: int) -> int:
+        """
+        Borra de ``semantic_model_object`` los objetos que ya no existen en el
+        modelo y que no referencia ninguna dependencia. Devuelve cuántos.
+        """
+        params = [
+            semantic_model_id,
+            sorted(self.known_measures),
+            sorted(f"{t}\x1f{c}" for t, cols in self.known_columns.items() for c in cols),
+            sorted(self.known_tables),
+        ]
+        where = """
+            WHERE o.semantic_model_id = ?
+              AND NOT CASE CAST(o.object_kind AS VARCHAR)
+                  WHEN 'measure' THEN list_contains(?, o.object_name)
+                  WHEN 'column' THEN list_contains(?, o.table_name || chr(31) || o.object_name)
+                  ELSE list_contains(?, o.object_name) END
+              AND NOT EXISTS (
+                  SELECT 1 FROM semantic_model_measure_dependency_ids d
+                  WHERE d.semantic_model_id = o.semantic_model_id
+                    AND (d.measure_id = o.object_id OR d.referenced_id = o.object_id))
+        """
+        count = conn.execute(
+            f"SELECT COUNT(*) FROM semantic_model_object o {where}", params
+        ).fetchone()[0]
+        if count:
+            conn.execute(
+                f"DELETE FROM semantic_model_object o {where}", params
+            )
+        return count
+
+    @staticmethod
+    def _refresh_report_usage(conn, semantic_model_id: int) -> None:
+        """Recalcula los bitsets de uso por report del modelo si la BD tiene reports."""
+        present = conn.execute(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_name IN "
+            "('report', 'report_column_used', 'report_measure_used')"
+        ).fetchone()[0]
+        if present == 3:
+            DaxTokenizer.save_report_usage_to_db(
+                None, semantic_model_id=semantic_model_id, conn=conn
+            )
+
     def _resolve_table(self, name: str) -> str:
         """Return the canonical table name (case-insensitive match)."""
         low = name.lower()
@@ -0,0 +1,205 @@
+"""
+Carga de ficheros JSON de reports (report.json, page.json, visual.json).
+
+Usa ``orjson`` si está instalado y ``json`` de la librería estándar en caso
+contrario. ``load_json_files`` lee muchos ficheros con un pool de hilos
+acotado: en unidades de red la latencia de E/S domina sobre el parseo.
+``JsonStream`` recorre un documento grande por trozos (report.json legacy de
+decenas de MB) sin cargarlo entero en memoria.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+from typing import IO, Any, Callable, Iterator, List, Optional, Sequence, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+# orjson.JSONDecodeError hereda de json.JSONDecodeError: los ``except`` existentes sirven
+JSONDecodeError = json.JSONDecodeError
+
+DEFAULT_IO_WORKERS = min(16, (os.cpu_count() or 1) * 4)
+
+
+def loads_json(content: Union[str, bytes]) -> Any:
+    """Parsea texto JSON (con o sin BOM UTF-8)."""
+    if isinstance(content, bytes) and content.startswith(b'\xef\xbb\xbf'):
+        content = content[3:]
+    elif isinstance(content, str) and content.startswith('\ufeff'):
+        content = content[1:]
+    if orjson is not None:
+        try:
+            return orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # orjson es más estricto (NaN, enteros > 64 bits): se reintenta con json
+            pass
+    if isinstance(content, bytes):
+        content = content.decode('utf-8')
+    return json.loads(content)
+
+
+def load_json(path: str) -> Any:
+    """Lee y parsea un fichero JSON. Propaga OSError / JSONDecodeError."""
+    with open(path, 'rb') as f:
+        return loads_json(f.read())
+
+
+def _load_or_error(path: str) -> Any:
+    try:
+        return load_json(path)
+    except (OSError, JSONDecodeError, UnicodeDecodeError) as e:
+        return e
+
+
+def map_in_threads(func: Callable[[Any], Any], items: Sequence[Any], max_workers: Optional[int] = None) -> List[Any]:
+    """``map`` con un pool de hilos acotado (``max_workers``, 1 = secuencial), conservando el orden."""
+    workers = max_workers or DEFAULT_IO_WORKERS
+    if workers == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(func, items))
+
+
+def load_json_files(paths: Sequence[str], max_workers: Optional[int] = None) -> List[Any]:
+    """
+    Carga ``paths`` en paralelo y devuelve los resultados en el mismo orden.
+    Un fichero que no se pueda leer o parsear devuelve la excepción en su
+    posición en vez de interrumpir el resto.
+    """
+    return map_in_threads(_load_or_error, paths, max_workers)
+
+
+# ── Lectura incremental ───────────────────────────────────────────
+
+
+class JsonStream:
+    """
+    Lector incremental de JSON sobre un fichero de texto abierto.
+
+    ``iter_object`` / ``iter_array`` recorren un contenedor y, en cada paso,
+    el llamador DEBE consumir el valor actual con ``value()``, ``skip()`` o
+    un ``iter_*`` anidado antes de pedir el siguiente. Solo el valor en curso
+    (más un trozo de lectura) está en memoria.
+    """
+
+    _WHITESPACE = ' \t\n\r'
+
+    def __init__(self, stream: IO[str], chunk_size: int = 1 << 16):
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    @classmethod
+    def open(cls, path: str, chunk_size: int = 1 << 16) -> 'JsonStream':
+        """Abre ``path`` (UTF-8, con o sin BOM). Cerrar con ``close()``."""
+        return cls(open(path, 'r', encoding='utf-8-sig'), chunk_size)
+
+    def close(self) -> None:
+        self._stream.close()
+
+    def __enter__(self) -> 'JsonStream':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _fill(self, min_size: int = 0) -> bool:
+        """Descarta lo consumido y lee al menos ``min_size`` caracteres más."""
+        if self._eof:
+            return False
+        if self._pos:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        chunk = self._stream.read(max(self._chunk_size, min_size))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf += chunk
+        return True
+
+    def _skip_ws(self) -> None:
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in self._WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf) or not self._fill():
+                return
+
+    def _next_char(self) -> str:
+        self._skip_ws()
+        if self._pos >= len(self._buf):
+            raise JSONDecodeError('Fin de fichero inesperado', self._buf, self._pos)
+        ch = self._buf[self._pos]
+        self._pos += 1
+        return ch
+
+    def _expect(self, expected: str) -> None:
+        ch = self._next_char()
+        if ch != expected:
+            raise JSONDecodeError(f"Se esperaba '{expected}' y se encontró '{ch}'", self._buf, self._pos - 1)
+
+    def peek(self) -> str:
+        """Siguiente carácter significativo ('' al final del fichero)."""
+        self._skip_ws()
+        return self._buf[self._pos] if self._pos < len(self._buf) else ''
+
+    def value(self) -> Any:
+        """Decodifica el valor completo en la posición actual."""
+        self._skip_ws()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except JSONDecodeError:
+                # Valor incompleto: se amplía el búfer (crecimiento geométrico)
+                if not self._fill(len(self._buf) - self._pos):
+                    raise
+                continue
+            # Un número al final del búfer puede estar cortado ("1" de "12", "1." de "1.5")
+            if (isinstance(obj, (int, float)) and not self._eof
+                    and (end == len(self._buf) or self._buf[end] in '.eE+-')):
+                self._fill(len(self._buf) - self._pos)
+                continue
+            self._pos = end
+            return obj
+
+    def skip(self) -> None:
+        """Descarta el valor en la posición actual."""
+        self.value()
+
+    def iter_object(self) -> Iterator[str]:
+        """Recorre las claves del objeto en la posición actual."""
+        self._expect('{')
+        if self.peek() == '}':
+            self._pos += 1
+            return
+        while True:
+            key = self.value()
+            self._expect(':')
+            yield key
+            ch = self._next_char()
+            if ch == '}':
+                return
+            if ch != ',':
+                raise JSONDecodeError(f"Se esperaba ',' o '}}' y se encontró '{ch}'", self._buf, self._pos - 1)
+
+    def iter_array(self) -> Iterator[int]:
+        """Recorre los elementos (por índice) del array en la posición actual."""
+        self._expect('[')
+        if self.peek() == ']':
+            self._pos += 1
+            return
+        index = 0
+        while True:
+            yield index
+            index += 1
+            ch = self._next_char()
+            if ch == ']':
+                return
+            if ch != ',':
+                raise JSONDecodeError(f"Se esperaba ',' o ']' y se encontró '{ch}'", self._buf, self._pos - 1)
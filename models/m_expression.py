@@ -0,0 +1,472 @@
+"""
+Parser mínimo de expresiones M (Power Query) ``let ... in``.
+
+Divide la expresión en pasos respetando cadenas, comentarios, corchetes y
+``let`` anidados, y permite insertar pasos re-apuntando las referencias.
+Lo usa ``Table.update_partition_m_expression`` para recortar columnas justo
+después de la navegación al origen (de modo que el filtro se pliegue en la
+consulta al origen) o en la lista SELECT de las consultas SQL nativas.
+"""
+from typing import List, Optional, Tuple
+import re
+
+# Conectores que pliegan consultas (query folding)
+_FOLDABLE_SOURCES = re.compile(
+    r'^(Sql\.Databases?|Lakehouse\.Contents|Fabric\.Warehouse|Snowflake\.Databases|'
+    r'Oracle\.Database|PostgreSQL\.Database|MySQL\.Database|GoogleBigQuery\.Database|'
+    r'Databricks\.Catalogs|DatabricksMultiCloud\.Catalogs|AmazonRedshift\.Database|'
+    r'Teradata\.Database|DB2\.Database|AzureDataExplorer\.Contents|Odbc\.DataSource)\s*\('
+)
+# Navegación: Origen{[Schema="dbo",Item="X"]}[Data] o Origen{0}[Data]
+_NAVIGATION = re.compile(r'^(#"(?:[^"]|"")*"|[A-Za-z_][\w.]*)\s*\{.*\}\s*\[(Data|Content|Item)\]$', re.DOTALL)
+# Funciones que cambian nombres/forma de columnas: tras ellas los nombres del
+# origen ya no coinciden con los de sourceColumn
+_RESHAPING_FUNCTIONS = re.compile(
+    r'\bTable\.(RenameColumns|AddColumn|AddIndexColumn|ExpandTableColumn|ExpandRecordColumn|'
+    r'ExpandListColumn|DuplicateColumn|CombineColumns|SplitColumn|Pivot|Unpivot|'
+    r'UnpivotOtherColumns|Group|PromoteHeaders|DemoteHeaders|NestedJoin|Join|'
+    r'TransformColumnNames|FromRecords|Combine|Distinct)\b'
+)
+_STEP_HEAD = re.compile(r'^\s*(#"(?:[^"]|"")*"|[A-Za-z_][\w.]*)\s*=\s*', re.DOTALL)
+_IDENTIFIER = re.compile(r'[A-Za-z_][\w.]*')
+_NATIVE_QUERY_CALL = re.compile(r'\bValue\.NativeQuery\s*\(')
+# Opción Query de Sql.Database("srv", "bd", [Query="..."])
+_QUERY_OPTION = re.compile(r'\[\s*Query\s*=\s*("(?:[^"]|"")*")', re.DOTALL)
+_TSQL_SOURCE = re.compile(r'^Sql\.Databases?\s*\(')
+# Escapes de cadena M usados por Power BI Desktop en SQL nativo
+_M_ESCAPES = (('#(cr)', '\r'), ('#(lf)', '\n'), ('#(tab)', '\t'))
+
+
+def _scan(text: str):
+    """
+    Recorre ``text`` devolviendo ``(posición, carácter, profundidad)`` solo
+    para caracteres fuera de cadenas y comentarios.
+    """
+    depth = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == '"':
+            # Cadena M (comillas dobles escapadas como "")
+            i += 1
+            while i < n:
+                if text[i] == '"':
+                    if i + 1 < n and text[i + 1] == '"':
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+            continue
+        if text.startswith('//', i):
+            end = text.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if ch in '([{':
+            depth += 1
+        elif ch in ')]}':
+            depth -= 1
+        yield i, ch, depth
+        i += 1
+
+
+def _is_word_at(text: str, i: int, word: str) -> bool:
+    end = i + len(word)
+    return (
+        text.startswith(word, i)
+        and (i == 0 or not (text[i - 1].isalnum() or text[i - 1] in '_.#'))
+        and (end >= len(text) or not (text[end].isalnum() or text[end] == '_'))
+    )
+
+
+def _split_top_level(text: str, separator: str = ',') -> List[str]:
+    """Divide por ``separator`` fuera de cadenas, comentarios y corchetes."""
+    parts = []
+    start = 0
+    for i, ch, depth in _scan(text):
+        if ch == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+class MExpression:
+    """Expresión M ``let`` como lista ordenada de pasos ``(nombre, expresión)``."""
+
+    def __init__(self, steps: List[Tuple[str, str]], result: str):
+        self.steps = steps
+        self.result = result
+
+    @classmethod
+    def parse(cls, text: str) -> Optional['MExpression']:
+        """Parsea ``let ... in <resultado>``; None si no tiene esa forma."""
+        text = text.strip()
+        if not _is_word_at(text, 0, 'let'):
+            return None
+        body_start = 3
+        nested = 0
+        in_pos = -1
+        for i, ch, depth in _scan(text):
+            if i < body_start or depth != 0 or ch not in 'li':
+                continue
+            if _is_word_at(text, i, 'let'):
+                nested += 1
+            elif _is_word_at(text, i, 'in'):
+                if nested == 0:
+                    in_pos = i
+                    break
+                nested -= 1
+        if in_pos == -1:
+            return None
+
+        steps = []
+        for part in _split_top_level(text[body_start:in_pos]):
+            if not part.strip():
+                continue
+            head = _STEP_HEAD.match(part)
+            if not head:
+                return None
+            steps.append((head.group(1), part[head.end():].strip()))
+        result = text[in_pos + 2:].strip()
+        if not steps or not result:
+            return None
+        return cls(steps, result)
+
+    def to_string(self) -> str:
+        lines = ['let']
+        for idx, (name, expr) in enumerate(self.steps):
+            sep = ',' if idx < len(self.steps) - 1 else ''
+            lines.append(f'    {name} = {expr}{sep}')
+        lines.append('in')
+        lines.append(f'    {self.result}')
+        return '\n'.join(lines)
+
+    # ── Análisis ──────────────────────────────────────────────────
+
+    def is_foldable_source(self) -> bool:
+        """El primer paso es un conector que pliega consultas."""
+        return bool(self.steps) and bool(_FOLDABLE_SOURCES.match(self.steps[0][1]))
+
+    def navigation_end(self) -> int:
+        """
+        Índice del último paso de la cadena origen → navegación
+        (``Origen{[Name="BD"]}[Data]``...), o -1 si el origen no pliega.
+        """
+        if not self.is_foldable_source():
+            return -1
+        end = 0
+        for idx in range(1, len(self.steps)):
+            match = _NAVIGATION.match(self.steps[idx][1])
+            if not match or match.group(1) != self.steps[idx - 1][0]:
+                break
+            end = idx
+        return end if end > 0 else -1
+
+    @staticmethod
+    def _native_query(expr: str) -> Optional[Tuple[int, int, str]]:
+        """
+        Localiza el SQL nativo de un paso: ``(inicio, fin, origen)`` del
+        literal SQL y la expresión de la que lee. Los argumentos de
+        ``Value.NativeQuery(origen, "SQL", ...)`` se separan fuera de cadenas
+        y paréntesis; en ``Sql.Database(..., [Query="SQL"])`` el origen es el
+        propio paso.
+        """
+        for call in _NATIVE_QUERY_CALL.finditer(expr):
+            open_pos = call.end() - 1
+            close_pos = -1
+            for i, ch, depth in _scan(expr[open_pos:]):
+                if ch == ')' and depth == 0:
+                    close_pos = open_pos + i
+                    break
+            if close_pos < 0:
+                continue
+            args = _split_top_level(expr[open_pos + 1:close_pos])
+            if len(args) < 2:
+                continue
+            literal = args[1].strip()
+            if len(literal) < 2 or literal[0] != '"' or literal[-1] != '"':
+                continue
+            start = open_pos + 1 + len(args[0]) + 1 + args[1].index(literal)
+            return start, start + len(literal), args[0].strip()
+        match = _QUERY_OPTION.search(expr)
+        if match:
+            return match.start(1), match.end(1), expr
+        return None
+
+    def _source_expression(self, expr: str, before: int) -> str:
+        """
+        Expresión que origina ``expr`` siguiendo referencias a pasos
+        anteriores a ``before`` y su navegación (``Origen{...}[Data]``).
+        """
+        names = {name: idx for idx, (name, _) in enumerate(self.steps[:before])}
+        expr = expr.strip()
+        while True:
+            navigation = _NAVIGATION.match(expr)
+            ref = navigation.group(1) if navigation else expr
+            if ref not in names:
+                return expr
+            before = names.pop(ref)
+            expr = self.steps[before][1].strip()
+
+    def native_query_step(self) -> int:
+        """Índice del paso con SQL nativo (``Value.NativeQuery`` o ``[Query=...]``)."""
+        for idx, (_, expr) in enumerate(self.steps):
+            if self._native_query(expr) is not None:
+                return idx
+        return -1
+
+    def steps_reference_columns(self, start: int, columns: List[str]) -> bool:
+        """
+        True si algún paso desde ``start`` (o el resultado) cambia la forma de
+        las columnas o menciona alguna de ``columns`` (``"Col"`` o ``[Col]``).
+        """
+        tail = '\n'.join(expr for _, expr in self.steps[start:]) + '\n' + self.result
+        if _RESHAPING_FUNCTIONS.search(tail):
+            return True
+        for col in columns:
+            escaped = col.replace('"', '""')
+            if f'"{escaped}"' in tail or f'[{col}]' in tail:
+                return True
+        return False
+
+    # ── Transformaciones ──────────────────────────────────────────
+
+    def unique_step_name(self, base: str) -> str:
+        existing = {name for name, _ in self.steps}
+        name = f'#"{base}"'
+        counter = 2
+        while name in existing:
+            name = f'#"{base} {counter}"'
+            counter += 1
+        return name
+
+    @staticmethod
+    def _replace_reference(expr: str, old: str, new: str) -> str:
+        """Sustituye la referencia al paso ``old`` (fuera de cadenas) por ``new``."""
+        out = []
+        last = 0
+        i = 0
+        n = len(expr)
+        while i < n:
+            ch = expr[i]
+            if expr.startswith('#"', i):
+                j = i + 2
+                while j < n:
+                    if expr[j] == '"':
+                        if j + 1 < n and expr[j + 1] == '"':
+                            j += 2
+                            continue
+                        break
+                    j += 1
+                token = expr[i:j + 1]
+                if token == old:
+                    out.append(expr[last:i])
+                    out.append(new)
+                    last = j + 1
+                i = j + 1
+                continue
+            if ch == '"':
+                j = i + 1
+                while j < n:
+                    if expr[j] == '"':
+                        if j + 1 < n and expr[j + 1] == '"':
+                            j += 2
+                            continue
+                        break
+                    j += 1
+                i = j + 1
+                continue
+            match = _IDENTIFIER.match(expr, i)
+            if match and (i == 0 or not (expr[i - 1].isalnum() or expr[i - 1] == '_')):
+                if match.group(0) == old:
+                    out.append(expr[last:i])
+                    out.append(new)
+                    last = match.end()
+                i = match.end()
+                continue
+            i += 1
+        out.append(expr[last:])
+        return ''.join(out)
+
+    def insert_after(self, index: int, name: str, expr: str) -> None:
+        """
+        Inserta un paso tras ``index``; los pasos siguientes que usaban el
+        paso ``index`` pasan a usar el nuevo.
+        """
+        previous = self.steps[index][0]
+        for idx in range(index + 1, len(self.steps)):
+            step_name, step_expr = self.steps[idx]
+            self.steps[idx] = (step_name, self._replace_reference(step_expr, previous, name))
+        self.result = self._replace_reference(self.result, previous, name)
+        self.steps.insert(index + 1, (name, expr))
+
+    def prune_columns(self, keep_columns: List[str], removed_columns: List[str]) -> Optional[str]:
+        """
+        Recorta columnas lo antes posible:
+
+        - SQL nativo: reescribe la lista SELECT.
+        - Origen plegable: ``Table.SelectColumns`` justo tras la navegación.
+
+        Solo se aplica si los pasos posteriores no renombran/crean columnas
+        ni usan las columnas quitadas. Devuelve ``'native'``, ``'select'``
+        o None si no se ha podido (el llamador aplica su alternativa).
+        """
+        if not keep_columns or not removed_columns:
+            return None
+
+        native_idx = self.native_query_step()
+        if native_idx >= 0:
+            if self.steps_reference_columns(native_idx + 1, removed_columns):
+                return None
+            name, expr = self.steps[native_idx]
+            start, end, source = self._native_query(expr)
+            tsql = bool(_TSQL_SOURCE.match(self._source_expression(source, native_idx)))
+            sql = expr[start + 1:end - 1].replace('""', '"')
+            for escape, char in _M_ESCAPES:
+                sql = sql.replace(escape, char)
+            new_sql = prune_select_list(sql, keep_columns, tsql)
+            if new_sql is None:
+                return None
+            for escape, char in _M_ESCAPES:
+                new_sql = new_sql.replace(char, escape)
+            new_literal = '"' + new_sql.replace('"', '""') + '"'
+            self.steps[native_idx] = (name, expr[:start] + new_literal + expr[end:])
+            return 'native'
+
+        nav_end = self.navigation_end()
+        if nav_end < 0 or self.steps_reference_columns(nav_end + 1, removed_columns):
+            return None
+        columns_list = '{' + ', '.join(
+            '"' + col.replace('"', '""') + '"' for col in keep_columns
+        ) + '}'
+        previous = self.steps[nav_end][0]
+        self.insert_after(
+            nav_end,
+            self.unique_step_name('Columnas seleccionadas'),
+            f'Table.SelectColumns({previous}, {columns_list})',
+        )
+        return 'select'
+
+
+# ── SQL nativo ────────────────────────────────────────────────────
+
+def _sql_top_level(sql: str):
+    """``(posición, carácter)`` fuera de literales, identificadores y paréntesis."""
+    depth = 0
+    i = 0
+    n = len(sql)
+    closers = {"'": "'", '"': '"', '[': ']', '`': '`'}
+    while i < n:
+        ch = sql[i]
+        if ch in closers:
+            end = sql.find(closers[ch], i + 1)
+            i = n if end == -1 else end + 1
+            continue
+        if sql.startswith('--', i):
+            end = sql.find('\n', i)
+            i = n if end == -1 else end
+            continue
+        if sql.startswith('/*', i):
+            end = sql.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        if ch == '(':
+            depth += 1
+        elif ch == ')':
+            depth -= 1
+        elif depth == 0:
+            yield i, ch
+        i += 1
+
+
+def _sql_keyword_positions(sql: str, keyword: str) -> List[int]:
+    keyword = keyword.upper()
+    upper = sql.upper()
+    return [
+        i for i, _ in _sql_top_level(sql)
+        if upper.startswith(keyword, i)
+        and (i == 0 or not (sql[i - 1].isalnum() or sql[i - 1] == '_'))
+        and (i + len(keyword) >= len(sql) or not (sql[i + len(keyword)].isalnum() or sql[i + len(keyword)] == '_'))
+    ]
+
+
+def _sql_output_name(item: str) -> Optional[str]:
+    """Nombre de la columna resultante de un elemento de la lista SELECT."""
+    item = item.strip()
+    alias = re.search(r'\bAS\s+(\[[^\]]+\]|"[^"]+"|`[^`]+`|\w+)\s*$', item, re.IGNORECASE)
+    if alias:
+        name = alias.group(1)
+    else:
+        last = re.search(r'(\[[^\]]+\]|"[^"]+"|`[^`]+`|\w+)\s*$', item)
+        if not last:
+            return None
+        # Expresión sin alias (p.ej. "a + b"): sin nombre fiable
+        prefix = item[:last.start()].rstrip()
+        if prefix and not prefix.endswith('.') and not re.search(r'[\]\w"`)]$', prefix):
+            return None
+        name = last.group(1)
+    return name.strip('[]"`')
+
+
+def prune_select_list(sql: str, keep_columns: List[str], tsql: bool = False) -> Optional[str]:
+    """
+    Reescribe la lista SELECT de una consulta simple para devolver solo
+    ``keep_columns``. None si la consulta no es un SELECT simple (CTE,
+    UNION, DISTINCT, varias sentencias...) o no se reconocen las columnas.
+    """
+    body = sql.strip().rstrip(';')
+    if ';' in (ch for _, ch in _sql_top_level(body)):
+        return None
+    if not re.match(r'^\s*SELECT\b', body, re.IGNORECASE):
+        return None
+    for keyword in ('UNION', 'INTERSECT', 'EXCEPT', 'DISTINCT', 'INTO'):
+        if _sql_keyword_positions(body, keyword):
+            return None
+    froms = _sql_keyword_positions(body, 'FROM')
+    if not froms:
+        return None
+    select_start = re.match(r'^\s*SELECT\s+', body, re.IGNORECASE).end()
+    top = re.match(r'TOP\s*(\(\s*\d+\s*\)|\d+)\s+(PERCENT\s+)?', body[select_start:], re.IGNORECASE)
+    list_start = select_start + (top.end() if top else 0)
+    list_end = froms[0]
+    items = _split_sql_items(body[list_start:list_end])
+
+    keep_lower = {c.lower(): c for c in keep_columns}
+    if len(items) == 1 and items[0].strip() == '*':
+        if not tsql:
+            return None
+        new_list = ', '.join('[' + c.replace(']', ']]') + ']' for c in keep_columns)
+    else:
+        kept = []
+        found = set()
+        for item in items:
+            name = _sql_output_name(item)
+            if name is None:
+                return None
+            if name.lower() in keep_lower:
+                kept.append(item.strip())
+                found.add(name.lower())
+        if found != set(keep_lower) or len(kept) == len(items):
+            return None
+        new_list = ', '.join(kept)
+
+    trailing = sql[len(sql.rstrip()):]
+    semicolon = ';' if sql.strip().endswith(';') else ''
+    return body[:list_start] + new_list + ' ' + body[list_end:].lstrip() + semicolon + trailing
+
+
+def _split_sql_items(select_list: str) -> List[str]:
+    parts = []
+    start = 0
+    for i, ch in _sql_top_level(select_list):
+        if ch == ',':
+            parts.append(select_list[start:i])
+            start = i + 1
+    parts.append(select_list[start:])
+    return parts
@@ -0,0 +1,278 @@
+"""
+Estimación heurística de la huella en memoria (VertiPaq) de un modelo.
+
+No conoce los datos reales: parte del tipo de dato, ``summarizeBy``, si la
+columna es calculada y si parece una clave, y la ajusta con pistas de número
+de filas / cardinalidad cuando existen (anotaciones TMDL o un fichero de
+estadísticas JSON aportado por el usuario).  Sirve para comparar modelos y
+submodelos entre sí y para ordenar columnas por coste, no como cifra exacta.
+"""
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+import json
+import math
+import re
+
+from .table import Column, Table
+
+if TYPE_CHECKING:
+    from .semantic_model import SemanticModel
+    from .subset_plan import SubsetPlan
+
+# Bytes por valor en el diccionario según dataType
+_DICTIONARY_VALUE_BYTES = {
+    'string': 24,
+    'int64': 8,
+    'double': 8,
+    'decimal': 8,
+    'dateTime': 8,
+    'boolean': 1,
+    'binary': 64,
+}
+# Anotaciones reconocidas como pistas
+_ROW_COUNT_ANNOTATIONS = ('RowCount', 'EstimatedRowCount')
+_CARDINALITY_ANNOTATIONS = ('Cardinality', 'EstimatedCardinality')
+_ANNOTATION = re.compile(r'^(\s*)annotation\s+(\w+)\s*=\s*"?([^"\n]*)"?\s*$', re.MULTILINE)
+_AUTO_DATE_PREFIXES = ('LocalDateTable_', 'DateTableTemplate_')
+_KEY_NAME = re.compile(r'(key|id|code|codigo|código|sk|guid|uuid)$|^(id|sk|cod)[_ ]', re.IGNORECASE)
+
+
+class MemoryEstimator:
+    """
+    Estima bytes por columna: diccionario (cardinalidad × bytes por valor),
+    índices comprimidos (filas × bits necesarios para la cardinalidad) y
+    jerarquía de atributo (cardinalidad × 16 bytes).
+
+    Formato del fichero de estadísticas (todas las claves opcionales)::
+
+        {"tables": {"Ventas": {"rows": 12000000,
+                               "columns": {"ClienteKey": 180000}}}}
+    """
+
+    DEFAULT_ROWS = 1_000_000
+    DEFAULT_DIMENSION_ROWS = 10_000
+
+    def __init__(
+        self,
+        stats: Optional[Dict[str, Any]] = None,
+        default_rows: int = DEFAULT_ROWS,
+        default_dimension_rows: int = DEFAULT_DIMENSION_ROWS,
+    ):
+        stats = stats or {}
+        self.table_stats: Dict[str, Dict[str, Any]] = stats.get('tables', stats)
+        self.default_rows = default_rows
+        self.default_dimension_rows = default_dimension_rows
+
+    @classmethod
+    def from_stats_file(cls, stats_path: Optional[Path], **kwargs) -> 'MemoryEstimator':
+        """Crea el estimador con un fichero de estadísticas JSON (opcional)."""
+        if not stats_path:
+            return cls(**kwargs)
+        with open(stats_path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    # ── Pistas ────────────────────────────────────────────────────
+
+    @staticmethod
+    def _int_hint(raw_content: str, keys, max_indent: Optional[int] = None) -> Optional[int]:
+        """Valor entero de la primera anotación ``keys`` presente en el TMDL."""
+        for indent, key, value in _ANNOTATION.findall(raw_content or ''):
+            if key not in keys or (max_indent is not None and len(indent.expandtabs(4)) > max_indent):
+                continue
+            try:
+                return int(float(value))
+            except ValueError:
+                continue
+        return None
+
+    def table_rows(self, table: Table, is_dimension: bool = False) -> int:
+        """
+        Filas de la tabla: fichero de estadísticas > anotación > por defecto
+        (menor para dimensiones, es decir, tablas en el lado "uno" de alguna
+        relación).
+        """
+        rows = self.table_stats.get(table.name, {}).get('rows')
+        if rows is None:
+            # Solo anotaciones de la propia tabla (primer nivel de indentación)
+            rows = self._int_hint(table.raw_content, _ROW_COUNT_ANNOTATIONS, max_indent=4)
+        if rows is None:
+            # Tablas calculadas pequeñas (parámetros, grupos de cálculo...)
+            if table.name.startswith(_AUTO_DATE_PREFIXES):
+                # Auto date/time: un día por fila, ~10 años por columna de fecha
+                rows = 3_650
+            elif table.is_calculated or table.calculation_items:
+                rows = 1_000
+            elif is_dimension:
+                rows = self.default_dimension_rows
+            else:
+                rows = self.default_rows
+        return max(int(rows), 1)
+
+    @staticmethod
+    def is_key_like(column: Column) -> bool:
+        """Columna con nombre de clave/código (alta cardinalidad)."""
+        return bool(_KEY_NAME.search(column.name.strip()))
+
+    def column_cardinality(
+        self, table: Table, column: Column, rows: int, max_cardinality: Optional[int] = None
+    ) -> int:
+        """
+        Cardinalidad: fichero de estadísticas > anotación > heurística por
+        tipo, limitada por ``max_cardinality`` (p.ej. filas de la dimensión
+        a la que apunta una clave foránea).
+        """
+        hinted = self.table_stats.get(table.name, {}).get('columns', {}).get(column.name)
+        if hinted is None:
+            hinted = self._int_hint(column.raw_content, _CARDINALITY_ANNOTATIONS)
+        if hinted is not None:
+            return max(1, min(int(hinted), rows))
+
+        data_type = column.data_type or 'string'
+        if data_type == 'boolean':
+            ratio = 2 / rows
+        elif self.is_key_like(column):
+            # Claves: casi únicas; las de texto son las más caras
+            ratio = 1.0 if data_type == 'string' else 0.5
+        elif data_type == 'dateTime':
+            return min(rows, 3_650)
+        elif data_type in ('double', 'decimal') and (column.summarize_by or 'sum') != 'none':
+            ratio = 0.5
+        elif data_type == 'int64' and (column.summarize_by or 'sum') != 'none':
+            ratio = 0.2
+        elif data_type == 'string':
+            return min(rows, 5_000)
+        else:
+            ratio = 0.05
+        return max(1, min(rows, max_cardinality or rows, int(rows * ratio)))
+
+    # ── Estimaciones ──────────────────────────────────────────────
+
+    def estimate_column(
+        self,
+        table: Table,
+        column: Column,
+        rows: Optional[int] = None,
+        max_cardinality: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Bytes estimados de una columna y su desglose."""
+        rows = rows or self.table_rows(table)
+        data_type = column.data_type or 'string'
+        cardinality = self.column_cardinality(table, column, rows, max_cardinality)
+
+        dictionary = cardinality * _DICTIONARY_VALUE_BYTES.get(data_type, 8)
+        if data_type == 'string' and self.is_key_like(column):
+            dictionary = int(dictionary * 1.5)
+        bits = max(1, math.ceil(math.log2(cardinality + 1)))
+        data = rows * bits // 8
+        # Las columnas calculadas no participan en la optimización del orden
+        if column.is_calculated:
+            data = int(data * 1.25)
+        hierarchy = cardinality * 16
+
+        return {
+            "table": table.name,
+            "column": column.name,
+            "data_type": data_type,
+            "rows": rows,
+            "cardinality": cardinality,
+            "is_calculated": column.is_calculated,
+            "is_key_like": self.is_key_like(column),
+            "dictionary_bytes": dictionary,
+            "data_bytes": data,
+            "hierarchy_bytes": hierarchy,
+            "bytes": dictionary + data + hierarchy,
+        }
+
+    def estimate_table(
+        self,
+        table: Table,
+        columns: Optional[Set[str]] = None,
+        is_dimension: bool = False,
+        max_cardinality: Optional[Dict[str, int]] = None,
+    ) -> Dict[str, Any]:
+        """Bytes estimados de una tabla (solo ``columns`` si se indica)."""
+        rows = self.table_rows(table, is_dimension)
+        max_cardinality = max_cardinality or {}
+        estimates = [
+            self.estimate_column(table, col, rows, max_cardinality.get(col.name))
+            for col in table.columns
+            if columns is None or col.name in columns
+        ]
+        return {
+            "table": table.name,
+            "rows": rows,
+            "bytes": sum(e["bytes"] for e in estimates),
+            "columns": estimates,
+        }
+
+    def estimate_model(
+        self,
+        model: 'SemanticModel',
+        plan: Optional['SubsetPlan'] = None,
+        dimensions: Optional[Set[str]] = None,
+        reference: Optional['SemanticModel'] = None,
+    ) -> Dict[str, Any]:
+        """
+        Bytes estimados del modelo, o del submodelo que describe ``plan``
+        (sin materializarlo). ``dimensions`` permite fijar las tablas
+        dimensión (por defecto, las del lado "uno" de las relaciones).
+        ``reference`` es el modelo cuyas relaciones acotan la cardinalidad
+        de las claves foráneas (por defecto, el propio ``model``).
+        """
+        reference = reference or model
+        if dimensions is None:
+            dimensions = {r.to_table for r in reference.relationships}
+        by_name = {t.name: t for t in reference.tables}
+        by_name.update({t.name: t for t in model.tables})
+        # Claves foráneas: como mucho tantos valores como filas de la dimensión
+        fk_caps: Dict[str, Dict[str, int]] = {}
+        for rel in reference.relationships:
+            if rel.to_table in by_name and rel.from_table and rel.from_column:
+                fk_caps.setdefault(rel.from_table, {})[rel.from_column] = self.table_rows(
+                    by_name[rel.to_table], rel.to_table in dimensions
+                )
+        tables = []
+        for table in model.tables:
+            if plan is not None and table.name not in plan.tables:
+                continue
+            columns = plan.columns.get(table.name) if plan is not None else None
+            tables.append(self.estimate_table(
+                table, columns, table.name in dimensions, fk_caps.get(table.name)
+            ))
+        total = sum(t["bytes"] for t in tables)
+        return {"bytes": total, "mb": total / 1024 / 1024, "tables": tables}
+
+    def rank_columns(
+        self,
+        model: 'SemanticModel',
+        top: Optional[int] = 20,
+        plan: Optional['SubsetPlan'] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Columnas del modelo ordenadas por coste estimado. Con ``plan`` se marca
+        si cada columna se conserva en el submodelo (``kept``).
+        """
+        ranking = []
+        for table_estimate in self.estimate_model(model)["tables"]:
+            for estimate in table_estimate["columns"]:
+                if plan is not None:
+                    kept_cols = plan.columns.get(estimate["table"])
+                    estimate["kept"] = estimate["table"] in plan.tables and (
+                        kept_cols is None or estimate["column"] in kept_cols
+                    )
+                ranking.append(estimate)
+        ranking.sort(key=lambda e: e["bytes"], reverse=True)
+        return ranking[:top] if top else ranking
+
+    def compare(self, source: 'SemanticModel', subset: 'SemanticModel') -> Dict[str, float]:
+        """MB estimados del modelo fuente, del submodelo y ahorro."""
+        # Dimensiones y topes de claves foráneas del modelo fuente en ambos:
+        # el submodelo puede perder relaciones
+        source_mb = self.estimate_model(source)["mb"]
+        subset_mb = self.estimate_model(subset, reference=source)["mb"]
+        return {
+            "source_mb": source_mb,
+            "subset_mb": subset_mb,
+            "saved_mb": source_mb - subset_mb,
+            "saved_pct": 100 * (1 - subset_mb / source_mb) if source_mb else 0.0,
+        }
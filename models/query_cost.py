@@ -0,0 +1,459 @@
+"""
+Puntuación de la carga de consultas de los visuales de un report, por
+visual y por página, a partir de lo guardado en DuckDB por
+``clsReport.save_to_database`` y ``SemanticModel.save_to_database``.
+
+Cada regla recibe el visual (tipo, columnas, medidas, filtros) y el
+``QueryCostScorer`` (metadatos del modelo: tablas DirectQuery y relaciones
+bidireccionales) y devuelve ``(puntos, motivo)`` o None. Las reglas son
+funciones normales: se pueden sustituir (``rules=``) o añadir
+(``add_rule``). La puntuación de una página es la suma de la de sus
+visuales, ya que cada visual lanza su propia consulta al abrirla.
+"""
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .catalog_sql import MEASURE_TABLES, REPORT_MODEL_JOIN, has_measure_tables
+
+Rule = Callable[[Dict[str, Any], 'QueryCostScorer'], Optional[Tuple[float, str]]]
+
+# Visuales tabulares: una consulta por celda visible y sin agregación previa
+TABLE_VISUALS = frozenset(('tableex', 'table', 'pivottable', 'matrix', 'matrixvisual'))
+
+
+# ── Reglas por defecto ───────────────────────────────────────────
+
+
+def rule_base_query(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    return 1.0, 'consulta propia'
+
+
+def rule_fields(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    extra = len(visual['columns']) + len(visual['measures']) - scorer.free_fields
+    if extra > 0:
+        return 0.5 * extra, f"{len(visual['columns']) + len(visual['measures'])} campos proyectados"
+    return None
+
+
+def rule_measures(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    if visual['measures']:
+        return 0.75 * len(visual['measures']), f"{len(visual['measures'])} medidas"
+    return None
+
+
+def rule_table_visual(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    if (visual['visual_type'] or '').lower() not in TABLE_VISUALS:
+        return None
+    n_columns = len(visual['columns'])
+    points = 2.0 + 0.5 * max(0, n_columns - scorer.wide_table_columns)
+    return points, f"tabla/matriz con {n_columns} columnas"
+
+
+def rule_unfiltered_table(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    if (visual['visual_type'] or '').lower() not in TABLE_VISUALS:
+        return None
+    if visual['visual_filters'] or visual['page_filtered'] or visual['report_filtered']:
+        return None
+    return 3.0, 'tabla/matriz sin filtros (visual, página ni report)'
+
+
+def rule_visual_filters(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    if visual['visual_filters']:
+        return 0.5 * visual['visual_filters'], f"{visual['visual_filters']} filtros de visual"
+    return None
+
+
+def rule_large_in_lists(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    values = visual['max_in_values']
+    if values >= scorer.large_in_values:
+        return min(5.0, values / scorer.large_in_values), f"lista In con {values} valores"
+    return None
+
+
+def rule_directquery(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    remote = sorted(visual['tables'] & scorer.directquery_tables)
+    if remote:
+        return 4.0 * len(remote), f"DirectQuery: {', '.join(remote)}"
+    return None
+
+
+def rule_bidirectional(visual: Dict[str, Any], scorer: 'QueryCostScorer') -> Optional[Tuple[float, str]]:
+    # Relaciones bidireccionales en el camino de relaciones que une las tablas
+    # del visual, aunque pase por tablas que el visual no usa
+    bidirectional = set(scorer.bidirectional_relationships)
+    relationships = sorted(r for r in scorer.relationship_path(visual['tables']) if r in bidirectional)
+    if relationships:
+        names = ', '.join(f"{a}↔{b}" for a, b in relationships)
+        return 2.0 * len(relationships), f"relaciones bidireccionales: {names}"
+    return None
+
+
+DEFAULT_RULES: Tuple[Rule, ...] = (
+    rule_base_query,
+    rule_fields,
+    rule_measures,
+    rule_table_visual,
+    rule_unfiltered_table,
+    rule_visual_filters,
+    rule_large_in_lists,
+    rule_directquery,
+    rule_bidirectional,
+)
+
+
+class QueryCostScorer:
+    """
+    Puntúa los visuales de uno o varios reports. ``visuals`` es la lista de
+    ``{report_id, report_name, page_name, visual_name, visual_type, columns,
+    measures, tables, visual_filters, max_in_values, page_filtered,
+    report_filtered}`` (ver ``from_db``). ``relationships`` son las
+    relaciones activas ``(from_table, to_table)`` del modelo; por defecto,
+    solo las bidireccionales.
+    """
+
+    def __init__(
+        self,
+        visuals: Optional[List[Dict[str, Any]]] = None,
+        directquery_tables: Optional[Set[str]] = None,
+        bidirectional_relationships: Optional[List[Tuple[str, str]]] = None,
+        relationships: Optional[List[Tuple[str, str]]] = None,
+        rules: Optional[List[Rule]] = None,
+        free_fields: int = 4,
+        wide_table_columns: int = 6,
+        large_in_values: int = 50,
+        visual_levels: Tuple[float, float] = (5.0, 10.0),
+        page_levels: Tuple[float, float] = (20.0, 40.0),
+    ):
+        self.visuals = visuals or []
+        self.directquery_tables = set(directquery_tables or ())
+        self.bidirectional_relationships = list(bidirectional_relationships or [])
+        self.relationships = list(relationships if relationships is not None else self.bidirectional_relationships)
+        self._neighbours: Dict[str, List[Tuple[str, Tuple[str, str]]]] = {}
+        for rel in self.relationships:
+            self._neighbours.setdefault(rel[0], []).append((rel[1], rel))
+            self._neighbours.setdefault(rel[1], []).append((rel[0], rel))
+        self._paths: Dict[frozenset, Set[Tuple[str, str]]] = {}
+        self.rules: List[Rule] = list(DEFAULT_RULES if rules is None else rules)
+        self.free_fields = free_fields
+        self.wide_table_columns = wide_table_columns
+        self.large_in_values = large_in_values
+        self.visual_levels = visual_levels
+        self.page_levels = page_levels
+
+    def add_rule(self, rule: Rule) -> None:
+        self.rules.append(rule)
+
+    def relationship_path(self, tables: Set[str]) -> Set[Tuple[str, str]]:
+        """
+        Relaciones que recorre una consulta sobre ``tables``: las del camino
+        más corto (en número de relaciones) entre cada par de tablas.
+        """
+        key = frozenset(tables)
+        if key in self._paths:
+            return self._paths[key]
+        path: Set[Tuple[str, str]] = set()
+        ordered = sorted(tables)
+        for i, start in enumerate(ordered):
+            targets = set(ordered[i + 1:])
+            # BFS desde start guardando la relación por la que se llega a cada tabla
+            came_from: Dict[str, Optional[Tuple[str, Tuple[str, str]]]] = {start: None}
+            queue = [start]
+            while queue and not targets <= came_from.keys():
+                next_queue = []
+                for table in queue:
+                    for neighbour, rel in self._neighbours.get(table, ()):
+                        if neighbour not in came_from:
+                            came_from[neighbour] = (table, rel)
+                            next_queue.append(neighbour)
+                queue = next_queue
+            for target in targets:
+                step = came_from.get(target)
+                while step is not None:
+                    path.add(step[1])
+                    step = came_from[step[0]]
+        self._paths[key] = path
+        return path
+
+    @classmethod
+    def from_db(
+        cls,
+        db_path: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        report_name: Optional[str] = None,
+        conn=None,
+        **kwargs,
+    ) -> 'QueryCostScorer':
+        """
+        Carga los visuales de los reports del modelo ``semantic_model_id``
+        (por nombre o referencia) o del report ``report_name``, junto con las
+        particiones DirectQuery y relaciones bidireccionales del modelo.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path, read_only=True)
+        try:
+            if report_name is not None:
+                report_ids = [r[0] for r in conn.execute("SELECT id FROM report WHERE name = ?", [report_name]).fetchall()]
+                if semantic_model_id is None and report_ids:
+                    row = conn.execute(f"SELECT semantic_model_id FROM ({REPORT_MODEL_JOIN}) WHERE report_id = ? LIMIT 1",
+                                       [report_ids[0]]).fetchone()
+                    semantic_model_id = row[0] if row else None
+            else:
+                report_ids = [r[0] for r in conn.execute(
+                    f"SELECT DISTINCT report_id FROM ({REPORT_MODEL_JOIN}) WHERE semantic_model_id = ?", [semantic_model_id]
+                ).fetchall()]
+            visuals = cls._load_visuals(conn, report_ids, semantic_model_id)
+            directquery, bidirectional, relationships = cls._load_model_metadata(conn, semantic_model_id)
+        finally:
+            if _own_conn:
+                conn.close()
+        return cls(visuals, directquery, bidirectional, relationships, **kwargs)
+
+    @staticmethod
+    def _table_exists(conn, table_name: str) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [table_name]
+        ).fetchone() is not None
+
+    @staticmethod
+    def _column_exists(conn, table_name: str, column_name: str) -> bool:
+        return conn.execute(
+            "SELECT 1 FROM information_schema.columns WHERE table_name = ? AND column_name = ?",
+            [table_name, column_name]
+        ).fetchone() is not None
+
+    @classmethod
+    def _load_visuals(cls, conn, report_ids: List[int], semantic_model_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Visuales de ``report_ids`` con sus campos y las tablas que consultan:
+        las de sus columnas y filtros y, para cada medida, las que lee según
+        sus dependencias DAX en ``semantic_model_id`` (su tabla si no hay).
+        """
+        if not report_ids:
+            return []
+        visuals: Dict[Tuple[int, str, str], Dict[str, Any]] = {}
+        for report_id, report_name, page_name, visual_name, visual_type in conn.execute(
+            "SELECT v.report_id, r.name, v.page_name, v.name, v.visual_type "
+            "FROM report_visual v JOIN report r ON r.id = v.report_id "
+            "WHERE list_contains(?, v.report_id) ORDER BY v.id", [report_ids]
+        ).fetchall():
+            visuals[(report_id, page_name, visual_name)] = {
+                'report_id': report_id, 'report_name': report_name, 'page_name': page_name,
+                'visual_name': visual_name, 'visual_type': visual_type,
+                'columns': set(), 'measures': set(), 'tables': set(),
+                'visual_filters': 0, 'max_in_values': 0,
+                'page_filtered': False, 'report_filtered': False,
+            }
+
+        measure_tables: Dict[str, Set[str]] = {}
+        if semantic_model_id is not None and has_measure_tables(conn):
+            for measure_name, table_name in conn.execute(
+                f"SELECT measure_name, table_name FROM ({MEASURE_TABLES}) WHERE semantic_model_id = ?",
+                [semantic_model_id]
+            ).fetchall():
+                measure_tables.setdefault(measure_name, set()).add(table_name)
+
+        for table, field, key in (('report_column_used', 'column_name', 'columns'),
+                                  ('report_measure_used', 'measure_name', 'measures')):
+            for report_id, page_name, visual_name, table_name, name in conn.execute(
+                f"SELECT report_id, page_name, visual_name, table_name, {field} FROM {table} "
+                "WHERE list_contains(?, report_id)", [report_ids]
+            ).fetchall():
+                visual = visuals.get((report_id, page_name, visual_name))
+                if visual is not None:
+                    visual[key].add((table_name, name))
+                    if key == 'columns':
+                        visual['tables'].add(table_name)
+                    else:
+                        visual['tables'].update(measure_tables.get(name) or (table_name,))
+
+        # Solo cuentan los filtros con alguna condición: un filtro sin condición
+        # (campo añadido al panel sin valores) no cambia la consulta.
+        # report_filter_condition y filter_index no existen en BDs antiguas.
+        if cls._column_exists(conn, 'report_filter_condition', 'filter_index'):
+            visual_filters_sql = (
+                "SELECT f.report_id, f.page_name, f.visual_name, f.table_name FROM report_visual_filter f "
+                "SEMI JOIN report_filter_condition c ON c.scope = 'visual' AND c.report_id = f.report_id "
+                "AND c.page_name = f.page_name AND c.visual_name = f.visual_name "
+                "AND c.filter_index = f.filter_index "
+                "WHERE list_contains(?, f.report_id)"
+            )
+            page_filters_sql = (
+                "SELECT DISTINCT report_id, page_name FROM report_filter_condition "
+                "WHERE list_contains(?, report_id) AND scope = 'page'"
+            )
+            report_filters_sql = (
+                "SELECT DISTINCT report_id FROM report_filter_condition "
+                "WHERE list_contains(?, report_id) AND scope = 'report'"
+            )
+        else:
+            visual_filters_sql = (
+                "SELECT report_id, page_name, visual_name, table_name FROM report_visual_filter "
+                "WHERE list_contains(?, report_id)"
+            )
+            page_filters_sql = "SELECT DISTINCT report_id, page_name FROM report_page_filter WHERE list_contains(?, report_id)"
+            report_filters_sql = "SELECT DISTINCT report_id FROM report_filter WHERE list_contains(?, report_id)"
+
+        for report_id, page_name, visual_name, table_name in conn.execute(visual_filters_sql, [report_ids]).fetchall():
+            visual = visuals.get((report_id, page_name, visual_name))
+            if visual is not None:
+                visual['visual_filters'] += 1
+                visual['tables'].add(table_name)
+
+        filtered_pages = set(conn.execute(page_filters_sql, [report_ids]).fetchall())
+        filtered_reports = {r[0] for r in conn.execute(report_filters_sql, [report_ids]).fetchall()}
+
+        # Listas In de filtros de visual (report_filter_condition no existe en BDs antiguas)
+        in_values: Dict[Tuple[int, str, str], int] = {}
+        if cls._table_exists(conn, 'report_filter_condition'):
+            for report_id, page_name, visual_name, values in conn.execute(
+                "SELECT report_id, page_name, visual_name, MAX(value_count) FROM report_filter_condition "
+                "WHERE list_contains(?, report_id) AND scope = 'visual' AND operator = 'in' "
+                "GROUP BY ALL", [report_ids]
+            ).fetchall():
+                in_values[(report_id, page_name, visual_name)] = int(values or 0)
+
+        for key, visual in visuals.items():
+            visual['page_filtered'] = (key[0], key[1]) in filtered_pages
+            visual['report_filtered'] = key[0] in filtered_reports
+            visual['max_in_values'] = in_values.get(key, 0)
+        return list(visuals.values())
+
+    @staticmethod
+    def _load_model_metadata(
+        conn, semantic_model_id: Optional[int]
+    ) -> Tuple[Set[str], List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Tablas DirectQuery, relaciones activas bidireccionales y todas las activas."""
+        if semantic_model_id is None:
+            return set(), [], []
+        directquery = {r[0] for r in conn.execute(
+            "SELECT DISTINCT table_name FROM semantic_model_partitions "
+            "WHERE semantic_model_id = ? AND lower(mode) = 'directquery'", [semantic_model_id]
+        ).fetchall()}
+        relationships, bidirectional = [], []
+        for from_table, to_table, both in conn.execute(
+            "SELECT from_table, to_table, lower(cross_filtering_behavior) = 'bothdirections' "
+            "FROM semantic_model_relationship "
+            "WHERE semantic_model_id = ? AND COALESCE(is_active, TRUE) "
+            "ORDER BY from_table, to_table", [semantic_model_id]
+        ).fetchall():
+            relationships.append((from_table, to_table))
+            if both:
+                bidirectional.append((from_table, to_table))
+        return directquery, bidirectional, relationships
+
+    # ── Puntuación ────────────────────────────────────────────────
+
+    @staticmethod
+    def _level(score: float, levels: Tuple[float, float]) -> str:
+        if score >= levels[1]:
+            return 'alto'
+        return 'medio' if score >= levels[0] else 'bajo'
+
+    def score_visual(self, visual: Dict[str, Any]) -> Dict[str, Any]:
+        """``{report_id, report_name, page_name, visual_name, visual_type, score, level, reasons}``."""
+        score, reasons = 0.0, []
+        # Visuales sin campos (textos, imágenes, botones) no consultan el modelo
+        if visual['columns'] or visual['measures']:
+            for rule in self.rules:
+                result = rule(visual, self)
+                if result and result[0]:
+                    score += result[0]
+                    reasons.append(f"{result[1]} (+{result[0]:g})")
+        return {
+            'report_id': visual['report_id'], 'report_name': visual['report_name'],
+            'page_name': visual['page_name'], 'visual_name': visual['visual_name'],
+            'visual_type': visual['visual_type'], 'score': round(score, 2),
+            'level': self._level(score, self.visual_levels), 'reasons': reasons,
+        }
+
+    def score(self) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        ``(visuales, páginas)``; cada página es ``{report_id, report_name,
+        page_name, visuals, query_visuals, score, max_visual_score, level}``.
+        Ambas listas van ordenadas de mayor a menor puntuación.
+        """
+        visual_scores = [self.score_visual(v) for v in self.visuals]
+        pages: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for row in visual_scores:
+            page = pages.setdefault((row['report_id'], row['page_name']), {
+                'report_id': row['report_id'], 'report_name': row['report_name'],
+                'page_name': row['page_name'], 'visuals': 0, 'query_visuals': 0,
+                'score': 0.0, 'max_visual_score': 0.0, 'level': 'bajo',
+            })
+            page['visuals'] += 1
+            page['query_visuals'] += 1 if row['score'] else 0
+            page['score'] = round(page['score'] + row['score'], 2)
+            page['max_visual_score'] = max(page['max_visual_score'], row['score'])
+        for page in pages.values():
+            page['level'] = self._level(page['score'], self.page_levels)
+        return (sorted(visual_scores, key=lambda r: -r['score']),
+                sorted(pages.values(), key=lambda r: -r['score']))
+
+    # ── Persistencia ──────────────────────────────────────────────
+
+    def save_to_database(self, conn) -> Tuple[int, int]:
+        """
+        Guarda las puntuaciones en ``report_visual_query_cost`` y
+        ``report_page_query_cost`` (sustituye las de los reports puntuados).
+        Devuelve ``(visuales, páginas)`` guardados.
+        """
+        visual_scores, page_scores = self.score()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_visual_query_cost (
+                report_id INTEGER NOT NULL,
+                page_name VARCHAR NOT NULL,
+                visual_name VARCHAR NOT NULL,
+                visual_type VARCHAR,
+                score DOUBLE NOT NULL,
+                level VARCHAR,
+                reasons TEXT,
+                created_at TIMESTAMP DEFAULT now(),
+                FOREIGN KEY(report_id) REFERENCES report(id)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS report_page_query_cost (
+                report_id INTEGER NOT NULL,
+                page_name VARCHAR NOT NULL,
+                visual_count INTEGER,
+                query_visual_count INTEGER,
+                score DOUBLE NOT NULL,
+                max_visual_score DOUBLE,
+                level VARCHAR,
+                created_at TIMESTAMP DEFAULT now(),
+                FOREIGN KEY(report_id) REFERENCES report(id)
+            )
+        """)
+        for report_id in sorted({v['report_id'] for v in self.visuals}):
+            conn.execute("DELETE FROM report_visual_query_cost WHERE report_id = ?", [report_id])
+            conn.execute("DELETE FROM report_page_query_cost WHERE report_id = ?", [report_id])
+        if visual_scores:
+            conn.executemany("""
+                INSERT INTO report_visual_query_cost (report_id, page_name, visual_name, visual_type, score, level, reasons)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [[r['report_id'], r['page_name'], r['visual_name'], r['visual_type'], r['score'],
+                   r['level'], '; '.join(r['reasons'])] for r in visual_scores])
+        if page_scores:
+            conn.executemany("""
+                INSERT INTO report_page_query_cost (report_id, page_name, visual_count, query_visual_count,
+                    score, max_visual_score, level)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [[p['report_id'], p['page_name'], p['visuals'], p['query_visuals'], p['score'],
+                   p['max_visual_score'], p['level']] for p in page_scores])
+        return len(visual_scores), len(page_scores)
+
+
+def print_query_costs(page_scores: List[Dict[str, Any]], visual_scores: List[Dict[str, Any]], top: int = 10) -> None:
+    """Páginas y visuales más costosos en consola."""
+    print(f"\n  {'Report':<28} {'Página':<28} {'Visuales':>8} {'Puntos':>8}  Nivel")
+    print(f"  {'-' * 86}")
+    for page in page_scores:
+        print(f"  {page['report_name'][:28]:<28} {page['page_name'][:28]:<28} "
+              f"{page['query_visuals']:>8} {page['score']:>8.1f}  {page['level']}")
+    print(f"\n  {'Visual':<28} {'Tipo':<18} {'Puntos':>8}  Motivos")
+    print(f"  {'-' * 100}")
+    for row in visual_scores[:top]:
+        print(f"  {row['visual_name'][:28]:<28} {(row['visual_type'] or '')[:18]:<18} "
+              f"{row['score']:>8.1f}  {'; '.join(row['reasons'])}")
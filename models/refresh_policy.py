@@ -0,0 +1,359 @@
+"""
+Refresco incremental de tablas de hechos grandes.
+
+Dos alternativas sobre una tabla con una única partición M:
+
+- ``add_incremental_refresh``: parámetros ``RangeStart``/``RangeEnd`` en
+  expressions.tmdl, filtro sobre la columna de fecha inyectado en el M (justo
+  tras la navegación si el origen pliega) y bloque ``refreshPolicy``.
+- ``add_date_partitions``: particiones explícitas por año o por mes con el
+  mismo filtro con fechas fijas.
+
+La columna de fecha se detecta por la relación del hecho con la dimensión
+fecha (claves ``yyyyMMdd`` enteras o columnas ``dateTime``). Sirve igual
+para el modelo completo que para un submodelo generado.
+"""
+from datetime import date
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+import re
+import uuid
+
+from .m_expression import MExpression
+from .memory_estimator import MemoryEstimator
+from .table import Partition, Table
+
+if TYPE_CHECKING:
+    from .semantic_model import SemanticModel
+
+_DATE_TABLE_NAME = re.compile(r'date|fecha|calend|time|tiempo', re.IGNORECASE)
+_RANGE_PARAMETER = (
+    "expression {name} = #datetime({year}, 1, 1, 0, 0, 0) "
+    "meta [IsParameterQuery=true, Type=\"DateTime\", IsParameterQueryRequired=true]\n"
+    "\tlineageTag: {tag}\n"
+    "\n"
+    "\tannotation PBI_ResultType = DateTime\n"
+)
+
+
+class RefreshPolicyGenerator:
+    """Genera refresco incremental o particiones por fecha en tablas de ``model``."""
+
+    def __init__(self, model: 'SemanticModel'):
+        self.model = model
+
+    def _table(self, table_name: str) -> Table:
+        for table in self.model.tables:
+            if table.name == table_name:
+                return table
+        raise ValueError(f"Tabla '{table_name}' no encontrada en el modelo")
+
+    # ── Detección ─────────────────────────────────────────────────
+
+    def is_date_table(self, table_name: str) -> bool:
+        table = self._table(table_name)
+        return ('dataCategory: Time' in table.raw_content
+                or bool(_DATE_TABLE_NAME.search(table_name)))
+
+    def detect_date_column(self, table_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Columna de fecha del hecho: la de la relación (activa primero) con
+        la dimensión fecha o, si no hay, su primera columna ``dateTime``.
+
+        Returns:
+            ``{'column', 'source_column', 'data_type', 'date_table'}`` o None
+        """
+        table = self._table(table_name)
+        columns = {c.name: c for c in table.columns}
+        candidates = [
+            rel for rel in self.model.relationships
+            if rel.from_table == table_name and rel.from_column in columns
+            and any(t.name == rel.to_table for t in self.model.tables)
+            and self.is_date_table(rel.to_table)
+        ]
+        candidates.sort(key=lambda rel: not rel.is_active)
+        for rel in candidates:
+            column = columns[rel.from_column]
+            if column.is_calculated or column.data_type not in ('dateTime', 'int64'):
+                continue
+            return {
+                'column': column.name,
+                'source_column': column.source_column or column.name,
+                'data_type': column.data_type,
+                'date_table': rel.to_table,
+            }
+        for column in table.columns:
+            if column.data_type == 'dateTime' and not column.is_calculated:
+                return {
+                    'column': column.name,
+                    'source_column': column.source_column or column.name,
+                    'data_type': 'dateTime',
+                    'date_table': None,
+                }
+        return None
+
+    def large_fact_tables(self, min_rows: int = 10_000_000,
+                          estimator: Optional[MemoryEstimator] = None) -> List[str]:
+        """
+        Hechos (lado "muchos") con al menos ``min_rows`` filas estimadas y
+        relacionados con la dimensión fecha.
+        """
+        estimator = estimator or MemoryEstimator()
+        facts = {r.from_table for r in self.model.relationships}
+        return [
+            t.name for t in self.model.tables
+            if t.name in facts and not t.is_calculated
+            and estimator.table_rows(t) >= min_rows
+            and (self.detect_date_column(t.name) or {}).get('date_table')
+        ]
+
+    # ── Expresiones M ─────────────────────────────────────────────
+
+    @staticmethod
+    def _bound(value, data_type: str) -> str:
+        """Literal M de un límite: parámetro (RangeStart) o fecha fija."""
+        if isinstance(value, str):
+            if data_type == 'int64':
+                return f'Int64.From(DateTime.ToText({value}, "yyyyMMdd"))'
+            return value
+        if data_type == 'int64':
+            return value.strftime('%Y%m%d')
+        return f"#datetime({value.year}, {value.month}, {value.day}, 0, 0, 0)"
+
+    @classmethod
+    def _condition(cls, source_column: str, data_type: str, lower=None, upper=None) -> str:
+        field = f'[{source_column}]'
+        parts = []
+        if lower is not None:
+            parts.append(f"{field} >= {cls._bound(lower, data_type)}")
+        if upper is not None:
+            parts.append(f"{field} < {cls._bound(upper, data_type)}")
+        return ' and '.join(parts) or 'true'
+
+    @staticmethod
+    def _inject_filter(expression: str, condition: str) -> Optional[str]:
+        """
+        Añade ``Table.SelectRows`` con ``condition``: justo tras la navegación
+        si el origen pliega y los pasos siguientes no cambian las columnas,
+        si no al final.
+        """
+        m_expression = MExpression.parse(expression)
+        if m_expression is None:
+            return None
+        index = m_expression.navigation_end()
+        if index < 0 or m_expression.steps_reference_columns(index + 1, []):
+            names = [name for name, _ in m_expression.steps]
+            if m_expression.result not in names:
+                return None
+            index = names.index(m_expression.result)
+        previous = m_expression.steps[index][0]
+        m_expression.insert_after(
+            index,
+            m_expression.unique_step_name('Filas filtradas'),
+            f'Table.SelectRows({previous}, each {condition})',
+        )
+        return m_expression.to_string()
+
+    @staticmethod
+    def _polling_expression(expression: str, source_column: str) -> str:
+        """
+        ``pollingExpression`` como la escribe Power BI: máximo de la columna de
+        detección de cambios sobre el origen ya filtrado por RangeStart/RangeEnd
+        (se evalúa por partición), con una fecha fija si la partición está vacía.
+        """
+        source = '\n'.join(f"        {line}" for line in expression.split('\n'))
+        return '\n'.join([
+            "let",
+            "    Source =",
+            f"{source},",
+            f"    MaxDate = List.Max(Source[{source_column}]),",
+            "    accountForNull = if MaxDate = null then #datetime(1901, 1, 1, 0, 0, 0) else MaxDate",
+            "in",
+            "    accountForNull",
+        ])
+
+    @staticmethod
+    def _partition_block(name: str, mode: Optional[str], expression: str) -> str:
+        quoted = name if re.fullmatch(r'[A-Za-z_]\w*', name) else "'" + name.replace("'", "''") + "'"
+        lines = [f"\tpartition {quoted} = m", f"\t\tmode: {mode or 'import'}", "\t\tsource ="]
+        lines += [f"\t\t\t\t{line}" for line in expression.split('\n')]
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _replace_blocks(raw_content: str, keywords, new_blocks: List[str]) -> str:
+        """
+        Quita los bloques de primer nivel que empiezan por ``keywords``
+        (``partition``, ``refreshPolicy``) e inserta ``new_blocks`` donde
+        estaba el primero (o al final).
+        """
+        lines = raw_content.rstrip('\n').split('\n')
+        result: List[str] = []
+        insert_at = None
+        skipping = False
+        for line in lines:
+            stripped = line.strip()
+            indent = len(line) - len(line.lstrip())
+            if stripped and indent <= 1:
+                skipping = indent == 1 and stripped.split(' ')[0] in keywords
+                if skipping and insert_at is None:
+                    # Sin la línea en blanco que precede al bloque
+                    while result and not result[-1].strip():
+                        result.pop()
+                    insert_at = len(result)
+            if not skipping:
+                result.append(line)
+        if insert_at is None:
+            while result and not result[-1].strip():
+                result.pop()
+            insert_at = len(result)
+        block_lines: List[str] = []
+        for block in new_blocks:
+            block_lines += [''] + block.rstrip('\n').split('\n')
+        if insert_at < len(result) and result[insert_at].strip():
+            block_lines.append('')
+        result[insert_at:insert_at] = block_lines
+        return '\n'.join(result) + '\n'
+
+    def _single_m_partition(self, table: Table) -> Partition:
+        partitions = [p for p in table.partitions if p.source_type == 'm']
+        if len(table.partitions) != 1 or not partitions:
+            raise ValueError(
+                f"'{table.name}' debe tener una única partición M "
+                f"(tiene {len(table.partitions)})"
+            )
+        return partitions[0]
+
+    def _update_table(self, table: Table, raw_content: str) -> Table:
+        """Sustituye la tabla por una copia reparseada (puede estar compartida con otro modelo)."""
+        updated = Table.from_content(table.name, raw_content)
+        self.model.tables[self.model.tables.index(table)] = updated
+        self.model._file_metadata['tables'].setdefault(table.name, {})['modified'] = True
+        return updated
+
+    def ensure_range_parameters(self, start_year: Optional[int] = None) -> List[str]:
+        """Añade ``RangeStart``/``RangeEnd`` a expressions.tmdl si no existen."""
+        content = self.model.expressions_content or ''
+        start_year = start_year or date.today().year - 1
+        added = []
+        for name, year in (('RangeStart', start_year), ('RangeEnd', start_year + 1)):
+            if re.search(rf'^expression\s+{name}\s*=', content, re.MULTILINE):
+                continue
+            content = content.rstrip('\n') + ('\n\n' if content.strip() else '') + \
+                _RANGE_PARAMETER.format(name=name, year=year, tag=uuid.uuid4())
+            added.append(name)
+        if added:
+            self.model.expressions_content = content
+            self.model._file_metadata.setdefault('expressions', {})['modified'] = True
+        return added
+
+    # ── Generadores ───────────────────────────────────────────────
+
+    def add_incremental_refresh(
+        self,
+        table_name: str,
+        date_column: Optional[str] = None,
+        rolling_window_granularity: str = 'year',
+        rolling_window_periods: int = 5,
+        incremental_granularity: str = 'day',
+        incremental_periods: int = 10,
+        detect_data_changes_column: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Política de refresco incremental (``refreshPolicy``) sobre ``table_name``
+        filtrando la columna de fecha con ``RangeStart``/``RangeEnd``.
+        """
+        table = self._table(table_name)
+        partition = self._single_m_partition(table)
+        info = self._resolve_date_column(table, date_column)
+
+        condition = self._condition(info['source_column'], info['data_type'], 'RangeStart', 'RangeEnd')
+        expression = self._inject_filter(partition.source_expression, condition)
+        if expression is None:
+            raise ValueError(f"No se pudo inyectar el filtro en el M de '{table_name}'")
+        added = self.ensure_range_parameters()
+
+        policy = [
+            "\trefreshPolicy",
+            "\t\tpolicyType: basic",
+            f"\t\trollingWindowGranularity: {rolling_window_granularity}",
+            f"\t\trollingWindowPeriods: {rolling_window_periods}",
+            f"\t\tincrementalGranularity: {incremental_granularity}",
+            f"\t\tincrementalPeriods: {incremental_periods}",
+        ]
+        if detect_data_changes_column:
+            polling_column = self._resolve_date_column(table, detect_data_changes_column)['source_column']
+            policy.append("\t\tpollingExpression =")
+            policy += [f"\t\t\t\t{line}" for line in self._polling_expression(expression, polling_column).split('\n')]
+        policy.append("\t\tsourceExpression =")
+        policy += [f"\t\t\t\t{line}" for line in expression.split('\n')]
+
+        raw = self._replace_blocks(
+            table.raw_content, ('partition', 'refreshPolicy'),
+            ['\n'.join(policy), self._partition_block(partition.name, partition.mode, expression)],
+        )
+        self._update_table(table, raw)
+        print(f"  [Refresh] {table_name}: refreshPolicy sobre [{info['column']}] "
+              f"({rolling_window_periods} {rolling_window_granularity} / "
+              f"{incremental_periods} {incremental_granularity})"
+              + (f"; parámetros añadidos: {', '.join(added)}" if added else ""))
+        return {'table': table_name, 'date_column': info['column'], 'parameters_added': added}
+
+    def add_date_partitions(
+        self,
+        table_name: str,
+        date_column: Optional[str] = None,
+        granularity: str = 'year',
+        start_year: Optional[int] = None,
+        end_year: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Sustituye la partición única por particiones por año (o mes). La
+        primera no tiene límite inferior y la última no tiene límite superior,
+        de modo que ninguna fila queda fuera.
+        """
+        if granularity not in ('year', 'month'):
+            raise ValueError("granularity debe ser 'year' o 'month'")
+        table = self._table(table_name)
+        partition = self._single_m_partition(table)
+        info = self._resolve_date_column(table, date_column)
+        end_year = end_year or date.today().year
+        start_year = start_year or end_year - 4
+
+        periods = []
+        for year in range(start_year, end_year + 1):
+            if granularity == 'year':
+                periods.append((str(year), date(year, 1, 1)))
+            else:
+                periods += [(f"{year}-{month:02d}", date(year, month, 1)) for month in range(1, 13)]
+
+        blocks = []
+        for idx, (label, lower) in enumerate(periods):
+            upper = periods[idx + 1][1] if idx + 1 < len(periods) else None
+            condition = self._condition(
+                info['source_column'], info['data_type'], lower if idx > 0 else None, upper
+            )
+            expression = self._inject_filter(partition.source_expression, condition)
+            if expression is None:
+                raise ValueError(f"No se pudo inyectar el filtro en el M de '{table_name}'")
+            blocks.append(self._partition_block(f"{table_name} {label}", partition.mode, expression))
+
+        raw = self._replace_blocks(table.raw_content, ('partition', 'refreshPolicy'), blocks)
+        self._update_table(table, raw)
+        print(f"  [Refresh] {table_name}: {len(blocks)} particiones por {granularity} "
+              f"sobre [{info['column']}]")
+        return {'table': table_name, 'date_column': info['column'], 'partitions': len(blocks)}
+
+    def _resolve_date_column(self, table: Table, date_column: Optional[str]) -> Dict[str, Any]:
+        if date_column:
+            column = next((c for c in table.columns if c.name == date_column), None)
+            if column is None or column.is_calculated:
+                raise ValueError(f"Columna de fecha '{date_column}' no válida en '{table.name}'")
+            return {
+                'column': column.name,
+                'source_column': column.source_column or column.name,
+                'data_type': column.data_type or 'dateTime',
+                'date_table': None,
+            }
+        info = self.detect_date_column(table.name)
+        if info is None:
+            raise ValueError(f"No se encontró columna de fecha en '{table.name}'")
+        return info
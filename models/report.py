@@ -12,12 +12,47 @@ from pathlib import Path
 from typing import Dict, List, Set, Tuple, Optional, Any
 from collections import defaultdict
 
+from .json_loader import JsonStream, load_json, loads_json, load_json_files, map_in_threads
+
+
+# Claves que fijan el rol de los campos que contienen (gana la más interna)
+_FIELD_ROLE_KEYS = {
+    'queryState': 'projection',
+    'projections': 'projection',
+    'Select': 'projection',
+    'sortDefinition': 'sort',
+    'OrderBy': 'sort',
+    'filterConfig': 'filter',
+    'filters': 'filter',
+    'Where': 'filter',
+    'objects': 'formatting',
+    'visualContainerObjects': 'formatting',
+    'vcObjects': 'formatting',
+}
+# report.json legacy a partir de este tamaño se recorre en streaming (ver clsReport)
+LEGACY_STREAM_THRESHOLD_MB = 20.0
+
+# Niveles de subcarpetas que recorre clsReport si report.json no está en su ruta conocida
+REPORT_JSON_SEARCH_DEPTH = 2
+_REPORT_SEARCH_SKIP_DIRS = frozenset(('StaticResources', 'definition', 'pages', 'visuals'))
+
+_FIELD_KINDS = frozenset(('Column', 'Measure', 'Aggregation', 'HierarchyLevel'))
+
+# Condiciones de filtro (Where[].Condition) -> operador almacenado en report_filter_condition
+_COMPARISON_OPERATORS = {0: '=', 1: '>', 2: '>=', 3: '<', 4: '<='}
+_TEXT_CONDITIONS = {'Contains': 'contains', 'StartsWith': 'starts_with', 'EndsWith': 'ends_with'}
+_TIME_UNITS = {0: 'day', 1: 'week', 2: 'month', 3: 'year', 4: 'decade', 5: 'second', 6: 'minute', 7: 'hour'}
+
 
 class Visual:
     """Representa un visual dentro de una página del informe."""
 
-    def __init__(self, visual_dir: str):
-        self.visual_path = os.path.join(visual_dir, 'visual.json')
+    def __init__(self, visual_dir: Optional[str] = None, data: Optional[dict] = None):
+        """
+        Carga el visual desde ``visual_dir/visual.json`` (PBIR) o, si se pasa
+        ``data``, directamente desde el dict ya parseado (legacy), sin tocar disco.
+        """
+        self.visual_path = os.path.join(visual_dir, 'visual.json') if visual_dir else None
         self.name = None
         self.visualType = None
         self.text = None
@@ -25,16 +60,19 @@ class Visual:
         self.position = {}
         self.columns_used = []
         self.measures_used = []
+        self.field_roles: Dict[Tuple[str, str], Set[str]] = {}  # (kind, 'Tabla.Campo') -> roles
+        # Jerarquías de fecha automáticas usadas: (tabla, columna, variation)
+        self.variations_used: List[Tuple[str, str, str]] = []
         self.filterConfig = None
         self.filters: List[Filter] = []
         self.entity_alias_map = {}  # Nuevo: mapeo alias->entidad real
 
-        try:
-            with open(self.visual_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error al cargar visual.json: {e}")
-            data = {}
+        if data is None:
+            try:
+                data = load_json(self.visual_path)
+            except (OSError, json.JSONDecodeError, TypeError) as e:
+                print(f"Error al cargar visual.json: {e}")
+                data = {}
 
         self.name = data.get("name")
         self.visualType = data.get("visual", {}).get("visualType")
@@ -77,25 +115,9 @@ class Visual:
                 nav_expr = props["navigationSection"].get("expr", {}).get("Literal", {}).get("Value", "")
                 self.navigationTarget = nav_expr.strip("'")
 
-        # Campos usados en queryState (recorrer todos los posibles apartados)
-        query_state = data.get("visual", {}).get("query", {}).get("queryState", {})
-        if isinstance(query_state, dict):
-            for key, value in query_state.items():
-                if isinstance(value, dict) and "projections" in value:
-                    projections = value.get("projections", [])
-                    for proj in projections:
-                        self._extraer_campo(proj.get("field", {}), proj.get("queryRef"))
-
-        # Campos usados en sortDefinition
-        sort_fields = data.get("visual", {}).get("query", {}).get("sortDefinition", {}).get("sort", [])
-        for sort in sort_fields:
-            self._extraer_campo(sort.get("field", {}))
-
-        # Campos usados en objects
-        objects = data.get("visual", {}).get("objects", {})
-        self._buscar_campos_en_objetos(objects)
-        self._buscar_campos_en_objetos(data)
-        
+        # Campos usados (proyecciones, orden, filtros y formato) en una sola pasada
+        self._extract_fields(data)
+
         # Filtros a nivel de visual
         self.filterConfig = data.get("filterConfig", {})
         if self.filterConfig:
@@ -105,64 +127,136 @@ class Visual:
                 visual_name=self.name
             )
 
-    def _extraer_campo(self, field, query_ref=None):
-        """Extrae campos de tipo Column o Measure, usando queryRef si está presente y distinguiendo tipo. Sustituye alias por entidad real si es necesario."""
-        # Si hay query_ref, usarlo y distinguir tipo
-        if query_ref:
-            # Resolver alias en queryRef (formato típico: "alias.Property")
-            resolved_ref = query_ref
-            if '.' in query_ref:
-                alias_part, prop_part = query_ref.split('.', 1)
-                if alias_part in self.entity_alias_map:
-                    resolved_ref = f"{self.entity_alias_map[alias_part]}.{prop_part}"
-            if "Measure" in field:
-                self.measures_used.append(resolved_ref)
-                return
-            elif "Column" in field:
-                self.columns_used.append(resolved_ref)
-                return
-        # Si no hay query_ref, parseo tradicional
-        if "Column" in field:
-            ref = field["Column"]
-            table_name = ref.get("Table") or ref.get("Entity")
-            if not table_name:
-                table_name = ref.get("Expression", {}).get("SourceRef", {}).get("Entity")
-                if not table_name:
-                    table_name = ref.get("Expression", {}).get("SourceRef", {}).get("Source")
-            # Sustituir alias por entidad real si corresponde
-            if table_name and table_name in self.entity_alias_map:
-                table_name = self.entity_alias_map[table_name]
-            prop = ref.get("Property")
-            if prop:
-                self.columns_used.append(f"{table_name}.{prop}" if table_name else f"{prop}")
-        elif "Measure" in field:
-            ref = field["Measure"]
-            table_name = ref.get("Table") or ref.get("Entity")
-            if not table_name:
-                table_name = ref.get("Expression", {}).get("SourceRef", {}).get("Entity")
-                if not table_name:
-                    table_name = ref.get("Expression", {}).get("SourceRef", {}).get("Source")
-            # Sustituir alias por entidad real si corresponde
-            if table_name and table_name in self.entity_alias_map:
-                table_name = self.entity_alias_map[table_name]
-            prop = ref.get("Property")
-            if prop:
-                self.measures_used.append(f"{table_name}.{prop}" if table_name else f"{prop}")
-
-    def _buscar_campos_en_objetos(self, obj):
-        """Busca recursivamente campos en objetos visuales."""
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                if key in ["Measure", "Column"]:
-                    if isinstance(value, dict) and "Expression" in value and "Property" in value:
-                        self._extraer_campo({key: value})
-                    else:
-                        self._extraer_campo({key: value})
-                else:
-                    self._buscar_campos_en_objetos(value)
-        elif isinstance(obj, list):
-            for item in obj:
-                self._buscar_campos_en_objetos(item)
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Visual':
+        """Crea el visual desde un dict en memoria (config legacy ya normalizado)."""
+        return cls(data=data)
+
+    def _extract_fields(self, data: dict):
+        """
+        Recorre ``data`` una sola vez (pila explícita, sin límite de recursión)
+        y recoge las referencias Column, Measure, Aggregation (su columna) y
+        HierarchyLevel. Cada campo se guarda una vez en ``columns_used`` /
+        ``measures_used`` y ``field_roles`` registra dónde apareció:
+        projection, sort, filter, formatting u other. Los niveles de
+        jerarquías de fecha automáticas (``PropertyVariationSource``) se
+        anotan además en ``variations_used``.
+
+        Los alias (``From`` de prototypeQuery o de cada filtro) se resuelven
+        en el ámbito en que se declaran.
+        """
+        field_roles: Dict[Tuple[str, str], Set[str]] = {}
+        variations: Set[Tuple[str, str, str]] = set()
+        stack: List[Tuple[Any, str, Dict[str, str]]] = [(data, 'other', self.entity_alias_map)]
+        push, pop = stack.append, stack.pop
+        role_keys, field_kinds, field_ref = _FIELD_ROLE_KEYS, _FIELD_KINDS, self._field_ref
+        while stack:
+            obj, role, aliases = pop()
+            if type(obj) is list:
+                for item in reversed(obj):
+                    if type(item) is dict or type(item) is list:
+                        push((item, role, aliases))
+                continue
+            from_list = obj['From'] if 'From' in obj else None
+            if type(from_list) is list:
+                scoped = {
+                    entry['Name']: entry['Entity'] for entry in from_list
+                    if isinstance(entry, dict) and 'Name' in entry and 'Entity' in entry
+                }
+                if scoped:
+                    aliases = {**aliases, **scoped}
+            for key in reversed(obj):
+                value = obj[key]
+                value_type = type(value)
+                if value_type is dict:
+                    if key in field_kinds:
+                        field = field_ref(key, value, aliases)
+                        if field:
+                            field_roles.setdefault(field, set()).add(role)
+                            if key == 'HierarchyLevel' or key == 'Aggregation':
+                                variation = self._variation_ref(key, value, aliases)
+                                if variation:
+                                    variations.add(variation)
+                        continue
+                elif value_type is not list:
+                    continue
+                push((value, role_keys[key] if key in role_keys else role, aliases))
+
+        self.field_roles = field_roles
+        self.columns_used = [ref for kind, ref in field_roles if kind == 'column']
+        self.measures_used = [ref for kind, ref in field_roles if kind == 'measure']
+        self.variations_used = sorted(variations)
+
+    @staticmethod
+    def _source_entity(expression: Any, aliases: Dict[str, str]) -> Optional[str]:
+        """Entidad de un ``SourceRef`` (por ``Entity`` o por alias en ``Source``)."""
+        if not isinstance(expression, dict):
+            return None
+        source_ref = expression.get('SourceRef')
+        if not isinstance(source_ref, dict):
+            return None
+        entity = source_ref.get('Entity') or source_ref.get('Source')
+        return aliases.get(entity, entity)
+
+    @classmethod
+    def _field_ref(cls, key: str, value: dict, aliases: Dict[str, str]) -> Optional[Tuple[str, str]]:
+        """``('column' | 'measure', 'Tabla.Campo')`` de una referencia, o None."""
+        if key == 'HierarchyLevel':
+            expression = value.get('Expression')
+            hierarchy = expression.get('Hierarchy') if isinstance(expression, dict) else None
+            if not isinstance(hierarchy, dict):
+                return None
+            expression = hierarchy.get('Expression', {})
+            variation = expression.get('PropertyVariationSource') if isinstance(expression, dict) else None
+            if isinstance(variation, dict):
+                # Jerarquía de fecha automática: la columna es la propiedad base
+                table_name = cls._source_entity(variation.get('Expression'), aliases)
+                prop = variation.get('Property')
+            else:
+                # Jerarquía de usuario: el nivel se llama como su columna por defecto
+                table_name = cls._source_entity(expression, aliases)
+                prop = value.get('Level')
+            kind = 'column'
+        elif key == 'Aggregation':
+            inner = value.get('Expression', {})
+            if not isinstance(inner, dict):
+                return None
+            for inner_key in ('Column', 'Measure', 'HierarchyLevel'):
+                if isinstance(inner.get(inner_key), dict):
+                    return cls._field_ref(inner_key, inner[inner_key], aliases)
+            return None
+        else:
+            table_name = value.get('Table') or value.get('Entity') or cls._source_entity(value.get('Expression'), aliases)
+            table_name = aliases.get(table_name, table_name)
+            prop = value.get('Property')
+            kind = 'measure' if key == 'Measure' else 'column'
+        if not prop:
+            return None
+        return kind, f"{table_name}.{prop}" if table_name else f"{prop}"
+
+    @classmethod
+    def _variation_ref(cls, key: str, value: dict, aliases: Dict[str, str]) -> Optional[Tuple[str, str, str]]:
+        """
+        ``(tabla, columna, variation)`` si el campo es un nivel de una jerarquía
+        de fecha automática: la columna base apunta a su LocalDateTable a
+        través de la ``variation`` de ese nombre.
+        """
+        if key == 'Aggregation':
+            inner = value.get('Expression')
+            value = inner.get('HierarchyLevel') if isinstance(inner, dict) else None
+            if not isinstance(value, dict):
+                return None
+        expression = value.get('Expression')
+        hierarchy = expression.get('Hierarchy') if isinstance(expression, dict) else None
+        source = hierarchy.get('Expression') if isinstance(hierarchy, dict) else None
+        variation = source.get('PropertyVariationSource') if isinstance(source, dict) else None
+        if not isinstance(variation, dict):
+            return None
+        table_name = cls._source_entity(variation.get('Expression'), aliases)
+        prop, name = variation.get('Property'), variation.get('Name')
+        if not (table_name and prop and name):
+            return None
+        return table_name, prop, name
 
     def __repr__(self):
         return f"Visual(name={self.name}, type={self.visualType}, columns={len(self.columns_used)}, measures={len(self.measures_used)})"
@@ -229,7 +323,8 @@ class Filter:
     """Representa un filtro con información de su origen (report, page o visual) y columnas involucradas."""
 
     def __init__(self, name: str, filter_type: str, table_name: str, column_name: str, 
-                 page_name: str = None, visual_name: str = None, description: str = None):
+                 page_name: str = None, visual_name: str = None, description: str = None,
+                 filter_kind: str = None, conditions: List[Dict[str, Any]] = None):
         """
         Args:
             name: Nombre del filtro
@@ -239,6 +334,8 @@ class Filter:
             page_name: Nombre de la página (si es page o visual filter)
             visual_name: Nombre del visual (si es visual filter)
             description: Descripción legible del filtro
+            filter_kind: Tipo de filtro en Power BI ('Categorical', 'Advanced', 'TopN', 'RelativeDate'...)
+            conditions: Árbol de condiciones aplanado (ver ``parse_conditions``)
         """
         self.name = name
         self.filter_type = filter_type
@@ -247,6 +344,181 @@ class Filter:
         self.page_name = page_name
         self.visual_name = visual_name
         self.description = description
+        self.filter_kind = filter_kind
+        self.conditions = conditions or []
+
+    @property
+    def value_count(self) -> int:
+        """Nº total de valores del filtro (p. ej. tamaño de las listas In)."""
+        return sum(len(c['values']) for c in self.conditions)
+
+    # ── Condiciones estructuradas ──
+
+    @classmethod
+    def parse_conditions(cls, filter_def: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Convierte ``filter.Where`` en una lista de nodos (árbol aplanado en
+        preorden). Cada nodo es un dict con:
+
+        - ``index`` / ``parent_index``: posición del nodo y de su padre (None en la raíz)
+        - ``operator``: 'and', 'or', 'in', 'in_subquery', 'comparison', 'between',
+          'contains', 'starts_with', 'ends_with' u 'other:<Clave>'
+        - ``negated``: True si la condición está dentro de un ``Not``
+        - ``kind``, ``table_name``, ``column_name``: campo filtrado (si lo hay)
+        - ``comparison``: '=', '>', '>=', '<', '<=' (solo en 'comparison')
+        - ``values``: filas de literales; cada fila es una tupla con un
+          ``(valor, tipo)`` por columna (una sola salvo en In multicolumna)
+        - ``fields``: ``(kind, table_name, column_name)`` de cada columna de un
+          In multicolumna, en el orden de sus filas de ``values``
+        - ``top_n``: N de un filtro TopN (In sobre subconsulta con ``Top``)
+        - ``relative_amount`` / ``relative_unit``: fecha relativa (DateAdd sobre Now)
+        """
+        if not isinstance(filter_def, dict):
+            return []
+        aliases: Dict[str, str] = {}
+        subqueries: Dict[str, dict] = {}
+        for entry in filter_def.get('From') or []:
+            if not isinstance(entry, dict) or 'Name' not in entry:
+                continue
+            if 'Entity' in entry:
+                aliases[entry['Name']] = entry['Entity']
+            subquery = (entry.get('Expression') or {}).get('Subquery')
+            if isinstance(subquery, dict):
+                subqueries[entry['Name']] = subquery.get('Query') or {}
+
+        nodes: List[Dict[str, Any]] = []
+        for clause in filter_def.get('Where') or []:
+            if isinstance(clause, dict):
+                cls._parse_condition(clause.get('Condition'), None, False, aliases, subqueries, nodes)
+        return nodes
+
+    @classmethod
+    def _parse_condition(cls, condition: Any, parent_index: Optional[int], negated: bool,
+                         aliases: Dict[str, str], subqueries: Dict[str, dict],
+                         nodes: List[Dict[str, Any]]) -> None:
+        """Añade a ``nodes`` el nodo de ``condition`` y, recursivamente, sus hijos."""
+        if not isinstance(condition, dict) or not condition:
+            return
+        key, body = next(iter(condition.items()))
+        if not isinstance(body, dict):
+            body = {}
+        if key == 'Not':
+            # Not no genera nodo: se propaga como negación a la condición interna
+            cls._parse_condition(body.get('Expression'), parent_index, not negated, aliases, subqueries, nodes)
+            return
+
+        node = {
+            'index': len(nodes), 'parent_index': parent_index, 'operator': None, 'negated': negated,
+            'kind': None, 'table_name': None, 'column_name': None, 'comparison': None,
+            'values': [], 'fields': [], 'top_n': None, 'relative_amount': None, 'relative_unit': None,
+        }
+        nodes.append(node)
+
+        if key in ('And', 'Or'):
+            node['operator'] = key.lower()
+            for side in ('Left', 'Right'):
+                cls._parse_condition(body.get(side), node['index'], negated, aliases, subqueries, nodes)
+            return
+
+        if key == 'In':
+            expressions = body.get('Expressions') or []
+            cls._set_condition_field(node, expressions[0] if expressions else None, aliases)
+            if len(expressions) > 1:
+                for expression in expressions:
+                    field = {'kind': None, 'table_name': None, 'column_name': None}
+                    cls._set_condition_field(field, expression, aliases)
+                    node['fields'].append((field['kind'], field['table_name'], field['column_name']))
+            table = body.get('Table')
+            if isinstance(table, dict):
+                node['operator'] = 'in_subquery'
+                source = (table.get('SourceRef') or {}).get('Source')
+                top = subqueries.get(source, {}).get('Top')
+                node['top_n'] = int(top) if isinstance(top, (int, float)) else None
+                return
+            node['operator'] = 'in'
+            for row in body.get('Values') or []:
+                values = tuple(cls._literal_value(v, node) for v in row) if isinstance(row, list) else ()
+                if values:
+                    node['values'].append(values)
+        elif key == 'Comparison':
+            node['operator'] = 'comparison'
+            node['comparison'] = _COMPARISON_OPERATORS.get(body.get('ComparisonKind'))
+            cls._set_condition_field(node, body.get('Left'), aliases)
+            node['values'].append((cls._literal_value(body.get('Right'), node),))
+        elif key == 'Between':
+            node['operator'] = 'between'
+            cls._set_condition_field(node, body.get('Expression'), aliases)
+            node['values'].append((cls._literal_value(body.get('LowerBound'), node),))
+            node['values'].append((cls._literal_value(body.get('UpperBound'), node),))
+        elif key in _TEXT_CONDITIONS:
+            node['operator'] = _TEXT_CONDITIONS[key]
+            cls._set_condition_field(node, body.get('Left'), aliases)
+            node['values'].append((cls._literal_value(body.get('Right'), node),))
+        else:
+            node['operator'] = f"other:{key}"
+
+    @staticmethod
+    def _set_condition_field(node: Dict[str, Any], expression: Any, aliases: Dict[str, str]) -> None:
+        """Rellena kind/table_name/column_name del nodo con el campo de ``expression``."""
+        if not isinstance(expression, dict):
+            return
+        for key in _FIELD_KINDS:
+            if isinstance(expression.get(key), dict):
+                field = Visual._field_ref(key, expression[key], aliases)
+                if field:
+                    table_name, _, column_name = field[1].rpartition('.')
+                    node['kind'] = field[0]
+                    node['table_name'] = table_name or None
+                    node['column_name'] = column_name
+                return
+
+    @staticmethod
+    def _literal_value(expression: Any, node: Dict[str, Any]) -> Tuple[Optional[str], str]:
+        """
+        ``(valor, tipo)`` de un literal de Power BI ('texto', 12L, 1.5D,
+        datetime'...', true, null). Las fechas relativas (DateSpan/DateAdd/Now)
+        se anotan en ``node`` y devuelven ``(None, 'relative')``.
+        """
+        if not isinstance(expression, dict):
+            return None, 'unknown'
+        literal = expression.get('Literal')
+        if isinstance(literal, dict):
+            raw = str(literal.get('Value'))
+            if raw.startswith("'") and raw.endswith("'") and len(raw) >= 2:
+                return raw[1:-1].replace("''", "'"), 'text'
+            if raw.startswith("datetime'") and raw.endswith("'"):
+                return raw[9:-1], 'datetime'
+            if raw in ('true', 'false'):
+                return raw, 'boolean'
+            if raw == 'null':
+                return None, 'null'
+            if raw[-1:] == 'L':
+                return raw[:-1], 'integer'
+            if raw[-1:] in ('D', 'M'):
+                return raw[:-1], 'decimal'
+            return raw, 'unknown'
+
+        # Fecha relativa: DateSpan(DateAdd(Now, Amount, TimeUnit), TimeUnit)
+        relative = expression
+        while isinstance(relative, dict):
+            if 'DateAdd' in relative:
+                # En Between manda el primer límite (el inicio de la ventana)
+                date_add = relative['DateAdd'] or {}
+                if node['relative_amount'] is None:
+                    node['relative_amount'] = date_add.get('Amount')
+                    node['relative_unit'] = _TIME_UNITS.get(date_add.get('TimeUnit'))
+                return None, 'relative'
+            if 'Now' in relative:
+                if node['relative_amount'] is None:
+                    node['relative_amount'] = 0
+                return None, 'relative'
+            inner = relative.get('DateSpan') or relative.get('Date')
+            if not isinstance(inner, dict):
+                break
+            if node['relative_unit'] is None and 'TimeUnit' in inner:
+                node['relative_unit'] = _TIME_UNITS.get(inner.get('TimeUnit'))
+            relative = inner.get('Expression')
+        return None, 'expression'
 
     @staticmethod
     def extract_from_config(filter_config: Dict[str, Any], filter_type: str = "report",
@@ -366,7 +638,9 @@ class Filter:
                     column_name=column_name,
                     page_name=page_name,
                     visual_name=visual_name,
-                    description=description
+                    description=description,
+                    filter_kind=f.get("type"),
+                    conditions=Filter.parse_conditions(filter_config_obj)
                 )
                 filters.append(filter_obj)
         
@@ -379,14 +653,28 @@ class Filter:
 class Page(FilterMixin):
     """Representa una página de un informe, incluyendo sus visuales."""
 
-    def __init__(self, page_dir: str):
-        page_file = os.path.join(page_dir, 'page.json')
-        try:
-            with open(page_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"Error al cargar página: {e}")
-            data = {}
+    def __init__(
+        self,
+        page_dir: Optional[str] = None,
+        data: Optional[dict] = None,
+        visuals_data: Optional[List[dict]] = None,
+        visual_dirs: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Carga la página desde ``page_dir`` (``page.json`` + carpeta ``visuals``)
+        o, si se pasa ``data``, desde memoria: ``data`` equivale a ``page.json``
+        y ``visuals_data`` a la lista de ``visual.json`` (con sus carpetas en
+        ``visual_dirs`` si vienen de disco). ``max_workers`` acota los hilos
+        usados para leer los ``visual.json``.
+        """
+        if data is None:
+            page_file = os.path.join(page_dir, 'page.json') if page_dir else None
+            try:
+                data = load_json(page_file)
+            except (OSError, json.JSONDecodeError, TypeError) as e:
+                print(f"Error al cargar página: {e}")
+                data = {}
 
         self.name = data.get("name")
         self.displayName = data.get("displayName")
@@ -405,18 +693,40 @@ class Page(FilterMixin):
             page_name=self.name
         )
         self.visuals: List[Visual] = []
-        self._load_visuals(page_dir)
+        if visuals_data is not None:
+            self._add_visuals(visuals_data, visual_dirs)
+        elif page_dir:
+            self._load_visuals(page_dir, max_workers)
 
-    def _load_visuals(self, page_dir: str):
-        """Carga los visuales de la página desde la carpeta 'visuals'."""
+    @classmethod
+    def from_dict(cls, data: dict, visuals_data: Optional[List[dict]] = None) -> 'Page':
+        """Crea la página desde dicts en memoria (secciones legacy), sin ficheros intermedios."""
+        return cls(data=data, visuals_data=visuals_data or [])
+
+    @staticmethod
+    def _list_visual_dirs(page_dir: str) -> List[str]:
+        """Carpetas de visuales dentro de 'visuals' (vacío si no existe)."""
         visuals_dir = os.path.join(page_dir, 'visuals')
         if not os.path.isdir(visuals_dir):
-            return
+            return []
+        return [
+            entry.path for entry in os.scandir(visuals_dir) if entry.is_dir()
+        ]
 
-        for visual_id in os.listdir(visuals_dir):
-            visual_path = os.path.join(visuals_dir, visual_id)
-            if os.path.isdir(visual_path):
-                self.visuals.append(Visual(visual_path))
+    def _load_visuals(self, page_dir: str, max_workers: Optional[int] = None):
+        """Carga los visuales de la página desde la carpeta 'visuals' (lectura en paralelo)."""
+        visual_dirs = self._list_visual_dirs(page_dir)
+        results = load_json_files([os.path.join(d, 'visual.json') for d in visual_dirs], max_workers)
+        self._add_visuals(results, visual_dirs)
+
+    def _add_visuals(self, visuals_data: List[Any], visual_dirs: Optional[List[str]] = None):
+        """Construye los Visual desde dicts ya cargados (una excepción = fichero ilegible)."""
+        visual_dirs = visual_dirs or [None] * len(visuals_data)
+        for visual_dir, data in zip(visual_dirs, visuals_data):
+            if isinstance(data, Exception):
+                print(f"Error al cargar visual.json: {data}")
+                data = {}
+            self.visuals.append(Visual(visual_dir, data=data))
 
     def get_all_columns_used(self) -> Set[str]:
         """Retorna el conjunto de todas las columnas usadas en la página."""
@@ -815,8 +1125,15 @@ class Page(FilterMixin):
 class clsReport(FilterMixin):
     """Clase principal para cargar y representar un informe completo."""
 
-    def __init__(self, root_path: str, report_id: str = None, workspace_id: str = None, report_name: str = None):
+    def __init__(self, root_path: str, report_id: str = None, workspace_id: str = None, report_name: str = None,
+                 max_workers: Optional[int] = None, stream_legacy: Optional[bool] = None,
+                 search_depth: int = REPORT_JSON_SEARCH_DEPTH):
         self.root_path = root_path
+        self.search_depth = search_depth  # Niveles de subcarpetas si report.json no está en su ruta conocida
+        self.max_workers = max_workers  # Hilos para leer page.json / visual.json (1 = secuencial)
+        # report.json legacy en streaming (None = automático a partir de LEGACY_STREAM_THRESHOLD_MB)
+        self.stream_legacy = stream_legacy
+        self._sections_streamed = False
         self.report_id = report_id  # ID del reporte desde Microsoft Fabric
         self.workspace_id = workspace_id  # ID del workspace desde Microsoft Fabric
         self.report_name = report_name  # Nombre del reporte (displayName desde Power BI)
@@ -867,9 +1184,8 @@ class clsReport(FilterMixin):
             return None
             
         try:
-            with open(pbir_file_path, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-        except (FileNotFoundError, json.JSONDecodeError):
+            data = load_json(pbir_file_path)
+        except (OSError, json.JSONDecodeError):
             return None
     
         dataset_ref = data.get("datasetReference", {})
@@ -898,31 +1214,58 @@ class clsReport(FilterMixin):
         """Busca el archivo report.json en dos formatos:
         1. Formato nuevo PBIR: carpeta 'definition/report.json'
         2. Formato antiguo: 'report.json' en la raíz
+        Si no está en esas rutas, busca en subcarpetas hasta ``search_depth`` niveles.
         """
         if not os.path.exists(self.root_path):
             print(f"⚠️ La ruta del reporte NO EXISTE: {self.root_path}")
             return None
-        
-        # Caso 1: Buscar en formato nuevo (PBIR) - dentro de carpeta 'definition/'
-        for root, dirs, files in os.walk(self.root_path):
-            if 'definition' in dirs:
-                definition_path = os.path.join(root, 'definition')
-                report_path = os.path.join(definition_path, 'report.json')
-                if os.path.isfile(report_path):
-                    print(f"[OK] Encontrado report.json (formato PBIR) en: {report_path}")
-                    return report_path
-        
-        # Caso 2: Buscar en formato antiguo - report.json en la raíz
-        report_path = os.path.join(self.root_path, 'report.json')
-        if os.path.isfile(report_path):
-            print(f"[OK] Encontrado report.json (formato antiguo) en: {report_path}")
+
+        report_path, report_format = self._probe_report_json(self.root_path, self.search_depth)
+        if report_path:
+            label = "formato PBIR" if report_format == "pbir" else "formato antiguo"
+            print(f"[OK] Encontrado report.json ({label}) en: {report_path}")
             return report_path
-        
+
         # Si no encuentra nada, mostrar información de debug
         print(f"[ERROR] report.json NO ENCONTRADO en: {self.root_path}")
         print(f"   Carpetas/archivos en raiz: {os.listdir(self.root_path) if os.path.exists(self.root_path) else 'N/A'}")
         return None
 
+    @staticmethod
+    def _probe_report_json(root_path: str, search_depth: int = REPORT_JSON_SEARCH_DEPTH) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Devuelve ``(ruta, 'pbir' | 'legacy')`` del report.json de ``root_path``.
+
+        Primero prueba las rutas conocidas (``definition/report.json`` y
+        ``report.json``) sin listar carpetas; después recorre por niveles las
+        subcarpetas hasta ``search_depth`` (0 = solo la raíz), en orden
+        alfabético y sin entrar en recursos estáticos ni en ``definition``.
+        """
+        level = [root_path]
+        for depth in range(search_depth + 1):
+            next_level = []
+            for folder in level:
+                pbir_path = os.path.join(folder, 'definition', 'report.json')
+                if os.path.isfile(pbir_path):
+                    return pbir_path, 'pbir'
+                legacy_path = os.path.join(folder, 'report.json')
+                if os.path.isfile(legacy_path):
+                    return legacy_path, 'legacy'
+                if depth < search_depth:
+                    try:
+                        entries = sorted(
+                            entry.name for entry in os.scandir(folder)
+                            if entry.is_dir() and entry.name not in _REPORT_SEARCH_SKIP_DIRS
+                            and not entry.name.startswith('.')
+                        )
+                    except OSError:
+                        continue
+                    next_level.extend(os.path.join(folder, name) for name in entries)
+            level = next_level
+            if not level:
+                break
+        return None, None
+
     def _load_report_json(self):
         """Carga el contenido del archivo report.json."""
         if not self.report_path:
@@ -931,11 +1274,14 @@ class clsReport(FilterMixin):
             
         try:
             self.SemanticModel = self._extract_semantic_model_name()
-            with open(self.report_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+            if self._should_stream_report():
+                data = self._stream_report_json()
+            else:
+                data = load_json(self.report_path)
+        except (OSError, json.JSONDecodeError) as e:
             print(f"Error al cargar report.json: {e}")
             data = {}
+            self.pages, self.pageOrder, self._sections_streamed = [], [], False
 
         # Detectar formato: PBIR (con $schema) o antiguo (con sections y config)
         self.report_format = "pbir" if "$schema" in data else "legacy"
@@ -950,7 +1296,7 @@ class clsReport(FilterMixin):
             raw_filters = data.get("filters", [])
             if isinstance(raw_filters, str):
                 try:
-                    raw_filters = json.loads(raw_filters)
+                    raw_filters = loads_json(raw_filters)
                 except json.JSONDecodeError:
                     raw_filters = []
             if isinstance(raw_filters, list) and raw_filters:
@@ -971,6 +1317,60 @@ class clsReport(FilterMixin):
             filter_type="report"
         )
 
+    def _should_stream_report(self) -> bool:
+        if self.stream_legacy is not None:
+            return self.stream_legacy
+        try:
+            return os.path.getsize(self.report_path) >= LEGACY_STREAM_THRESHOLD_MB * 1024 * 1024
+        except OSError:
+            return False
+
+    def _stream_report_json(self) -> dict:
+        """
+        Lee report.json por trozos: las claves de primer nivel se cargan
+        normalmente salvo ``sections``, cuyas páginas y visuales se construyen
+        sobre la marcha (cada config se parsea y se libera tras extraer sus
+        campos). Devuelve el resto del documento, sin ``sections``.
+        """
+        print("   Leyendo report.json en streaming...")
+        data = {}
+        with JsonStream.open(self.report_path) as stream:
+            for key in stream.iter_object():
+                if key == 'sections' and stream.peek() == '[':
+                    self._stream_legacy_sections(stream)
+                    self._sections_streamed = True
+                else:
+                    data[key] = stream.value()
+        return data
+
+    def _stream_legacy_sections(self, stream: JsonStream):
+        """Construye las páginas de ``sections`` sin mantener el array en memoria."""
+        for idx in stream.iter_array():
+            if stream.peek() != '{':
+                stream.skip()
+                continue
+            section = {}
+            visuals: List[Visual] = []
+            for key in stream.iter_object():
+                if key == 'visualContainers' and stream.peek() == '[':
+                    for visual_idx in stream.iter_array():
+                        visual_container = stream.value()
+                        try:
+                            visual_data = self._legacy_visual_to_dict(visual_container, visual_idx)
+                            visuals.append(Visual.from_dict(visual_data))
+                        except Exception as e:
+                            print(f"Error al procesar visual {visual_idx} de legacy section {idx}: {e}")
+                else:
+                    section[key] = stream.value()
+            try:
+                page = Page.from_dict(self._legacy_page_dict(section, idx))
+                page.visuals = visuals
+                self.pages.append(page)
+                if 'name' in section:
+                    self.pageOrder.append(section['name'])
+            except Exception as e:
+                print(f"Error al procesar legacy section {idx}: {e}")
+
     def _load_pages(self):
         """Carga las páginas del informe desde la carpeta 'pages' (PBIR) o desde 'sections' (legacy)."""
         
@@ -987,25 +1387,43 @@ class clsReport(FilterMixin):
             return
         pages_metadata_file = os.path.join(self.pages_path, 'pages.json')
         try:
-            with open(pages_metadata_file, 'r', encoding='utf-8') as f:
-                pages_data = json.load(f)
+            pages_data = load_json(pages_metadata_file)
             self.pageOrder = pages_data.get("pageOrder", [])
             self.activePageName = pages_data.get("activePageName")
-        except (FileNotFoundError, json.JSONDecodeError) as e:
+        except (OSError, json.JSONDecodeError) as e:
             print(f"Error al cargar pages.json: {e}")
 
-        for page_id in self.pageOrder:
-            page_dir = os.path.join(self.pages_path, page_id)
-            page_file = os.path.join(page_dir, 'page.json')
-            if os.path.isfile(page_file):
-                self.pages.append(Page(page_dir))
+        # page.json, carpetas de visuales y visual.json de todas las páginas se leen
+        # con el mismo pool acotado; los objetos se construyen después en orden
+        page_dirs = [os.path.join(self.pages_path, page_id) for page_id in self.pageOrder]
+        page_results = load_json_files([os.path.join(d, 'page.json') for d in page_dirs], self.max_workers)
+        loaded = [
+            (page_dir, data) for page_dir, data in zip(page_dirs, page_results)
+            if not isinstance(data, FileNotFoundError)
+        ]
+        visual_dirs = map_in_threads(Page._list_visual_dirs, [d for d, _ in loaded], self.max_workers)
+        visual_results = load_json_files(
+            [os.path.join(v, 'visual.json') for dirs in visual_dirs for v in dirs], self.max_workers
+        )
+
+        offset = 0
+        for (page_dir, data), dirs in zip(loaded, visual_dirs):
+            if isinstance(data, Exception):
+                print(f"Error al cargar página: {data}")
+                data = {}
+            page_visuals = visual_results[offset:offset + len(dirs)]
+            offset += len(dirs)
+            self.pages.append(Page(page_dir, data=data, visuals_data=page_visuals, visual_dirs=dirs))
     
     def _load_legacy_pages(self):
         """Carga las páginas en formato legacy desde el array 'sections' del report.json."""
-        if not self._report_data:
+        if self._sections_streamed:
+            # Páginas ya construidas al leer report.json en streaming
+            sections = []
+        elif not self._report_data:
             return
-        
-        sections = self._report_data.get('sections', [])
+        else:
+            sections = self._report_data.get('sections', [])
         for idx, section in enumerate(sections):
             try:
                 # Crear un objeto Page simulado desde cada section
@@ -1023,150 +1441,138 @@ class clsReport(FilterMixin):
             self.activePageName = self.pages[0].name if hasattr(self.pages[0], 'name') else 'Page 1'
     
     def _create_page_from_legacy_section(self, section: dict, section_index: int) -> Optional['Page']:
-        """Crea un objeto Page a partir de una section del formato legacy."""
+        """Crea un objeto Page en memoria a partir de una section del formato legacy."""
         try:
-            # Extraer información básica de la section
-            page_name = section.get('name', f'Page {section_index + 1}')
-            display_name = section.get('displayName', page_name)
-            # Crear un directorio temporal para almacenar los datos de la página
-            # Usar pages_path si existe, sino usar el root_path
-            base_dir = self.pages_path if self.pages_path else self.root_path
-            temp_page_dir = os.path.join(base_dir, f'_legacy_{section_index}')
-
-            # Crear el directorio si no existe
-            os.makedirs(temp_page_dir, exist_ok=True)
-
-            # Crear el subdirectorio 'visuals' para almacenar los visuals
-            visuals_dir = os.path.join(temp_page_dir, 'visuals')
-            os.makedirs(visuals_dir, exist_ok=True)
-
-            # Extraer visualContainers y crear archivos visual.json individuales
-            visual_containers = section.get('visualContainers', [])
-            for visual_idx, visual_container in enumerate(visual_containers):
-                # Extraer el config del visual
-                visual_config = visual_container.get('config', '{}')
-
-                # Si config es un string JSON, parsearlo
-                if isinstance(visual_config, str):
-                    try:
-                        visual_data = json.loads(visual_config)
-                    except json.JSONDecodeError:
-                        print(f"⚠️  No se pudo parsear visual config como JSON en visual {visual_idx}")
-                        visual_data = {}
-                else:
-                    visual_data = visual_config
-                
-                # En formato legacy, la posición está en el visualContainer, no dentro del config
-                # Inyectar position para que Visual.__init__ la encuentre
-                if 'position' not in visual_data:
-                    visual_data['position'] = {
-                        "x": visual_container.get('x', 0),
-                        "y": visual_container.get('y', 0),
-                        "width": visual_container.get('width', 100),
-                        "height": visual_container.get('height', 100),
-                        "z": visual_container.get('z', 0),
-                        "tabOrder": visual_container.get('tabOrder', 0),
-                    }
-                # Buscar mapeo de alias a entidad real en prototypeQuery.From
-                alias_map = {}
-                proto_query = visual_data.get('prototypeQuery')
-                if not proto_query:
-                    sv= visual_data.get("singleVisual")
-                    if sv and isinstance(sv, dict):
-                        proto_query = sv.get('prototypeQuery')
-                if proto_query and isinstance(proto_query, dict):
-                    from_list = proto_query.get('From')
-                    if isinstance(from_list, list):
-                        for entry in from_list:
-                            if isinstance(entry, dict) and 'Name' in entry and 'Entity' in entry:
-                                alias_map[entry['Name']] = entry['Entity']
-                
-                def sustituir_source_ref(obj):
-                    if isinstance(obj, dict):
-                        for k, v in obj.items():
-                            # Solo sustituir en SourceRef
-                            if k == 'SourceRef' and isinstance(v, dict):
-                                # Sustituir solo en Source y Entity
-                                if 'Source' in v and v['Source'] in alias_map:
-                                    v['Source'] = alias_map[v['Source']]
-                                if 'Entity' in v and v['Entity'] in alias_map:
-                                    v['Entity'] = alias_map[v['Entity']]
-                            else:
-                                sustituir_source_ref(v)
-                    elif isinstance(obj, list):
-                        for item in obj:
-                            sustituir_source_ref(item)
-
-                sustituir_source_ref(visual_data)
-
-                # En legacy, los filtros del visual están en visualContainer.filters (JSON string separado del config)
-                visual_raw_filters = visual_container.get('filters', '[]')
-                if isinstance(visual_raw_filters, str):
-                    try:
-                        visual_raw_filters = json.loads(visual_raw_filters)
-                    except json.JSONDecodeError:
-                        visual_raw_filters = []
-                if isinstance(visual_raw_filters, list) and visual_raw_filters:
-                    visual_data['filterConfig'] = {"filters": visual_raw_filters}
-
-                # Obtener el nombre del visual o usar un nombre por defecto
-                visual_name = visual_data.get('name', f'visual_{visual_idx}')
-
-                # Crear subdirectorio para este visual
-                visual_dir = os.path.join(visuals_dir, visual_name)
-                os.makedirs(visual_dir, exist_ok=True)
-
-                # Guardar el visual.json
-                visual_json_path = os.path.join(visual_dir, 'visual.json')
-                with open(visual_json_path, 'w', encoding='utf-8') as f:
-                    json.dump(visual_data, f, indent=2)
-            
-            # Crear el page.json (sin visualContainers, ya que ahora están en archivos separados)
-            # En legacy, 'filters' puede ser un string JSON; parsearlo y convertirlo al formato filterConfig
-            raw_filters = section.get('filters', [])
-            if isinstance(raw_filters, str):
-                try:
-                    raw_filters = json.loads(raw_filters)
-                except json.JSONDecodeError:
-                    raw_filters = []
-            # Convertir al formato que Page espera: filterConfig = {"filters": [...]}
-            filter_config = {"filters": raw_filters} if isinstance(raw_filters, list) and raw_filters else {}
-            
-            # Extraer visibility desde el config de la section (es un string JSON en legacy)
-            page_visibility = section.get('visibility')
-            if page_visibility is None:
-                raw_config = section.get('config', '{}')
-                if isinstance(raw_config, str):
-                    try:
-                        config_parsed = json.loads(raw_config)
-                        page_visibility = config_parsed.get('visibility')
-                    except json.JSONDecodeError:
-                        pass
-            
-            page_data = {
-                'name': page_name,
-                'displayName': display_name,
-                'filterConfig': filter_config,
-                'visibility': page_visibility,
-                'height': section.get('height'),
-                'width': section.get('width')
-            }
-            
-            # Guardar el page.json temporal
-            page_json_path = os.path.join(temp_page_dir, 'page.json')
-            with open(page_json_path, 'w', encoding='utf-8') as f:
-                json.dump(page_data, f, indent=2)
-            
-            # Crear el objeto Page desde el directorio
-            page = Page(temp_page_dir)
-            return page
-            
+            page_data, visuals_data = self._legacy_section_to_dicts(section, section_index)
+            return Page.from_dict(page_data, visuals_data)
         except Exception as e:
             print(f"Error al crear Page desde legacy section: {e}")
             import traceback
             traceback.print_exc()
             return None
 
+    @staticmethod
+    def _legacy_section_to_dicts(section: dict, section_index: int) -> Tuple[dict, List[dict]]:
+        """
+        Normaliza una section legacy a los dicts equivalentes de ``page.json``
+        y de cada ``visual.json`` del formato PBIR.
+        """
+        visuals_data = [
+            clsReport._legacy_visual_to_dict(visual_container, visual_idx)
+            for visual_idx, visual_container in enumerate(section.get('visualContainers', []))
+        ]
+        return clsReport._legacy_page_dict(section, section_index), visuals_data
+
+    @staticmethod
+    def _legacy_page_dict(section: dict, section_index: int) -> dict:
+        """Dict equivalente a ``page.json`` de una section legacy (sin sus visuales)."""
+        # Extraer información básica de la section
+        page_name = section.get('name', f'Page {section_index + 1}')
+        display_name = section.get('displayName', page_name)
+
+        # En legacy, 'filters' puede ser un string JSON; parsearlo y convertirlo al formato filterConfig
+        raw_filters = section.get('filters', [])
+        if isinstance(raw_filters, str):
+            try:
+                raw_filters = loads_json(raw_filters)
+            except json.JSONDecodeError:
+                raw_filters = []
+        # Convertir al formato que Page espera: filterConfig = {"filters": [...]}
+        filter_config = {"filters": raw_filters} if isinstance(raw_filters, list) and raw_filters else {}
+
+        # Extraer visibility desde el config de la section (es un string JSON en legacy)
+        page_visibility = section.get('visibility')
+        if page_visibility is None:
+            raw_config = section.get('config', '{}')
+            if isinstance(raw_config, str):
+                try:
+                    config_parsed = loads_json(raw_config)
+                    page_visibility = config_parsed.get('visibility')
+                except json.JSONDecodeError:
+                    pass
+
+        page_data = {
+            'name': page_name,
+            'displayName': display_name,
+            'filterConfig': filter_config,
+            'visibility': page_visibility,
+            'height': section.get('height'),
+            'width': section.get('width')
+        }
+        return page_data
+
+    @staticmethod
+    def _legacy_visual_to_dict(visual_container: dict, visual_idx: int) -> dict:
+        """Convierte un visualContainer legacy al dict equivalente a ``visual.json``."""
+        # Extraer el config del visual
+        visual_config = visual_container.get('config', '{}')
+
+        # Si config es un string JSON, parsearlo
+        if isinstance(visual_config, str):
+            try:
+                visual_data = loads_json(visual_config)
+            except json.JSONDecodeError:
+                print(f"⚠️  No se pudo parsear visual config como JSON en visual {visual_idx}")
+                visual_data = {}
+        else:
+            visual_data = visual_config
+
+        # En formato legacy, la posición está en el visualContainer, no dentro del config
+        # Inyectar position para que Visual.__init__ la encuentre
+        if 'position' not in visual_data:
+            visual_data['position'] = {
+                "x": visual_container.get('x', 0),
+                "y": visual_container.get('y', 0),
+                "width": visual_container.get('width', 100),
+                "height": visual_container.get('height', 100),
+                "z": visual_container.get('z', 0),
+                "tabOrder": visual_container.get('tabOrder', 0),
+            }
+        # Buscar mapeo de alias a entidad real en prototypeQuery.From
+        alias_map = {}
+        proto_query = visual_data.get('prototypeQuery')
+        if not proto_query:
+            sv= visual_data.get("singleVisual")
+            if sv and isinstance(sv, dict):
+                proto_query = sv.get('prototypeQuery')
+        if proto_query and isinstance(proto_query, dict):
+            from_list = proto_query.get('From')
+            if isinstance(from_list, list):
+                for entry in from_list:
+                    if isinstance(entry, dict) and 'Name' in entry and 'Entity' in entry:
+                        alias_map[entry['Name']] = entry['Entity']
+
+        def sustituir_source_ref(obj):
+            if isinstance(obj, dict):
+                for k, v in obj.items():
+                    # Solo sustituir en SourceRef
+                    if k == 'SourceRef' and isinstance(v, dict):
+                        # Sustituir solo en Source y Entity
+                        if 'Source' in v and v['Source'] in alias_map:
+                            v['Source'] = alias_map[v['Source']]
+                        if 'Entity' in v and v['Entity'] in alias_map:
+                            v['Entity'] = alias_map[v['Entity']]
+                    else:
+                        sustituir_source_ref(v)
+            elif isinstance(obj, list):
+                for item in obj:
+                    sustituir_source_ref(item)
+
+        if alias_map:
+            sustituir_source_ref(visual_data)
+
+        # En legacy, los filtros del visual están en visualContainer.filters (JSON string separado del config)
+        visual_raw_filters = visual_container.get('filters', '[]')
+        if isinstance(visual_raw_filters, str):
+            try:
+                visual_raw_filters = loads_json(visual_raw_filters)
+            except json.JSONDecodeError:
+                visual_raw_filters = []
+        if isinstance(visual_raw_filters, list) and visual_raw_filters:
+            visual_data['filterConfig'] = {"filters": visual_raw_filters}
+
+        return visual_data
+
     def get_all_columns_used(self) -> Dict[str, Set[str]]:
         """Retorna todas las columnas usadas en el informe organizadas por tabla."""
         table_columns: Dict[str, Set[str]] = defaultdict(set)
@@ -1404,6 +1810,19 @@ class clsReport(FilterMixin):
             )
         """)
         
+        # Jerarquías de fecha automáticas usadas (columna base + variation)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS report_variation_used (
+                report_id INTEGER NOT NULL,
+                page_name VARCHAR NOT NULL,
+                visual_name VARCHAR NOT NULL,
+                table_name VARCHAR NOT NULL,
+                column_name VARCHAR NOT NULL,
+                variation_name VARCHAR NOT NULL,
+                FOREIGN KEY(report_id) REFERENCES report(id)
+            )
+        """)
+
         # Crear tabla report_measure_used
         connection.execute("""
             CREATE TABLE IF NOT EXISTS report_measure_used (
@@ -1430,6 +1849,7 @@ class clsReport(FilterMixin):
                 id INTEGER PRIMARY KEY DEFAULT nextval('seq_report_filter_id'),
                 report_id INTEGER NOT NULL,
                 filter_name VARCHAR NOT NULL,
+                filter_index INTEGER,
                 table_name VARCHAR NOT NULL,
                 column_name VARCHAR NOT NULL,
                 filter_description TEXT,
@@ -1445,6 +1865,7 @@ class clsReport(FilterMixin):
                 report_id INTEGER NOT NULL,
                 page_name VARCHAR NOT NULL,
                 filter_name VARCHAR NOT NULL,
+                filter_index INTEGER,
                 table_name VARCHAR NOT NULL,
                 column_name VARCHAR NOT NULL,
                 filter_description TEXT,
@@ -1461,6 +1882,7 @@ class clsReport(FilterMixin):
                 page_name VARCHAR NOT NULL,
                 visual_name VARCHAR NOT NULL,
                 filter_name VARCHAR NOT NULL,
+                filter_index INTEGER,
                 table_name VARCHAR NOT NULL,
                 column_name VARCHAR NOT NULL,
                 filter_description TEXT,
@@ -1469,14 +1891,72 @@ class clsReport(FilterMixin):
             )
         """)
         
+        # Condiciones estructuradas de los filtros (report, page y visual) y sus valores literales.
+        # Se enlazan con report_*_filter por (report_id, scope, page_name, visual_name, filter_index):
+        # filter_index es la posición del filtro en su ámbito, porque filter_name puede repetirse
+        # (p. ej. varios "Unnamed Filter" en el mismo visual).
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS report_filter_condition (
+                report_id INTEGER NOT NULL,
+                scope VARCHAR NOT NULL,
+                page_name VARCHAR,
+                visual_name VARCHAR,
+                filter_name VARCHAR NOT NULL,
+                filter_index INTEGER,
+                filter_kind VARCHAR,
+                condition_index INTEGER NOT NULL,
+                parent_index INTEGER,
+                operator VARCHAR,
+                is_negated BOOLEAN DEFAULT FALSE,
+                field_kind VARCHAR,
+                table_name VARCHAR,
+                column_name VARCHAR,
+                comparison VARCHAR,
+                value_count INTEGER DEFAULT 0,
+                top_n INTEGER,
+                relative_amount INTEGER,
+                relative_unit VARCHAR,
+                created_at TIMESTAMP DEFAULT now(),
+                FOREIGN KEY(report_id) REFERENCES report(id)
+            )
+        """)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS report_filter_value (
+                report_id INTEGER NOT NULL,
+                scope VARCHAR NOT NULL,
+                page_name VARCHAR,
+                visual_name VARCHAR,
+                filter_name VARCHAR NOT NULL,
+                filter_index INTEGER,
+                condition_index INTEGER NOT NULL,
+                value_index INTEGER NOT NULL,
+                column_index INTEGER DEFAULT 0,
+                table_name VARCHAR,
+                column_name VARCHAR,
+                value VARCHAR,
+                value_type VARCHAR,
+                FOREIGN KEY(report_id) REFERENCES report(id)
+            )
+        """)
+
+        # Migración: ordinal del filtro en su ámbito (bases de datos antiguas)
+        for table_name in ('report_filter', 'report_page_filter', 'report_visual_filter'):
+            try:
+                connection.execute(f"ALTER TABLE {table_name} ADD COLUMN filter_index INTEGER")
+            except Exception:
+                pass  # columna ya existe
+
         # AHORA SÍ: Limpiar datos antiguos de este reporte (sin dropear las tablas completas)
         connection.execute("DELETE FROM report_measure_used WHERE report_id = ?", [report_id])
         connection.execute("DELETE FROM report_column_used WHERE report_id = ?", [report_id])
+        connection.execute("DELETE FROM report_variation_used WHERE report_id = ?", [report_id])
         connection.execute("DELETE FROM report_visual WHERE report_id = ?", [report_id])
         connection.execute("DELETE FROM report_page WHERE report_name = ?", [report_name])
         connection.execute("DELETE FROM report_filter WHERE report_id = ?", [report_id])
         connection.execute("DELETE FROM report_page_filter WHERE report_id = ?", [report_id])
         connection.execute("DELETE FROM report_visual_filter WHERE report_id = ?", [report_id])
+        connection.execute("DELETE FROM report_filter_condition WHERE report_id = ?", [report_id])
+        connection.execute("DELETE FROM report_filter_value WHERE report_id = ?", [report_id])
         
         # Insertar páginas e visuals
         for page in self.pages:
@@ -1520,7 +2000,7 @@ class clsReport(FilterMixin):
         # Insertar columnas usadas por cada visual
         for page in self.pages:
             for visual in page.visuals:
-                # Agrupar columnas usadas en este visual
+                # Agrupar columnas usadas en este visual (contador = nº de roles en que aparece)
                 visual_columns = {}
                 for col_ref in visual.columns_used:
                     if '.' in col_ref:
@@ -1528,7 +2008,8 @@ class clsReport(FilterMixin):
                         table = parts[0]
                         col = '.'.join(parts[1:])
                         key = (table, col)
-                        visual_columns[key] = visual_columns.get(key, 0) + 1
+                        roles = visual.field_roles.get(('column', col_ref), ())
+                        visual_columns[key] = visual_columns.get(key, 0) + max(1, len(roles))
                 
                 # Insertar cada columna con su contador
                 for (table, col), count in visual_columns.items():
@@ -1537,13 +2018,25 @@ class clsReport(FilterMixin):
                         VALUES (?, ?, ?, ?, ?, ?)
                     """, [report_id, page.name, visual.name, table, col, count])
         
+        variation_rows = [
+            [report_id, page.name, visual.name, table, column, variation]
+            for page in self.pages
+            for visual in page.visuals
+            for table, column, variation in visual.variations_used
+        ]
+        if variation_rows:
+            connection.executemany("""
+                INSERT INTO report_variation_used (report_id, page_name, visual_name, table_name, column_name, variation_name)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, variation_rows)
+
         # Insertar medidas usadas (con relación a report_visual)
         measures_used = self.get_all_measures_used()
         
         # Insertar medidas usadas por cada visual
         for page in self.pages:
             for visual in page.visuals:
-                # Agrupar medidas usadas en este visual
+                # Agrupar medidas usadas en este visual (contador = nº de roles en que aparece)
                 visual_measures = {}
                 for measure_ref in visual.measures_used:
                     if '.' in measure_ref:
@@ -1551,7 +2044,8 @@ class clsReport(FilterMixin):
                         table = parts[0]
                         measure = '.'.join(parts[1:])
                         key = (table, measure)
-                        visual_measures[key] = visual_measures.get(key, 0) + 1
+                        roles = visual.field_roles.get(('measure', measure_ref), ())
+                        visual_measures[key] = visual_measures.get(key, 0) + max(1, len(roles))
                 
                 # Insertar cada medida con su contador
                 for (table, measure), count in visual_measures.items():
@@ -1561,13 +2055,14 @@ class clsReport(FilterMixin):
                     """, [report_id, page.name, visual.name, table, measure, count])
         
         # Insertar filtros a nivel de REPORTE
-        for filter_obj in self.filters:
+        for filter_index, filter_obj in enumerate(self.filters):
             connection.execute("""
-                INSERT INTO report_filter (report_id, filter_name, table_name, column_name, filter_description)
-                VALUES (?, ?, ?, ?, ?)
+                INSERT INTO report_filter (report_id, filter_name, filter_index, table_name, column_name, filter_description)
+                VALUES (?, ?, ?, ?, ?, ?)
             """, [
                 report_id,
                 filter_obj.name,
+                filter_index,
                 filter_obj.table_name,
                 filter_obj.column_name,
                 filter_obj.description
@@ -1576,14 +2071,15 @@ class clsReport(FilterMixin):
         # Insertar filtros a nivel de PÁGINA y VISUAL
         for page in self.pages:
             # Filtros a nivel de página
-            for filter_obj in page.filters:
+            for filter_index, filter_obj in enumerate(page.filters):
                 connection.execute("""
-                    INSERT INTO report_page_filter (report_id, page_name, filter_name, table_name, column_name, filter_description)
-                    VALUES (?, ?, ?, ?, ?, ?)
+                    INSERT INTO report_page_filter (report_id, page_name, filter_name, filter_index, table_name, column_name, filter_description)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
                 """, [
                     report_id,
                     page.name,
                     filter_obj.name,
+                    filter_index,
                     filter_obj.table_name,
                     filter_obj.column_name,
                     filter_obj.description
@@ -1591,24 +2087,75 @@ class clsReport(FilterMixin):
             
             # Filtros a nivel de visual
             for visual in page.visuals:
-                for filter_obj in visual.filters:
+                for filter_index, filter_obj in enumerate(visual.filters):
                     if filter_obj.name is None:
                         print(f"[WARN] Filtro visual ignorado: filter_name es None (visual: {visual.name}, page: {page.name})")
                         print("[WARN] Código fuente del filtro:")
                         print(filter_obj.__dict__)
                         continue
                     connection.execute("""
-                        INSERT INTO report_visual_filter (report_id, page_name, visual_name, filter_name, table_name, column_name, filter_description)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                        INSERT INTO report_visual_filter (report_id, page_name, visual_name, filter_name, filter_index, table_name, column_name, filter_description)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                     """, [
                         report_id,
                         page.name,
                         visual.name,
                         filter_obj.name,
+                        filter_index,
                         filter_obj.table_name,
                         filter_obj.column_name,
                         filter_obj.description
                     ])
 
+        # Condiciones estructuradas de todos los filtros
+        condition_rows, value_rows = self._filter_condition_rows(report_id)
+        if condition_rows:
+            connection.executemany("""
+                INSERT INTO report_filter_condition (report_id, scope, page_name, visual_name, filter_name, filter_index,
+                    filter_kind, condition_index, parent_index, operator, is_negated, field_kind, table_name, column_name,
+                    comparison, value_count, top_n, relative_amount, relative_unit)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, condition_rows)
+        if value_rows:
+            connection.executemany("""
+                INSERT INTO report_filter_value (report_id, scope, page_name, visual_name, filter_name, filter_index,
+                    condition_index, value_index, column_index, table_name, column_name, value, value_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, value_rows)
+
+    def _filter_condition_rows(self, report_id: int) -> Tuple[List[list], List[list]]:
+        """
+        Filas de report_filter_condition y report_filter_value para report, páginas y visuales.
+
+        Cada filtro se identifica por su posición en el ámbito (``filter_index``);
+        cada fila de valores de un In multicolumna genera una fila por columna
+        (``value_index`` = fila, ``column_index`` = columna).
+        """
+        scoped_filters = [('report', None, None, i, f) for i, f in enumerate(self.filters)]
+        for page in self.pages:
+            scoped_filters.extend(('page', page.name, None, i, f) for i, f in enumerate(page.filters))
+            for visual in page.visuals:
+                scoped_filters.extend(('visual', page.name, visual.name, i, f)
+                                      for i, f in enumerate(visual.filters) if f.name is not None)
+
+        condition_rows, value_rows = [], []
+        for scope, page_name, visual_name, filter_index, filter_obj in scoped_filters:
+            key = [report_id, scope, page_name, visual_name, filter_obj.name, filter_index]
+            for node in filter_obj.conditions:
+                condition_rows.append(key + [
+                    filter_obj.filter_kind, node['index'], node['parent_index'], node['operator'],
+                    node['negated'], node['kind'], node['table_name'], node['column_name'],
+                    node['comparison'], len(node['values']), node['top_n'],
+                    node['relative_amount'], node['relative_unit'],
+                ])
+                fields = node['fields'] or [(node['kind'], node['table_name'], node['column_name'])]
+                for value_index, row in enumerate(node['values']):
+                    for column_index, (value, value_type) in enumerate(row):
+                        _, table_name, column_name = (fields[column_index] if column_index < len(fields)
+                                                      else (None, None, None))
+                        value_rows.append(key + [node['index'], value_index, column_index,
+                                                 table_name, column_name, value, value_type])
+        return condition_rows, value_rows
+
     def __repr__(self):
         return f"clsReport(model={self.SemanticModel}, model_id={self.semantic_model_id}, pages={len(self.pages)})"
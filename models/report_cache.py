@@ -0,0 +1,238 @@
+"""
+Caché LRU de reports parseados (``clsReport``) para procesos de larga vida
+como el servidor MCP.
+
+La clave de cada report es el hash de sus ficheros de definición
+(``report.json``, ``definition.pbir``, ``pages.json``, cada ``page.json`` y
+cada ``visual.json``): si alguno cambia, el report se vuelve a parsear. El
+SHA-256 de cada fichero se memoriza por ``(ruta, tamaño, mtime)``, así que
+una consulta repetida solo hace ``stat`` de los ficheros.
+
+Con ``cache_dir`` lo extraído de cada report (páginas, visuales, campos y
+filtros) se guarda además en un JSON por huella (sin pickle), de modo que
+un proceso nuevo no vuelve a parsear los reports que no han cambiado.
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from .report import REPORT_JSON_SEARCH_DEPTH, Filter, Page, Visual, clsReport
+
+# Versión del formato de los JSON de caché: si cambia, se vuelven a parsear
+_CACHE_FORMAT = 1
+_CACHED_CLASSES = {cls.__name__: cls for cls in (clsReport, Page, Visual, Filter)}
+# Datos crudos que solo se usan durante el parseo
+_SKIPPED_ATTRIBUTES = frozenset(('_report_data',))
+_REPORT_KWARGS = ('report_id', 'workspace_id', 'report_name')
+
+
+def _encode(value: Any) -> Any:
+    """Objetos del report → JSON (tuplas, sets y claves no string etiquetados)."""
+    if isinstance(value, tuple(_CACHED_CLASSES.values())):
+        return {'__class__': type(value).__name__, 'attrs': {
+            k: _encode(v) for k, v in vars(value).items() if k not in _SKIPPED_ATTRIBUTES
+        }}
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: _encode(v) for k, v in value.items()}
+        return {'__items__': [[_encode(k), _encode(v)] for k, v in value.items()]}
+    if isinstance(value, tuple):
+        return {'__tuple__': [_encode(v) for v in value]}
+    if isinstance(value, (set, frozenset)):
+        return {'__set__': sorted((_encode(v) for v in value), key=repr)}
+    if isinstance(value, list):
+        return [_encode(v) for v in value]
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if not isinstance(value, dict):
+        return value
+    if '__class__' in value and value.get('__class__') in _CACHED_CLASSES and 'attrs' in value:
+        obj = _CACHED_CLASSES[value['__class__']].__new__(_CACHED_CLASSES[value['__class__']])
+        obj.__dict__.update({k: _decode(v) for k, v in value['attrs'].items()})
+        if isinstance(obj, clsReport):
+            obj._report_data = None
+        return obj
+    if '__tuple__' in value:
+        return tuple(_decode(v) for v in value['__tuple__'])
+    if '__set__' in value:
+        return {_decode(v) for v in value['__set__']}
+    if '__items__' in value:
+        return {_decode(k): _decode(v) for k, v in value['__items__']}
+    return {k: _decode(v) for k, v in value.items()}
+
+
+class ReportCache:
+    """
+    ``get(ruta)`` devuelve el ``clsReport`` de la carpeta, parseándolo solo
+    si sus ficheros de definición han cambiado. Conserva como mucho
+    ``max_entries`` reports (se descarta el usado hace más tiempo). Con
+    ``cache_dir`` también se consultan y guardan en disco.
+
+    Los reports devueltos son compartidos entre llamadas: no modificarlos.
+    """
+
+    def __init__(self, max_entries: int = 32, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._reports: 'OrderedDict[str, Tuple[str, clsReport]]' = OrderedDict()
+        self._file_hashes: Dict[str, Tuple[int, int, str]] = {}
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # ── Huella de ficheros ────────────────────────────────────────
+
+    @staticmethod
+    def definition_files(root_path: str) -> List[str]:
+        """Ficheros de los que depende el parseo del report (orden estable)."""
+        files = []
+        pbir_file = os.path.join(root_path, 'definition.pbir')
+        if os.path.isfile(pbir_file):
+            files.append(pbir_file)
+        report_path, report_format = clsReport._probe_report_json(root_path, REPORT_JSON_SEARCH_DEPTH)
+        if not report_path:
+            return files
+        files.append(report_path)
+        if report_format != 'pbir':
+            return files
+
+        pages_path = os.path.join(os.path.dirname(report_path), 'pages')
+        pages_file = os.path.join(pages_path, 'pages.json')
+        if os.path.isfile(pages_file):
+            files.append(pages_file)
+        if not os.path.isdir(pages_path):
+            return files
+        for page in sorted(os.scandir(pages_path), key=lambda e: e.name):
+            if not page.is_dir():
+                continue
+            page_file = os.path.join(page.path, 'page.json')
+            if os.path.isfile(page_file):
+                files.append(page_file)
+            for visual_dir in Page._list_visual_dirs(page.path):
+                visual_file = os.path.join(visual_dir, 'visual.json')
+                if os.path.isfile(visual_file):
+                    files.append(visual_file)
+        return files
+
+    def _file_hash(self, path: str) -> str:
+        stat = os.stat(path)
+        cached = self._file_hashes.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        self._file_hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def fingerprint(self, root_path: str) -> str:
+        """Hash combinado de los ficheros de definición del report."""
+        combined = hashlib.sha256()
+        for path in self.definition_files(root_path):
+            combined.update(os.path.relpath(path, root_path).encode('utf-8'))
+            combined.update(self._file_hash(path).encode('ascii'))
+        return combined.hexdigest()
+
+    # ── Disco ─────────────────────────────────────────────────────
+
+    def _disk_prefix(self, key: str) -> str:
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode('utf-8')).hexdigest()[:16])
+
+    def _disk_path(self, key: str, fingerprint: str) -> str:
+        """JSON de un report: ``<hash de la ruta>-<huella de sus ficheros>.json``."""
+        return f"{self._disk_prefix(key)}-{fingerprint}.json"
+
+    def _load_from_disk(self, key: str, fingerprint: str) -> Optional[clsReport]:
+        path = self._disk_path(key, fingerprint)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Caché de report ilegible ({path}): {e}")
+            return None
+        if data.get('format') != _CACHE_FORMAT or data.get('fingerprint') != fingerprint:
+            return None
+        report = _decode(data.get('report'))
+        return report if isinstance(report, clsReport) else None
+
+    def _save_to_disk(self, key: str, fingerprint: str, report: clsReport) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key, fingerprint)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'format': _CACHE_FORMAT, 'fingerprint': fingerprint,
+                           'report': _encode(report)}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ No se pudo guardar la caché del report {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _remove_from_disk(self, key: str) -> None:
+        """Borra los JSON guardados de ``key`` (de huellas que ya no valen)."""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return
+        prefix = os.path.basename(self._disk_prefix(key)) + '-'
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(prefix) and entry.name.endswith('.json'):
+                os.remove(entry.path)
+
+    # ── Acceso ────────────────────────────────────────────────────
+
+    def get(self, root_path: str, **report_kwargs: Any) -> clsReport:
+        """``clsReport`` de ``root_path`` (desde caché si no ha cambiado)."""
+        key = os.path.abspath(root_path)
+        fingerprint = self.fingerprint(key)
+        cached = self._reports.get(key)
+        if cached and cached[0] == fingerprint:
+            self._reports.move_to_end(key)
+            self.hits += 1
+            return cached[1]
+
+        report = self._load_from_disk(key, fingerprint) if self.cache_dir else None
+        if report is not None:
+            self.disk_hits += 1
+            for attr in _REPORT_KWARGS:
+                if attr in report_kwargs:
+                    setattr(report, attr, report_kwargs[attr])
+        else:
+            self.misses += 1
+            report = clsReport(root_path, **report_kwargs)
+            if self.cache_dir:
+                self._remove_from_disk(key)
+                self._save_to_disk(key, fingerprint, report)
+        self._reports[key] = (fingerprint, report)
+        self._reports.move_to_end(key)
+        while len(self._reports) > self.max_entries:
+            evicted, _ = self._reports.popitem(last=False)
+            prefix = evicted + os.sep
+            self._file_hashes = {p: h for p, h in self._file_hashes.items() if not p.startswith(prefix)}
+        return report
+
+    def invalidate(self, root_path: Optional[str] = None) -> None:
+        """Descarta un report (o toda la caché si ``root_path`` es None), también en disco."""
+        if root_path is None:
+            self._reports.clear()
+            self._file_hashes.clear()
+            if self.cache_dir and os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith('.json'):
+                        os.remove(entry.path)
+            return
+        key = os.path.abspath(root_path)
+        self._reports.pop(key, None)
+        self._remove_from_disk(key)
+        prefix = key + os.sep
+        self._file_hashes = {p: h for p, h in self._file_hashes.items() if not p.startswith(prefix)}
+
+    def info(self) -> Dict[str, int]:
+        return {'entries': len(self._reports), 'hits': self.hits, 'disk_hits': self.disk_hits,
+                'misses': self.misses, 'max_entries': self.max_entries}
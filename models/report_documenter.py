@@ -6,6 +6,11 @@ Power BI almacenados en DuckDB.  Reutilizable desde Streamlit, MCP, CLI, etc.
 import html as html_mod
 from collections import defaultdict
 
+from .query_cost import QueryCostScorer
+
+
+QUERY_LEVEL_COLORS = {"bajo": "#2e7d32", "medio": "#ef6c00", "alto": "#c62828"}
+
 
 def _esc(text):
     if text is None:
@@ -29,6 +34,7 @@ class ReportDocumenter:
         else:
             self._sm_name = None
         self.semantic_model_id = self._resolve_sm_id()
+        self._query_costs = None
 
     # ── data access ──────────────────────────────────────────────────
 
@@ -164,7 +170,61 @@ class ReportDocumenter:
         ).fetchall()
         cols = ["name", "visual_type", "x", "y", "width", "height",
                 "text_content", "navigation_target"]
-        return [dict(zip(cols, r)) for r in rows]
+        costs = self._load_query_costs()[0]
+        visuals = []
+        for r in rows:
+            d = dict(zip(cols, r))
+            cost = costs.get((page["name"], d["name"]))
+            d["query_score"] = cost["score"] if cost else None
+            d["query_level"] = cost["level"] if cost else None
+            visuals.append(d)
+        return visuals
+
+    # ── query cost ───────────────────────────────────────────────────
+
+    def _load_query_costs(self):
+        """(visuales, páginas) de report_*_query_cost, o calculados si no se guardaron."""
+        if self._query_costs is not None:
+            return self._query_costs
+        if not self.report:
+            self._query_costs = ({}, {})
+            return self._query_costs
+        rid = self.report["id"]
+        persisted = self.con.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_name IN ('report_visual_query_cost', 'report_page_query_cost')"
+        ).fetchone()[0] == 2
+        if persisted:
+            visual_rows = self.con.execute(
+                "SELECT page_name, visual_name, score, level, reasons "
+                "FROM report_visual_query_cost WHERE report_id = ?", [rid]).fetchall()
+            page_rows = self.con.execute(
+                "SELECT page_name, visual_count, query_visual_count, score, max_visual_score, level "
+                "FROM report_page_query_cost WHERE report_id = ?", [rid]).fetchall()
+            persisted = bool(visual_rows)
+        if persisted:
+            visuals = {(r[0], r[1]): {"score": r[2], "level": r[3],
+                                      "reasons": r[4].split("; ") if r[4] else []} for r in visual_rows}
+            pages = {r[0]: {"visuals": r[1], "query_visuals": r[2], "score": r[3],
+                            "max_visual_score": r[4], "level": r[5]} for r in page_rows}
+        else:
+            visual_scores, page_scores = QueryCostScorer.from_db(
+                report_name=self.report_name, conn=self.con).score()
+            visuals = {(v["page_name"], v["visual_name"]): v for v in visual_scores if v["report_id"] == rid}
+            pages = {p["page_name"]: p for p in page_scores if p["report_id"] == rid}
+        self._query_costs = (visuals, pages)
+        return self._query_costs
+
+    def get_page_query_cost(self, page):
+        """Puntuación de carga de consultas de la página (None si no tiene visuales)."""
+        return self._load_query_costs()[1].get(page["name"])
+
+    def get_visual_query_costs(self, page):
+        """Visuales de la página con su puntuación, de mayor a menor."""
+        visuals = self._load_query_costs()[0]
+        rows = [{"visual_name": name, **cost} for (pname, name), cost in visuals.items()
+                if pname == page["name"]]
+        return sorted(rows, key=lambda r: -r["score"])
 
     # ── SVG mockup ───────────────────────────────────────────────────
 
@@ -237,6 +297,13 @@ class ReportDocumenter:
                 f'<text x="{vx+6}" y="{vy+32}" font-family="Segoe UI,sans-serif" '
                 f'font-size="10" fill="#555">{label}</text>'
             )
+            if v.get("query_score"):
+                cost_color = QUERY_LEVEL_COLORS.get(v.get("query_level"), "#555")
+                svg.append(
+                    f'<text x="{vx+6}" y="{vy+48}" font-family="Segoe UI,sans-serif" '
+                    f'font-size="10" fill="{cost_color}" font-weight="600">'
+                    f'⚡ {v["query_score"]:g} ({_esc(v.get("query_level"))})</text>'
+                )
 
         svg.append("</svg>")
         return "\n".join(svg)
@@ -0,0 +1,278 @@
+"""
+Fusión de páginas de varios reports en un report destino.
+
+- PBIR: copia ``definition/pages/<id>/`` (``page.json`` y ``visuals/*``) de
+  cada report origen. Los ficheros se copian en paralelo con reflink
+  (copia en escritura, si el sistema de ficheros lo soporta) y, si no, con
+  copia normal. ``link_mode='hardlink'`` enlaza en su lugar: es lo más
+  rápido, pero origen y destino comparten el fichero y editar uno en sitio
+  modifica el otro.
+- Legacy: concatena la clave ``pages`` de ``report.json`` como hasta ahora.
+
+Los ids de página repetidos se renombran de forma determinista
+(``<id>_2``, ``<id>_3``...) en el orden de los reports origen y de su
+``pageOrder``; ``pages.json`` y ``report.json`` del destino se escriben una
+sola vez.
+
+La fusión es idempotente: ``MERGE_MANIFEST`` (en la raíz del report destino)
+guarda de qué report y página origen viene cada página fusionada y el hash
+de su contenido. Al volver a fusionar, las páginas sin cambios se omiten y
+las modificadas se reemplazan en su sitio, sin crear copias ``_2``.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+import shutil
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from .json_loader import load_json, load_json_files, map_in_threads
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl FICLONE de Linux (btrfs, XFS, ...): clona el fichero sin copiar datos
+_FICLONE = 0x40049409
+
+# Manifiesto de páginas fusionadas: {"pages": {"<report>/<página>": {"page_id", "hash"}},
+#                                    "legacy_pages": {"<report>/<nombre>": {"name", "hash"}}}
+MERGE_MANIFEST = ".merged_pages.json"
+
+PAGES_METADATA_SCHEMA = (
+    "https://developer.microsoft.com/json-schemas/fabric/item/report/definition/pagesMetadata/1.0.0/schema.json"
+)
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+    try:
+        with open(src, 'rb') as s, open(dst, 'wb') as d:
+            fcntl.ioctl(d.fileno(), _FICLONE, s.fileno())
+    except OSError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        return False
+    shutil.copystat(src, dst)
+    return True
+
+
+def _place_file(task: Tuple[str, str, str]) -> str:
+    """Copia ``src`` en ``dst`` según ``link_mode``; devuelve el método usado."""
+    src, dst, link_mode = task
+    if link_mode == 'hardlink':
+        try:
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+    if link_mode in ('auto', 'hardlink') and _reflink(src, dst):
+        return 'reflink'
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def unique_page_id(page_id: str, used: Set[str]) -> str:
+    """``page_id`` o, si ya existe, el primer ``<page_id>_N`` libre (N >= 2)."""
+    if page_id not in used:
+        return page_id
+    suffix = 2
+    while f"{page_id}_{suffix}" in used:
+        suffix += 1
+    return f"{page_id}_{suffix}"
+
+
+def _page_digest(page_dir: Path) -> str:
+    """Hash de todos los ficheros de una carpeta de página (ruta relativa + contenido)."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(page_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, page_dir).replace(os.sep, '/').encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def _source_page_ids(pages_dir: Path, pages_meta: dict) -> List[str]:
+    """Páginas del report origen: primero las de ``pageOrder``, luego el resto por nombre."""
+    on_disk = sorted(e.name for e in os.scandir(pages_dir)
+                     if e.is_dir() and os.path.isfile(os.path.join(e.path, 'page.json')))
+    available = set(on_disk)
+    ordered = [p for p in pages_meta.get('pageOrder') or [] if p in available]
+    seen = set(ordered)
+    return ordered + [p for p in on_disk if p not in seen]
+
+
+def merge_report_pages(
+    source_dirs: Sequence[Path],
+    target_dir: Path,
+    link_mode: str = 'auto',
+    max_workers: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Añade al report ``target_dir`` las páginas de los reports ``source_dirs``.
+    Las que ya se fusionaron antes (según ``MERGE_MANIFEST``) se omiten si no
+    han cambiado o se reemplazan si han cambiado.
+
+    Args:
+        source_dirs: Carpetas ``.Report`` de origen (se ignoran las que no existen)
+        target_dir: Carpeta ``.Report`` destino (debe tener ``definition/report.json``)
+        link_mode: 'auto' (reflink o copia), 'hardlink' o 'copy'
+        max_workers: Hilos para leer y copiar ficheros (1 = secuencial)
+
+    Returns:
+        Resumen: páginas PBIR y legacy añadidas, reemplazadas y omitidas, ids
+        renombrados y ficheros por método
+    """
+    summary = {'pbir_pages': 0, 'legacy_pages': 0, 'replaced': 0, 'skipped': 0, 'renamed': 0,
+               'reflink': 0, 'hardlink': 0, 'copy': 0}
+    target_definition = Path(target_dir) / 'definition'
+    target_report_json = target_definition / 'report.json'
+    if not target_report_json.exists():
+        return summary
+
+    target_pages_dir = target_definition / 'pages'
+    target_pages_json = target_pages_dir / 'pages.json'
+    sources = [Path(s) for s in source_dirs
+               if Path(s).resolve() != Path(target_dir).resolve() and (Path(s) / 'definition').is_dir()]
+
+    # Una sola lectura (en paralelo) de report.json/pages.json de destino y orígenes
+    json_paths = [str(target_report_json), str(target_pages_json)]
+    for src in sources:
+        json_paths += [str(src / 'definition' / 'report.json'), str(src / 'definition' / 'pages' / 'pages.json')]
+    loaded = [d if isinstance(d, dict) else None for d in load_json_files(json_paths, max_workers)]
+    target_data = loaded[0]
+    if target_data is None:
+        print(f"⚠️ No se pudo leer {target_report_json}; no se fusionan páginas")
+        return summary
+    pages_meta = loaded[1] or {"$schema": PAGES_METADATA_SCHEMA, "pageOrder": [], "activePageName": None}
+
+    manifest_path = Path(target_dir) / MERGE_MANIFEST
+    try:
+        manifest = load_json(str(manifest_path)) if manifest_path.is_file() else {}
+    except (OSError, ValueError) as e:
+        print(f"⚠️ {manifest_path} no válido ({e}); se ignora")
+        manifest = {}
+    merged_pages = manifest.setdefault('pages', {})
+    merged_legacy = manifest.setdefault('legacy_pages', {})
+
+    # ── Páginas PBIR ──
+    used_ids = set(pages_meta.get('pageOrder') or [])
+    if target_pages_dir.is_dir():
+        used_ids.update(e.name for e in os.scandir(target_pages_dir) if e.is_dir())
+
+    copy_tasks: List[Tuple[str, str, str]] = []
+    renamed_pages: List[Tuple[dict, Path]] = []
+    new_page_ids: List[str] = []
+    for i, src in enumerate(sources):
+        src_pages_dir = src / 'definition' / 'pages'
+        if not src_pages_dir.is_dir():
+            continue
+        try:
+            page_ids = _source_page_ids(src_pages_dir, loaded[3 + 2 * i] or {})
+        except OSError as e:
+            print(f"⚠️ No se pudieron leer las páginas de {src.name}: {e}; se omite")
+            continue
+        for page_id in page_ids:
+            src_page = src_pages_dir / page_id
+            key = f"{src.name}/{page_id}"
+            try:
+                digest = _page_digest(src_page)
+            except OSError as e:
+                print(f"⚠️ Página {page_id} de {src.name} omitida: {e}")
+                continue
+            previous = merged_pages.get(key)
+            replace = bool(previous) and (target_pages_dir / previous['page_id']).is_dir()
+            if replace and previous['hash'] == digest:
+                summary['skipped'] += 1
+                continue
+            # Ya fusionada pero cambiada en el origen: se reemplaza con el mismo id
+            new_id = previous['page_id'] if replace else unique_page_id(page_id, used_ids)
+            page_data = None
+            if new_id != page_id:
+                # Se renombra: su page.json se reescribe con el nuevo "name"
+                try:
+                    page_data = load_json(str(src_page / 'page.json'))
+                except (OSError, ValueError) as e:
+                    page_data = e
+                if not isinstance(page_data, dict):
+                    print(f"⚠️ Página {page_id} de {src.name} omitida: page.json no válido ({page_data})")
+                    continue
+            if replace:
+                shutil.rmtree(target_pages_dir / new_id)
+                summary['replaced'] += 1
+            else:
+                used_ids.add(new_id)
+                new_page_ids.append(new_id)
+            merged_pages[key] = {'page_id': new_id, 'hash': digest}
+            dst_page = target_pages_dir / new_id
+            for root, dirs, files in os.walk(src_page):
+                dirs.sort()
+                rel = os.path.relpath(root, src_page)
+                os.makedirs(os.path.join(dst_page, rel), exist_ok=True)
+                for name in sorted(files):
+                    if rel == '.' and name == 'page.json' and page_data is not None:
+                        page_data['name'] = new_id
+                        renamed_pages.append((page_data, dst_page / name))
+                        continue
+                    copy_tasks.append((os.path.join(root, name), os.path.join(dst_page, rel, name), link_mode))
+
+    for method in map_in_threads(_place_file, copy_tasks, max_workers):
+        summary[method] += 1
+    # page.json de las páginas renombradas: "name" debe coincidir con la carpeta
+    for page_data, dst_file in renamed_pages:
+        dst_file.write_text(json.dumps(page_data, indent=2), encoding='utf-8')
+    summary['pbir_pages'] = len(new_page_ids)
+    summary['renamed'] = len(renamed_pages)
+
+    if new_page_ids:
+        pages_meta.setdefault('pageOrder', []).extend(new_page_ids)
+        if not pages_meta.get('activePageName'):
+            pages_meta['activePageName'] = pages_meta['pageOrder'][0]
+        target_pages_json.write_text(json.dumps(pages_meta, indent=2), encoding='utf-8')
+
+    # ── Clave 'pages' legacy de report.json ──
+    target_pages = target_data.setdefault('pages', [])
+    existing_names = {p.get('name') for p in target_pages if isinstance(p, dict)}
+    for i, src in enumerate(sources):
+        src_data = loaded[2 + 2 * i] or {}
+        for p in src_data.get('pages') or []:
+            if not isinstance(p, dict):
+                continue
+            name = p.get('name')
+            key = f"{src.name}/{name}"
+            digest = hashlib.sha256(json.dumps(p, sort_keys=True).encode('utf-8')).hexdigest()
+            previous = merged_legacy.get(key) if name else None
+            index = next((j for j, t in enumerate(target_pages)
+                          if previous and isinstance(t, dict) and t.get('name') == previous['name']), None)
+            if index is not None:
+                if previous['hash'] != digest:
+                    target_pages[index] = {**p, 'name': previous['name']}
+                    summary['replaced'] += 1
+                else:
+                    summary['skipped'] += 1
+                merged_legacy[key] = {'name': previous['name'], 'hash': digest}
+                continue
+            if name and name in existing_names:
+                # Nombre único "<nombre> (N)"
+                suffix = 2
+                while f"{name} ({suffix})" in existing_names:
+                    suffix += 1
+                p = {**p, 'name': f"{name} ({suffix})"}
+            if p.get('name'):
+                existing_names.add(p['name'])
+                merged_legacy[key] = {'name': p['name'], 'hash': digest}
+            target_pages.append(p)
+            summary['legacy_pages'] += 1
+
+    # IMPORTANTE: NO incluir 'pages' si está vacía (Power BI Desktop no abre archivos con pages: [])
+    if not target_data['pages']:
+        del target_data['pages']
+    target_report_json.write_text(json.dumps(target_data, indent=2), encoding='utf-8')
+    if merged_pages or merged_legacy:
+        manifest_path.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding='utf-8')
+    return summary
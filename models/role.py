@@ -0,0 +1,72 @@
+from pathlib import Path
+from typing import Dict, Optional, Set
+import re
+from .tmdl_parser import TmdlParser
+
+class Role:
+    """
+    Representa un rol de seguridad (RLS) del modelo.
+
+    Cada ``tablePermission`` asocia una tabla con una expresión DAX de filtro.
+    """
+
+    def __init__(self):
+        self.name: str = ""
+        self.model_permission: Optional[str] = None
+        # {tabla: expresión DAX de filtro}
+        self.table_permissions: Dict[str, str] = {}
+        self.raw_content: str = ""
+
+    @classmethod
+    def from_file(cls, filepath: Path) -> 'Role':
+        """Carga el rol desde un archivo .tmdl"""
+        instance = cls()
+        instance.name = filepath.stem
+
+        with open(filepath, 'r', encoding='utf-8') as f:
+            instance.raw_content = f.read()
+
+        match = re.match(r"""^\s*role\s+(?:'((?:[^']|'')+)'|"([^"]+)"|(\S+))""", instance.raw_content)
+        if match:
+            instance.name = (match.group(1) or match.group(2) or match.group(3)).replace("''", "'")
+
+        parser = TmdlParser(instance.raw_content)
+        instance.model_permission = parser.get_property('modelPermission')
+
+        for table_name, block in cls._iter_table_permission_blocks(instance.raw_content):
+            instance.table_permissions[table_name] = TmdlParser(block).get_header_expression()
+
+        return instance
+
+    @staticmethod
+    def _iter_table_permission_blocks(content: str):
+        """Genera (tabla, bloque) por cada ``tablePermission`` del contenido."""
+        return TmdlParser(content).iter_blocks('tablePermission')
+
+    def filter_tables(self, table_names: Set[str]) -> 'Role':
+        """
+        Devuelve una copia del rol sin los ``tablePermission`` de tablas que
+        no están en ``table_names`` (p.ej. al crear un submodelo).
+        """
+        filtered = Role()
+        filtered.name = self.name
+        filtered.model_permission = self.model_permission
+        filtered.table_permissions = {
+            t: expr for t, expr in self.table_permissions.items() if t in table_names
+        }
+
+        removed_blocks = [
+            block for table_name, block in self._iter_table_permission_blocks(self.raw_content)
+            if table_name not in table_names
+        ]
+        raw_content = self.raw_content
+        for block in removed_blocks:
+            raw_content = raw_content.replace(block + '\n', '', 1) if block + '\n' in raw_content \
+                else raw_content.replace(block, '', 1)
+        filtered.raw_content = raw_content
+        return filtered
+
+    def save_to_file(self, filepath: Path):
+        """Guarda el rol a un archivo .tmdl"""
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(self.raw_content)
@@ -1,5 +1,7 @@
 from typing import List, Optional, Set, Tuple, Literal, Dict, Any
 from pathlib import Path
+import copy
+import hashlib
 import json
 import os
 import uuid
@@ -7,11 +9,19 @@ from enum import Enum
 
 from .model import Model
 from .relationship import Relationship
-from .table import Table
+from .table import Table, column_header_name
 from .culture import Culture
+from .role import Role
+from .subset_plan import SubsetIndex, SubsetPlan
+from .memory_estimator import MemoryEstimator
+from .storage_mode_advisor import StorageModeAdvisor, print_storage_advice
 from .platform import Platform
 from .definition import Definition
 
+# Manifiesto (en la raíz del modelo) de los ficheros que escribió
+# save_to_directory_incremental: hash y stats de cada ruta relativa
+GENERATED_FILES_MANIFEST = ".generated_files.json"
+
 class RelationshipDirection(Enum):
     """Dirección de búsqueda de relaciones (NO la cardinalidad de la relación)"""
     MANY_TO_ONE = "ManyToOne"
@@ -85,8 +95,11 @@ class SemanticModel:
         self.relationships: List[Relationship] = []
         self.tables: List[Table] = []
         self.cultures: List[Culture] = []
+        self.roles: List[Role] = []
         self.platform: Optional[Platform] = None
         self.definition: Optional[Definition] = None
+        # expressions.tmdl (parámetros y consultas compartidas), sin parsear
+        self.expressions_content: Optional[str] = None
         # Dependencias cargadas desde DuckDB
         self.report_usage: List[Dict[str, Any]] = []
         self.column_usage: List[Dict[str, Any]] = []
@@ -100,8 +113,10 @@ class SemanticModel:
             'relationships': {},
             'tables': {},
             'cultures': {},
+            'roles': {},
             'platform': {'original_path': None, 'modified': False},
-            'definition': {'original_path': None, 'modified': False}
+            'definition': {'original_path': None, 'modified': False},
+            'expressions': {'original_path': None, 'modified': False}
         }
     
     def load_from_directory(self, directory: Path):
@@ -131,6 +146,16 @@ class SemanticModel:
                 'content': relationships_content
             }
         
+        # Cargar expressions.tmdl (parámetros M como RangeStart/RangeEnd)
+        expressions_file = definition_dir / "expressions.tmdl"
+        if expressions_file.exists():
+            with open(expressions_file, 'r', encoding='utf-8') as f:
+                self.expressions_content = f.read()
+            self._file_metadata['expressions'] = {
+                'original_path': str(expressions_file),
+                'modified': False
+            }
+        
         # Cargar tables (dentro de definition)
         tables_dir = definition_dir / "tables"
         if tables_dir.exists():
@@ -153,6 +178,18 @@ class SemanticModel:
                     'modified': False
                 }
         
+        # Cargar roles RLS (dentro de definition)
+        roles_dir = definition_dir / "roles"
+        if roles_dir.exists():
+            for role_file in sorted(roles_dir.glob("*.tmdl")):
+                role = Role.from_file(role_file)
+                self.roles.append(role)
+                self._file_metadata['roles'][role.name] = {
+                    'original_path': str(role_file),
+                    'file_name': role_file.name,
+                    'modified': False
+                }
+        
         # Cargar definition.pbism (en la raíz)
         definition_path = directory / "definition.pbism"
         if definition_path.exists():
@@ -168,44 +205,148 @@ class SemanticModel:
     def save_to_directory(self, output_dir: Path, only_modified: bool = False):
         """Guarda la estructura a un directorio, manteniendo el orden original."""
         output_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Crear carpeta definition
-        definition_dir = output_dir / "definition"
-        definition_dir.mkdir(exist_ok=True)
-        
-        # Guardar model.tmdl (dentro de definition)
-        if self.model and (not only_modified or self._file_metadata['model']['modified']):
-            self.model.save_to_file(definition_dir / "model.tmdl")
-        
-        # Guardar relationships.tmdl (archivo único dentro de definition)
-        if self.relationships and (not only_modified or self._file_metadata['relationships']['modified']):
-            relationships_file = definition_dir / "relationships.tmdl"
-            with open(relationships_file, 'w', encoding='utf-8') as f:
-                f.write(self._file_metadata['relationships']['content'])
-        
-        # Guardar tables (dentro de definition)
-        if self.tables:
-            tables_dir = definition_dir / "tables"
-            tables_dir.mkdir(exist_ok=True)
-            for table in self.tables:
-                if not only_modified or self._file_metadata['tables'][table.name]['modified']:
-                    table.save_to_file(tables_dir / f"{table.name}.tmdl")
-        
-        # Guardar cultures (dentro de definition)
-        if self.cultures:
-            cultures_dir = definition_dir / "cultures"
-            cultures_dir.mkdir(exist_ok=True)
-            for culture in self.cultures:
-                if not only_modified or self._file_metadata['cultures'][culture.name]['modified']:
-                    culture.save_to_file(cultures_dir / f"{culture.name}.tmdl")
-        
-        # Guardar definition.pbism (en la raíz)
-        if self.definition and (not only_modified or self._file_metadata['definition']['modified']):
-            self.definition.save_to_file(output_dir / "definition.pbism")
-        
-        # Guardar .platform (en la raíz)
-        if self.platform and (not only_modified or self._file_metadata['platform']['modified']):
-            self.platform.save_to_file(output_dir / ".platform")
+        (output_dir / "definition").mkdir(exist_ok=True)
+        for rel, content in self._render_files(only_modified).items():
+            path = output_dir / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+    
+    def _render_files(self, only_modified: bool = False) -> Dict[str, str]:
+        """
+        Contenido de cada fichero del modelo por ruta relativa
+        (``definition/tables/X.tmdl``...), sin tocar el disco. Con
+        ``only_modified`` solo se incluyen los objetos marcados como modificados.
+        """
+        meta = self._file_metadata
+
+        def modified(section: str, name: Optional[str] = None) -> bool:
+            if not only_modified:
+                return True
+            entry = meta.get(section, {})
+            if name is not None:
+                entry = entry.get(name, {})
+            return entry.get('modified', True)
+
+        files: Dict[str, str] = {}
+        if self.model and modified('model'):
+            files["definition/model.tmdl"] = self.model.raw_content
+        if self.relationships and modified('relationships'):
+            files["definition/relationships.tmdl"] = meta['relationships']['content']
+        if self.expressions_content and modified('expressions'):
+            files["definition/expressions.tmdl"] = self.expressions_content
+        for table in self.tables:
+            if modified('tables', table.name):
+                files[f"definition/tables/{table.name}.tmdl"] = table.raw_content
+        for culture in self.cultures:
+            if modified('cultures', culture.name):
+                files[f"definition/cultures/{culture.name}.tmdl"] = culture.raw_content
+        for role in self.roles:
+            if modified('roles', role.name):
+                role_meta = meta.get('roles', {}).get(role.name, {})
+                files[f"definition/roles/{role_meta.get('file_name', f'{role.name}.tmdl')}"] = role.raw_content
+        if self.definition and modified('definition'):
+            files["definition.pbism"] = json.dumps(self.definition.raw_content, indent=2, ensure_ascii=False)
+        if self.platform and modified('platform'):
+            files[".platform"] = json.dumps(self.platform.raw_content, indent=2, ensure_ascii=False)
+        return files
+
+    def save_to_directory_incremental(
+        self,
+        output_dir: Path,
+        previous_hashes: Optional[Dict[str, str]] = None,
+        previous_stats: Optional[Dict[str, List[int]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Guarda el modelo reescribiendo solo los ficheros cuyo contenido cambia.
+
+        Cada fichero se compara por hash SHA-256 con ``previous_hashes`` (los
+        de la generación anterior, guardados en ``{subset}_config.json``); ese
+        atajo solo se usa si el fichero en disco conserva el tamaño y el mtime
+        guardados en ``previous_stats`` (``file_stats``). Si no, se compara con
+        el hash del fichero existente en ``output_dir`` y se reescribe si
+        difiere o falta. Los ficheros que escribió una generación anterior
+        (según ``GENERATED_FILES_MANIFEST`` o la configuración del submodelo)
+        y que ya no forman parte del modelo se borran; el resto de ficheros
+        de la carpeta no se tocan. Los hashes y stats nuevos se guardan en el
+        manifiesto y, si el modelo es un submodelo con configuración
+        guardada, también en esa configuración.
+
+        Returns:
+            ``{'written': [...], 'unchanged': [...], 'removed': [...], 'hashes': {...}, 'stats': {...}}``
+        """
+        output_dir = Path(output_dir)
+        subset_config = self._file_metadata.get('subset_config', {})
+        previous = subset_config.get('previous', {})
+        manifest_path = output_dir / GENERATED_FILES_MANIFEST
+        if not previous.get('file_hashes') and manifest_path.is_file():
+            try:
+                with open(manifest_path, 'r', encoding='utf-8') as f:
+                    previous = json.load(f)
+            except (OSError, ValueError):
+                previous = {}
+        if previous_hashes is None:
+            previous_hashes = previous.get('file_hashes', {})
+        if previous_stats is None:
+            previous_stats = previous.get('file_stats', {})
+
+        files = self._render_files()
+        hashes = {
+            rel: hashlib.sha256(content.encode('utf-8')).hexdigest()
+            for rel, content in files.items()
+        }
+        stats: Dict[str, List[int]] = {}
+        result: Dict[str, Any] = {'written': [], 'unchanged': [], 'removed': [], 'hashes': hashes, 'stats': stats}
+
+        for rel, content in files.items():
+            path = output_dir / rel
+            if path.is_file():
+                st = path.stat()
+                stat = [st.st_size, st.st_mtime_ns]
+                # El hash anterior solo vale si el fichero no se ha tocado desde entonces
+                if previous_hashes.get(rel) == hashes[rel] and previous_stats.get(rel) == stat:
+                    stats[rel] = stat
+                    result['unchanged'].append(rel)
+                    continue
+                existing = path.read_text(encoding='utf-8')
+                if hashlib.sha256(existing.encode('utf-8')).hexdigest() == hashes[rel]:
+                    stats[rel] = stat
+                    result['unchanged'].append(rel)
+                    continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            st = path.stat()
+            stats[rel] = [st.st_size, st.st_mtime_ns]
+            result['written'].append(rel)
+
+        # Solo se borran ficheros que escribió una generación anterior
+        stale = {rel for rel in previous_hashes if rel not in files}
+        for rel in sorted(stale):
+            path = output_dir / rel
+            if path.is_file():
+                path.unlink()
+                result['removed'].append(rel)
+
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump({'file_hashes': hashes, 'file_stats': stats}, f, indent=2, ensure_ascii=False)
+
+        config_path = subset_config.get('path')
+        if config_path and Path(config_path).exists():
+            with open(config_path, 'r', encoding='utf-8') as f:
+                config = json.load(f)
+            config['file_hashes'] = hashes
+            config['file_stats'] = stats
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False)
+
+        print(f"  💾 {output_dir.name}: {len(result['written'])} ficheros reescritos, "
+              f"{len(result['unchanged'])} sin cambios, {len(result['removed'])} eliminados")
+        for rel in result['written']:
+            print(f"     ✏️ {rel}")
+        for rel in result['removed']:
+            print(f"     🗑️ {rel}")
+        return result
     
     def create_subset_model_legacy(
         self, 
@@ -418,7 +559,10 @@ class SemanticModel:
         subset_model.model = self.model
         subset_model.platform = self.platform
         subset_model.definition = self.definition
+        subset_model.expressions_content = self.expressions_content
         subset_model.cultures = self.cultures.copy()
+        # Roles RLS sin los tablePermission de tablas excluidas
+        subset_model.roles = [role.filter_tables(set(final_tables)) for role in self.roles]
         
         # Filtrar y aplicar especificaciones de elementos a las tablas
         # Solo incluir tablas que están en final_tables (tablas iniciales + detectadas en medidas)
@@ -483,8 +627,13 @@ class SemanticModel:
                 for table in subset_model.tables
             },
             'cultures': self._file_metadata['cultures'].copy(),
+            'roles': {
+                name: {**meta, 'modified': True}
+                for name, meta in self._file_metadata.get('roles', {}).items()
+            },
             'platform': self._file_metadata['platform'].copy(),
-            'definition': self._file_metadata['definition'].copy()
+            'definition': self._file_metadata['definition'].copy(),
+            'expressions': self._file_metadata.get('expressions', {}).copy()
         }
         
         return subset_model
@@ -496,19 +645,19 @@ class SemanticModel:
         semantic_model_id: Optional[int] = None,
         config_path: Optional[Path] = None,
         create_pbip: bool = True,
+        reports: Optional[List[str]] = None,
+        stats_path: Optional[Path] = None,
+        remove_auto_date_tables: bool = False,
+        storage_modes: Literal['off', 'advise', 'apply'] = 'off',
     ) -> 'SemanticModel':
         """
         Crea un subconjunto del modelo semántico basándose en datos de DuckDB.
 
         Flujo:
-        1. Consulta ``report_column_used`` / ``report_measure_used`` para saber
-           qué columnas y medidas usan los reports asociados a este modelo.
-        2. Consulta ``semantic_model_measure_dependencies`` para obtener las
-           dependencias transitivas de esas medidas (tablas, columnas y medidas
-           adicionales necesarias para que el DAX funcione).
-        3. Consulta ``semantic_model_relationship`` para incluir relaciones
-           cuyas dos tablas estén en el conjunto final.
-        4. Construye el submodelo filtrando tablas, columnas y medidas.
+        1. ``plan_subset_from_db`` carga en memoria (una sola conexión) el uso
+           de los reports asociados y todas las dependencias del modelo, y
+           calcula tablas, columnas, medidas y relaciones necesarias.
+        2. ``materialize_subset`` construye el submodelo a partir del plan.
 
         Args:
             db_path: Ruta al fichero .duckdb.
@@ -517,296 +666,114 @@ class SemanticModel:
                 Si None, se infiere a partir de ``self.semantic_model_id`` (GUID)
                 o del primer modelo disponible.
             config_path: Ruta donde guardar el JSON de configuración (opcional).
+            reports: Reports cuyo uso se tiene en cuenta. Si None, todos los
+                reports asociados al modelo.
+            stats_path: Fichero JSON de filas/cardinalidades para la
+                estimación de memoria (ver ``MemoryEstimator``).
+            remove_auto_date_tables: Quitar del submodelo las tablas auto
+                date/time no usadas (ver ``remove_auto_date_tables``).
+            storage_modes: ``'advise'`` calcula el modo de almacenamiento
+                recomendado por tabla (``StorageModeAdvisor``) y lo guarda en
+                la configuración; ``'apply'`` además lo escribe en las
+                particiones del submodelo.
 
         Returns:
             Nueva instancia de SemanticModel con el subconjunto.
         """
-        import duckdb
-
-        conn = duckdb.connect(db_path, read_only=True)
-        try:
-            # ── Resolver semantic_model_id numérico ──────────────────
-            sm_id = semantic_model_id
-            if sm_id is None and self.semantic_model_id:
-                row = conn.execute(
-                    "SELECT id FROM semantic_model WHERE semantic_model_id = ?",
-                    [self.semantic_model_id],
-                ).fetchone()
-                if row:
-                    sm_id = row[0]
-            # Try name-based lookup (most reliable for locally-imported models)
-            if sm_id is None and self.name:
-                lookup_name = self.name if self.name.endswith('.SemanticModel') else self.name + '.SemanticModel'
-                row = conn.execute(
-                    "SELECT id FROM semantic_model WHERE name = ?",
-                    [lookup_name],
-                ).fetchone()
-                if row:
-                    sm_id = row[0]
-            if sm_id is None:
-                row = conn.execute("SELECT id FROM semantic_model LIMIT 1").fetchone()
-                if not row:
-                    raise ValueError("No semantic models found in database")
-                sm_id = row[0]
-                print(f"  ⚠️ Warning: falling back to first model in DB (id={sm_id})")
-
-            # ── 1. Columnas usadas por reports ───────────────────────
-            used_columns: Dict[str, Set[str]] = {}   # tabla → {cols}
-            rows = conn.execute("""
-                SELECT DISTINCT c.table_name, c.column_name
-                FROM report_column_used c
-                JOIN report r ON r.id = c.report_id
-                JOIN semantic_model sm ON sm.name = r.name || '.SemanticModel'
-                WHERE sm.id = ?
-            """, [sm_id]).fetchall()
-            for tbl, col in rows:
-                used_columns.setdefault(tbl, set()).add(col)
-
-            # ── 2. Medidas usadas por reports ────────────────────────
-            used_measures: Dict[str, Set[str]] = {}   # tabla → {measures}
-            rows = conn.execute("""
-                SELECT DISTINCT m.table_name, m.measure_name
-                FROM report_measure_used m
-                JOIN report r ON r.id = m.report_id
-                JOIN semantic_model sm ON sm.name = r.name || '.SemanticModel'
-                WHERE sm.id = ?
-            """, [sm_id]).fetchall()
-            for tbl, meas in rows:
-                used_measures.setdefault(tbl, set()).add(meas)
-
-            # ── Conjunto base de tablas (las que usan los reports) ───
-            report_tables = set(used_columns.keys()) | set(used_measures.keys())
-
-            # ── 3. Medidas concretas usadas por reports ──────────────
-            all_used_measure_names: Set[str] = set()
-            for measures in used_measures.values():
-                all_used_measure_names |= measures
-
-            # ── 4. Dependencias transitivas de esas medidas ──────────
-            dep_tables: Set[str] = set()          # tablas extra por DAX
-            dep_columns: Dict[str, Set[str]] = {} # tabla → {cols extra}
-            dep_measures: Set[str] = set()         # medidas encadenadas
-
-            if all_used_measure_names:
-                placeholders = ", ".join(["?"] * len(all_used_measure_names))
-                measure_list = list(all_used_measure_names)
-
-                # Tablas requeridas por DAX
-                rows = conn.execute(f"""
-                    SELECT DISTINCT referenced_name
-                    FROM semantic_model_measure_dependencies
-                    WHERE semantic_model_id = ?
-                      AND measure_name IN ({placeholders})
-                      AND dependency_type = 'table'
-                """, [sm_id] + measure_list).fetchall()
-                for (tbl,) in rows:
-                    dep_tables.add(tbl)
-
-                # Columnas requeridas por DAX
-                rows = conn.execute(f"""
-                    SELECT DISTINCT referenced_table, referenced_name
-                    FROM semantic_model_measure_dependencies
-                    WHERE semantic_model_id = ?
-                      AND measure_name IN ({placeholders})
-                      AND dependency_type = 'column'
-                """, [sm_id] + measure_list).fetchall()
-                for tbl, col in rows:
-                    if tbl:
-                        dep_columns.setdefault(tbl, set()).add(col)
-
-                # Medidas encadenadas (A usa B, incluir B)
-                rows = conn.execute(f"""
-                    SELECT DISTINCT referenced_name, referenced_table
-                    FROM semantic_model_measure_dependencies
-                    WHERE semantic_model_id = ?
-                      AND measure_name IN ({placeholders})
-                      AND dependency_type = 'measure'
-                """, [sm_id] + measure_list).fetchall()
-                for meas, tbl in rows:
-                    dep_measures.add(meas)
-                    if tbl:
-                        dep_tables.add(tbl)
-
-            # ── 5. Conjunto final de tablas ──────────────────────────
-            final_tables = report_tables | dep_tables | set(dep_columns.keys())
-
-            # ── 5b. Dependencias de tablas calculadas ────────────────
-            # Las tablas calculadas (DAX) referencian otras tablas/columnas.
-            # Iteramos hasta cierre transitivo (tablas calculadas que dependen
-            # de otras tablas calculadas).
-            calc_tables_processed: Set[str] = set()
-            try:
-                while True:
-                    pending = final_tables - calc_tables_processed
-                    if not pending:
-                        break
-                    calc_tables_processed |= pending
-                    placeholders_ct = ", ".join(["?"] * len(pending))
-                    dep_rows = conn.execute(f"""
-                        SELECT dependency_type, referenced_name, referenced_table
-                        FROM semantic_model_calculatedTable_dependencies
-                        WHERE semantic_model_id = ?
-                          AND calculated_table_name IN ({placeholders_ct})
-                    """, [sm_id] + list(pending)).fetchall()
-
-                    new_tables: Set[str] = set()
-                    for dep_type, ref_name, ref_table in dep_rows:
-                        if dep_type == 'table':
-                            if ref_name not in final_tables:
-                                print(f"  [CalcTable] añadida tabla '{ref_name}' (dep de tabla calculada)")
-                                new_tables.add(ref_name)
-                        elif dep_type == 'column' and ref_table:
-                            if ref_table not in final_tables:
-                                print(f"  [CalcTable] añadida tabla '{ref_table}' (dep de tabla calculada)")
-                                new_tables.add(ref_table)
-                            dep_columns.setdefault(ref_table, set()).add(ref_name)
-
-                    final_tables |= new_tables
-                    if not new_tables:
-                        break
-            except Exception:
-                pass  # La tabla puede no existir en DBs antiguas
-
-            # ── 6. Unir columnas: report usage + DAX deps ────────────
-            # Para cada tabla, columnas que deben incluirse
-            final_columns: Dict[str, Set[str]] = {}
-            for tbl in final_tables:
-                cols: Set[str] = set()
-                if tbl in used_columns:
-                    cols |= used_columns[tbl]
-                if tbl in dep_columns:
-                    cols |= dep_columns[tbl]
-                if cols:
-                    final_columns[tbl] = cols
-
-            # ── 7. Unir medidas: report usage + DAX deps ────────────
-            final_measures: Dict[str, Set[str]] = {}
-            # Medidas directamente usadas por reports
-            for tbl, measures in used_measures.items():
-                final_measures.setdefault(tbl, set()).update(measures)
-            # Medidas encadenadas: buscar en qué tabla viven
-            if dep_measures:
-                for table in self.tables:
-                    for measure in table.measures:
-                        if measure.name in dep_measures:
-                            final_measures.setdefault(table.name, set()).add(measure.name)
-                            final_tables.add(table.name)  # asegurar tabla incluida
-
-            # ── 8. Relaciones de la DB donde ambas tablas están ──────
-            subset_relationships = []
-            rel_rows = conn.execute(
-                "SELECT relationship_name, from_table, from_column, "
-                "       to_table, to_column, cardinality, "
-                "       cross_filtering_behavior, security_filtering_behavior, is_active "
-                "FROM semantic_model_relationship WHERE semantic_model_id = ?",
-                [sm_id],
-            ).fetchall()
-
-            required_rel_columns: Dict[str, Set[str]] = {}
-            for (rel_name, from_tbl, from_col, to_tbl, to_col,
-                 card, cross, sec, active) in rel_rows:
-                if from_tbl in final_tables and to_tbl in final_tables:
-                    # Buscar la relación in-memory para conservar raw_content
-                    matched_rel = next(
-                        (r for r in self.relationships
-                         if r.from_table == from_tbl and r.to_table == to_tbl
-                         and r.from_column == from_col and r.to_column == to_col),
-                        None
-                    )
-                    if matched_rel:
-                        subset_relationships.append(matched_rel)
-                    # Columnas de relaciones siempre necesarias
-                    required_rel_columns.setdefault(from_tbl, set()).add(from_col)
-                    required_rel_columns.setdefault(to_tbl, set()).add(to_col)
+        plan = self.plan_subset_from_db(
+            db_path, semantic_model_id=semantic_model_id, reports=reports
+        )
+        estimator = MemoryEstimator.from_stats_file(stats_path)
+        storage_advisor = None
+        if storage_modes != 'off':
+            storage_advisor = StorageModeAdvisor.from_db(
+                self, db_path, semantic_model_id=plan.semantic_model_id, estimator=estimator
+            )
+        return self.materialize_subset(
+            plan, subset_name, config_path=config_path, create_pbip=create_pbip,
+            estimator=estimator,
+            remove_auto_date_tables=remove_auto_date_tables,
+            storage_advisor=storage_advisor,
+            apply_storage_modes=storage_modes == 'apply',
+        )
 
-            # ── 9. Agregar columnas de relaciones a final_columns ────
-            for tbl, cols in required_rel_columns.items():
-                final_columns.setdefault(tbl, set()).update(cols)
+    def plan_subset_from_db(
+        self,
+        db_path: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+        reports: Optional[List[str]] = None,
+    ) -> SubsetPlan:
+        """
+        Calcula (sin escribir nada) el plan del submodelo mínimo para los
+        reports asociados a este modelo, o solo para ``reports`` si se indica
+        (unión de sus bitsets de uso).
 
-        finally:
-            conn.close()
+        Para planificar varias combinaciones de uso sobre el mismo modelo,
+        construir una vez ``SubsetIndex.from_db`` y llamar a ``plan``.
+        """
+        import duckdb
 
-        # ── 9b. SortByColumn dependencies ────────────────────────────
-        # Si una columna incluida tiene sortByColumn, la columna referenciada
-        # también debe incluirse (con cierre transitivo).
-        changed = True
-        iteration = 0
-        while changed and iteration < 10:  # Límite para evitar loops infinitos
-            iteration += 1
-            changed = False
-            for table in self.tables:
-                if table.name not in final_tables:
-                    continue
-                included_cols = final_columns.get(table.name, set())
-                # Columnas disponibles en la tabla original
-                available_cols = {c.name for c in table.columns}
-                
-                for col in table.columns:
-                    if col.name in included_cols and col.sort_by_column:
-                        sort_col = col.sort_by_column
-                        # Validar que sort_col exista en la tabla
-                        if sort_col not in available_cols:
-                            print(f"  [SortByColumn] ⚠️ {table.name}.'{col.name}' → '{sort_col}' NO EXISTE EN TABLA (ignorado)")
-                            continue
-                        if sort_col not in included_cols:
-                            final_columns.setdefault(table.name, set()).add(sort_col)
-                            changed = True
-                            print(f"  [SortByColumn] {table.name}.'{col.name}' → añadida '{sort_col}'")
-
-        # ── 9c. Bins/Grupos (__PBI_SemanticLinks) ─────────────────────
-        # Si una columna incluida tiene un bin/grupo derivado (o viceversa),
-        # la columna fuente también debe incluirse (y el bin si está en el modelo).
-        conn2 = duckdb.connect(db_path, read_only=True)
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path, read_only=True)
         try:
-            # Columna fuente → bin: si la fuente está incluida, incluir el bin si existe
-            # Bin → columna fuente: si el bin está incluido, incluir la fuente
-            bin_rows = conn2.execute(
-                "SELECT table_name, source_column, bin_table, bin_column "
-                "FROM semantic_model_table_bins WHERE semantic_model_id = ?",
-                [sm_id],
-            ).fetchall()
-        except Exception:
-            bin_rows = []
+            index = SubsetIndex.from_db(self, semantic_model_id=semantic_model_id, conn=conn)
+            if reports:
+                index.load_report_usage(conn)
+                return index.plan_for_reports(reports)
+            return index.plan()
         finally:
-            conn2.close()
-
-        for (src_table, src_col, bin_table, bin_col) in bin_rows:
-            src_included = src_table in final_tables and src_col in final_columns.get(src_table, set())
-            bin_included = bin_table in final_tables and bin_col in final_columns.get(bin_table, set())
+            if _own_conn:
+                conn.close()
 
-            if src_included and not bin_included:
-                # La columna fuente está incluida → incluir también el bin
-                if bin_table in final_tables:
-                    final_columns.setdefault(bin_table, set()).add(bin_col)
-                    print(f"  [Bin] {src_table}.'{src_col}' → bin añadido '{bin_table}'.'{bin_col}'")
-
-            if bin_included and not src_included:
-                # El bin está incluido → incluir también la columna fuente
-                final_tables.add(src_table)
-                final_columns.setdefault(src_table, set()).add(src_col)
-                print(f"  [Bin] '{bin_table}'.'{bin_col}' → fuente añadida '{src_table}'.'{src_col}'")
+    def materialize_subset(
+        self,
+        plan: SubsetPlan,
+        subset_name: str,
+        config_path: Optional[Path] = None,
+        create_pbip: bool = True,
+        estimator: Optional[MemoryEstimator] = None,
+        remove_auto_date_tables: bool = False,
+        storage_advisor: Optional[StorageModeAdvisor] = None,
+        apply_storage_modes: bool = False,
+    ) -> 'SemanticModel':
+        """
+        Construye el submodelo descrito por ``plan`` (tablas filtradas,
+        relaciones, roles y metadatos), guarda su configuración JSON y,
+        opcionalmente, el scaffold .pbip + .Report.
 
-        # ── DEBUG: estado de final_columns antes de construir submodelo ──
-        if 'dim_WorkingDay' in final_columns:
-            print(f"\n[DEBUG] final_columns['dim_WorkingDay'] ANTES de construir submodelo: {sorted(final_columns['dim_WorkingDay'])}")
+        Con ``storage_advisor`` se añade a la configuración el modo de
+        almacenamiento recomendado por tabla y, si ``apply_storage_modes``,
+        se escribe en las particiones del submodelo.
+        """
+        final_tables = plan.tables
+        final_columns = plan.columns
+        final_measures = plan.measures
+        subset_relationships = plan.relationships
 
         # ── Logging ──────────────────────────────────────────────────
+        for line in plan.log:
+            print(f"  {line}")
         print(f"\n{'='*60}")
         print(f"create_subset_model_from_db: {subset_name}")
         print(f"{'='*60}")
-        print(f"  Tablas usadas por reports:      {len(report_tables)}")
-        print(f"  Tablas extra por deps DAX:      {len(dep_tables - report_tables)}")
+        print(f"  Tablas usadas por reports:      {len(plan.report_tables)}")
+        print(f"  Tablas extra por deps DAX:      {len(plan.dax_tables)}")
         print(f"  Total tablas finales:           {len(final_tables)}")
-        print(f"  Medidas usadas por reports:     {len(all_used_measure_names)}")
-        print(f"  Medidas encadenadas (DAX):      {len(dep_measures - all_used_measure_names)}")
+        print(f"  Medidas usadas por reports:     {len(plan.used_measures)}")
+        print(f"  Medidas encadenadas (DAX):      {len(plan.chained_measures)}")
         print(f"  Relaciones incluidas:           {len(subset_relationships)}")
 
-        # ── 10. Construir submodelo ──────────────────────────────────
+        # ── Construir submodelo ──────────────────────────────────────
         subset_model = SemanticModel(str(self.base_path.parent / subset_name))
         subset_model.model = self.model
         subset_model.platform = self.platform
         subset_model.definition = self.definition
+        subset_model.expressions_content = self.expressions_content
         subset_model.cultures = self.cultures.copy()
+        # Roles RLS sin los tablePermission de tablas excluidas
+        subset_model.roles = [role.filter_tables(set(final_tables)) for role in self.roles]
 
         subset_model.tables = []
         for table in self.tables:
@@ -826,9 +793,9 @@ class SemanticModel:
             subset_model.tables.append(filtered)
 
         # Relaciones
-        subset_model.relationships = subset_relationships
+        subset_model.relationships = list(subset_relationships)
 
-        # ── 10b. Eliminar variation blocks con relaciones no incluidas ──
+        # ── Eliminar variation blocks con relaciones no incluidas ──
         valid_rel_ids = {rel.name for rel in subset_relationships if rel.name}
         for table in subset_model.tables:
             table.raw_content = self._strip_invalid_variations(
@@ -841,7 +808,7 @@ class SemanticModel:
             'relationships': {
                 'original_path': self._file_metadata['relationships'].get('original_path'),
                 'modified': False,
-                'content': self._rebuild_relationships_content(subset_relationships)
+                'content': self._rebuild_relationships_content(subset_model.relationships)
             },
             'tables': {
                 table.name: {
@@ -851,35 +818,82 @@ class SemanticModel:
                 for table in subset_model.tables
             },
             'cultures': self._file_metadata['cultures'].copy(),
+            'roles': {
+                name: {**meta, 'modified': True}
+                for name, meta in self._file_metadata.get('roles', {}).items()
+            },
             'platform': self._file_metadata['platform'].copy(),
-            'definition': self._file_metadata['definition'].copy()
+            'definition': self._file_metadata['definition'].copy(),
+            'expressions': self._file_metadata.get('expressions', {}).copy()
         }
 
+        # ── Tablas auto date/time no usadas por los reports ─────────
+        auto_date = None
+        if remove_auto_date_tables:
+            auto_date = subset_model.remove_auto_date_tables(
+                keep_tables=plan.report_tables, estimator=estimator,
+                used_variations=plan.used_variations,
+            )
+
         # ── Guardar configuración ────────────────────────────────────
-        config = {
-            "name": subset_name,
-            "base_model": self.base_path.name if self.base_path else "Unknown",
-            "method": "from_db",
-            "report_tables": sorted(report_tables),
-            "dax_extra_tables": sorted(dep_tables - report_tables),
-            "included_tables": sorted(final_tables),
-            "total_tables": len(final_tables),
-            "total_relationships": len(subset_relationships),
-            "used_measures": sorted(all_used_measure_names),
-            "chained_measures": sorted(dep_measures - all_used_measure_names),
-        }
+        config = plan.to_config(
+            subset_name, self.base_path.name if self.base_path else "Unknown"
+        )
+        memory = (estimator or MemoryEstimator()).compare(self, subset_model)
+        config["estimated_memory_mb"] = {k: round(v, 2) for k, v in memory.items()}
+        if auto_date is not None:
+            config["removed_auto_date_tables"] = auto_date['removed_tables']
+
+        # ── Modo de almacenamiento recomendado ──────────────────────
+        if storage_advisor is not None:
+            storage_advice = storage_advisor.advise(plan)
+            print_storage_advice(storage_advice)
+            config["storage_modes"] = {
+                row['table']: {
+                    'current': row['current_mode'],
+                    'proposed': row['proposed_mode'],
+                    'reason': row['reason'],
+                }
+                for row in storage_advice
+            }
+            if apply_storage_modes:
+                changed = StorageModeAdvisor.apply(subset_model, storage_advice)
+                print(f"  💽 Modo de almacenamiento aplicado en {len(changed)} tablas")
 
         if config_path is None:
             config_path = self.base_path.parent / f"{subset_name}_config.json"
+        # Configuración de la generación anterior: diff del plan y hashes
+        # para save_to_directory_incremental
+        previous_config: Dict[str, Any] = {}
+        if Path(config_path).exists():
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    previous_config = json.load(f)
+            except (OSError, ValueError):
+                previous_config = {}
+        subset_model._file_metadata['subset_config'] = {
+            'path': str(config_path),
+            'previous': previous_config,
+        }
+        if previous_config:
+            old_tables = set(previous_config.get('included_tables', []))
+            added = sorted(final_tables - old_tables)
+            removed = sorted(old_tables - final_tables)
+            if added:
+                print(f"  ➕ Tablas nuevas respecto a la generación anterior: {', '.join(added)}")
+            if removed:
+                print(f"  ➖ Tablas quitadas respecto a la generación anterior: {', '.join(removed)}")
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
         print(f"  Configuración guardada: {config_path}")
 
         # ── Resumen de tablas ────────────────────────────────────────
         for table in sorted(subset_model.tables, key=lambda t: t.name):
-            src = "report" if table.name in report_tables else "dax-dep"
+            src = "report" if table.name in plan.report_tables else "dax-dep"
             print(f"  [{src}] {table.name}: "
                   f"{len(table.columns)} cols, {len(table.measures)} measures")
+        print(f"  🧠 Memoria estimada: {memory['subset_mb']:.1f} MB de {memory['source_mb']:.1f} MB "
+              f"(ahorro {memory['saved_mb']:.1f} MB, {memory['saved_pct']:.0f}%)")
         print(f"{'='*60}\n")
 
         # ── Scaffold .pbip + .Report vacío ─────────────────────────────
@@ -887,35 +901,6 @@ class SemanticModel:
             models_path = self.base_path.parent
             SemanticModel.scaffold_pbip_and_report(models_path, subset_name)
 
-        # ════════════════════════════════════════════════════════════════
-        # DEBUG: Verificar columnas sort_by que se perdieron
-        # ════════════════════════════════════════════════════════════════
-        for table in subset_model.tables:
-            if table.name == 'dim_WorkingDay':
-                # Tabla original
-                original_cols = {c.name for c in next(t for t in self.tables if t.name == 'dim_WorkingDay').columns}
-                print(f"\n[DEBUG] Tabla original 'dim_WorkingDay' tiene estas columnas:")
-                print(f"  {sorted(original_cols)}")
-                
-                print(f"\n[DEBUG] final_columns['dim_WorkingDay'] esperadas antes de filter_elements:")
-                print(f"  {sorted(final_columns.get('dim_WorkingDay', set()))}")
-                
-                print(f"\n[DEBUG] Tabla {table.name} FINAL (después de filter_elements):")
-                for col in table.columns:
-                    print(f"  - {col.name}")
-                # Comparar con lo que debería tener
-                expected = final_columns.get(table.name, set())
-                print(f"\n[DEBUG] Columnas esperadas en final_columns: {sorted(expected)}")
-                missing = expected - {c.name for c in table.columns}
-                not_in_original = missing - original_cols
-                if missing:
-                    print(f"[DEBUG] ⚠️ FALTA: {sorted(missing)}")
-                    if not_in_original:
-                        print(f"[DEBUG]   → {sorted(not_in_original)} NO EXISTEN EN TABLA ORIGINAL")
-                    in_original = missing & original_cols
-                    if in_original:
-                        print(f"[DEBUG]   → {sorted(in_original)} EXISTEN EN TABLA ORIGINAL pero fueron filtradas")
-
         return subset_model
 
     # ──────────────────────────────────────────────────────────────
@@ -1419,6 +1404,169 @@ class SemanticModel:
         
         return '\n\n'.join(content_parts)
     
+    # ──────────────────────────────────────────────────────────────
+    # Optimización: tablas auto date/time
+    # ──────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def auto_date_table_kind(table: Table) -> Optional[str]:
+        """
+        ``'local'`` para ``LocalDateTable_*``, ``'template'`` para
+        ``DateTableTemplate_*`` (tablas ocultas que crea la opción auto
+        date/time de Power BI Desktop) y None para el resto.
+        """
+        raw = table.raw_content or ''
+        if table.name.startswith('LocalDateTable_') or '__PBI_LocalDateTable' in raw:
+            return 'local'
+        if table.name.startswith('DateTableTemplate_') or '__PBI_TemplateDateTable' in raw:
+            return 'template'
+        return None
+
+    def auto_date_variation_targets(self) -> Dict[Tuple[str, str, str], str]:
+        """
+        ``{(tabla, columna, variation): LocalDateTable}``: tabla auto date/time
+        a la que lleva cada bloque ``variation`` de las columnas de fecha (por
+        su ``relationship`` o, si no está, por ``defaultHierarchy``).
+        """
+        rel_targets = {r.name: r.to_table for r in self.relationships if r.name}
+        targets: Dict[Tuple[str, str, str], str] = {}
+        for table in self.tables:
+            raw = table.raw_content or ''
+            if 'variation ' not in raw:
+                continue
+            column = variation = None
+            for line in raw.split('\n'):
+                stripped = line.strip()
+                if stripped.startswith('column '):
+                    column = column_header_name(line)
+                    variation = None
+                elif stripped.startswith(('measure ', 'hierarchy ', 'partition ')):
+                    column = variation = None
+                elif stripped.startswith('variation ') and column:
+                    name = stripped[len('variation '):].strip()
+                    if len(name) > 1 and name[0] == name[-1] == "'":
+                        name = name[1:-1].replace("''", "'")
+                    variation = name
+                elif variation and stripped.startswith('relationship:'):
+                    target = rel_targets.get(stripped.split(':', 1)[1].strip())
+                    if target:
+                        targets[(table.name, column, variation)] = target
+                elif variation and stripped.startswith('defaultHierarchy:'):
+                    target = stripped.split(':', 1)[1].strip().rsplit('.', 1)[0].strip("'")
+                    targets.setdefault((table.name, column, variation), target)
+        return targets
+
+    def remove_auto_date_tables(
+        self,
+        keep_tables: Optional[Set[str]] = None,
+        estimator: Optional[MemoryEstimator] = None,
+        used_variations: Optional[Set[Tuple[str, str, str]]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Elimina (en este modelo) las tablas auto date/time que no se usan,
+        junto con sus relaciones y los bloques ``variation`` de las columnas
+        de fecha que apuntaban a ellas.
+
+        Se conservan las de ``keep_tables``, las que alguna expresión DAX del
+        modelo referencia por nombre y las LocalDateTable de las jerarquías de
+        fecha automáticas que usan los reports (``used_variations``:
+        ``(tabla, columna, variation)``, ver ``report_variation_used``). Los
+        visuales usan esas jerarquías a través de la columna base, así que
+        ``keep_tables`` no las incluye. Las plantillas ``DateTableTemplate_*``
+        solo se quitan si no queda ninguna ``LocalDateTable_*``; en ese caso
+        también se desactiva ``__PBI_TimeIntelligenceEnabled`` en model.tmdl
+        para que Power BI Desktop no las vuelva a crear.
+
+        Returns:
+            ``{'removed_tables', 'removed_relationships', 'updated_tables',
+            'estimated_mb'}``
+        """
+        keep_tables = set(keep_tables or ())
+        auto_tables = {t.name: kind for t in self.tables
+                       if (kind := self.auto_date_table_kind(t))}
+        if not auto_tables:
+            return {'removed_tables': [], 'removed_relationships': 0,
+                    'updated_tables': [], 'estimated_mb': 0.0}
+        if used_variations:
+            variation_targets = self.auto_date_variation_targets()
+            keep_tables |= {variation_targets[v] for v in used_variations if v in variation_targets}
+
+        # Referencias DAX desde tablas normales (medidas, columnas y tablas
+        # calculadas, grupos de cálculo)
+        dax_text = '\n'.join(
+            t.raw_content for t in self.tables if t.name not in auto_tables
+        )
+        used = {
+            name for name in auto_tables
+            if name in keep_tables or f"'{name}'" in dax_text or f"{name}[" in dax_text
+        }
+        remove = {n for n, kind in auto_tables.items() if kind == 'local' and n not in used}
+        locals_left = any(kind == 'local' and n not in remove for n, kind in auto_tables.items())
+        if not locals_left:
+            remove |= {n for n, kind in auto_tables.items() if kind == 'template' and n not in used}
+        if not remove:
+            return {'removed_tables': [], 'removed_relationships': 0,
+                    'updated_tables': [], 'estimated_mb': 0.0}
+
+        estimator = estimator or MemoryEstimator()
+        removed_bytes = sum(
+            estimator.estimate_table(t)['bytes'] for t in self.tables if t.name in remove
+        )
+
+        # Relaciones hacia las tablas eliminadas y sus variations
+        removed_rels = [r for r in self.relationships
+                        if r.from_table in remove or r.to_table in remove]
+        removed_rel_ids = {r.name for r in removed_rels if r.name}
+        self.relationships = [r for r in self.relationships if r not in removed_rels]
+        valid_rel_ids = {r.name for r in self.relationships if r.name}
+
+        self.tables = [t for t in self.tables if t.name not in remove]
+        updated_tables = []
+        for table in self.tables:
+            if 'variation ' in table.raw_content and any(
+                rel_id in table.raw_content for rel_id in removed_rel_ids
+            ):
+                table.raw_content = self._strip_invalid_variations(table.raw_content, valid_rel_ids)
+                self._file_metadata['tables'].setdefault(table.name, {})['modified'] = True
+                updated_tables.append(table.name)
+        for name in remove:
+            self._file_metadata['tables'].pop(name, None)
+
+        if removed_rels:
+            self._file_metadata['relationships']['content'] = \
+                self._rebuild_relationships_content(self.relationships)
+            self._file_metadata['relationships']['modified'] = True
+
+        # model.tmdl: referencias a las tablas y auto date/time
+        if self.model:
+            content = self.model.raw_content
+            lines = [
+                line for line in content.split('\n')
+                if not any(line.strip() in (f"ref table {n}", f"ref table '{n}'") for n in remove)
+            ]
+            content = '\n'.join(lines)
+            if not locals_left:
+                content = content.replace(
+                    'annotation __PBI_TimeIntelligenceEnabled = 1',
+                    'annotation __PBI_TimeIntelligenceEnabled = 0',
+                )
+            if content != self.model.raw_content:
+                # Copia: el objeto Model puede estar compartido con el modelo fuente
+                self.model = copy.copy(self.model)
+                self.model.raw_content = content
+                self._file_metadata['model']['modified'] = True
+
+        result = {
+            'removed_tables': sorted(remove),
+            'removed_relationships': len(removed_rels),
+            'updated_tables': sorted(updated_tables),
+            'estimated_mb': removed_bytes / 1024 / 1024,
+        }
+        print(f"  [AutoDate] {len(remove)} tablas auto date/time eliminadas, "
+              f"{len(removed_rels)} relaciones, variations en {len(updated_tables)} tablas "
+              f"(~{result['estimated_mb']:.1f} MB estimados)")
+        return result
+    
     def _extract_columns_from_measures_in_tables(
         self,
         table_names: List[str]
@@ -1737,6 +1885,87 @@ class SemanticModel:
             })
    
    
+    def _resolve_db_model_id(self, conn, semantic_model_id: Optional[int] = None) -> int:
+        """Resuelve el ID numérico de ``semantic_model`` (GUID → nombre → primero)."""
+        if semantic_model_id is not None:
+            return semantic_model_id
+        if self.semantic_model_id:
+            row = conn.execute(
+                "SELECT id FROM semantic_model WHERE semantic_model_id = ?",
+                [self.semantic_model_id],
+            ).fetchone()
+            if row:
+                return row[0]
+        if self.name:
+            lookup_name = self.name if self.name.endswith('.SemanticModel') else self.name + '.SemanticModel'
+            row = conn.execute(
+                "SELECT id FROM semantic_model WHERE name = ?",
+                [lookup_name],
+            ).fetchone()
+            if row:
+                return row[0]
+        row = conn.execute("SELECT id FROM semantic_model LIMIT 1").fetchone()
+        if not row:
+            raise ValueError("No semantic models found in database")
+        print(f"  ⚠️ Warning: falling back to first model in DB (id={row[0]})")
+        return row[0]
+
+    def get_impact_analysis(
+        self,
+        db_path: str,
+        table_name: str,
+        object_name: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        rebuild_index: bool = False,
+    ) -> Dict[str, List[Dict]]:
+        """
+        Devuelve qué medidas, tablas calculadas, visuales y reports dependen
+        (directa o transitivamente) de una columna, medida o tabla.
+
+        Usa el índice ``semantic_model_lineage`` (ver
+        ``DaxTokenizer.build_lineage_index``); si no existe para el modelo o
+        ``rebuild_index`` es True, lo construye antes de consultar.
+
+        Args:
+            db_path: Ruta al fichero .duckdb.
+            table_name: Tabla del objeto.
+            object_name: Columna o medida. Si None, impacto de la tabla entera.
+            semantic_model_id: ID numérico en ``semantic_model`` (opcional).
+            rebuild_index: Fuerza la reconstrucción del índice.
+        """
+        import duckdb
+        from .dax_tokenizer import DaxTokenizer
+
+        # Solo lectura si el índice ya existe: no bloquea a otros lectores/escritores del catálogo
+        conn = duckdb.connect(db_path, read_only=True)
+        try:
+            sm_id = self._resolve_db_model_id(conn, semantic_model_id)
+            if not rebuild_index:
+                try:
+                    row = conn.execute(
+                        "SELECT 1 FROM semantic_model_lineage WHERE semantic_model_id = ? LIMIT 1",
+                        [sm_id],
+                    ).fetchone()
+                    rebuild_index = row is None
+                except Exception:
+                    rebuild_index = True
+            if not rebuild_index:
+                return DaxTokenizer.get_impact(
+                    db_path, table_name, object_name, semantic_model_id=sm_id, conn=conn
+                )
+        finally:
+            conn.close()
+
+        # Falta el índice (o se pidió reconstruirlo): conexión de escritura solo para eso
+        conn = duckdb.connect(db_path)
+        try:
+            DaxTokenizer.build_lineage_index(db_path, semantic_model_id=sm_id, conn=conn)
+            return DaxTokenizer.get_impact(
+                db_path, table_name, object_name, semantic_model_id=sm_id, conn=conn
+            )
+        finally:
+            conn.close()
+
     def save_to_database(self, connection):
         """
         Guarda el modelo semántico completo en DuckDB.
@@ -1758,6 +1987,8 @@ class SemanticModel:
         connection.execute("CREATE SEQUENCE IF NOT EXISTS seq_semantic_model_relationship_id START 1")
         connection.execute("CREATE SEQUENCE IF NOT EXISTS seq_semantic_model_partition_id START 1")
         connection.execute("CREATE SEQUENCE IF NOT EXISTS seq_semantic_model_table_bins_id START 1")
+        connection.execute("CREATE SEQUENCE IF NOT EXISTS seq_semantic_model_calculation_item_id START 1")
+        connection.execute("CREATE SEQUENCE IF NOT EXISTS seq_semantic_model_role_permission_id START 1")
         
         # Crear tabla semantic_model (sin dropear, para acumular múltiples modelos)
         connection.execute("""
@@ -1885,6 +2116,15 @@ class SemanticModel:
             connection.execute("ALTER TABLE semantic_model_column ADD COLUMN sort_by_column VARCHAR")
         except Exception:
             pass  # columna ya existe
+        # Migración: columnas calculadas (expresión DAX)
+        try:
+            connection.execute("ALTER TABLE semantic_model_column ADD COLUMN is_calculated BOOLEAN DEFAULT FALSE")
+        except Exception:
+            pass  # columna ya existe
+        try:
+            connection.execute("ALTER TABLE semantic_model_column ADD COLUMN expression TEXT")
+        except Exception:
+            pass  # columna ya existe
         
         # Crear tabla semantic_model_measure
         connection.execute("""
@@ -1934,12 +2174,41 @@ class SemanticModel:
             )
         """)
 
+        # Crear tabla semantic_model_calculation_item (items de grupos de cálculo)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_calculation_item (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_semantic_model_calculation_item_id'),
+                semantic_model_id INTEGER NOT NULL,
+                table_name VARCHAR NOT NULL,
+                item_name VARCHAR NOT NULL,
+                expression TEXT,
+                created_at TIMESTAMP DEFAULT now(),
+                FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
+            )
+        """)
+
+        # Crear tabla semantic_model_role_permission (filtros RLS por rol y tabla)
+        connection.execute("""
+            CREATE TABLE IF NOT EXISTS semantic_model_role_permission (
+                id INTEGER PRIMARY KEY DEFAULT nextval('seq_semantic_model_role_permission_id'),
+                semantic_model_id INTEGER NOT NULL,
+                role_name VARCHAR NOT NULL,
+                model_permission VARCHAR,
+                table_name VARCHAR NOT NULL,
+                filter_expression TEXT,
+                created_at TIMESTAMP DEFAULT now(),
+                FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
+            )
+        """)
+
         # AHORA SÍ: Limpiar datos antiguos de este modelo (después de crear las tablas)
         connection.execute("DELETE FROM semantic_model_measure WHERE semantic_model_id = ?", [semantic_model_id])
         connection.execute("DELETE FROM semantic_model_column WHERE semantic_model_id = ?", [semantic_model_id])
         connection.execute("DELETE FROM semantic_model_table WHERE semantic_model_id = ?", [semantic_model_id])
         connection.execute("DELETE FROM semantic_model_relationship WHERE semantic_model_id = ?", [semantic_model_id])
         connection.execute("DELETE FROM semantic_model_table_bins WHERE semantic_model_id = ?", [semantic_model_id])
+        connection.execute("DELETE FROM semantic_model_calculation_item WHERE semantic_model_id = ?", [semantic_model_id])
+        connection.execute("DELETE FROM semantic_model_role_permission WHERE semantic_model_id = ?", [semantic_model_id])
         
         # Insertar tablas, columnas y medidas
         for table in self.tables:
@@ -1959,8 +2228,8 @@ class SemanticModel:
             # Insertar columnas
             for column in table.columns:
                 connection.execute("""
-                    INSERT INTO semantic_model_column (semantic_model_id, table_name, column_name, data_type, summarize_by, is_hidden, format_string, sort_by_column)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    INSERT INTO semantic_model_column (semantic_model_id, table_name, column_name, data_type, summarize_by, is_hidden, format_string, sort_by_column, is_calculated, expression)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 """, [
                     semantic_model_id,
                     table.name,
@@ -1969,7 +2238,9 @@ class SemanticModel:
                     column.summarize_by,
                     column.is_hidden,
                     column.format_string,
-                    column.sort_by_column
+                    column.sort_by_column,
+                    column.is_calculated,
+                    column.expression or None
                 ])
             
             # Insertar medidas
@@ -1986,6 +2257,18 @@ class SemanticModel:
                     measure.is_hidden
                 ])
             
+            # Insertar items de grupo de cálculo
+            for item in table.calculation_items:
+                connection.execute("""
+                    INSERT INTO semantic_model_calculation_item (semantic_model_id, table_name, item_name, expression)
+                    VALUES (?, ?, ?, ?)
+                """, [
+                    semantic_model_id,
+                    table.name,
+                    item['name'],
+                    item['expression']
+                ])
+            
             # Insertar particiones (delegado a la clase Table)
             table.save_partitions_to_database(connection, semantic_model_id)
 
@@ -2005,6 +2288,20 @@ class SemanticModel:
                             link['bin_column'],
                         ])
         
+        # Insertar roles RLS (un registro por tablePermission)
+        for role in self.roles:
+            for table_name, filter_expression in role.table_permissions.items():
+                connection.execute("""
+                    INSERT INTO semantic_model_role_permission (semantic_model_id, role_name, model_permission, table_name, filter_expression)
+                    VALUES (?, ?, ?, ?, ?)
+                """, [
+                    semantic_model_id,
+                    role.name,
+                    role.model_permission,
+                    table_name,
+                    filter_expression
+                ])
+        
         # Insertar relaciones
         for relationship in self.relationships:
             if relationship.from_table is None or relationship.to_table is None:
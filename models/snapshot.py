@@ -0,0 +1,243 @@
+"""
+Snapshots compactos de modelos semánticos y reports en Parquet (vía DuckDB,
+sin pyarrow), con versión de esquema.
+
+- Modelo: una fila por fichero TMDL/JSON (``_render_files``). Se rehidrata
+  volcando los ficheros a una carpeta temporal y cargándolos con
+  ``load_from_directory``.
+- Report: filas columnares por tipo de registro (``report``, ``page``,
+  ``visual``, ``field``) con lo ya extraído: páginas, visuales, campos con
+  sus roles y configuración de filtros. Se rehidrata sin releer el report.
+
+A diferencia de pickle, cargar un snapshot no ejecuta código y no depende
+de la estructura interna de las clases; un cambio de formato incrementa
+``SNAPSHOT_SCHEMA_VERSION``.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+import json
+import os
+from pathlib import Path
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, List
+
+from .report import Filter, Page, Visual, clsReport
+
+if TYPE_CHECKING:
+    from .semantic_model import SemanticModel
+
+SNAPSHOT_SCHEMA_VERSION = 1
+
+_MODEL_COLUMNS = """
+    schema_version INTEGER, name VARCHAR, semantic_model_id VARCHAR,
+    workspace_id VARCHAR, rel_path VARCHAR, content VARCHAR
+"""
+_REPORT_COLUMNS = """
+    schema_version INTEGER, record_type VARCHAR, page_name VARCHAR,
+    visual_name VARCHAR, kind VARCHAR, ref VARCHAR, roles VARCHAR[], payload VARCHAR
+"""
+
+# Atributos de clsReport serializables tal cual en la fila 'report'
+_REPORT_ATTRIBUTES = (
+    'root_path', 'report_id', 'workspace_id', 'report_name', 'report_path', 'report_format',
+    'pages_path', 'schema', 'themeCollection', 'filterConfig', 'objects', 'publicCustomVisuals',
+    'resourcePackages', 'settings', 'slowDataSourceSettings', 'pageOrder', 'activePageName',
+    'SemanticModel', 'semantic_model_id', 'max_workers', 'stream_legacy', 'search_depth',
+)
+
+
+def _copy_to_parquet(conn, table: str, path: str) -> None:
+    escaped = str(path).replace("'", "''")
+    conn.execute(f"COPY {table} TO '{escaped}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+
+
+def _read_parquet(path: str, columns: str) -> List[tuple]:
+    import duckdb
+
+    conn = duckdb.connect()
+    try:
+        rows = conn.execute(f"SELECT {columns} FROM read_parquet(?)", [str(path)]).fetchall()
+    finally:
+        conn.close()
+    versions = {row[0] for row in rows}
+    if versions - {SNAPSHOT_SCHEMA_VERSION}:
+        raise ValueError(
+            f"Snapshot {path} con versión de esquema {sorted(versions)}; "
+            f"se esperaba {SNAPSHOT_SCHEMA_VERSION}"
+        )
+    return rows
+
+
+# ── Modelos semánticos ───────────────────────────────────────────
+
+
+def write_model_snapshot(model: 'SemanticModel', path: str) -> str:
+    """Guarda los ficheros del modelo en ``path`` (Parquet, una fila por fichero)."""
+    import duckdb
+
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"CREATE TABLE snapshot ({_MODEL_COLUMNS})")
+        conn.executemany(
+            "INSERT INTO snapshot VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                [SNAPSHOT_SCHEMA_VERSION, model.name,
+                 None if model.semantic_model_id is None else str(model.semantic_model_id),
+                 None if model.workspace_id is None else str(model.workspace_id), rel, content]
+                for rel, content in sorted(model._render_files().items())
+            ],
+        )
+        _copy_to_parquet(conn, 'snapshot', path)
+    finally:
+        conn.close()
+    return path
+
+
+def read_model_snapshot(path: str) -> 'SemanticModel':
+    """Rehidrata un ``SemanticModel`` desde un snapshot de ``write_model_snapshot``."""
+    from .semantic_model import SemanticModel
+
+    rows = _read_parquet(path, "schema_version, name, semantic_model_id, workspace_id, rel_path, content")
+    if not rows:
+        raise ValueError(f"Snapshot vacío: {path}")
+    _, name, semantic_model_id, workspace_id = rows[0][:4]
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = Path(tmp) / f"{name}.SemanticModel"
+        for *_, rel_path, content in rows:
+            file_path = model_dir / rel_path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_text(content, encoding='utf-8')
+        model = SemanticModel(str(model_dir), name=name,
+                              semantic_model_id=semantic_model_id, workspace_id=workspace_id)
+        model.load_from_directory(model_dir)
+    # Las rutas temporales ya no existen: el modelo se guarda con save_to_directory
+    model.base_path = None
+    return model
+
+
+# ── Reports ──────────────────────────────────────────────────────
+
+
+def _report_rows(report: clsReport) -> List[list]:
+    version = SNAPSHOT_SCHEMA_VERSION
+    header = {attr: getattr(report, attr, None) for attr in _REPORT_ATTRIBUTES}
+    rows = [[version, 'report', None, None, None, None, None, json.dumps(header, default=str)]]
+    for page in report.pages:
+        page_data = {
+            'name': page.name, 'displayName': page.displayName, 'displayOption': page.displayOption,
+            'height': page.height, 'width': page.width, 'pageBinding': page.pageBinding,
+            'objects': page.objects, 'visibility': page.visibility, 'filterConfig': page.filterConfig,
+        }
+        rows.append([version, 'page', page.name, None, None, None, None, json.dumps(page_data, default=str)])
+        for visual in page.visuals:
+            visual_data = {
+                'visual_path': visual.visual_path, 'visualType': visual.visualType, 'text': visual.text,
+                'navigationTarget': visual.navigationTarget, 'position': visual.position,
+                'filterConfig': visual.filterConfig, 'entity_alias_map': visual.entity_alias_map,
+                'variations_used': visual.variations_used,
+            }
+            rows.append([version, 'visual', page.name, visual.name, None, None, None,
+                         json.dumps(visual_data, default=str)])
+            for (kind, ref), roles in visual.field_roles.items():
+                rows.append([version, 'field', page.name, visual.name, kind, ref, sorted(roles), None])
+    return rows
+
+
+def write_report_snapshot(report: clsReport, path: str) -> str:
+    """Guarda páginas, visuales, campos (con roles) y filtros del report en ``path``."""
+    import duckdb
+
+    conn = duckdb.connect()
+    try:
+        conn.execute(f"CREATE TABLE snapshot ({_REPORT_COLUMNS})")
+        conn.executemany("INSERT INTO snapshot VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _report_rows(report))
+        _copy_to_parquet(conn, 'snapshot', path)
+    finally:
+        conn.close()
+    return path
+
+
+def _visual_from_snapshot(name: str, data: Dict[str, Any]) -> Visual:
+    visual = Visual.from_dict({
+        'name': name,
+        'visual': {'visualType': data.get('visualType')},
+        'position': data.get('position') or {},
+        'filterConfig': data.get('filterConfig') or {},
+    })
+    visual.visual_path = data.get('visual_path')
+    visual.text = data.get('text')
+    visual.navigationTarget = data.get('navigationTarget')
+    visual.entity_alias_map = data.get('entity_alias_map') or {}
+    visual.variations_used = [tuple(v) for v in data.get('variations_used') or ()]
+    # Los campos vienen de las filas 'field' (con sus roles), no de re-extraerlos
+    visual.columns_used, visual.measures_used, visual.field_roles = [], [], {}
+    return visual
+
+
+def read_report_snapshot(path: str) -> clsReport:
+    """Rehidrata un ``clsReport`` desde un snapshot de ``write_report_snapshot``."""
+    rows = _read_parquet(path, "schema_version, record_type, page_name, visual_name, kind, ref, roles, payload")
+    header = next((json.loads(r[7]) for r in rows if r[1] == 'report'), None)
+    if header is None:
+        raise ValueError(f"Snapshot sin cabecera de report: {path}")
+
+    report = clsReport.__new__(clsReport)
+    report.__dict__.update(header)
+    report._report_data = None
+    report._sections_streamed = False
+    report.allfilters = []
+    report.filterConfig = report.filterConfig or {}
+    report.allfilter_descriptions = report.extract_filter_descriptions(report.filterConfig)
+    report.filters = Filter.extract_from_config(report.filterConfig, filter_type="report")
+    report.pages = []
+
+    pages: Dict[str, Page] = {}
+    visuals: Dict[tuple, Visual] = {}
+    for _, record_type, page_name, visual_name, kind, ref, roles, payload in rows:
+        if record_type == 'page':
+            page = Page.from_dict(json.loads(payload))
+            pages[page_name] = page
+            report.pages.append(page)
+        elif record_type == 'visual':
+            visual = _visual_from_snapshot(visual_name, json.loads(payload))
+            visuals[(page_name, visual_name)] = visual
+            pages[page_name].visuals.append(visual)
+        elif record_type == 'field':
+            visual = visuals[(page_name, visual_name)]
+            visual.field_roles[(kind, ref)] = set(roles or ())
+            (visual.measures_used if kind == 'measure' else visual.columns_used).append(ref)
+    return report
+
+
+# ── Escritura en segundo plano ───────────────────────────────────
+
+
+class SnapshotWriter:
+    """
+    Escribe snapshots en un hilo aparte para no retrasar la importación.
+    ``wait()`` espera a que terminen y devuelve las rutas escritas.
+    """
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot")
+        self._futures: List[Future] = []
+
+    def submit_model(self, model: 'SemanticModel', file_name: str) -> None:
+        path = os.path.join(self.output_dir, f"{file_name}.parquet")
+        self._futures.append(self._pool.submit(write_model_snapshot, model, path))
+
+    def submit_report(self, report: clsReport, file_name: str) -> None:
+        path = os.path.join(self.output_dir, f"{file_name}.parquet")
+        self._futures.append(self._pool.submit(write_report_snapshot, report, path))
+
+    def wait(self) -> List[str]:
+        written = []
+        for future in self._futures:
+            try:
+                written.append(future.result())
+            except Exception as e:
+                print(f"⚠️ Error escribiendo snapshot: {e}")
+        self._pool.shutdown()
+        self._futures = []
+        return written
@@ -0,0 +1,286 @@
+"""
+Recomendador de modo de almacenamiento (Import / DirectQuery / Dual) por
+tabla, para submodelos generados a partir del uso de los reports.
+
+Combina la topología de relaciones (hechos en el lado "muchos", dimensiones
+en el lado "uno"), la frecuencia de uso en ``report_column_used`` /
+``report_measure_used`` y la huella estimada por ``MemoryEstimator``:
+
+- Hechos grandes y poco usados con origen plegable → DirectQuery.
+- Dimensiones relacionadas con tablas DirectQuery o Dual → Dual (evita
+  relaciones limitadas entre islas de almacenamiento).
+- El resto (dimensiones pequeñas, hechos muy consultados) → Import.
+"""
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
+import copy
+import re
+
+from .m_expression import MExpression
+from .memory_estimator import MemoryEstimator
+from .catalog_sql import MEASURE_TABLES, REPORT_MODEL_JOIN, has_measure_tables
+
+if TYPE_CHECKING:
+    from .semantic_model import SemanticModel
+    from .subset_plan import SubsetPlan
+
+_MODE_LINE = re.compile(r'^(\s*)mode:\s*(\w+)\s*$')
+
+
+class StorageModeAdvisor:
+    """
+    Propone ``mode:`` por tabla. ``table_usage`` es
+    ``{tabla: {'reports': n, 'visuals': n, 'usage_count': n}}``
+    (ver ``from_db``).
+    """
+
+    def __init__(
+        self,
+        model: 'SemanticModel',
+        estimator: Optional[MemoryEstimator] = None,
+        table_usage: Optional[Dict[str, Dict[str, int]]] = None,
+        large_fact_mb: float = 500.0,
+        large_fact_rows: int = 50_000_000,
+        rare_visuals: int = 3,
+    ):
+        self.model = model
+        self.estimator = estimator or MemoryEstimator()
+        self.table_usage = table_usage or {}
+        self.large_fact_mb = large_fact_mb
+        self.large_fact_rows = large_fact_rows
+        self.rare_visuals = rare_visuals
+
+    @classmethod
+    def from_db(
+        cls,
+        model: 'SemanticModel',
+        db_path: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+        **kwargs,
+    ) -> 'StorageModeAdvisor':
+        """
+        Carga el uso por tabla de los reports del modelo (por nombre o
+        referencia). Una medida cuenta para las tablas que lee (siguiendo sus
+        dependencias DAX), no para la tabla donde está definida; sin
+        dependencias guardadas se usa su tabla.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path, read_only=True)
+        try:
+            sm_id = model._resolve_db_model_id(conn, semantic_model_id)
+            if has_measure_tables(conn):
+                measure_tables = f"SELECT measure_name, table_name FROM ({MEASURE_TABLES}) WHERE semantic_model_id = ?"
+                params = [sm_id, sm_id]
+            else:
+                measure_tables = "SELECT NULL::VARCHAR AS measure_name, NULL::VARCHAR AS table_name WHERE FALSE"
+                params = [sm_id]
+            rows = conn.execute(f"""
+                WITH model_reports AS (
+                    SELECT report_id AS id FROM ({REPORT_MODEL_JOIN}) WHERE semantic_model_id = ?
+                ),
+                measure_tables AS ({measure_tables}),
+                usage AS (
+                    SELECT c.report_id, c.page_name, c.visual_name, c.table_name, c.usage_count
+                    FROM report_column_used c JOIN model_reports mr ON mr.id = c.report_id
+                    UNION ALL
+                    SELECT m.report_id, m.page_name, m.visual_name,
+                           COALESCE(mt.table_name, m.table_name), m.usage_count
+                    FROM report_measure_used m JOIN model_reports mr ON mr.id = m.report_id
+                    LEFT JOIN measure_tables mt ON mt.measure_name = m.measure_name
+                )
+                SELECT table_name,
+                       COUNT(DISTINCT report_id),
+                       COUNT(DISTINCT (report_id, page_name, visual_name)),
+                       SUM(COALESCE(usage_count, 1))
+                FROM usage
+                GROUP BY table_name
+            """, params).fetchall()
+        finally:
+            if _own_conn:
+                conn.close()
+        usage = {
+            tbl: {'reports': n_reports, 'visuals': n_visuals, 'usage_count': int(total or 0)}
+            for tbl, n_reports, n_visuals, total in rows
+        }
+        return cls(model, table_usage=usage, **kwargs)
+
+    # ── Análisis ──────────────────────────────────────────────────
+
+    @staticmethod
+    def current_mode(table) -> str:
+        for partition in table.partitions:
+            if partition.mode:
+                return partition.mode
+        return 'import'
+
+    @staticmethod
+    def is_foldable(table) -> bool:
+        """Alguna partición M consulta un origen que admite DirectQuery."""
+        for partition in table.partitions:
+            if partition.source_type != 'm':
+                continue
+            m_expression = MExpression.parse(partition.source_expression)
+            if m_expression and (m_expression.is_foldable_source() or m_expression.native_query_step() >= 0):
+                return True
+        return False
+
+    def advise(self, plan: Optional['SubsetPlan'] = None) -> List[Dict[str, Any]]:
+        """
+        Recomendación por tabla (del modelo o de las tablas de ``plan``):
+        ``{table, role, current_mode, proposed_mode, rows, estimated_mb,
+        reports, visuals, foldable, reason}``.
+        """
+        tables = {t.name: t for t in self.model.tables if plan is None or t.name in plan.tables}
+        relationships = [
+            r for r in (plan.relationships if plan is not None else self.model.relationships)
+            if r.from_table in tables and r.to_table in tables
+        ]
+        dimensions = {r.to_table for r in relationships}
+        facts = {r.from_table for r in relationships}
+        many_side: Dict[str, Set[str]] = {}  # dimensión → tablas del lado "muchos"
+        for rel in relationships:
+            many_side.setdefault(rel.to_table, set()).add(rel.from_table)
+        estimates = {
+            e['table']: e for e in self.estimator.estimate_model(
+                self.model, plan, dimensions={r.to_table for r in self.model.relationships}
+            )['tables']
+        }
+
+        advice: Dict[str, Dict[str, Any]] = {}
+        for name, table in tables.items():
+            usage = self.table_usage.get(name, {})
+            estimate = estimates.get(name, {'rows': 0, 'bytes': 0})
+            row = {
+                'table': name,
+                'role': 'dimension' if name in dimensions else ('fact' if name in facts else 'standalone'),
+                'current_mode': self.current_mode(table),
+                'proposed_mode': 'import',
+                'rows': estimate['rows'],
+                'estimated_mb': estimate['bytes'] / 1024 / 1024,
+                'reports': usage.get('reports', 0),
+                'visuals': usage.get('visuals', 0),
+                'foldable': self.is_foldable(table),
+                'reason': '',
+            }
+            if table.is_calculated or any(p.source_type == 'calculated' for p in table.partitions):
+                row['role'] = 'calculated'
+                row['reason'] = 'tabla calculada: solo Import'
+            elif not any(p.source_type == 'm' for p in table.partitions):
+                row['proposed_mode'] = row['current_mode']
+                row['reason'] = 'partición sin expresión M: se mantiene el modo actual'
+            elif row['role'] == 'fact':
+                large = row['estimated_mb'] >= self.large_fact_mb or row['rows'] >= self.large_fact_rows
+                rare = row['visuals'] <= self.rare_visuals
+                if large and rare and row['foldable']:
+                    row['proposed_mode'] = 'directQuery'
+                    row['reason'] = (f"hecho grande (~{row['estimated_mb']:.0f} MB) usado en "
+                                     f"{row['visuals']} visuales")
+                elif large and rare:
+                    row['reason'] = 'hecho grande y poco usado, pero el origen no admite DirectQuery'
+                elif large:
+                    row['reason'] = f"hecho grande pero muy consultado ({row['visuals']} visuales)"
+                else:
+                    row['reason'] = 'hecho pequeño'
+            else:
+                row['reason'] = 'dimensión pequeña' if row['role'] == 'dimension' else 'sin relaciones'
+            advice[name] = row
+
+        # Dimensiones (también en copo de nieve) de tablas DirectQuery/Dual → Dual
+        changed = True
+        while changed:
+            changed = False
+            for dim in dimensions:
+                row = advice[dim]
+                if row['role'] == 'calculated' or row['proposed_mode'] != 'import':
+                    continue
+                remote = sorted(t for t in many_side.get(dim, ())
+                                if advice[t]['proposed_mode'] in ('directQuery', 'dual'))
+                if not remote:
+                    continue
+                if row['foldable']:
+                    row['proposed_mode'] = 'dual'
+                    row['reason'] = f"dimensión de {', '.join(remote)} (evita relaciones limitadas)"
+                    changed = True
+                else:
+                    row['reason'] = (f"dimensión de {', '.join(remote)}, pero el origen no admite "
+                                     "Dual: la relación será limitada")
+
+        return sorted(advice.values(), key=lambda r: (r['proposed_mode'], -r['estimated_mb']))
+
+    # ── Aplicación ────────────────────────────────────────────────
+
+    @staticmethod
+    def apply(model: 'SemanticModel', advice: List[Dict[str, Any]]) -> List[str]:
+        """
+        Escribe el ``mode:`` propuesto en las particiones de ``model`` (p.ej.
+        el submodelo generado). Devuelve las tablas modificadas.
+        """
+        proposed = {
+            row['table']: row['proposed_mode'] for row in advice
+            if row['role'] != 'calculated' and row['proposed_mode'] != row['current_mode']
+        }
+        changed = []
+        for idx, table in enumerate(model.tables):
+            mode = proposed.get(table.name)
+            if not mode:
+                continue
+            # Copias: tablas y particiones pueden estar compartidas con el modelo fuente
+            table = copy.copy(table)
+            table.partitions = [copy.copy(p) for p in table.partitions]
+            for partition in table.partitions:
+                partition.mode = mode
+                partition.raw_content = StorageModeAdvisor._set_partition_modes(partition.raw_content, mode)
+            table.raw_content = StorageModeAdvisor._set_partition_modes(table.raw_content, mode)
+            model.tables[idx] = table
+            model._file_metadata['tables'].setdefault(table.name, {})['modified'] = True
+            changed.append(table.name)
+        return changed
+
+    @staticmethod
+    def _set_partition_modes(raw_content: str, mode: str) -> str:
+        """
+        Sustituye (o añade) ``mode:`` en cada bloque ``partition`` del TMDL.
+
+        La sangría de las propiedades se toma de la primera línea no vacía del
+        bloque (tabuladores o espacios, según el fichero); si el bloque está
+        vacío se usa la de la cabecera más un tabulador.
+        """
+        lines = raw_content.split('\n')
+        result = []
+        partition_indent = None
+        child_indent = None
+        for i, line in enumerate(lines):
+            stripped = line.strip()
+            leading = line[:len(line) - len(line.lstrip())]
+            if partition_indent is not None and stripped and len(leading) <= partition_indent:
+                partition_indent = None
+            if stripped.startswith('partition '):
+                # El modo va justo tras la cabecera; se descarta el anterior
+                partition_indent = len(leading)
+                child_indent = leading + '\t'
+                for following in lines[i + 1:]:
+                    if following.strip():
+                        following_leading = following[:len(following) - len(following.lstrip())]
+                        if len(following_leading) > partition_indent:
+                            child_indent = following_leading
+                        break
+                result.append(line)
+                result.append(f'{child_indent}mode: {mode}')
+                continue
+            if partition_indent is not None and leading == child_indent and _MODE_LINE.match(line):
+                continue
+            result.append(line)
+        return '\n'.join(result)
+
+
+def print_storage_advice(advice: List[Dict[str, Any]]) -> None:
+    """Tabla de recomendaciones en consola."""
+    print(f"\n  {'Tabla':<32} {'Rol':<10} {'Actual':<12} {'Propuesto':<12} {'MB':>8} {'Vis.':>5}  Motivo")
+    print(f"  {'-' * 110}")
+    for row in advice:
+        marker = '→' if row['proposed_mode'] != row['current_mode'] else ' '
+        print(f"  {row['table'][:32]:<32} {row['role']:<10} {row['current_mode']:<12} "
+              f"{marker}{row['proposed_mode']:<11} {row['estimated_mb']:>8.1f} {row['visuals']:>5}  {row['reason']}")
@@ -0,0 +1,660 @@
+"""
+Planificación de submodelos a partir del catálogo DuckDB.
+
+Separa el *cálculo* de qué tablas, columnas, medidas y relaciones necesita un
+submodelo (``SubsetIndex.plan`` → ``SubsetPlan``) de su *materialización*
+(``SemanticModel.materialize_subset``), de forma que la planificación se hace
+solo en memoria y puede repetirse al instante (previsualizaciones, lotes).
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
+
+from .relationship import Relationship
+from .catalog_sql import REPORT_MODEL_JOIN
+
+if TYPE_CHECKING:
+    from .semantic_model import SemanticModel
+
+# (dependency_type, referenced_name, referenced_table)
+DependencyRef = Tuple[str, str, Optional[str]]
+# (from_table, from_column, to_table, to_column)
+RelationshipKey = Tuple[str, str, str, str]
+# (tabla, columna, variation) de una jerarquía de fecha automática
+VariationRef = Tuple[str, str, str]
+
+
+class SubsetPlan:
+    """
+    Resultado de planificar un submodelo: qué conservar y por qué.
+
+    ``columns`` solo tiene entrada para las tablas que se filtran; una tabla
+    incluida sin entrada se copia entera (igual que ``measures``).
+    """
+
+    def __init__(self):
+        self.semantic_model_id: Optional[int] = None
+        self.report_tables: Set[str] = set()
+        self.tables: Set[str] = set()
+        self.columns: Dict[str, Set[str]] = {}
+        self.measures: Dict[str, Set[str]] = {}
+        self.relationships: List[Relationship] = []
+        self.used_measures: Set[str] = set()
+        self.chained_measures: Set[str] = set()
+        # Jerarquías de fecha automáticas usadas: (tabla, columna, variation)
+        self.used_variations: Set[VariationRef] = set()
+        # Motivo de cada elemento añadido por dependencias (para logging)
+        self.log: List[str] = []
+
+    @property
+    def dax_tables(self) -> Set[str]:
+        """Tablas añadidas por dependencias (DAX, relaciones, bins...)."""
+        return self.tables - self.report_tables
+
+    def to_config(self, subset_name: str, base_model: str) -> dict:
+        """Configuración JSON equivalente a la que guarda ``create_subset_model_from_db``."""
+        return {
+            "name": subset_name,
+            "base_model": base_model,
+            "method": "from_db",
+            "report_tables": sorted(self.report_tables),
+            "dax_extra_tables": sorted(self.dax_tables),
+            "included_tables": sorted(self.tables),
+            "total_tables": len(self.tables),
+            "total_relationships": len(self.relationships),
+            "used_measures": sorted(self.used_measures),
+            "chained_measures": sorted(self.chained_measures),
+        }
+
+    def describe_tables(self, model: 'SemanticModel') -> List[Dict]:
+        """
+        Resumen por tabla (columnas/medidas conservadas frente al original)
+        sin materializar el submodelo.
+        """
+        rows = []
+        for table in sorted(model.tables, key=lambda t: t.name):
+            if table.name not in self.tables:
+                continue
+            cols = self.columns.get(table.name)
+            meas = self.measures.get(table.name)
+            total_cols = len(table.columns)
+            total_meas = len(table.measures)
+            rows.append({
+                "table": table.name,
+                "source": "report" if table.name in self.report_tables else "dax-dep",
+                "columns": total_cols if cols is None else len(cols & {c.name for c in table.columns}),
+                "total_columns": total_cols,
+                "measures": total_meas if meas is None else len(meas & {m.name for m in table.measures}),
+                "total_measures": total_meas,
+            })
+        return rows
+
+
+class SubsetIndex:
+    """
+    Estructuras pre-indexadas de un modelo para planificar submodelos.
+
+    Se construye una vez (``from_db``) con todas las dependencias del modelo
+    y después ``plan`` resuelve cualquier combinación de columnas/medidas
+    usadas sin volver a consultar la BD.
+    """
+
+    def __init__(self, model: 'SemanticModel'):
+        self.model = model
+        self.semantic_model_id: Optional[int] = None
+
+        # Uso de todos los reports asociados al modelo
+        self.used_columns: Dict[str, Set[str]] = {}
+        self.used_measures: Dict[str, Set[str]] = {}
+        self.used_variations: Set[VariationRef] = set()
+
+        # Índices del modelo en memoria
+        self.measure_home: Dict[str, str] = {
+            m.name: t.name for t in model.tables for m in t.measures
+        }
+        self.table_columns: Dict[str, Set[str]] = {
+            t.name: {c.name for c in t.columns} for t in model.tables
+        }
+        self.sort_by: Dict[str, Dict[str, str]] = {}
+        for t in model.tables:
+            edges = {c.name: c.sort_by_column for c in t.columns if c.sort_by_column}
+            if edges:
+                self.sort_by[t.name] = edges
+        self.relationship_objects: Dict[RelationshipKey, Relationship] = {
+            (r.from_table, r.from_column, r.to_table, r.to_column): r
+            for r in model.relationships
+        }
+        self.relationship_keys: List[RelationshipKey] = list(self.relationship_objects)
+        # (tabla, columna, variation) → LocalDateTable de la jerarquía automática
+        self.variation_targets: Dict[VariationRef, str] = model.auto_date_variation_targets()
+
+        # Dependencias desde la BD
+        self.measure_deps: Dict[str, List[DependencyRef]] = {}
+        self.calc_table_deps: Dict[str, List[DependencyRef]] = {}
+        self.expr_deps: Dict[Tuple[str, str, str], List[DependencyRef]] = {}
+        # (tabla, columna) → [(tabla, columna)] en ambos sentidos fuente ↔ bin
+        self.bin_sources: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        self.bin_targets: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+        # Uso por report como bitmap: bit → ('column'|'measure', tabla, nombre)
+        self.usage_objects: Dict[int, Tuple[str, str, str]] = {}
+        self.report_usage: Dict[str, int] = {}
+        self.report_variations: Dict[str, Set[VariationRef]] = {}
+
+    @classmethod
+    def from_db(
+        cls,
+        model: 'SemanticModel',
+        db_path: Optional[str] = None,
+        semantic_model_id: Optional[int] = None,
+        conn=None,
+    ) -> 'SubsetIndex':
+        """
+        Carga en una sola conexión el uso de reports y todas las dependencias
+        (medidas, tablas calculadas, expresiones, relaciones y bins) del modelo.
+        """
+        import duckdb
+
+        _own_conn = conn is None
+        if _own_conn:
+            conn = duckdb.connect(db_path, read_only=True)
+        index = cls(model)
+        try:
+            sm_id = model._resolve_db_model_id(conn, semantic_model_id)
+            index.semantic_model_id = sm_id
+
+            for tbl, col in conn.execute(f"""
+                SELECT DISTINCT c.table_name, c.column_name
+                FROM report_column_used c
+                JOIN ({REPORT_MODEL_JOIN}) mr ON mr.report_id = c.report_id
+                WHERE mr.semantic_model_id = ?
+            """, [sm_id]).fetchall():
+                index.used_columns.setdefault(tbl, set()).add(col)
+
+            for tbl, meas in conn.execute(f"""
+                SELECT DISTINCT m.table_name, m.measure_name
+                FROM report_measure_used m
+                JOIN ({REPORT_MODEL_JOIN}) mr ON mr.report_id = m.report_id
+                WHERE mr.semantic_model_id = ?
+            """, [sm_id]).fetchall():
+                index.used_measures.setdefault(tbl, set()).add(meas)
+
+            index.used_variations = {
+                v for variations in index._load_report_variations(conn).values() for v in variations
+            }
+
+            # Cierre transitivo ya resuelto por DaxTokenizer.save_dependencies_to_db
+            for meas, dep_type, ref_name, ref_tbl in conn.execute("""
+                SELECT DISTINCT measure_name, dependency_type, referenced_name, referenced_table
+                FROM semantic_model_measure_dependencies
+                WHERE semantic_model_id = ?
+            """, [sm_id]).fetchall():
+                index.measure_deps.setdefault(meas, []).append((dep_type, ref_name, ref_tbl))
+
+            try:
+                for calc_tbl, dep_type, ref_name, ref_tbl in conn.execute("""
+                    SELECT calculated_table_name, dependency_type, referenced_name, referenced_table
+                    FROM semantic_model_calculatedTable_dependencies
+                    WHERE semantic_model_id = ?
+                """, [sm_id]).fetchall():
+                    index.calc_table_deps.setdefault(calc_tbl, []).append((dep_type, ref_name, ref_tbl))
+            except Exception:
+                pass  # La tabla puede no existir en DBs antiguas
+
+            try:
+                for kind, src_tbl, src_name, dep_type, ref_name, ref_tbl in conn.execute(
+                    "SELECT source_kind, source_table, source_name, dependency_type, "
+                    "       referenced_name, referenced_table "
+                    "FROM semantic_model_expression_dependencies WHERE semantic_model_id = ?",
+                    [sm_id],
+                ).fetchall():
+                    index.expr_deps.setdefault((kind, src_tbl, src_name), []).append(
+                        (dep_type, ref_name, ref_tbl)
+                    )
+            except Exception:
+                pass  # La tabla puede no existir en DBs antiguas
+
+            rel_rows = conn.execute(
+                "SELECT from_table, from_column, to_table, to_column "
+                "FROM semantic_model_relationship WHERE semantic_model_id = ?",
+                [sm_id],
+            ).fetchall()
+            if rel_rows:
+                index.relationship_keys = [tuple(r) for r in rel_rows]
+
+            try:
+                bin_rows = conn.execute(
+                    "SELECT table_name, source_column, bin_table, bin_column "
+                    "FROM semantic_model_table_bins WHERE semantic_model_id = ?",
+                    [sm_id],
+                ).fetchall()
+            except Exception:
+                bin_rows = []
+            for src_table, src_col, bin_table, bin_col in bin_rows:
+                index.bin_targets.setdefault((src_table, src_col), []).append((bin_table, bin_col))
+                index.bin_sources.setdefault((bin_table, bin_col), []).append((src_table, src_col))
+        finally:
+            if _own_conn:
+                conn.close()
+        return index
+
+    def load_report_usage(self, conn) -> Dict[str, int]:
+        """
+        Carga el uso de columnas y medidas de cada report del modelo (por
+        nombre o por ``semantic_model_reference``) como un bitmap por report
+        sobre ``usage_objects``.
+
+        Usa los bitsets guardados en ``semantic_model_report_usage`` (bit =
+        ``object_id`` de ``semantic_model_object``, ver
+        ``DaxTokenizer.save_report_usage_to_db``); si la BD no los tiene, los
+        calcula en memoria con una sola consulta.
+        """
+        try:
+            stored = conn.execute(
+                "SELECT report_name, usage_bits FROM semantic_model_report_usage "
+                "WHERE semantic_model_id = ?",
+                [self.semantic_model_id],
+            ).fetchall()
+        except Exception:
+            stored = []  # La tabla puede no existir en DBs antiguas
+
+        self.report_usage = {}
+        self.report_variations = self._load_report_variations(conn)
+        if stored:
+            self.usage_objects = {
+                oid: (kind, tbl, name)
+                for oid, kind, tbl, name in conn.execute(
+                    "SELECT object_id, CAST(object_kind AS VARCHAR), table_name, object_name "
+                    "FROM semantic_model_object WHERE semantic_model_id = ?",
+                    [self.semantic_model_id],
+                ).fetchall()
+            }
+            for report_name, usage_bits in stored:
+                bits = int.from_bytes(usage_bits, "little")
+                self.report_usage[report_name] = self.report_usage.get(report_name, 0) | bits
+            return self.report_usage
+
+        rows = conn.execute(f"""
+            WITH model_reports AS (
+                SELECT report_id AS id, report_name AS name
+                FROM ({REPORT_MODEL_JOIN}) WHERE semantic_model_id = ?
+            )
+            SELECT mr.name, 'column' AS kind, c.table_name, c.column_name
+            FROM report_column_used c JOIN model_reports mr ON mr.id = c.report_id
+            UNION
+            SELECT mr.name, 'measure' AS kind, m.table_name, m.measure_name
+            FROM report_measure_used m JOIN model_reports mr ON mr.id = m.report_id
+        """, [self.semantic_model_id]).fetchall()
+
+        self.usage_objects = {}
+        usage_bit: Dict[Tuple[str, str, str], int] = {}
+        for report_name, kind, tbl, name in rows:
+            key = (kind, tbl, name)
+            bit = usage_bit.get(key)
+            if bit is None:
+                bit = len(usage_bit)
+                usage_bit[key] = bit
+                self.usage_objects[bit] = key
+            self.report_usage[report_name] = self.report_usage.get(report_name, 0) | (1 << bit)
+        return self.report_usage
+
+    def _load_report_variations(self, conn) -> Dict[str, Set[VariationRef]]:
+        """Jerarquías de fecha automáticas usadas por cada report del modelo."""
+        try:
+            rows = conn.execute(f"""
+                SELECT DISTINCT mr.report_name, v.table_name, v.column_name, v.variation_name
+                FROM report_variation_used v
+                JOIN ({REPORT_MODEL_JOIN}) mr ON mr.report_id = v.report_id
+                WHERE mr.semantic_model_id = ?
+            """, [self.semantic_model_id]).fetchall()
+        except Exception:
+            rows = []  # La tabla puede no existir en DBs antiguas
+        variations: Dict[str, Set[VariationRef]] = {}
+        for report_name, tbl, col, variation in rows:
+            variations.setdefault(report_name, set()).add((tbl, col, variation))
+        return variations
+
+    @staticmethod
+    def _report_key(report_name: str) -> str:
+        """Acepta tanto 'Ventas' como la carpeta 'Ventas.Report'."""
+        return report_name[:-len('.Report')] if report_name.endswith('.Report') else report_name
+
+    def plan_for_reports(self, report_names: List[str]) -> SubsetPlan:
+        """
+        Plan del submodelo que necesitan solo ``report_names`` (requiere
+        ``load_report_usage``): une sus bitmaps y planifica una vez.
+        """
+        bits = 0
+        variations: Set[VariationRef] = set()
+        found = []
+        for report_name in report_names:
+            key = self._report_key(report_name)
+            if key not in self.report_usage:
+                print(f"  ⚠️ Report sin uso registrado en la BD: {report_name}")
+                continue
+            bits |= self.report_usage[key]
+            variations |= self.report_variations.get(key, set())
+            found.append(key)
+        if not found:
+            raise ValueError(
+                f"Ninguno de los reports indicados usa este modelo: {', '.join(report_names)}"
+            )
+        return self.plan(*self.usage_from_bits(bits), used_variations=variations)
+
+    def usage_from_bits(self, bits: int) -> Tuple[Dict[str, Set[str]], Dict[str, Set[str]]]:
+        """Decodifica un bitmap de uso a ``(used_columns, used_measures)``."""
+        used_columns: Dict[str, Set[str]] = {}
+        used_measures: Dict[str, Set[str]] = {}
+        while bits:
+            low = bits & -bits
+            kind, tbl, name = self.usage_objects[low.bit_length() - 1]
+            target = used_columns if kind == 'column' else used_measures
+            target.setdefault(tbl, set()).add(name)
+            bits ^= low
+        return used_columns, used_measures
+
+    def plan_reports(self, report_names: Optional[List[str]] = None) -> Dict[str, SubsetPlan]:
+        """
+        Plan por report (requiere ``load_report_usage``). Los reports con el
+        mismo uso (bitmap y jerarquías de fecha) comparten plan.
+        """
+        plans_by_usage: Dict[Tuple[int, frozenset], SubsetPlan] = {}
+        plans: Dict[str, SubsetPlan] = {}
+        for report_name in report_names or sorted(self.report_usage):
+            report_name = self._report_key(report_name)
+            bits = self.report_usage.get(report_name)
+            if bits is None:
+                print(f"  ⚠️ Report sin uso registrado en la BD: {report_name}")
+                continue
+            variations = frozenset(self.report_variations.get(report_name, ()))
+            if (bits, variations) not in plans_by_usage:
+                plans_by_usage[(bits, variations)] = self.plan(
+                    *self.usage_from_bits(bits), used_variations=set(variations)
+                )
+            plans[report_name] = plans_by_usage[(bits, variations)]
+        return plans
+
+    def plan(
+        self,
+        used_columns: Optional[Dict[str, Set[str]]] = None,
+        used_measures: Optional[Dict[str, Set[str]]] = None,
+        used_variations: Optional[Set[VariationRef]] = None,
+    ) -> SubsetPlan:
+        """
+        Calcula el submodelo mínimo para el uso indicado (por defecto, el de
+        todos los reports del modelo) en un único bucle de punto fijo:
+        dependencias de medidas, tablas calculadas, columnas calculadas /
+        grupos de cálculo / RLS, relaciones, sortByColumn y bins. Las
+        jerarquías de fecha automáticas usadas (``used_variations``) añaden
+        su LocalDateTable.
+        """
+        if used_variations is None:
+            used_variations = self.used_variations if used_columns is None else set()
+        if used_columns is None:
+            used_columns = self.used_columns
+        if used_measures is None:
+            used_measures = self.used_measures
+
+        plan = SubsetPlan()
+        plan.semantic_model_id = self.semantic_model_id
+        plan.report_tables = set(used_columns) | set(used_measures)
+        plan.tables = set(plan.report_tables)
+        plan.columns = {t: set(cols) for t, cols in used_columns.items()}
+        plan.measures = {t: set(meas) for t, meas in used_measures.items()}
+        for meas in used_measures.values():
+            plan.used_measures |= meas
+
+        tables = plan.tables
+        columns = plan.columns
+        log = plan.log
+
+        def add_table(tbl: str, reason: str) -> bool:
+            if tbl in tables:
+                return False
+            tables.add(tbl)
+            log.append(f"[{reason}] añadida tabla '{tbl}'")
+            return True
+
+        def add_column(tbl: str, col: str) -> bool:
+            cols = columns.setdefault(tbl, set())
+            if col in cols:
+                return False
+            cols.add(col)
+            return True
+
+        def add_measure(name: str, tbl: Optional[str]) -> bool:
+            tbl = self.measure_home.get(name) or tbl
+            if not tbl:
+                return False
+            meas = plan.measures.setdefault(tbl, set())
+            if name in meas:
+                return False
+            meas.add(name)
+            if name not in plan.used_measures:
+                plan.chained_measures.add(name)
+            tables.add(tbl)
+            return True
+
+        def apply_deps(deps: List[DependencyRef], reason: str) -> bool:
+            added = False
+            for dep_type, ref_name, ref_tbl in deps:
+                if dep_type == 'table':
+                    added |= add_table(ref_name, reason)
+                elif dep_type == 'column':
+                    if ref_tbl:
+                        added |= add_table(ref_tbl, reason)
+                        added |= add_column(ref_tbl, ref_name)
+                elif dep_type == 'measure':
+                    added |= add_measure(ref_name, ref_tbl)
+            return added
+
+        # Jerarquías de fecha automáticas: la columna base ya está en el uso;
+        # su LocalDateTable (y la relación, por el bucle) también hace falta
+        for variation in sorted(used_variations):
+            target = self.variation_targets.get(variation)
+            if target and variation[0] in tables:
+                plan.used_variations.add(variation)
+                add_table(target, f"AutoDateHierarchy {variation[0]}.'{variation[1]}'")
+
+        done_measures: Set[str] = set()
+        done_calc_tables: Set[str] = set()
+        done_exprs: Set[Tuple[str, str, str]] = set()
+        done_relationships: Set[RelationshipKey] = set()
+
+        changed = True
+        while changed:
+            changed = False
+
+            # Medidas incluidas → sus dependencias (cierre ya transitivo)
+            for tbl in list(plan.measures):
+                for name in list(plan.measures[tbl]):
+                    if name not in done_measures:
+                        done_measures.add(name)
+                        changed |= apply_deps(self.measure_deps.get(name, []), 'Measure')
+
+            # Tablas calculadas incluidas → tablas/columnas que referencian
+            for tbl in list(tables - done_calc_tables):
+                done_calc_tables.add(tbl)
+                changed |= apply_deps(self.calc_table_deps.get(tbl, []), 'CalcTable')
+
+            # Columnas calculadas conservadas, grupos de cálculo y RLS
+            for key, deps in self.expr_deps.items():
+                kind, src_tbl, src_name = key
+                if key in done_exprs or src_tbl not in tables:
+                    continue
+                if kind == 'calculated_column':
+                    kept = columns.get(src_tbl)
+                    # Sin filtro de columnas la tabla se copia entera
+                    if kept is not None and src_name not in kept:
+                        continue
+                done_exprs.add(key)
+                changed |= apply_deps(deps, f"{kind} {src_tbl}.'{src_name}'")
+
+            # Relaciones con ambas tablas incluidas → columnas clave
+            for key in self.relationship_keys:
+                from_tbl, from_col, to_tbl, to_col = key
+                if key in done_relationships or from_tbl not in tables or to_tbl not in tables:
+                    continue
+                done_relationships.add(key)
+                changed |= add_column(from_tbl, from_col)
+                changed |= add_column(to_tbl, to_col)
+
+            # sortByColumn de columnas incluidas
+            for tbl, edges in self.sort_by.items():
+                if tbl not in columns:
+                    continue
+                for col in list(columns[tbl]):
+                    sort_col = edges.get(col)
+                    if not sort_col or sort_col in columns[tbl]:
+                        continue
+                    if sort_col not in self.table_columns.get(tbl, set()):
+                        log.append(f"[SortByColumn] ⚠️ {tbl}.'{col}' → '{sort_col}' NO EXISTE EN TABLA (ignorado)")
+                        continue
+                    columns[tbl].add(sort_col)
+                    log.append(f"[SortByColumn] {tbl}.'{col}' → añadida '{sort_col}'")
+                    changed = True
+
+            # Bins/grupos (__PBI_SemanticLinks): fuente ↔ bin
+            for tbl in list(columns):
+                for col in list(columns[tbl]):
+                    for bin_tbl, bin_col in self.bin_targets.get((tbl, col), []):
+                        if bin_tbl in tables and add_column(bin_tbl, bin_col):
+                            log.append(f"[Bin] {tbl}.'{col}' → bin añadido '{bin_tbl}'.'{bin_col}'")
+                            changed = True
+                    for src_tbl, src_col in self.bin_sources.get((tbl, col), []):
+                        tables.add(src_tbl)
+                        if add_column(src_tbl, src_col):
+                            log.append(f"[Bin] '{tbl}'.'{col}' → fuente añadida '{src_tbl}'.'{src_col}'")
+                            changed = True
+
+        plan.relationships = [
+            self.relationship_objects[key]
+            for key in self.relationship_keys
+            if key in done_relationships and key in self.relationship_objects
+        ]
+        return plan
+
+
+# ──────────────────────────────────────────────────────────────
+# Generación por lotes: un submodelo mínimo por report
+# ──────────────────────────────────────────────────────────────
+
+_WORKER_MODEL: Optional['SemanticModel'] = None
+
+
+def _directory_size(path: Path) -> int:
+    return sum(f.stat().st_size for f in Path(path).rglob('*') if f.is_file())
+
+
+def _init_subset_worker(model_dir: str) -> None:
+    """Carga el modelo fuente una vez por proceso."""
+    global _WORKER_MODEL
+    from .semantic_model import SemanticModel
+
+    _WORKER_MODEL = SemanticModel(model_dir)
+    _WORKER_MODEL.load_from_directory(Path(model_dir))
+
+
+def _materialize_subset_job(
+    report_name: str, plan: SubsetPlan, subset_name: str, create_pbip: bool
+) -> Dict[str, Any]:
+    """Materializa y guarda un submodelo; devuelve su fila de resumen."""
+    model = _WORKER_MODEL
+    # El scaffold del report solo se crea la primera vez
+    report_dir = model.base_path.parent / f"{subset_name.replace('.SemanticModel', '')}.Report"
+    subset = model.materialize_subset(
+        plan, subset_name, create_pbip=create_pbip and not report_dir.exists()
+    )
+    changes = subset.save_to_directory_incremental(subset.base_path)
+    return {
+        "report": report_name,
+        "subset": subset_name,
+        "tables": len(subset.tables),
+        "columns": sum(len(t.columns) for t in subset.tables),
+        "measures": sum(len(t.measures) for t in subset.tables),
+        "relationships": len(subset.relationships),
+        "bytes": _directory_size(subset.base_path / "definition"),
+        "files_written": len(changes["written"]),
+        "files_removed": len(changes["removed"]),
+    }
+
+
+def generate_report_subsets(
+    model_dir: str,
+    db_path: str,
+    semantic_model_id: Optional[int] = None,
+    report_names: Optional[List[str]] = None,
+    suffix: str = "_minimal",
+    workers: Optional[int] = None,
+    create_pbip: bool = True,
+) -> List[Dict[str, Any]]:
+    """
+    Genera un submodelo mínimo por cada report del modelo.
+
+    El modelo fuente y sus dependencias se cargan una vez, el uso de todos
+    los reports se lee en una sola consulta y los planes se calculan en
+    memoria; la escritura de los submodelos se reparte entre ``workers``
+    procesos (1 = en el proceso actual).
+
+    Returns:
+        Una fila por submodelo con su tamaño y reducción frente al original.
+    """
+    import duckdb
+    from .semantic_model import SemanticModel
+
+    global _WORKER_MODEL
+    model = SemanticModel(model_dir)
+    model.load_from_directory(Path(model_dir))
+
+    conn = duckdb.connect(db_path, read_only=True)
+    try:
+        index = SubsetIndex.from_db(model, semantic_model_id=semantic_model_id, conn=conn)
+        index.load_report_usage(conn)
+    finally:
+        conn.close()
+    plans = index.plan_reports(report_names)
+    print(f"📋 {len(plans)} reports, "
+          f"{len({id(p) for p in plans.values()})} planes distintos")
+
+    source = {
+        "tables": len(model.tables),
+        "columns": sum(len(t.columns) for t in model.tables),
+        "measures": sum(len(t.measures) for t in model.tables),
+        "bytes": _directory_size(Path(model_dir) / "definition"),
+    }
+    jobs = [
+        (report_name, plan, f"{report_name}{suffix}.SemanticModel", create_pbip)
+        for report_name, plan in plans.items()
+    ]
+
+    results: List[Dict[str, Any]] = []
+    if workers == 1 or len(jobs) <= 1:
+        _WORKER_MODEL = model
+        results = [_materialize_subset_job(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_subset_worker, initargs=(model_dir,)
+        ) as pool:
+            futures = [pool.submit(_materialize_subset_job, *job) for job in jobs]
+            results = [f.result() for f in futures]
+
+    for row in results:
+        for key in ("tables", "columns", "measures", "bytes"):
+            total = source[key]
+            row[f"{key}_reduction_pct"] = round(100 * (1 - row[key] / total), 1) if total else 0.0
+    print_subset_summary(results, source)
+    return results
+
+
+def print_subset_summary(results: List[Dict[str, Any]], source: Dict[str, int]) -> None:
+    """Imprime la tabla resumen de reducción por submodelo."""
+    print(f"\n{'='*105}")
+    print(f"{'Report':40} {'Tablas':>10} {'Columnas':>12} {'Medidas':>12} {'KB':>10} {'Reducción':>9} {'Cambios':>8}")
+    print(f"{'(original)':40} {source['tables']:>10} {source['columns']:>12} "
+          f"{source['measures']:>12} {source['bytes'] / 1024:>10.1f}")
+    print(f"{'-'*105}")
+    for row in sorted(results, key=lambda r: r["report"]):
+        print(f"{row['report'][:40]:40} {row['tables']:>10} {row['columns']:>12} "
+              f"{row['measures']:>12} {row['bytes'] / 1024:>10.1f} {row['bytes_reduction_pct']:>8.1f}% "
+              f"{row['files_written'] + row['files_removed']:>8}")
+    print(f"{'='*105}\n")
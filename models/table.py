@@ -1,8 +1,27 @@
 from pathlib import Path
 from typing import List, Optional, Dict, Any, Set, Literal
 from .tmdl_parser import TmdlParser
+from .m_expression import MExpression
+import copy
 import re 
 
+# Nombre de columna en la cabecera ``column ...``: 'simple', "doble" o sin comillas
+_COLUMN_NAME = re.compile(r"""^\s*column\s+(?:'((?:[^']|'')+)'|"((?:[^"]|"")+)"|([^'"=\s]+))""")
+
+
+def column_header_name(line: str) -> Optional[str]:
+    """Nombre de la columna de una línea ``column ...`` del TMDL (sin comillas)."""
+    match = _COLUMN_NAME.match(line)
+    if not match:
+        return None
+    single, double, bare = match.groups()
+    if single is not None:
+        return single.replace("''", "'")
+    if double is not None:
+        return double.replace('""', '"')
+    return bare
+
+
 class Column:
     """Representa una columna de una tabla"""
     
@@ -14,6 +33,9 @@ class Column:
         self.summarize_by: Optional[str] = None
         self.sort_by_column: Optional[str] = None
         self.is_hidden: bool = False
+        # Columnas calculadas: ``column X = <DAX>``
+        self.is_calculated: bool = False
+        self.expression: str = ""
         self.raw_content: str = ""
         # Lista de dicts con {bin_table, bin_column} extraídos de __PBI_SemanticLinks
         self.semantic_links: List[Dict[str, str]] = []
@@ -49,6 +71,8 @@ class Table:
         self.measures: List[Measure] = []
         self.partitions: List[Partition] = []
         self.hierarchies: List[Dict] = []
+        # Grupos de cálculo: [{name, expression}] de cada calculationItem
+        self.calculation_items: List[Dict[str, str]] = []
         self.is_hidden: bool = False
         self.is_calculated: bool = False
         self.source_code: Optional[str] = None
@@ -59,11 +83,15 @@ class Table:
     @classmethod
     def from_file(cls, filepath: Path) -> 'Table':
         """Carga una tabla desde un archivo .tmdl"""
-        instance = cls()
-        instance.name = filepath.stem
-        
         with open(filepath, 'r', encoding='utf-8') as f:
-            instance.raw_content = f.read()
+            return cls.from_content(filepath.stem, f.read())
+
+    @classmethod
+    def from_content(cls, name: str, raw_content: str) -> 'Table':
+        """Crea una tabla a partir de su contenido TMDL (p.ej. una tabla generada)."""
+        instance = cls()
+        instance.name = name
+        instance.raw_content = raw_content
         
         parser = TmdlParser(instance.raw_content)
         instance.is_hidden = parser.get_property('isHidden', False)
@@ -78,6 +106,9 @@ class Table:
         
         # Parsear particiones embebidas
         instance.partitions = cls._parse_partitions(instance.raw_content)
+
+        # Parsear items de grupo de cálculo (si los hay)
+        instance.calculation_items = cls._parse_calculation_items(instance.raw_content)
         
         # Detectar si es tabla calculada y extraer código DAX
         for partition in instance.partitions:
@@ -105,6 +136,8 @@ class Table:
             col.summarize_by = parser.get_property('summarizeBy')
             col.sort_by_column = parser.get_property('sortByColumn')
             col.is_hidden = parser.get_property('isHidden', False)
+            col.expression = parser.get_header_expression()
+            col.is_calculated = bool(col.expression)
             # Parsear __PBI_SemanticLinks (bins/grupos generados desde esta columna)
             import json as _json
             for raw_line in col_lines:
@@ -130,16 +163,12 @@ class Table:
                     columns.append(current_column)
                 
                 current_column = Column()
-                # Extraer nombre de la columna (solo hasta el primer =, espacio o comilla)
-                # Soporta: column MesKey, column 'Name With Spaces', column "QuotedName"
-                match = re.match(r"^\s*column\s+(['\"])?([^'\"=\s]+)\1?", line)
-                if match:
-                    current_column.name = match.group(2)
-                else:
-                    # Fallback: si no encaja el patrón 1, intenta capturar entre comillas
-                    match = re.match(r"^\s*column\s+['\"]([^'\"]+)['\"]", line)
-                    if match:
-                        current_column.name = match.group(1)
+                # Extraer nombre de la columna: entre comillas (simples o dobles,
+                # con la comilla escapada duplicada) o hasta el primer =, espacio o comilla
+                # Soporta: column MesKey, column 'Name With Spaces', column "Quoted Name"
+                name = column_header_name(line)
+                if name is not None:
+                    current_column.name = name
                 column_content = [line]
                 in_column = True
             elif in_column:
@@ -273,6 +302,14 @@ class Table:
 
         return measures
     
+    @staticmethod
+    def _parse_calculation_items(content: str) -> List[Dict[str, str]]:
+        """Parsea los ``calculationItem`` de un grupo de cálculo."""
+        return [
+            {'name': name, 'expression': TmdlParser(block).get_header_expression()}
+            for name, block in TmdlParser(content).iter_blocks('calculationItem')
+        ]
+
     @staticmethod
     def _parse_partitions(content: str) -> List[Partition]:
         """Parsea las particiones del contenido TMDL"""
@@ -414,17 +451,30 @@ class Table:
             Lista de nombres de columnas eliminadas
         """
         filtered_names = {col.name for col in filtered_columns}
-        original_names = {col.name for col in self.columns}
+        # Las columnas calculadas no existen en el M: no se quitan allí
+        original_names = {col.name for col in self.columns if not col.is_calculated}
         removed_names = original_names - filtered_names
         return sorted(list(removed_names))
     
-    def update_partition_m_expression(self, partition: Partition, removed_columns: List[str]) -> Partition:
+    def update_partition_m_expression(
+        self,
+        partition: Partition,
+        removed_columns: List[str],
+        kept_columns: Optional[List[str]] = None,
+    ) -> Partition:
         """
-        Actualiza la expresión M de una partición para eliminar columnas usando Table.RemoveColumns.
+        Actualiza la expresión M de una partición para eliminar columnas.
+
+        Con ``kept_columns`` se intenta recortar en origen (ver
+        ``MExpression.prune_columns``): reescribiendo la lista SELECT del SQL
+        nativo o con ``Table.SelectColumns`` justo tras la navegación, para
+        que el refresco no traiga del origen las columnas quitadas. Si no es
+        posible, se añade ``Table.RemoveColumns`` como último paso.
         
         Args:
             partition: Partición a actualizar
-            removed_columns: Lista de nombres de columnas a eliminar
+            removed_columns: Lista de nombres (en el origen) de columnas a eliminar
+            kept_columns: Nombres (en el origen) de las columnas que se conservan
         
         Returns:
             Nueva instancia de Partition con expresión M actualizada
@@ -437,6 +487,15 @@ class Table:
         updated_partition.mode = partition.mode
         updated_partition.source_type = partition.source_type
         updated_partition.raw_content = partition.raw_content
+
+        if kept_columns:
+            m_expression = MExpression.parse(partition.source_expression)
+            pruned = m_expression.prune_columns(kept_columns, removed_columns) if m_expression else None
+            if pruned:
+                print(f"  [M] {self.name}.{partition.name}: {len(removed_columns)} columnas recortadas en origen "
+                      f"({'SELECT nativo' if pruned == 'native' else 'Table.SelectColumns'})")
+                updated_partition.source_expression = m_expression.to_string()
+                return self._replace_partition_source(partition, updated_partition)
         
         # Parsear la expresión M
         m_expr = partition.source_expression.strip()
@@ -491,8 +550,11 @@ class Table:
         new_lines.append(f'{remove_step_name}')
         
         updated_partition.source_expression = '\n'.join(new_lines)
+        return self._replace_partition_source(partition, updated_partition)
 
-        # Actualizar raw_content: reemplazar el bloque source = con la expresión M actualizada
+    @staticmethod
+    def _replace_partition_source(partition: Partition, updated_partition: Partition) -> Partition:
+        """Actualiza raw_content: reemplaza el bloque source = con la expresión M actualizada."""
         raw_lines = partition.raw_content.split('\n')
         source_line_idx = -1
         for ridx, rline in enumerate(raw_lines):
@@ -535,6 +597,7 @@ class Table:
         filtered_table.is_hidden = self.is_hidden
         filtered_table.line_age_granularity = self.line_age_granularity
         filtered_table.annotations = self.annotations.copy()
+        filtered_table.calculation_items = list(self.calculation_items)
         
         # IMPORTANTE: Las particiones se copian pero se actualizarán después
         filtered_table.partitions = []
@@ -558,10 +621,13 @@ class Table:
         # Limpiar sortByColumn inválidos (que apunten a columnas no incluidas)
         # Esto evita que Power BI falle con "referencia a objeto no encontrado"
         included_col_names = {col.name for col in filtered_table.columns}
-        for col in filtered_table.columns:
+        for i, col in enumerate(filtered_table.columns):
             if col.sort_by_column and col.sort_by_column not in included_col_names:
                 print(f"  [Filter] Limpiando sortByColumn inválido: {self.name}.'{col.name}' → '{col.sort_by_column}' (no incluida)")
+                # Copia para no modificar la columna del modelo fuente
+                col = copy.copy(col)
                 col.sort_by_column = None
+                filtered_table.columns[i] = col
         
         # Filtrar medidas
         if measures is not None:
@@ -595,12 +661,19 @@ class Table:
         else:
             filtered_table.hierarchies = self.hierarchies.copy()
         
-        # Determinar columnas eliminadas
-        removed_columns = self.get_removed_columns(filtered_table.columns)
-        
-        # Actualizar particiones: agregar Table.RemoveColumns si hay columnas eliminadas
+        # Determinar columnas eliminadas (con su nombre en el origen, que es
+        # el que ve la expresión M)
+        removed_columns = set(self.get_removed_columns(filtered_table.columns))
+        removed_sources = [
+            col.source_column or col.name for col in self.columns if col.name in removed_columns
+        ]
+        kept_sources = [
+            col.source_column or col.name for col in filtered_table.columns if not col.is_calculated
+        ]
+        
+        # Actualizar particiones: recortar columnas si hay columnas eliminadas
         for partition in self.partitions:
-            updated_partition = self.update_partition_m_expression(partition, removed_columns)
+            updated_partition = self.update_partition_m_expression(partition, removed_sources, kept_sources)
             filtered_table.partitions.append(updated_partition)
         
         # CORREGIDO: Usar raw_content original y filtrar en lugar de reconstruir
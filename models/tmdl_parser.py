@@ -1,5 +1,5 @@
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 class TmdlParser:
     """
@@ -114,3 +114,75 @@ class TmdlParser:
                     expression_lines.append(line)
         
         return '\n'.join(expression_lines)
+
+    def iter_blocks(self, keyword: str) -> Iterator[Tuple[str, str]]:
+        """
+        Genera ``(nombre, bloque)`` por cada objeto ``keyword`` del contenido
+        (``calculationItem``, ``tablePermission``...). El bloque es la cabecera
+        más las líneas con mayor indentación que la siguen.
+        """
+        header = re.compile(rf"""^\s*{keyword}\s+(?:'((?:[^']|'')+)'|"([^"]+)"|([^\s=]+))""")
+        i = 0
+        while i < len(self.lines):
+            line = self.lines[i]
+            match = header.match(line)
+            if not match:
+                i += 1
+                continue
+            base_indent = len(line) - len(line.lstrip())
+            block = [line]
+            i += 1
+            while i < len(self.lines):
+                current = self.lines[i]
+                if current.strip() and len(current) - len(current.lstrip()) <= base_indent:
+                    break
+                block.append(current)
+                i += 1
+            name = (match.group(1) or match.group(2) or match.group(3)).replace("''", "'")
+            yield name, '\n'.join(block)
+
+    def get_header_expression(self) -> str:
+        """
+        Obtiene la expresión DAX de la cabecera de un objeto TMDL
+        (``column X = ...``, ``calculationItem Y = ...``,
+        ``tablePermission T = ...``).
+
+        Soporta expresión en la misma línea, bloques ```...``` y expresiones
+        multi-línea indentadas por debajo de la cabecera (las propiedades
+        del objeto van a menor indentación y cierran la expresión).
+        """
+        if not self.lines:
+            return ""
+        header = re.match(
+            r"""^\s*\w+\s+(?:'(?:[^']|'')*'|"[^"]*"|[^\s=]+)\s*=\s*(.*)$""",
+            self.lines[0],
+        )
+        if not header:
+            return ""
+
+        first = header.group(1).strip()
+        in_block = first.startswith('```')
+        if in_block:
+            first = first[3:].strip()
+        elif first:
+            return first
+
+        expression_lines = [first] if first else []
+        expr_indent = None
+        for line in self.lines[1:]:
+            stripped = line.strip()
+            if in_block:
+                if stripped.startswith('```'):
+                    break
+                expression_lines.append(line.rstrip())
+                continue
+            if not stripped:
+                continue
+            indent = len(line) - len(line.lstrip())
+            if expr_indent is None:
+                expr_indent = indent
+            if indent < expr_indent:
+                break
+            expression_lines.append(stripped)
+
+        return '\n'.join(expression_lines).strip()
@@ -0,0 +1,68 @@
+"""
+Añade refresco incremental (refreshPolicy + RangeStart/RangeEnd) o
+particiones explícitas por año/mes a las tablas de hechos de un modelo
+(completo o submodelo).
+
+Uso:
+    python scripts/add_refresh_policy.py --semantic-model-dir Modelos/X.SemanticModel --table Ventas
+    python scripts/add_refresh_policy.py --semantic-model-dir ... --partitions month --start-year 2022
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models import SemanticModel, MemoryEstimator
+from models.refresh_policy import RefreshPolicyGenerator
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresco incremental / particiones por fecha")
+    parser.add_argument("--semantic-model-dir", required=True, help="Carpeta .SemanticModel")
+    parser.add_argument("--output-dir", default=None,
+                        help="Carpeta destino (por defecto, se sobrescribe el modelo)")
+    parser.add_argument("--table", action="append", dest="tables",
+                        help="Tabla de hechos (repetible). Por defecto, los hechos grandes con fecha")
+    parser.add_argument("--date-column", default=None,
+                        help="Columna de fecha (por defecto, la relacionada con la dimensión fecha)")
+    parser.add_argument("--min-rows", type=int, default=10_000_000,
+                        help="Filas estimadas mínimas para elegir hechos automáticamente")
+    parser.add_argument("--stats-file", default=None,
+                        help="JSON de filas/cardinalidades (ver MemoryEstimator)")
+    parser.add_argument("--partitions", choices=["year", "month"], default=None,
+                        help="Particiones explícitas en lugar de refreshPolicy")
+    parser.add_argument("--start-year", type=int, default=None)
+    parser.add_argument("--end-year", type=int, default=None)
+    parser.add_argument("--rolling-years", type=int, default=5,
+                        help="Años de datos que conserva la política")
+    parser.add_argument("--incremental-days", type=int, default=10,
+                        help="Días que se refrescan en cada carga")
+    args = parser.parse_args()
+
+    model_dir = Path(args.semantic_model_dir)
+    model = SemanticModel(str(model_dir))
+    model.load_from_directory(model_dir)
+    generator = RefreshPolicyGenerator(model)
+
+    tables = args.tables or generator.large_fact_tables(
+        args.min_rows, MemoryEstimator.from_stats_file(args.stats_file)
+    )
+    if not tables:
+        print("✓ No hay tablas de hechos candidatas")
+        sys.exit(0)
+
+    for table_name in tables:
+        try:
+            if args.partitions:
+                generator.add_date_partitions(
+                    table_name, args.date_column, args.partitions, args.start_year, args.end_year
+                )
+            else:
+                generator.add_incremental_refresh(
+                    table_name, args.date_column,
+                    rolling_window_periods=args.rolling_years,
+                    incremental_periods=args.incremental_days,
+                )
+        except ValueError as e:
+            print(f"  ⚠️ {e}")
+
+    model.save_to_directory_incremental(Path(args.output_dir or model_dir))
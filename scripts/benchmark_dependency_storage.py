@@ -0,0 +1,195 @@
+"""
+Benchmark del almacenamiento de dependencias DAX: formato antiguo (filas con
+VARCHAR repetidos) frente al formato compacto (IDs enteros + ENUM + vista).
+
+Genera un modelo sintético con N medidas encadenadas, guarda las mismas
+dependencias transitivas en dos BDs temporales y compara:
+  - tamaño ocupado en la BD (bloques usados tras CHECKPOINT, incluidos los
+    índices de las claves primarias)
+  - tiempo de la consulta de cierre usada por create_subset_model_from_db
+
+Por defecto usa 1000 medidas y 40 tablas (~855.000 filas de cierre), el
+orden de magnitud de los modelos grandes para los que existe el formato
+compacto. Con pocas filas ambos formatos caben en uno o dos bloques de
+DuckDB y el diccionario de objetos no compensa su bloque fijo.
+
+Uso:
+    python scripts/benchmark_dependency_storage.py [n_medidas] [n_tablas]
+"""
+from pathlib import Path
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import duckdb
+
+from models.dax_tokenizer import DaxTokenizer
+
+
+def build_tokenizer(n_measures: int, n_tables: int) -> DaxTokenizer:
+    """
+    Modelo sintético: cada medida usa 2 columnas y hasta 2 de las 30 medidas
+    anteriores (cadenas locales, como en los modelos reales por área).
+    """
+    rnd = random.Random(42)
+    tables = {f"Tabla Dimension {i:03d}" for i in range(n_tables)}
+    table_list = sorted(tables)
+    columns = {t: {f"Columna de negocio {c:02d}" for c in range(20)} for t in table_list}
+    measures = {}
+    measure_table_map = {}
+    for i in range(n_measures):
+        name = f"Medida de ventas acumuladas {i:05d}"
+        t1, t2 = rnd.sample(table_list, 2)
+        parts = [
+            f"SUM('{t1}'[Columna de negocio {rnd.randrange(20):02d}])",
+            f"COUNTROWS(FILTER('{t2}', '{t2}'[Columna de negocio {rnd.randrange(20):02d}] > 0))",
+        ]
+        window = range(max(0, i - 30), i)
+        for j in rnd.sample(window, min(len(window), 2)):
+            parts.append(f"[Medida de ventas acumuladas {j:05d}]")
+        measures[name] = " + ".join(parts)
+        measure_table_map[name] = rnd.choice(table_list)
+    return DaxTokenizer(tables, measures, columns, measure_table_map)
+
+
+def create_legacy_db(path: str, compact_path: str) -> None:
+    """
+    Esquema anterior: una fila de texto por dependencia. Se rellena desde la
+    vista de la BD compacta (mismas filas) para no pasar cada string por Python.
+    """
+    conn = duckdb.connect(path)
+    conn.execute("CREATE TABLE semantic_model (id INTEGER PRIMARY KEY, name VARCHAR)")
+    conn.execute("INSERT INTO semantic_model VALUES (1, 'Benchmark.SemanticModel')")
+    conn.execute("CREATE SEQUENCE seq_sm_measure_dep_id START 1")
+    conn.execute("""
+        CREATE TABLE semantic_model_measure_dependencies (
+            id INTEGER PRIMARY KEY DEFAULT nextval('seq_sm_measure_dep_id'),
+            semantic_model_id INTEGER NOT NULL,
+            measure_name VARCHAR NOT NULL,
+            measure_table VARCHAR NOT NULL,
+            dependency_type VARCHAR NOT NULL,
+            referenced_name VARCHAR NOT NULL,
+            referenced_table VARCHAR,
+            created_at TIMESTAMP DEFAULT now(),
+            is_direct BOOLEAN DEFAULT false,
+            FOREIGN KEY(semantic_model_id) REFERENCES semantic_model(id)
+        )
+    """)
+    conn.execute(f"ATTACH '{compact_path}' AS compact (READ_ONLY)")
+    conn.execute("""
+        INSERT INTO semantic_model_measure_dependencies
+            (semantic_model_id, measure_name, measure_table, dependency_type,
+             referenced_name, referenced_table, is_direct)
+        SELECT semantic_model_id, measure_name, measure_table, dependency_type,
+               referenced_name, referenced_table, is_direct
+        FROM compact.semantic_model_measure_dependencies
+    """)
+    conn.execute("DETACH compact")
+    conn.execute("CHECKPOINT")
+    conn.close()
+
+
+def create_compact_db(path: str, tk: DaxTokenizer) -> None:
+    """Esquema actual (solo las tablas de dependencias de medidas)."""
+    conn = duckdb.connect(path)
+    conn.execute("CREATE TABLE semantic_model (id INTEGER PRIMARY KEY, name VARCHAR)")
+    conn.execute("INSERT INTO semantic_model VALUES (1, 'Benchmark.SemanticModel')")
+    tk.save_dependencies_to_db(path, semantic_model_id=1,
+                               measure_table_map=tk.measure_table_map, conn=conn)
+    for table in ("semantic_model_measure_expression_hash",
+                  "semantic_model_calculatedTable_dependencies",
+                  "semantic_model_expression_dependencies",
+                  "semantic_model_report_usage"):
+        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+    conn.execute("CHECKPOINT")
+    conn.close()
+
+
+def used_size_mb(path: str) -> float:
+    """MB ocupados por bloques en uso (datos + índices), sin los bloques libres."""
+    conn = duckdb.connect(path, read_only=True)
+    used_blocks, block_size = conn.execute(
+        "SELECT used_blocks, block_size FROM pragma_database_size()"
+    ).fetchone()
+    conn.close()
+    return used_blocks * block_size / 1024 / 1024
+
+
+def count_blocks(path: str, tables) -> int:
+    """Bloques de almacenamiento distintos usados por las tablas indicadas."""
+    conn = duckdb.connect(path, read_only=True)
+    blocks = set()
+    for table in tables:
+        for block_id, extra in conn.execute(
+            f"SELECT block_id, additional_block_ids FROM pragma_storage_info('{table}') "
+            "WHERE persistent AND block_id >= 0"
+        ).fetchall():
+            blocks.add(block_id)
+            blocks.update(extra or [])
+    conn.close()
+    return len(blocks)
+
+
+def time_closure_query(path: str, measures, repeat: int = 20) -> float:
+    """Tiempo medio (ms) de las tres consultas de cierre del submodelo."""
+    conn = duckdb.connect(path, read_only=True)
+    placeholders = ", ".join(["?"] * len(measures))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for dep_type in ("table", "column", "measure"):
+            conn.execute(f"""
+                SELECT DISTINCT referenced_name, referenced_table
+                FROM semantic_model_measure_dependencies
+                WHERE semantic_model_id = ?
+                  AND measure_name IN ({placeholders})
+                  AND dependency_type = ?
+            """, [1] + list(measures) + [dep_type]).fetchall()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    conn.close()
+    return elapsed
+
+
+def main():
+    n_measures = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    n_tables = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+
+    print(f"📊 Modelo sintético: {n_measures} medidas, {n_tables} tablas")
+    tk = build_tokenizer(n_measures, n_tables)
+    sample = random.Random(7).sample(sorted(tk.known_measures), min(200, n_measures))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.duckdb")
+        compact_path = os.path.join(tmp, "compact.duckdb")
+
+        create_compact_db(compact_path, tk)
+        create_legacy_db(legacy_path, compact_path)
+
+        legacy_size = used_size_mb(legacy_path)
+        compact_size = used_size_mb(compact_path)
+        legacy_blocks = count_blocks(legacy_path, ["semantic_model_measure_dependencies"])
+        compact_blocks = count_blocks(
+            compact_path, ["semantic_model_measure_dependency_ids", "semantic_model_object"]
+        )
+        legacy_ms = time_closure_query(legacy_path, sample)
+        compact_ms = time_closure_query(compact_path, sample)
+
+        conn = duckdb.connect(compact_path, read_only=True)
+        n_rows = conn.execute(
+            "SELECT COUNT(*) FROM semantic_model_measure_dependency_ids"
+        ).fetchone()[0]
+        n_objects = conn.execute("SELECT COUNT(*) FROM semantic_model_object").fetchone()[0]
+        conn.close()
+
+    print(f"  Filas de dependencias:  {n_rows}  (objetos en diccionario: {n_objects})")
+    print(f"  {'':20} {'antiguo':>12} {'compacto':>12}")
+    print(f"  {'Tamaño BD (MB)':20} {legacy_size:12.2f} {compact_size:12.2f}")
+    print(f"  {'Bloques dependencias':20} {legacy_blocks:12d} {compact_blocks:12d}")
+    print(f"  {'Cierre (ms)':20} {legacy_ms:12.2f} {compact_ms:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
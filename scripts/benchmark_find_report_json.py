@@ -0,0 +1,109 @@
+"""
+Benchmark de la localización de report.json: recorrido anterior con
+``os.walk`` de toda la carpeta del report frente a las rutas conocidas
+(PBIR y legacy) con búsqueda por niveles acotada de ``clsReport``.
+
+Genera un workspace sintético con N reports (mitad PBIR, mitad legacy),
+cada uno con ``StaticResources`` (temas e imágenes) y, en PBIR, páginas y
+visuales. Compara el tiempo total, las carpetas listadas y que ambos
+métodos encuentran el mismo fichero.
+
+Uso:
+    python scripts/benchmark_find_report_json.py [n_reports] [visuales_por_report]
+"""
+from pathlib import Path
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.report import REPORT_JSON_SEARCH_DEPTH, clsReport
+
+
+def touch(path: str, content: str = "{}") -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def create_workspace(root: str, n_reports: int, n_visuals: int) -> None:
+    for i in range(n_reports):
+        report_dir = os.path.join(root, f"Report {i:04d}.Report")
+        static = os.path.join(report_dir, "StaticResources")
+        for t in range(3):
+            touch(os.path.join(static, "SharedResources", "BaseThemes", f"Tema{t}.json"))
+        for img in range(10):
+            touch(os.path.join(static, "RegisteredResources", f"imagen{img}.png"), "")
+        if i % 2 == 0:
+            definition = os.path.join(report_dir, "definition")
+            touch(os.path.join(definition, "report.json"))
+            for v in range(n_visuals):
+                touch(os.path.join(definition, "pages", f"pagina{v % 5}", "visuals", f"visual{v}", "visual.json"))
+            touch(os.path.join(report_dir, "definition.pbir"))
+        else:
+            touch(os.path.join(report_dir, "report.json"))
+
+
+# ── Búsqueda anterior (os.walk) ──────────────────────────────────
+
+
+def walk_find(root_path: str):
+    for root, dirs, _ in os.walk(root_path):
+        if 'definition' in dirs:
+            report_path = os.path.join(root, 'definition', 'report.json')
+            if os.path.isfile(report_path):
+                return report_path
+    report_path = os.path.join(root_path, 'report.json')
+    return report_path if os.path.isfile(report_path) else None
+
+
+def probe_find(root_path: str):
+    return clsReport._probe_report_json(root_path, REPORT_JSON_SEARCH_DEPTH)[0]
+
+
+def count_scandir(func, folders):
+    """Ejecuta ``func`` sobre cada carpeta contando las llamadas a os.scandir."""
+    calls = 0
+    original = os.scandir
+
+    def counting_scandir(*args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return original(*args, **kwargs)
+
+    os.scandir = counting_scandir
+    try:
+        start = time.perf_counter()
+        results = [func(folder) for folder in folders]
+        elapsed = time.perf_counter() - start
+    finally:
+        os.scandir = original
+    return results, elapsed, calls
+
+
+def main() -> None:
+    n_reports = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    n_visuals = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    with tempfile.TemporaryDirectory() as tmp:
+        create_workspace(tmp, n_reports, n_visuals)
+        folders = sorted(os.path.join(tmp, name) for name in os.listdir(tmp))
+
+        walk_results, walk_time, walk_calls = count_scandir(walk_find, folders)
+        probe_results, probe_time, probe_calls = count_scandir(probe_find, folders)
+
+        print(f"\n📊 Workspace sintético: {n_reports} reports (mitad PBIR, mitad legacy)")
+        print(f"  {'Método':<12} {'Tiempo (ms)':>12} {'Carpetas listadas':>18}")
+        print(f"  {'-' * 44}")
+        print(f"  {'os.walk':<12} {walk_time * 1000:>12.1f} {walk_calls:>18}")
+        print(f"  {'rutas':<12} {probe_time * 1000:>12.1f} {probe_calls:>18}")
+        if probe_time:
+            print(f"\n  ⚡ Aceleración: x{walk_time / probe_time:.1f}")
+        same = walk_results == probe_results
+        print(f"  {'✅' if same else '❌'} report.json encontrados {'idénticos' if same else 'DISTINTOS'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark de la carga de reports legacy (report.json con ``sections``):
+formato anterior (volcado de cada visual a ``_legacy_{idx}/visuals/*/visual.json``
+y relectura desde disco) frente a la construcción en memoria de Page/Visual.
+
+Genera un report.json sintético con N páginas x M visuales y compara:
+  - tiempo de carga de clsReport
+  - ficheros escritos en la carpeta del report
+  - que columnas, medidas y filtros extraídos son idénticos
+
+Uso:
+    python scripts/benchmark_legacy_report.py [n_paginas] [visuales_por_pagina]
+"""
+from pathlib import Path
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.report import Page, clsReport
+
+
+def build_visual_container(rnd: random.Random, idx: int, format_rules: int = 0) -> dict:
+    """
+    visualContainer legacy con prototypeQuery (alias), proyecciones y filtro;
+    ``format_rules`` añade reglas de formato literales para engordar el config.
+    """
+    fact = rnd.choice(["Ventas", "Pedidos", "Inventario"])
+    dim = rnd.choice(["Producto", "Cliente", "Fecha", "Tienda"])
+    config = {
+        "name": f"visual{idx:05d}",
+        "singleVisual": {
+            "visualType": rnd.choice(["tableEx", "columnChart", "card", "slicer"]),
+            "projections": {"Values": [{"queryRef": f"{fact}.Importe"}]},
+            "prototypeQuery": {
+                "Version": 2,
+                "From": [{"Name": "f", "Entity": fact, "Type": 0},
+                         {"Name": "d", "Entity": dim, "Type": 0}],
+                "Select": [
+                    {"Column": {"Expression": {"SourceRef": {"Source": "d"}},
+                                "Property": f"Atributo {rnd.randrange(10)}"},
+                     "Name": f"{dim}.Atributo"},
+                    {"Measure": {"Expression": {"SourceRef": {"Source": "f"}},
+                                 "Property": f"Medida {rnd.randrange(40)}"},
+                     "Name": f"{fact}.Medida"},
+                ],
+            },
+            "objects": {
+                "labels": [{"properties": {"show": {"expr": {"Literal": {"Value": "true"}}}}}],
+                "values": [{"properties": {"fontColor": {"solid": {"color": {"expr": {
+                               "Literal": {"Value": f"'#{rnd.randrange(1 << 24):06X}'"}}}}}},
+                            "selector": {"metadata": f"{fact}.Importe", "id": f"regla{r}"}}
+                           for r in range(format_rules)],
+            },
+        },
+    }
+    filters = [{
+        "name": f"Filter{idx}",
+        "expression": {"Column": {"Expression": {"SourceRef": {"Entity": dim}},
+                                  "Property": f"Atributo {rnd.randrange(10)}"}},
+        "type": "Categorical",
+    }]
+    return {
+        "x": rnd.randrange(1200), "y": rnd.randrange(700), "z": idx,
+        "width": 300, "height": 200,
+        "config": json.dumps(config),
+        "filters": json.dumps(filters),
+    }
+
+
+def create_legacy_report(path: str, n_pages: int, n_visuals: int, format_rules: int = 0) -> None:
+    rnd = random.Random(42)
+    sections = []
+    for p in range(n_pages):
+        sections.append({
+            "name": f"ReportSection{p:03d}",
+            "displayName": f"Página {p}",
+            "height": 720, "width": 1280,
+            "config": json.dumps({"visibility": 0}),
+            "filters": "[]",
+            "visualContainers": [build_visual_container(rnd, p * n_visuals + v, format_rules) for v in range(n_visuals)],
+        })
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "report.json"), "w", encoding="utf-8") as f:
+        json.dump({"config": "{}", "sections": sections, "filters": "[]"}, f)
+
+
+def _create_page_on_disk(self, section: dict, section_index: int):
+    """Implementación anterior: page.json y visual.json temporales en disco."""
+    page_data, visuals_data = clsReport._legacy_section_to_dicts(section, section_index)
+    base_dir = self.pages_path if self.pages_path else self.root_path
+    temp_page_dir = os.path.join(base_dir, f'_legacy_{section_index}')
+    visuals_dir = os.path.join(temp_page_dir, 'visuals')
+    os.makedirs(visuals_dir, exist_ok=True)
+    for visual_idx, visual_data in enumerate(visuals_data):
+        visual_dir = os.path.join(visuals_dir, visual_data.get('name', f'visual_{visual_idx}'))
+        os.makedirs(visual_dir, exist_ok=True)
+        with open(os.path.join(visual_dir, 'visual.json'), 'w', encoding='utf-8') as f:
+            json.dump(visual_data, f, indent=2)
+    with open(os.path.join(temp_page_dir, 'page.json'), 'w', encoding='utf-8') as f:
+        json.dump(page_data, f, indent=2)
+    return Page(temp_page_dir)
+
+
+def count_files(path: str) -> int:
+    return sum(len(files) for _, _, files in os.walk(path))
+
+
+def summarize(report: clsReport):
+    """Huella comparable del report cargado (independiente del orden en disco)."""
+    return sorted(
+        (page.name, visual.name, tuple(sorted(visual.columns_used)),
+         tuple(sorted(visual.measures_used)), len(visual.filters))
+        for page in report.pages for visual in page.visuals
+    )
+
+
+def load(path: str):
+    start = time.perf_counter()
+    report = clsReport(path)
+    return report, time.perf_counter() - start
+
+
+def main() -> None:
+    n_pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_visuals = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disk_path = os.path.join(tmp, "Disco.Report")
+        memory_path = os.path.join(tmp, "Memoria.Report")
+        create_legacy_report(disk_path, n_pages, n_visuals)
+        create_legacy_report(memory_path, n_pages, n_visuals)
+        files_before = count_files(disk_path)
+
+        in_memory = clsReport._create_page_from_legacy_section
+        clsReport._create_page_from_legacy_section = _create_page_on_disk
+        try:
+            disk_report, disk_time = load(disk_path)
+        finally:
+            clsReport._create_page_from_legacy_section = in_memory
+        memory_report, memory_time = load(memory_path)
+
+        print(f"\n📊 Report legacy sintético: {n_pages} páginas x {n_visuals} visuales "
+              f"({n_pages * n_visuals} visuales)")
+        print(f"  {'Modo':<12} {'Tiempo (s)':>12} {'Ficheros escritos':>18}")
+        print(f"  {'-' * 44}")
+        print(f"  {'disco':<12} {disk_time:>12.3f} {count_files(disk_path) - files_before:>18}")
+        print(f"  {'memoria':<12} {memory_time:>12.3f} {count_files(memory_path) - files_before:>18}")
+        if memory_time:
+            print(f"\n  ⚡ Aceleración: x{disk_time / memory_time:.1f}")
+        same = summarize(disk_report) == summarize(memory_report)
+        print(f"  {'✅' if same else '❌'} Campos y filtros extraídos {'idénticos' if same else 'DISTINTOS'}")
+
+
+if __name__ == "__main__":
+    main()
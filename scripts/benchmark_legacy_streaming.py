@@ -0,0 +1,65 @@
+"""
+Benchmark de memoria al importar report.json legacy grandes: carga completa
+del documento frente a la lectura en streaming de ``sections``
+(``clsReport(..., stream_legacy=True)``).
+
+Genera reports legacy sintéticos de tamaño creciente (con reglas de formato
+para que cada config pese como uno real) y mide con tracemalloc, por modo,
+el pico de memoria y el tiempo. "Extra" es el pico menos lo que retiene el
+report ya cargado (páginas y visuales): en streaming no crece con el fichero.
+También comprueba que páginas, visuales y campos extraídos son idénticos.
+
+Uso:
+    python scripts/benchmark_legacy_streaming.py [visuales_por_pagina] [paginas ...]
+"""
+from pathlib import Path
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmark_legacy_report import create_legacy_report, summarize
+from models.report import clsReport
+
+
+def measure(path: str, stream: bool):
+    tracemalloc.start()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        report = clsReport(path, stream_legacy=stream)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return report, elapsed, peak / 1024 / 1024, retained / 1024 / 1024
+
+
+def main() -> None:
+    n_visuals = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    page_counts = [int(a) for a in sys.argv[2:]] or [10, 40, 160]
+
+    print(f"\n📊 Reports legacy sintéticos ({n_visuals} visuales por página)")
+    print(f"  {'Páginas':>8} {'MB fichero':>11} {'Extra completo':>15} {'Extra stream':>13} "
+          f"{'s completo':>11} {'s stream':>9}  Iguales")
+    print(f"  {'-' * 82}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_pages in page_counts:
+            path = os.path.join(tmp, f"Legacy{n_pages}.Report")
+            create_legacy_report(path, n_pages, n_visuals, format_rules=30)
+            size_mb = os.path.getsize(os.path.join(path, "report.json")) / 1024 / 1024
+            full, full_time, full_peak, full_retained = measure(path, stream=False)
+            full_summary = summarize(full)
+            del full
+            streamed, stream_time, stream_peak, stream_retained = measure(path, stream=True)
+            same = full_summary == summarize(streamed)
+            print(f"  {n_pages:>8} {size_mb:>11.1f} {full_peak - full_retained:>13.1f}MB "
+                  f"{stream_peak - stream_retained:>11.1f}MB "
+                  f"{full_time:>11.2f} {stream_time:>9.2f}  {'✅' if same else '❌'}")
+
+
+if __name__ == "__main__":
+    main()
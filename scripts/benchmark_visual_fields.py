@@ -0,0 +1,177 @@
+"""
+Benchmark de la extracción de campos de un visual: recorrido anterior
+(queryState + sortDefinition + objects + documento completo, recursivo)
+frente al visitante iterativo de una sola pasada de ``Visual``.
+
+Genera un visual.json sintético (PBIR) con N proyecciones, formato
+condicional y filtros, y compara:
+  - tiempo medio de extracción
+  - referencias devueltas (con duplicados antes, únicas ahora)
+  - que el conjunto de campos coincide (con los alias de filtros resueltos)
+  - un documento muy anidado (el recorrido recursivo agota la pila)
+
+Uso:
+    python scripts/benchmark_visual_fields.py [n_proyecciones] [repeticiones]
+"""
+from pathlib import Path
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from models.report import Visual
+
+
+def field(kind: str, entity: str, prop: str) -> dict:
+    return {kind: {"Expression": {"SourceRef": {"Entity": entity}}, "Property": prop}}
+
+
+def build_visual(n_projections: int) -> dict:
+    """Visual con proyecciones, orden, formato condicional por medida y filtros."""
+    rnd = random.Random(42)
+    tables = ["Ventas", "Producto", "Cliente", "Fecha"]
+    projections = []
+    for i in range(n_projections):
+        kind = "Measure" if i % 3 == 0 else "Column"
+        entity = rnd.choice(tables)
+        prop = f"Campo {rnd.randrange(n_projections // 2 or 1)}"
+        projections.append({"field": field(kind, entity, prop), "queryRef": f"{entity}.{prop}"})
+    rules = [
+        {"properties": {"fontColor": {"solid": {"color": {"expr": {
+            "Conditional": {"Cases": [{"Condition": {"Comparison": {
+                "Left": field("Measure", "Ventas", f"Campo {rnd.randrange(n_projections // 2 or 1)}"),
+                "Right": {"Literal": {"Value": "0D"}}}}}]}}}}}},
+         "selector": {"metadata": f"Ventas.Campo {i}"}}
+        for i in range(n_projections)
+    ]
+    filters = [
+        {"name": f"f{i}", "field": {"Aggregation": {
+            "Expression": field("Column", "Ventas", f"Campo {i}"), "Function": 0}},
+         "filter": {"Version": 2, "From": [{"Name": "v", "Entity": "Ventas", "Type": 0}],
+                    "Where": [{"Condition": {"Comparison": {"Left": {"Aggregation": {
+                        "Expression": {"Column": {"Expression": {"SourceRef": {"Source": "v"}},
+                                                  "Property": f"Campo {i}"}}, "Function": 0}},
+                        "Right": {"Literal": {"Value": "100D"}}}}}]}}
+        for i in range(n_projections // 10 or 1)
+    ]
+    return {
+        "name": "visual_grande",
+        "position": {"x": 0, "y": 0, "width": 800, "height": 600},
+        "visual": {
+            "visualType": "pivotTable",
+            "query": {
+                "queryState": {"Rows": {"projections": projections[: n_projections // 2]},
+                               "Values": {"projections": projections[n_projections // 2:]}},
+                "sortDefinition": {"sort": [{"field": p["field"], "direction": "Descending"}
+                                            for p in projections[:5]]},
+            },
+            "objects": {"values": rules},
+        },
+        "filterConfig": {"filters": filters},
+    }
+
+
+# ── Recorrido anterior (recursivo, varias pasadas) ───────────────────
+
+
+def _old_field(field_obj, columns, measures, query_ref=None):
+    if query_ref:
+        if "Measure" in field_obj:
+            measures.append(query_ref)
+            return
+        if "Column" in field_obj:
+            columns.append(query_ref)
+            return
+    for kind, target in (("Column", columns), ("Measure", measures)):
+        if kind in field_obj:
+            ref = field_obj[kind]
+            table = (ref.get("Table") or ref.get("Entity")
+                     or ref.get("Expression", {}).get("SourceRef", {}).get("Entity")
+                     or ref.get("Expression", {}).get("SourceRef", {}).get("Source"))
+            prop = ref.get("Property")
+            if prop:
+                target.append(f"{table}.{prop}" if table else prop)
+            return
+
+
+def _old_walk(obj, columns, measures):
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key in ("Measure", "Column"):
+                _old_field({key: value}, columns, measures)
+            else:
+                _old_walk(value, columns, measures)
+    elif isinstance(obj, list):
+        for item in obj:
+            _old_walk(item, columns, measures)
+
+
+def old_extract(data: dict):
+    columns, measures = [], []
+    query = data.get("visual", {}).get("query", {})
+    for value in query.get("queryState", {}).values():
+        if isinstance(value, dict):
+            for proj in value.get("projections", []):
+                _old_field(proj.get("field", {}), columns, measures, proj.get("queryRef"))
+    for sort in query.get("sortDefinition", {}).get("sort", []):
+        _old_field(sort.get("field", {}), columns, measures)
+    _old_walk(data.get("visual", {}).get("objects", {}), columns, measures)
+    _old_walk(data, columns, measures)
+    return columns, measures
+
+
+def deep_visual(depth: int) -> dict:
+    node = field("Column", "Ventas", "Profundo")
+    for _ in range(depth):
+        node = {"nested": [node]}
+    return {"name": "visual_profundo", "visual": {"objects": {"deep": node}}}
+
+
+def timed(func, data, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(data)
+    return result, (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    n_projections = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    data = build_visual(n_projections)
+
+    (old_columns, old_measures), old_time = timed(old_extract, data, repeat)
+    visual = Visual(data=data)
+    _, new_time = timed(visual._extract_fields, data, repeat)
+
+    print(f"\n📊 Visual sintético: {n_projections} proyecciones, {n_projections} reglas de formato")
+    print(f"  {'Modo':<12} {'ms/visual':>10} {'Columnas':>10} {'Medidas':>10}")
+    print(f"  {'-' * 46}")
+    print(f"  {'recursivo':<12} {old_time * 1000:>10.2f} {len(old_columns):>10} {len(old_measures):>10}")
+    print(f"  {'una pasada':<12} {new_time * 1000:>10.2f} {len(visual.columns_used):>10} "
+          f"{len(visual.measures_used):>10}")
+    # El recorrido anterior no resolvía los alias declarados en el From de cada filtro
+    unresolved = {c for c in old_columns if c.startswith("v.")}
+    same = (set(old_columns) - unresolved == set(visual.columns_used)
+            and set(old_measures) == set(visual.measures_used))
+    print(f"  {'✅' if same else '❌'} Mismos campos {'' if same else 'NO '}(salvo {len(unresolved)} "
+          f"referencias con alias sin resolver en el recorrido anterior)")
+    roles: dict = {}
+    for field_roles in visual.field_roles.values():
+        for role in field_roles:
+            roles[role] = roles.get(role, 0) + 1
+    print(f"  Campos por rol: {dict(sorted(roles.items()))}")
+
+    depth = sys.getrecursionlimit() * 2
+    deep = deep_visual(depth)
+    try:
+        old_extract(deep)
+        old_status = "ok"
+    except RecursionError:
+        old_status = "RecursionError"
+    new_status = "ok" if Visual(data=deep).columns_used == ["Ventas.Profundo"] else "sin campo"
+    print(f"\n  Documento con {depth} niveles: recursivo={old_status}, una pasada={new_status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Genera tablas de agregación (alternateOf) para los granos que más se repiten
+en los visuales de los reports de un modelo.
+
+Uso:
+    python scripts/generate_aggregations.py --db-path data/x.duckdb \
+        --semantic-model-dir Modelos/X.SemanticModel [--output-dir ...] [--dry-run]
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models import SemanticModel, MemoryEstimator
+from models.aggregation_generator import AggregationGenerator, print_aggregation_candidates
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera tablas de agregación desde el uso de los reports")
+    parser.add_argument("--db-path", required=True, help="Ruta a la base DuckDB")
+    parser.add_argument("--semantic-model-dir", required=True, help="Carpeta .SemanticModel")
+    parser.add_argument("--semantic-model-id", type=int, default=None,
+                        help="ID numérico en la tabla semantic_model (opcional)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Carpeta destino (por defecto, se sobrescribe el modelo)")
+    parser.add_argument("--fact", action="append", dest="facts",
+                        help="Tabla de hechos a considerar (repetible). Por defecto, todas")
+    parser.add_argument("--min-visuals", type=int, default=2,
+                        help="Visuales mínimos que debe cubrir cada agregación")
+    parser.add_argument("--max-per-fact", type=int, default=3,
+                        help="Agregaciones máximas por tabla de hechos")
+    parser.add_argument("--stats-file", default=None,
+                        help="JSON de filas/cardinalidades para estimar el tamaño")
+    parser.add_argument("--dry-run", action="store_true", help="Solo mostrar las propuestas")
+    args = parser.parse_args()
+
+    model_dir = Path(args.semantic_model_dir)
+    model = SemanticModel(str(model_dir))
+    model.load_from_directory(model_dir)
+
+    generator = AggregationGenerator.from_db(
+        model, args.db_path, semantic_model_id=args.semantic_model_id,
+        estimator=MemoryEstimator.from_stats_file(args.stats_file),
+    )
+    candidates = generator.find_aggregations(
+        facts=set(args.facts) if args.facts else None,
+        min_visuals=args.min_visuals,
+        max_per_fact=args.max_per_fact,
+    )
+    if not candidates:
+        print("✓ No hay granos repetidos que justifiquen una agregación")
+        sys.exit(0)
+    print_aggregation_candidates(candidates)
+    if args.dry_run:
+        sys.exit(0)
+
+    created = generator.add_to_model(model, candidates)
+    model.save_to_directory_incremental(Path(args.output_dir or model_dir))
+    print(f"✓ {len(created)} tablas de agregación creadas: {', '.join(created)}")
@@ -0,0 +1,34 @@
+import sys
+import os
+import argparse
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models.subset_plan import generate_report_subsets
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Genera un modelo mínimo por cada report de un modelo semántico"
+    )
+    parser.add_argument("--db-path", required=True, help="Ruta a la base DuckDB")
+    parser.add_argument("--semantic-model-dir", required=True,
+                        help="Carpeta .SemanticModel del modelo fuente")
+    parser.add_argument("--semantic-model-id", type=int, default=None,
+                        help="ID numérico en la tabla semantic_model (opcional)")
+    parser.add_argument("--report", action="append", dest="reports",
+                        help="Report a procesar (repetible). Por defecto, todos")
+    parser.add_argument("--suffix", default="_minimal",
+                        help="Sufijo del nombre de cada submodelo")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos para escribir los submodelos (1 = secuencial)")
+    parser.add_argument("--no-pbip", action="store_true",
+                        help="No crear el scaffold .pbip + .Report de cada submodelo")
+    args = parser.parse_args()
+
+    generate_report_subsets(
+        model_dir=args.semantic_model_dir,
+        db_path=args.db_path,
+        semantic_model_id=args.semantic_model_id,
+        report_names=args.reports,
+        suffix=args.suffix,
+        workers=args.workers,
+        create_pbip=not args.no_pbip,
+    )
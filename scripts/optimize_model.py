@@ -0,0 +1,63 @@
+"""
+Pasada de optimización sobre un modelo semántico TMDL.
+
+Por ahora elimina las tablas auto date/time (LocalDateTable_* /
+DateTableTemplate_*) que no referencia ninguna expresión DAX ni usa ningún
+report (directamente o a través de una jerarquía de fecha automática), junto
+con sus relaciones y variations, e informa de la memoria estimada recuperada.
+
+El uso de los reports se lee del catálogo DuckDB (``report_column_used``,
+``report_measure_used`` y ``report_variation_used``); sin reports importados
+para el modelo no se elimina nada.
+
+Uso:
+    python scripts/optimize_model.py --semantic-model-dir Modelos/X.SemanticModel --db-path data/powerbi.duckdb
+    python scripts/optimize_model.py --semantic-model-dir ... --db-path ... --output-dir Modelos/X_opt.SemanticModel
+"""
+import sys
+import os
+import argparse
+from pathlib import Path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from models import SemanticModel, MemoryEstimator, SubsetIndex
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Optimiza un modelo semántico TMDL")
+    parser.add_argument("--semantic-model-dir", required=True,
+                        help="Carpeta .SemanticModel a optimizar")
+    parser.add_argument("--db-path", required=True,
+                        help="Catálogo DuckDB con los reports importados (uso de columnas y jerarquías)")
+    parser.add_argument("--semantic-model-id", type=int, default=None,
+                        help="ID del modelo en la BD (por defecto, se busca por nombre)")
+    parser.add_argument("--output-dir", default=None,
+                        help="Carpeta destino (por defecto, se sobrescribe el modelo)")
+    parser.add_argument("--keep-table", action="append", dest="keep_tables", default=[],
+                        help="Tabla auto date/time a conservar (repetible)")
+    parser.add_argument("--stats-file", default=None,
+                        help="JSON de filas/cardinalidades para estimar memoria")
+    args = parser.parse_args()
+
+    model = SemanticModel(args.semantic_model_dir)
+    model.load_from_directory(Path(args.semantic_model_dir))
+
+    usage = SubsetIndex.from_db(model, args.db_path, semantic_model_id=args.semantic_model_id)
+    report_tables = set(usage.used_columns) | set(usage.used_measures)
+    if not report_tables:
+        print("❌ No hay uso de reports para este modelo en la BD: no se eliminan tablas "
+              "(importa sus reports antes de optimizar)")
+        sys.exit(1)
+
+    estimator = MemoryEstimator.from_stats_file(args.stats_file)
+    result = model.remove_auto_date_tables(
+        keep_tables=set(args.keep_tables) | report_tables,
+        estimator=estimator,
+        used_variations=usage.used_variations,
+    )
+    if not result['removed_tables']:
+        print("✓ No hay tablas auto date/time sin usar")
+        sys.exit(0)
+
+    for name in result['removed_tables']:
+        print(f"  - {name}")
+    model.save_to_directory_incremental(Path(args.output_dir or args.semantic_model_dir))
+    print(f"✓ Memoria estimada recuperada: {result['estimated_mb']:.2f} MB")
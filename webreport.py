@@ -3,6 +3,7 @@ from pathlib import Path
 import duckdb
 import pandas as pd
 from models.report_documenter import ReportDocumenter
+from models.memory_estimator import MemoryEstimator
 
 # ── Page config ──────────────────────────────────────────────────────
 st.set_page_config(
@@ -127,6 +128,19 @@ def render_page_tab(doc, page):
     svg = doc.generate_svg(page, visuals)
     st.markdown(svg, unsafe_allow_html=True)
 
+    # Query cost
+    page_cost = doc.get_page_query_cost(page)
+    if page_cost:
+        st.markdown('<div class="section-header">⚡ Carga de consultas</div>', unsafe_allow_html=True)
+        st.metric("Puntuación de la página", f"{page_cost['score']:g} ({page_cost['level']})",
+                  help=f"{page_cost['query_visuals']} de {page_cost['visuals']} visuales consultan el modelo")
+        for v in doc.get_visual_query_costs(page):
+            if not v["score"]:
+                continue
+            with st.expander(f"⚡ {v['visual_name']} — {v['score']:g} ({v['level']})", expanded=False):
+                for reason in v["reasons"]:
+                    st.markdown(f"- {reason}")
+
     details = doc.get_page_details(page)
 
     # Columns used
@@ -264,6 +278,17 @@ def render_unused_tab(doc):
                         st.code(m["expression"], language="dax")
 
 
+@st.cache_resource(show_spinner=False)
+def _load_subset_index(source_model_path, db_path, semantic_model_id):
+    """Carga el modelo fuente y sus dependencias una sola vez por sesión."""
+    from models.semantic_model import SemanticModel
+    from models.subset_plan import SubsetIndex
+
+    model = SemanticModel(source_model_path)
+    model.load_from_directory(Path(source_model_path))
+    return SubsetIndex.from_db(model, db_path, semantic_model_id=semantic_model_id)
+
+
 def render_minimal_model_tab(doc, con):
     """Render the minimal model generation tab."""
     import sys, os
@@ -280,32 +305,6 @@ def render_minimal_model_tab(doc, con):
         "y el código M se ajusta con `Table.RemoveColumns`."
     )
 
-    # Show what would be included
-    summary = doc.get_unused_summary()
-    kpis = doc.get_kpis()
-    total_cols = kpis.get("columns", 0)
-    total_meas = kpis.get("measures", 0)
-    total_tables = kpis.get("tables", 0)
-    used_cols = total_cols - summary["total_unused_columns"]
-    used_meas = total_meas - summary["total_unused_measures"]
-    used_tables = total_tables - summary["total_unused_tables"]
-
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Tablas", f"{used_tables} / {total_tables}",
-                   delta=f"-{summary['total_unused_tables']}" if summary['total_unused_tables'] else None,
-                   delta_color="normal")
-    with col2:
-        st.metric("Columnas", f"{used_cols} / {total_cols}",
-                   delta=f"-{summary['total_unused_columns']}" if summary['total_unused_columns'] else None,
-                   delta_color="normal")
-    with col3:
-        st.metric("Medidas", f"{used_meas} / {total_meas}",
-                   delta=f"-{summary['total_unused_measures']}" if summary['total_unused_measures'] else None,
-                   delta_color="normal")
-
-    st.markdown("---")
-
     # Get model source path info
     sm_row = con.execute(
         "SELECT sm.name, w.displayName FROM semantic_model sm "
@@ -322,9 +321,91 @@ def render_minimal_model_tab(doc, con):
     # Source model path
     if base_dir_val and workspace_name:
         source_model_path = str(Path(base_dir_val) / workspace_name / sm_name)
-        st.info(f"📂 Modelo fuente: `{source_model_path}`")
     else:
         source_model_path = ""
+
+    # Plan en memoria (sin escribir ficheros): previsualización inmediata
+    plan = None
+    index = None
+    if source_model_path and Path(source_model_path).exists() and db_path:
+        try:
+            with st.spinner("Cargando modelo fuente..."):
+                index = _load_subset_index(source_model_path, db_path, doc.semantic_model_id)
+            plan = index.plan()
+        except Exception as e:
+            st.warning(f"No se pudo calcular el plan del modelo mínimo: {e}")
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    if plan is not None:
+        table_rows = plan.describe_tables(index.model)
+        total_tables = len(index.model.tables)
+        total_cols = sum(len(t.columns) for t in index.model.tables)
+        total_meas = sum(len(t.measures) for t in index.model.tables)
+        used_tables = len(table_rows)
+        used_cols = sum(r["columns"] for r in table_rows)
+        used_meas = sum(r["measures"] for r in table_rows)
+        with col4:
+            st.metric("Relaciones", f"{len(plan.relationships)} / {len(index.model.relationships)}")
+        estimator = MemoryEstimator()
+        dimensions = {r.to_table for r in index.model.relationships}
+        source_mb = estimator.estimate_model(index.model, dimensions=dimensions)["mb"]
+        subset_mb = estimator.estimate_model(index.model, plan=plan, dimensions=dimensions)["mb"]
+        with col5:
+            st.metric("Memoria est. (MB)", f"{subset_mb:,.1f} / {source_mb:,.1f}",
+                      delta=f"-{source_mb - subset_mb:,.1f} MB" if source_mb > subset_mb else None,
+                      delta_color="normal",
+                      help="Estimación heurística VertiPaq (tipo de dato, claves, cardinalidad)")
+    else:
+        # Show what would be included
+        table_rows = []
+        summary = doc.get_unused_summary()
+        kpis = doc.get_kpis()
+        total_cols = kpis.get("columns", 0)
+        total_meas = kpis.get("measures", 0)
+        total_tables = kpis.get("tables", 0)
+        used_cols = total_cols - summary["total_unused_columns"]
+        used_meas = total_meas - summary["total_unused_measures"]
+        used_tables = total_tables - summary["total_unused_tables"]
+
+    with col1:
+        st.metric("Tablas", f"{used_tables} / {total_tables}",
+                   delta=f"-{total_tables - used_tables}" if total_tables - used_tables else None,
+                   delta_color="normal")
+    with col2:
+        st.metric("Columnas", f"{used_cols} / {total_cols}",
+                   delta=f"-{total_cols - used_cols}" if total_cols - used_cols else None,
+                   delta_color="normal")
+    with col3:
+        st.metric("Medidas", f"{used_meas} / {total_meas}",
+                   delta=f"-{total_meas - used_meas}" if total_meas - used_meas else None,
+                   delta_color="normal")
+
+    if table_rows:
+        with st.expander("🔎 Previsualización de tablas incluidas", expanded=False):
+            st.dataframe(pd.DataFrame([{
+                "Tabla": r["table"],
+                "Origen": r["source"],
+                "Columnas": f'{r["columns"]} / {r["total_columns"]}',
+                "Medidas": f'{r["measures"]} / {r["total_measures"]}',
+            } for r in table_rows]), use_container_width=True, hide_index=True)
+            if plan.log:
+                st.code("\n".join(plan.log))
+        with st.expander("🧠 Columnas con más memoria estimada", expanded=False):
+            ranking = estimator.rank_columns(index.model, top=30, plan=plan)
+            st.dataframe(pd.DataFrame([{
+                "Tabla": r["table"],
+                "Columna": r["column"],
+                "Tipo": r["data_type"],
+                "Cardinalidad est.": r["cardinality"],
+                "MB est.": round(r["bytes"] / 1024 / 1024, 2),
+                "Se conserva": "✅" if r["kept"] else "—",
+            } for r in ranking]), use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+
+    if source_model_path:
+        st.info(f"📂 Modelo fuente: `{source_model_path}`")
+    else:
         st.warning("No se puede determinar la ruta del modelo fuente. "
                     "Asegúrate de que la base de datos tenga la estructura "
                     "`carpeta/workspace/modelo.SemanticModel`.")
@@ -349,27 +430,23 @@ def render_minimal_model_tab(doc, con):
         if not Path(source_model_path).exists():
             st.error(f"No se encontró el modelo fuente en: `{source_model_path}`")
             return
+        if plan is None:
+            st.error("No se pudo calcular el plan del modelo mínimo.")
+            return
 
         with st.spinner("Generando modelo mínimo..."):
             try:
-                from models.semantic_model import SemanticModel
-
-                model = SemanticModel(source_model_path)
-                model.load_from_directory(Path(source_model_path))
-
-                subset = model.create_subset_model_from_db(
-                    db_path=db_path,
-                    subset_name=subset_name,
-                    semantic_model_id=doc.semantic_model_id,
-                )
+                subset = index.model.materialize_subset(plan, subset_name)
 
                 target_path = Path(source_model_path).parent / subset_name
-                subset.save_to_directory(target_path)
+                changes = subset.save_to_directory_incremental(target_path)
 
                 st.success(
                     f"✅ Modelo mínimo generado: **{subset_name}**\n\n"
                     f"- Tablas: {len(subset.tables)}\n"
                     f"- Relaciones: {len(subset.relationships)}\n"
+                    f"- Ficheros reescritos: {len(changes['written'])} "
+                    f"(sin cambios: {len(changes['unchanged'])}, eliminados: {len(changes['removed'])})\n"
                     f"- Guardado en: `{target_path}`"
                 )
 